@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Agent Registry — agents importes et instancies au premier usage
+- AGENT_GROUPS: nom de classe -> module, par domaine (seo, content, marketing, ops, business)
+- get_agent(name): instance partagee par processus, creee au premier appel
+- LazyAgents: mapping cle -> agent pour MasterOrchestrator (rien n'est construit d'avance)
+- coalesced(name): meme agent, appels identiques simultanes executes une seule fois (singleflight)
+Deplacer un groupe dans son propre module = changer une seule chaine ici.
+Usage:
+    from agent_registry import get_agent
+    get_agent('MonitoringAgent').check_uptime(SITES)
+"""
+import importlib
+import threading
+from collections.abc import Mapping
+
+from singleflight import flight, make_key
+
+AGENT_GROUPS = {
+    'seo': ('agents_system', (
+        'KeywordResearchAgent', 'TechnicalSEOAuditAgent', 'PerformanceAgent', 'SchemaMarkupAgent',
+        'ImageOptimizationAgent', 'InternalLinkingAgent', 'URLOptimizationAgent', 'TitleTagAgent',
+        'OpenGraphAgent', 'SERPTrackerAgent', 'KeywordGapAgent', 'SiteSpeedAgent',
+        'KeywordClusterAgent', 'TopicalMapAgent', 'GoogleAgent',
+    )),
+    'content': ('agents_system', (
+        'ContentGenerationAgent', 'FAQGenerationAgent', 'ContentOptimizationAgent',
+        'ContentCalendarAgent', 'LandingPageAgent', 'BlogIdeaAgent', 'VideoScriptAgent',
+        'ServiceDescriptionAgent', 'ContentSchedulerAgent', 'ContentBriefAgent', 'ContentScoringAgent',
+    )),
+    'marketing': ('agents_system', (
+        'BacklinkAnalysisAgent', 'LocalSEOAgent', 'CompetitorAnalysisAgent', 'SocialMediaAgent',
+        'EmailMarketingAgent', 'ReviewManagementAgent', 'ConversionOptimizationAgent',
+        'RedditAgent', 'ForumAgent', 'DirectoryAgent', 'GuestPostAgent',
+        'BacklinkMonitorAgent', 'CompetitorWatchAgent',
+    )),
+    'ops': ('agents_system', (
+        'MonitoringAgent', 'SSLAgent', 'BackupAgent', 'AnalyticsAgent', 'ReportingAgent',
+    )),
+    'audit': ('self_audit_agent', (
+        'SelfAuditAgent',
+    )),
+    'business': ('agents_system', (
+        'PricingStrategyAgent', 'ClientOnboardingAgent', 'WhiteLabelReportAgent', 'ROICalculatorAgent',
+        'InvoiceAgent', 'CRMAgent', 'AccountingAgent', 'CalendarAgent', 'ChatbotAgent',
+        'NotificationAgent', 'DashboardAgent', 'LeadScoringAgent', 'EmailCampaignAgent',
+        'SupportTicketAgent', 'KnowledgeBaseAgent', 'SurveyAgent', 'WebhookAgent',
+        'AutomationAgent', 'AffiliateAgent', 'LoyaltyAgent',
+    )),
+}
+
+AGENT_MODULES = {name: module for module, names in AGENT_GROUPS.values() for name in names}
+
+_instances = {}
+_lock = threading.Lock()
+
+
+def get_agent_class(name):
+    """Classe de l'agent (importe son module si besoin)"""
+    try:
+        module = AGENT_MODULES[name]
+    except KeyError:
+        raise KeyError(f"Agent inconnu: {name}") from None
+    return getattr(importlib.import_module(module), name)
+
+
+def get_agent(name):
+    """Instance partagee de l'agent, construite au premier appel dans ce processus"""
+    agent = _instances.get(name)
+    if agent is None:
+        with _lock:
+            agent = _instances.get(name)
+            if agent is None:
+                agent = get_agent_class(name)()
+                _instances[name] = agent
+    return agent
+
+
+class CoalescedAgent:
+    """Proxy d'un agent: chaque methode publique passe par le single-flight"""
+
+    def __init__(self, name, agent, ttl=None):
+        self._name = name
+        self._agent = agent
+        self._ttl = ttl
+
+    def __getattr__(self, attr):
+        value = getattr(self._agent, attr)
+        if attr.startswith('_') or not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            key = make_key(self._name, attr, args, kwargs)
+            return flight.do(key, lambda: value(*args, **kwargs), label=f'{self._name}.{attr}', ttl=self._ttl)
+        return call
+
+
+def coalesced(name, ttl=None):
+    """get_agent(name) pour les appels couteux et idempotents (analyses, generation LLM)"""
+    return CoalescedAgent(name, get_agent(name), ttl)
+
+
+def loaded_agents():
+    """Noms des agents deja instancies (diagnostic / benchmark)"""
+    return sorted(_instances)
+
+
+def reset():
+    """Oublie les instances (tests, changement de DB_PATH)"""
+    with _lock:
+        _instances.clear()
+
+
+class LazyAgents(Mapping):
+    """Mapping cle -> agent du registre; chaque agent est construit au premier acces"""
+
+    def __init__(self, names):
+        self._names = dict(names)
+
+    def __getitem__(self, key):
+        return get_agent(self._names[key])
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def describe(self):
+        """(cle, nom affiche) sans instancier les agents"""
+        result = []
+        for key, name in self._names.items():
+            agent = _instances.get(name)
+            label = getattr(agent, 'name', None) if agent is not None else None
+            result.append((key, label or getattr(get_agent_class(name), 'name', name)))
+        return result
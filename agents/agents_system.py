@@ -10,9 +10,25 @@ import sqlite3
 import requests
 import subprocess
 import re
+import time
+import threading
+import concurrent.futures
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 import hashlib
+import zlib
+from string import Template
+import bisect
+import queue
+import smtplib
+from email.mime.text import MIMEText
+from html.parser import HTMLParser
+from agent_registry import LazyAgents
+from llm_stream import stream_chat, stream_ollama_generate, first_available
+import faq_index
+import search_index
+import llm_usage
+import backup_store
 
 # Configuration
 DB_PATH = '/opt/seo-agent/db/seo_agent.db'
@@ -47,12 +63,18 @@ def get_db():
 
 def call_qwen(prompt, max_tokens=2000, system_prompt=None):
     """Appel Groq (gratuit) avec fallback Fireworks"""
+    agent = llm_usage.current_agent()
+    if not llm_usage.check_budget(agent, 'groq', GROQ_MODEL):
+        return None
+    usage = llm_usage.LLMCall(agent)
+    full_prompt = f"{system_prompt or ''}{prompt}"
     messages = []
     if system_prompt:
         messages.append({'role': 'system', 'content': system_prompt})
     messages.append({'role': 'user', 'content': prompt})
     # 1. Groq primary (GRATUIT)
     if GROQ_API_KEY:
+        usage.attempt('groq')
         try:
             r = requests.post(GROQ_URL, headers={
                 'Content-Type': 'application/json',
@@ -64,12 +86,16 @@ def call_qwen(prompt, max_tokens=2000, system_prompt=None):
                 'temperature': 0.7
             }, timeout=120)
             if r.status_code == 200:
-                return r.json()['choices'][0]['message']['content']
+                data = r.json()
+                text = data['choices'][0]['message']['content']
+                usage.success('groq', GROQ_MODEL, data.get('usage'), full_prompt, text)
+                return text
             print(f"[agents_system] Groq {r.status_code}")
         except Exception as e:
             print(f"[agents_system] Groq error: {e}")
     # 2. Fireworks fallback
     if FIREWORKS_API_KEY:
+        usage.attempt('fireworks')
         try:
             r = requests.post(FIREWORKS_URL, headers={
                 'Content-Type': 'application/json',
@@ -81,9 +107,13 @@ def call_qwen(prompt, max_tokens=2000, system_prompt=None):
                 'temperature': 0.7
             }, timeout=120)
             if r.status_code == 200:
-                return r.json()['choices'][0]['message']['content']
+                data = r.json()
+                text = data['choices'][0]['message']['content']
+                usage.success('fireworks', LLAMA_MODEL, data.get('usage'), full_prompt, text)
+                return text
         except Exception as e:
             print(f"[agents_system] Fireworks fallback error: {e}")
+    usage.failure(LLAMA_MODEL if FIREWORKS_API_KEY else GROQ_MODEL)
     return None
 
 def call_ollama(prompt, max_tokens=1000, use_deepseek=False):
@@ -92,8 +122,10 @@ def call_ollama(prompt, max_tokens=1000, use_deepseek=False):
     use_deepseek=True -> Utilise DeepSeek R1 local si disponible
     use_deepseek=False -> Utilise Qwen 2.5 7B
     """
+    usage = llm_usage.LLMCall()
     try:
         model = OLLAMA_DEEPSEEK if use_deepseek else OLLAMA_MODEL
+        usage.attempt('ollama')
         payload = {
             'model': model,
             'prompt': prompt,
@@ -105,16 +137,23 @@ def call_ollama(prompt, max_tokens=1000, use_deepseek=False):
         }
         response = requests.post(OLLAMA_URL, json=payload, timeout=90)
         if response.status_code == 200:
-            return response.json().get('response', '')
+            data = response.json()
+            usage.success('ollama', model, data, prompt, data.get('response', ''))
+            return data.get('response', '')
         # Fallback vers Qwen si DeepSeek pas disponible
         if use_deepseek:
             payload['model'] = OLLAMA_MODEL
+            usage.attempt('ollama')
             response = requests.post(OLLAMA_URL, json=payload, timeout=60)
             if response.status_code == 200:
-                return response.json().get('response', '')
+                data = response.json()
+                usage.success('ollama', OLLAMA_MODEL, data, prompt, data.get('response', ''))
+                return data.get('response', '')
+        usage.failure(model)
         return None
     except Exception as e:
         print(f"Erreur Ollama: {e}")
+        usage.failure(OLLAMA_MODEL)
         return None
 
 
@@ -136,6 +175,39 @@ def call_ai(prompt, max_tokens=2000, use_local=False, system_prompt=None):
     return call_qwen(prompt, max_tokens, system_prompt)
 
 
+def stream_qwen(prompt, max_tokens=2000, system_prompt=None):
+    """Comme call_qwen, mais genere le texte au fil de l'eau (Groq puis Fireworks)"""
+    messages = []
+    if system_prompt:
+        messages.append({'role': 'system', 'content': system_prompt})
+    messages.append({'role': 'user', 'content': prompt})
+    agent = llm_usage.current_agent()
+    if not llm_usage.check_budget(agent, 'groq', GROQ_MODEL):
+        return iter(())
+    full_prompt = f"{system_prompt or ''}{prompt}"
+    providers = []
+    if GROQ_API_KEY:
+        providers.append(lambda: llm_usage.tracked_stream(
+            stream_chat(GROQ_URL, GROQ_API_KEY, GROQ_MODEL, messages, max_tokens), agent, 'groq', GROQ_MODEL, full_prompt))
+    if FIREWORKS_API_KEY:
+        providers.append(lambda: llm_usage.tracked_stream(
+            stream_chat(FIREWORKS_URL, FIREWORKS_API_KEY, LLAMA_MODEL, messages, max_tokens),
+            agent, 'fireworks', LLAMA_MODEL, full_prompt))
+    return first_available(*providers, label='agents_system')
+
+
+def stream_ollama(prompt, max_tokens=1000, use_deepseek=False):
+    """Comme call_ollama, mais genere le texte au fil de l'eau (NDJSON)"""
+    agent = llm_usage.current_agent()
+    providers = []
+    if use_deepseek:
+        providers.append(lambda: llm_usage.tracked_stream(
+            stream_ollama_generate(OLLAMA_URL, OLLAMA_DEEPSEEK, prompt, max_tokens), agent, 'ollama', OLLAMA_DEEPSEEK, prompt))
+    providers.append(lambda: llm_usage.tracked_stream(
+        stream_ollama_generate(OLLAMA_URL, OLLAMA_MODEL, prompt, max_tokens), agent, 'ollama', OLLAMA_MODEL, prompt))
+    return first_available(*providers, label='Ollama')
+
+
 def log_agent(agent_name, message, level='INFO'):
     """Log agent activity"""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -154,6 +226,39 @@ def log_agent(agent_name, message, level='INFO'):
     except:
         pass
 
+class CompiledTemplate(Template):
+    """
+    string.Template decoupe une seule fois en morceaux litteraux et en champs:
+    render() ne fait plus qu'un join, sans repasser la regex sur tout le gabarit
+    """
+
+    def __init__(self, template):
+        super().__init__(template)
+        self._literals = ['']
+        self._fields = []
+        parts = self.pattern.split(template)
+        # Motif de string.Template: texte, puis groupes escaped / named / braced / invalid
+        for i in range(0, len(parts), 5):
+            self._literals[-1] += parts[i]
+            if i + 1 >= len(parts):
+                break
+            escaped, named, braced, invalid = parts[i + 1:i + 5]
+            if escaped is not None:
+                self._literals[-1] += self.delimiter
+            elif named or braced:
+                self._fields.append(named or braced)
+                self._literals.append('')
+            else:
+                raise ValueError(f'Placeholder invalide dans le gabarit: {invalid!r}')
+
+    def render(self, values):
+        out = [self._literals[0]]
+        for field, literal in zip(self._fields, self._literals[1:]):
+            out.append(str(values[field]))
+            out.append(literal)
+        return ''.join(out)
+
+
 # ============================================
 # AGENT 1: KEYWORD RESEARCH AGENT
 # ============================================
@@ -210,10 +315,22 @@ Format JSON:
 class ContentGenerationAgent:
     name = "Content Generation Agent"
 
+    SYSTEM_PROMPT = "Tu es un redacteur SEO expert en francais canadien."
+
     def generate_article(self, site_id, keyword, word_count=1500):
         """Genere un article SEO complet"""
+        response = call_qwen(self.article_prompt(site_id, keyword, word_count), max_tokens=4000,
+                             system_prompt=self.SYSTEM_PROMPT)
+        return self.parse_article(response, keyword)
+
+    def stream_article(self, site_id, keyword, word_count=1500):
+        """Texte brut de l'article au fil de la generation (parse_article sur le texte complet)"""
+        return stream_qwen(self.article_prompt(site_id, keyword, word_count), max_tokens=4000,
+                           system_prompt=self.SYSTEM_PROMPT)
+
+    def article_prompt(self, site_id, keyword, word_count=1500):
         site = SITES.get(site_id, {})
-        prompt = f"""Ecris un article SEO de {word_count} mots pour {site.get('nom', '')}.
+        return f"""Ecris un article SEO de {word_count} mots pour {site.get('nom', '')}.
 MOT-CLE: {keyword}
 NICHE: {site.get('niche', '')}
 REGION: Quebec
@@ -230,7 +347,7 @@ Structure:
 Format JSON:
 {{"titre": "...", "meta_description": "...", "contenu": "<article HTML>", "faq": [{{"q": "...", "r": "..."}}], "mots_cles_secondaires": [...]}}"""
 
-        response = call_qwen(prompt, max_tokens=4000, system_prompt="Tu es un redacteur SEO expert en francais canadien.")
+    def parse_article(self, response, keyword):
         if response:
             try:
                 if '```json' in response:
@@ -1663,43 +1780,40 @@ class SSLAgent:
             return {'url': url, 'error': str(e)}
 
 class BackupAgent:
-    """Agent 23: Sauvegarde automatique complete"""
+    """Agent 23: Sauvegarde automatique complete (incrementale, dedupliquee: voir backup_store)"""
     name = "Backup Agent"
 
-    BACKUP_DIR = "/opt/seo-agent/db/backup"
-    SITES_BACKUP_DIR = "/opt/seo-agent/backups/sites"
-    MAX_BACKUPS = 30  # Garder les 30 derniers
+    BACKUP_DIR = "/opt/seo-agent/db/backup"             # anciennes copies completes (.db)
+    SITES_BACKUP_DIR = "/opt/seo-agent/backups/sites"   # anciennes archives (.tar.gz)
+    STORE_DIR = backup_store.STORE_DIR
+    MAX_BACKUPS = 30  # Garder les 30 derniers snapshots par source
+
+    @staticmethod
+    def _mb(size_bytes):
+        return round(size_bytes / (1024 * 1024), 2)
+
+    def _snapshot_result(self, manifest):
+        stats = manifest['stats']
+        return {'success': True, 'snapshot': manifest['id'], 'parent': manifest['parent'],
+                'size_mb': self._mb(stats['size_bytes']), 'stored_mb': self._mb(stats['stored_bytes']),
+                'files': stats['files'], 'chunks': stats['chunks'], 'new_chunks': stats['new_chunks'],
+                'duration_s': stats['duration_s'],
+                'timestamp': manifest['id'].rsplit('/', 1)[1]}
 
     def backup_database(self):
-        """Backup de la base de donnees SQLite"""
-        import shutil
-        os.makedirs(self.BACKUP_DIR, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = f"{self.BACKUP_DIR}/seo_agent_{timestamp}.db"
-        try:
-            # Utiliser la methode SQLite backup pour consistance
-            source = sqlite3.connect(DB_PATH)
-            dest = sqlite3.connect(backup_path)
-            source.backup(dest)
-            source.close()
-            dest.close()
-
-            size_mb = round(os.path.getsize(backup_path) / (1024 * 1024), 2)
-            log_agent(self.name, f"DB backup: {backup_path} ({size_mb}MB)")
-            return {'success': True, 'path': backup_path, 'size_mb': size_mb, 'timestamp': timestamp}
-        except Exception as e:
-            # Fallback: copie fichier
-            try:
-                shutil.copy2(DB_PATH, backup_path)
-                size_mb = round(os.path.getsize(backup_path) / (1024 * 1024), 2)
-                log_agent(self.name, f"DB backup (copy): {backup_path} ({size_mb}MB)")
-                return {'success': True, 'path': backup_path, 'size_mb': size_mb, 'method': 'copy'}
-            except Exception as e2:
-                return {'success': False, 'error': str(e2)}
+        """Snapshot incremental de la base SQLite (API backup par pas, seuls les blocs modifies sont ecrits)"""
+        try:
+            manifest = backup_store.snapshot_database(DB_PATH, store=self.STORE_DIR)
+        except Exception as e:
+            log_agent(self.name, f"DB backup failed: {e}", 'ERROR')
+            return {'success': False, 'error': str(e)}
+        result = self._snapshot_result(manifest)
+        log_agent(self.name, f"DB backup: {result['snapshot']} ({result['size_mb']}MB, "
+                             f"{result['new_chunks']}/{result['chunks']} blocs neufs, +{result['stored_mb']}MB)")
+        return result
 
     def backup_site_files(self, site_id):
-        """Backup des fichiers d'un site"""
-        import shutil
+        """Snapshot incremental des fichiers d'un site"""
         site = SITES.get(site_id)
         if not site:
             return {'success': False, 'error': f'Site {site_id} inconnu'}
@@ -1708,18 +1822,14 @@ class BackupAgent:
         if not os.path.exists(site_path):
             return {'success': False, 'error': f'Path {site_path} inexistant'}
 
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_dir = f"{self.SITES_BACKUP_DIR}/{site['domaine']}"
-        os.makedirs(backup_dir, exist_ok=True)
-        archive_path = f"{backup_dir}/{site['domaine']}_{timestamp}"
-
         try:
-            result = shutil.make_archive(archive_path, 'gztar', site_path)
-            size_mb = round(os.path.getsize(result) / (1024 * 1024), 2)
-            log_agent(self.name, f"Site backup: {site['domaine']} -> {result} ({size_mb}MB)")
-            return {'success': True, 'path': result, 'size_mb': size_mb, 'site': site['domaine']}
+            manifest = backup_store.snapshot_directory(site_path, f"site-{site['domaine']}", store=self.STORE_DIR)
         except Exception as e:
             return {'success': False, 'error': str(e)}
+        result = dict(self._snapshot_result(manifest), site=site['domaine'])
+        log_agent(self.name, f"Site backup: {site['domaine']} -> {result['snapshot']} ({result['size_mb']}MB, "
+                             f"+{result['stored_mb']}MB)")
+        return result
 
     def backup_all(self):
         """Backup complet: DB + tous les sites"""
@@ -1728,26 +1838,28 @@ class BackupAgent:
             results['sites'][site_id] = self.backup_site_files(site_id)
 
         total_size = results['database'].get('size_mb', 0)
+        stored = results['database'].get('stored_mb', 0)
         for s in results['sites'].values():
             total_size += s.get('size_mb', 0)
+            stored += s.get('stored_mb', 0)
 
         results['total_size_mb'] = round(total_size, 2)
+        results['stored_mb'] = round(stored, 2)
         results['timestamp'] = datetime.now().isoformat()
-        log_agent(self.name, f"Full backup: {results['total_size_mb']}MB total")
+        log_agent(self.name, f"Full backup: {results['total_size_mb']}MB total, {results['stored_mb']}MB ecrits")
         return results
 
     def cleanup_old_backups(self):
-        """Supprime les anciens backups (garde les MAX_BACKUPS derniers)"""
+        """Garbage collection: garde les MAX_BACKUPS derniers snapshots par source + blocs references"""
         cleaned = {'db': 0, 'sites': 0}
 
-        # DB backups
+        # Anciennes copies completes (avant le store deduplique)
         if os.path.exists(self.BACKUP_DIR):
             db_files = sorted([f for f in os.listdir(self.BACKUP_DIR) if f.endswith('.db')], reverse=True)
             for old_file in db_files[self.MAX_BACKUPS:]:
                 os.remove(os.path.join(self.BACKUP_DIR, old_file))
                 cleaned['db'] += 1
 
-        # Site backups
         if os.path.exists(self.SITES_BACKUP_DIR):
             for site_dir in os.listdir(self.SITES_BACKUP_DIR):
                 site_backup_path = os.path.join(self.SITES_BACKUP_DIR, site_dir)
@@ -1757,12 +1869,34 @@ class BackupAgent:
                         os.remove(os.path.join(site_backup_path, old_file))
                         cleaned['sites'] += 1
 
-        log_agent(self.name, f"Cleanup: {cleaned['db']} DB + {cleaned['sites']} sites supprimes")
+        cleaned['store'] = backup_store.gc(self.MAX_BACKUPS, store=self.STORE_DIR)
+        log_agent(self.name, f"Cleanup: {cleaned['db']} DB + {cleaned['sites']} sites supprimes, "
+                             f"{cleaned['store']['snapshots_removed']} snapshots / "
+                             f"{cleaned['store']['objects_removed']} blocs ({self._mb(cleaned['store']['bytes_freed'])}MB)")
         return cleaned
 
+    def verify_backup(self, snapshot_id):
+        """Relit chaque bloc d'un snapshot et controle son SHA-256"""
+        try:
+            return backup_store.verify(snapshot_id, store=self.STORE_DIR)
+        except backup_store.BackupError as e:
+            return {'id': snapshot_id, 'ok': False, 'errors': [str(e)]}
+
+    def restore_backup(self, snapshot_id, target_dir):
+        """Restaure un snapshot dans target_dir (verifie bloc par bloc, integrity_check pour la DB)"""
+        try:
+            result = backup_store.restore(snapshot_id, target_dir, store=self.STORE_DIR)
+        except backup_store.BackupError as e:
+            log_agent(self.name, f"Restore {snapshot_id} failed: {e}", 'ERROR')
+            return {'success': False, 'error': str(e)}
+        log_agent(self.name, f"Restore: {snapshot_id} -> {target_dir} ({result['files']} fichiers)")
+        return dict(result, success=True)
+
     def list_backups(self):
         """Liste tous les backups existants"""
-        backups = {'database': [], 'sites': {}}
+        backups = {'snapshots': backup_store.list_snapshots(store=self.STORE_DIR)[:50],
+                   'store': backup_store.store_usage(self.STORE_DIR),
+                   'database': [], 'sites': {}}
 
         if os.path.exists(self.BACKUP_DIR):
             for f in sorted(os.listdir(self.BACKUP_DIR), reverse=True)[:10]:
@@ -3024,56 +3158,62 @@ class MasterOrchestrator:
     name = "Master Orchestrator"
 
     def __init__(self):
-        self.agents = {
-            'keyword_research': KeywordResearchAgent(),
-            'content_generation': ContentGenerationAgent(),
-            'faq_generation': FAQGenerationAgent(),
-            'technical_seo': TechnicalSEOAuditAgent(),
-            'performance': PerformanceAgent(),
-            'backlink': BacklinkAnalysisAgent(),
-            'local_seo': LocalSEOAgent(),
-            'competitor': CompetitorAnalysisAgent(),
-            'content_optimization': ContentOptimizationAgent(),
-            'schema': SchemaMarkupAgent(),
-            'social_media': SocialMediaAgent(),
-            'email': EmailMarketingAgent(),
-            'image': ImageOptimizationAgent(),
-            'internal_linking': InternalLinkingAgent(),
-            'url': URLOptimizationAgent(),
-            'title_tag': TitleTagAgent(),
-            'content_calendar': ContentCalendarAgent(),
-            'pricing': PricingStrategyAgent(),
-            'review': ReviewManagementAgent(),
-            'conversion': ConversionOptimizationAgent(),
-            'monitoring': MonitoringAgent(),
-            'ssl': SSLAgent(),
-            'backup': BackupAgent(),
-            'analytics': AnalyticsAgent(),
-            'reporting': ReportingAgent(),
-            'landing_page': LandingPageAgent(),
-            'blog_idea': BlogIdeaAgent(),
-            'video_script': VideoScriptAgent(),
-            'service_description': ServiceDescriptionAgent(),
-            'google': GoogleAgent()
-        }
+        # Agents construits au premier acces (cf. agent_registry)
+        self.agents = LazyAgents({
+            'keyword_research': 'KeywordResearchAgent',
+            'content_generation': 'ContentGenerationAgent',
+            'faq_generation': 'FAQGenerationAgent',
+            'technical_seo': 'TechnicalSEOAuditAgent',
+            'performance': 'PerformanceAgent',
+            'backlink': 'BacklinkAnalysisAgent',
+            'local_seo': 'LocalSEOAgent',
+            'competitor': 'CompetitorAnalysisAgent',
+            'content_optimization': 'ContentOptimizationAgent',
+            'schema': 'SchemaMarkupAgent',
+            'social_media': 'SocialMediaAgent',
+            'email': 'EmailMarketingAgent',
+            'image': 'ImageOptimizationAgent',
+            'internal_linking': 'InternalLinkingAgent',
+            'url': 'URLOptimizationAgent',
+            'title_tag': 'TitleTagAgent',
+            'content_calendar': 'ContentCalendarAgent',
+            'pricing': 'PricingStrategyAgent',
+            'review': 'ReviewManagementAgent',
+            'conversion': 'ConversionOptimizationAgent',
+            'monitoring': 'MonitoringAgent',
+            'ssl': 'SSLAgent',
+            'backup': 'BackupAgent',
+            'analytics': 'AnalyticsAgent',
+            'reporting': 'ReportingAgent',
+            'landing_page': 'LandingPageAgent',
+            'blog_idea': 'BlogIdeaAgent',
+            'video_script': 'VideoScriptAgent',
+            'service_description': 'ServiceDescriptionAgent',
+            'google': 'GoogleAgent'
+        })
 
-    def run_full_audit(self, site_id):
-        """Execute un audit complet"""
+    def run_full_audit(self, site_id, progress=None):
+        """Execute un audit complet (progress(pourcentage, message) optionnel, ex: job_queue)"""
         site = SITES.get(site_id, {})
         results = {}
+        progress = progress or (lambda percent, message=None: None)
 
         log_agent(self.name, f"Demarrage audit complet pour {site.get('nom', '')}")
 
         # Technical SEO
+        progress(0, 'Audit technique')
         results['technical'] = self.agents['technical_seo'].audit_page(f"https://{site.get('domaine', '')}")
 
         # Performance
+        progress(25, 'Performance')
         results['performance'] = self.agents['performance'].check_speed(f"https://{site.get('domaine', '')}")
 
         # SSL
+        progress(60, 'SSL')
         results['ssl'] = self.agents['ssl'].check_ssl(site.get('domaine', ''))
 
         # Analytics
+        progress(80, 'Analytics')
         results['analytics'] = self.agents['analytics'].get_site_stats(site_id)
 
         log_agent(self.name, f"Audit termine pour {site.get('nom', '')}")
@@ -3114,7 +3254,7 @@ class MasterOrchestrator:
         except Exception:
             pass
         # Fallback sur les agents instancies
-        return [{'name': agent.name, 'status': 'active', 'type': key} for key, agent in self.agents.items()]
+        return [{'name': name, 'status': 'active', 'type': key} for key, name in self.agents.describe()]
 
 
 # ============================================
@@ -3910,10 +4050,32 @@ class WhiteLabelReportAgent:
     """
     Agent de generation de rapports White Label
     Rapports SEO professionnels avec branding client personnalise
+    - sources de metriques independantes collectees en parallele
+    - snapshot des metriques par client et par periode (report_metric_snapshots)
+    - gabarits HTML compiles une seule fois (string.Template)
+    - mode lot: tous les clients dans un pool, debit borne par les appels LLM
     """
     name = "White Label Report Agent"
 
-    def generate_monthly_report(self, client_id, branding=None):
+    PERIOD_DAYS = 30
+    BATCH_WORKERS = 8          # rapports prepares en parallele (metriques, rendu, sauvegarde)
+    LLM_CONCURRENCY = int(os.getenv('SEO_REPORT_LLM_CONCURRENCY', '4'))
+    REPORT_DIR = '/tmp'
+
+    # Appels LLM simultanes partages par toutes les instances du processus
+    _llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+    _snapshots_ready = False
+
+    DEFAULT_BRANDING = {
+        'logo_url': '',
+        'company_name': 'SEO AI Solution',
+        'primary_color': '#6366f1',
+        'secondary_color': '#22d3ee',
+        'contact_email': 'contact@seoai.solutions',
+        'contact_phone': ''
+    }
+
+    def generate_monthly_report(self, client_id, branding=None, refresh=False):
         """
         Genere un rapport mensuel complet pour un client
         branding: {
@@ -3924,6 +4086,7 @@ class WhiteLabelReportAgent:
             'contact_email': str,
             'contact_phone': str
         }
+        refresh: ignore le snapshot de metriques deja enregistre pour la periode
         """
         log_agent(self.name, f"Generation rapport mensuel pour client {client_id}")
 
@@ -3934,17 +4097,17 @@ class WhiteLabelReportAgent:
 
         # Branding par defaut
         if not branding:
-            branding = {
-                'logo_url': '',
-                'company_name': 'SEO AI Solution',
-                'primary_color': '#6366f1',
-                'secondary_color': '#22d3ee',
-                'contact_email': 'contact@seoai.solutions',
-                'contact_phone': ''
-            }
+            branding = dict(self.DEFAULT_BRANDING)
 
-        # Collecter les metriques
-        metrics = self._collect_metrics(client)
+        period = self._report_period()
+
+        # Metriques: snapshot de la periode, sinon collecte parallele
+        metrics = None if refresh else self._load_snapshot(client_id, period)
+        if metrics is None:
+            metrics, failed = self._collect_metrics(client)
+            # Source en erreur (valeur 0): pas de snapshot, la prochaine generation recollecte
+            if not failed:
+                self._store_snapshot(client_id, period, metrics)
 
         # Generer analyse IA
         analysis = self._generate_ai_analysis(client, metrics)
@@ -3956,10 +4119,7 @@ class WhiteLabelReportAgent:
         report = {
             'report_id': hashlib.md5(f"{client_id}-{datetime.now().isoformat()}".encode()).hexdigest()[:12],
             'generated_at': datetime.now().isoformat(),
-            'period': {
-                'start': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
-                'end': datetime.now().strftime('%Y-%m-%d')
-            },
+            'period': period,
             'client': {
                 'id': client_id,
                 'business_name': client.get('business_name', ''),
@@ -3982,6 +4142,146 @@ class WhiteLabelReportAgent:
 
         return report
 
+    def generate_batch_reports(self, client_ids=None, branding=None, refresh=False,
+                               save_pdf=False, progress=None, workers=None):
+        """
+        Genere les rapports de plusieurs clients (tous par defaut) dans un pool.
+        Les metriques et le rendu se chevauchent; seuls LLM_CONCURRENCY appels
+        d'analyse tournent en meme temps.
+        progress(percent, message) est appele apres chaque rapport; une exception
+        levee par progress (annulation) annule les rapports pas encore demarres.
+        """
+        if client_ids is None:
+            client_ids = self.list_client_ids()
+        client_ids = list(dict.fromkeys(client_ids))
+        total = len(client_ids)
+        log_agent(self.name, f"Generation par lot: {total} clients")
+        started = time.time()
+
+        results = []
+        if not total:
+            return {'success': True, 'total': 0, 'generated': 0, 'failed': 0, 'reports': results, 'seconds': 0}
+
+        workers = max(1, min(workers or self.BATCH_WORKERS, total))
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(self._batch_one, cid, branding, refresh, save_pdf): cid
+                       for cid in client_ids}
+            for future in concurrent.futures.as_completed(futures):
+                cid = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    log_agent(self.name, f"Erreur rapport client {cid}: {e}", "WARNING")
+                    results.append({'client_id': cid, 'error': str(e)})
+                if progress:
+                    progress(round(len(results) * 100.0 / total, 1), f"{len(results)}/{total} rapports")
+        finally:
+            # Annulation: les rapports en file ne demarrent pas, ceux en cours se terminent
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        failed = sum(1 for r in results if r.get('error'))
+        elapsed = round(time.time() - started, 2)
+        log_agent(self.name, f"Lot termine: {total - failed}/{total} rapports en {elapsed}s")
+        return {
+            'success': True,
+            'total': total,
+            'generated': total - failed,
+            'failed': failed,
+            'reports': results,
+            'seconds': elapsed
+        }
+
+    def _batch_one(self, client_id, branding, refresh, save_pdf):
+        """Un rapport du lot: genere, sauvegarde le HTML (et le PDF si demande)"""
+        report = self.generate_monthly_report(client_id, branding, refresh=refresh)
+        if 'error' in report:
+            return {'client_id': client_id, 'error': report['error']}
+        entry = {
+            'client_id': client_id,
+            'report_id': report['report_id'],
+            'period': report['period'],
+            'overall_score': report['analysis'].get('overall_score'),
+            'file_path': self.save_report(report),
+            'report': report
+        }
+        if save_pdf:
+            entry['pdf_path'] = self.save_pdf(report)
+        return entry
+
+    def list_client_ids(self):
+        """Clients actifs de la table clients, sinon les sites geres"""
+        try:
+            conn = get_db()
+            try:
+                rows = conn.execute(
+                    "SELECT id FROM clients WHERE COALESCE(status, 'active') = 'active' ORDER BY id"
+                ).fetchall()
+            finally:
+                conn.close()
+            if rows:
+                return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            log_agent(self.name, f"Lecture clients impossible: {e}", "WARNING")
+        return list(SITES.keys())
+
+    def _report_period(self):
+        now = datetime.now()
+        return {
+            'start': (now - timedelta(days=self.PERIOD_DAYS)).strftime('%Y-%m-%d'),
+            'end': now.strftime('%Y-%m-%d')
+        }
+
+    # ============================================
+    # Snapshots de metriques
+    # ============================================
+
+    def _snapshot_db(self):
+        conn = get_db()
+        conn.execute("PRAGMA busy_timeout=30000")
+        if not WhiteLabelReportAgent._snapshots_ready:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS report_metric_snapshots (
+                    client_id TEXT NOT NULL,
+                    period_start TEXT NOT NULL,
+                    period_end TEXT NOT NULL,
+                    metrics_json TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (client_id, period_start, period_end)
+                )
+            ''')
+            conn.commit()
+            WhiteLabelReportAgent._snapshots_ready = True
+        return conn
+
+    def _load_snapshot(self, client_id, period):
+        """Metriques deja collectees pour ce client et cette periode, sinon None"""
+        try:
+            conn = self._snapshot_db()
+            try:
+                row = conn.execute(
+                    'SELECT metrics_json FROM report_metric_snapshots WHERE client_id = ? AND period_start = ? AND period_end = ?',
+                    (str(client_id), period['start'], period['end'])).fetchone()
+            finally:
+                conn.close()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            log_agent(self.name, f"Lecture snapshot impossible: {e}", "WARNING")
+            return None
+
+    def _store_snapshot(self, client_id, period, metrics):
+        try:
+            conn = self._snapshot_db()
+            try:
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO report_metric_snapshots (client_id, period_start, period_end, metrics_json) VALUES (?, ?, ?, ?)',
+                        (str(client_id), period['start'], period['end'], json.dumps(metrics)))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            log_agent(self.name, f"Ecriture snapshot impossible: {e}", "WARNING")
+
     def _get_client_info(self, client_id):
         """Recupere les infos client depuis la DB"""
         try:
@@ -4017,12 +4317,38 @@ class WhiteLabelReportAgent:
             logging.warning(f'_call_ai error: {e}')
             return None
 
+    # Sources de metriques independantes: nom -> methode(domain), appelees en parallele
+    METRIC_SOURCES = {
+        'organic_visits': '_estimate_traffic',
+        'pages_indexed': '_check_indexed_pages',
+    }
+
+    def _fetch_metric_sources(self, domain):
+        """
+        Interroge toutes les METRIC_SOURCES en parallele -> (valeurs, sources en erreur).
+        Une source en erreur vaut 0.
+        """
+        values, failed = {}, []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.METRIC_SOURCES)) as executor:
+            futures = {executor.submit(getattr(self, method), domain): key
+                       for key, method in self.METRIC_SOURCES.items()}
+            for future in concurrent.futures.as_completed(futures):
+                key = futures[future]
+                try:
+                    values[key] = future.result()
+                except Exception as e:
+                    log_agent(self.name, f"Source {key} indisponible pour {domain}: {e}", "WARNING")
+                    values[key] = 0
+                    failed.append(key)
+        return values, failed
+
     def _collect_metrics(self, client):
-        """Collecte toutes les metriques SEO du client"""
+        """Collecte toutes les metriques SEO du client -> (metriques, sources en erreur)"""
         domain = client.get('domain', '')
+        sources, failed = self._fetch_metric_sources(domain)
         metrics = {
             'traffic': {
-                'organic_visits': self._estimate_traffic(domain),
+                'organic_visits': sources['organic_visits'],
                 'trend': 'up',  # up, down, stable
                 'change_percent': 12.5
             },
@@ -4035,7 +4361,7 @@ class WhiteLabelReportAgent:
             },
             'technical': {
                 'site_health_score': 85,
-                'pages_indexed': self._check_indexed_pages(domain),
+                'pages_indexed': sources['pages_indexed'],
                 'crawl_errors': 0,
                 'mobile_score': 92,
                 'speed_score': 78
@@ -4061,7 +4387,7 @@ class WhiteLabelReportAgent:
             }
         }
 
-        return metrics
+        return metrics, failed
 
     def _estimate_traffic(self, domain):
         """Estime le trafic organique"""
@@ -4112,7 +4438,9 @@ FORMAT JSON:
 """
 
         try:
-            response = call_qwen(prompt, 2000, "Tu es un analyste SEO senior. Reponds en JSON valide.")
+            # Le debit d'un lot est borne ici: LLM_CONCURRENCY appels a la fois
+            with self._llm_slots:
+                response = call_qwen(prompt, 2000, "Tu es un analyste SEO senior. Reponds en JSON valide.")
             if response:
                 if '```json' in response:
                     response = response.split('```json')[1].split('```')[0]
@@ -4220,78 +4548,83 @@ FORMAT JSON:
             ]
         }
 
-    def _generate_html_report(self, report):
-        """Genere une version HTML complete du rapport"""
-        branding = report['branding']
-        client = report['client']
-        metrics = report['metrics']
-        analysis = report['analysis']
-        summary = report['executive_summary']
-        recommendations = report['recommendations']
-
-        html = f"""<!DOCTYPE html>
+    # Gabarits du rapport HTML, compiles une seule fois au chargement de la classe
+    _HIGHLIGHT_TEMPLATE = CompiledTemplate('<div class="highlight">$text</div>')
+    _STEP_TEMPLATE = CompiledTemplate('<li>$text</li>')
+    _RECOMMENDATION_TEMPLATE = CompiledTemplate('''
+            <div class="recommendation $priority">
+                <h4>$title</h4>
+                <p>$description</p>
+                <div class="tags">
+                    <span class="tag">$category</span>
+                    <span class="tag">Impact: $impact</span>
+                    <span class="tag">Effort: $effort</span>
+                </div>
+            </div>
+            ''')
+    _REPORT_TEMPLATE = CompiledTemplate("""<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Rapport SEO - {client['business_name']}</title>
+    <title>Rapport SEO - $business_name</title>
     <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f5f5f5; color: #333; }}
-        .container {{ max-width: 900px; margin: 0 auto; background: white; }}
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f5f5f5; color: #333; }
+        .container { max-width: 900px; margin: 0 auto; background: white; }
 
         /* Header */
-        .header {{ background: linear-gradient(135deg, {branding['primary_color']}, {branding['secondary_color']}); color: white; padding: 40px; text-align: center; }}
-        .header h1 {{ font-size: 2rem; margin-bottom: 10px; }}
-        .header .period {{ opacity: 0.9; }}
-        .header .company {{ margin-top: 20px; font-size: 0.9rem; opacity: 0.8; }}
+        .header { background: linear-gradient(135deg, $primary_color, $secondary_color); color: white; padding: 40px; text-align: center; }
+        .header h1 { font-size: 2rem; margin-bottom: 10px; }
+        .header .period { opacity: 0.9; }
+        .header .company { margin-top: 20px; font-size: 0.9rem; opacity: 0.8; }
 
         /* Score Card */
-        .score-card {{ background: #1a1a2e; color: white; padding: 30px; text-align: center; }}
-        .score {{ font-size: 4rem; font-weight: bold; background: linear-gradient(135deg, {branding['primary_color']}, {branding['secondary_color']}); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
-        .score-label {{ font-size: 1.2rem; opacity: 0.8; }}
+        .score-card { background: #1a1a2e; color: white; padding: 30px; text-align: center; }
+        .score { font-size: 4rem; font-weight: bold; background: linear-gradient(135deg, $primary_color, $secondary_color); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
+        .score-label { font-size: 1.2rem; opacity: 0.8; }
 
         /* Section */
-        .section {{ padding: 30px 40px; border-bottom: 1px solid #eee; }}
-        .section h2 {{ color: {branding['primary_color']}; margin-bottom: 20px; font-size: 1.5rem; }}
+        .section { padding: 30px 40px; border-bottom: 1px solid #eee; }
+        .section h2 { color: $primary_color; margin-bottom: 20px; font-size: 1.5rem; }
 
         /* Metrics Grid */
-        .metrics-grid {{ display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; }}
-        .metric-card {{ background: #f8f9fa; padding: 20px; border-radius: 10px; text-align: center; }}
-        .metric-value {{ font-size: 2rem; font-weight: bold; color: {branding['primary_color']}; }}
-        .metric-label {{ color: #666; font-size: 0.875rem; margin-top: 5px; }}
-        .metric-change {{ font-size: 0.8rem; margin-top: 5px; }}
-        .metric-change.up {{ color: #22c55e; }}
-        .metric-change.down {{ color: #ef4444; }}
+        .metrics-grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; }
+        .metric-card { background: #f8f9fa; padding: 20px; border-radius: 10px; text-align: center; }
+        .metric-value { font-size: 2rem; font-weight: bold; color: $primary_color; }
+        .metric-label { color: #666; font-size: 0.875rem; margin-top: 5px; }
+        .metric-change { font-size: 0.8rem; margin-top: 5px; }
+        .metric-change.up { color: #22c55e; }
+        .metric-change.down { color: #ef4444; }
 
         /* Highlights */
-        .highlights {{ display: grid; grid-template-columns: repeat(2, 1fr); gap: 15px; }}
-        .highlight {{ padding: 15px; background: #f0f9ff; border-left: 4px solid {branding['primary_color']}; border-radius: 0 8px 8px 0; }}
+        .highlights { display: grid; grid-template-columns: repeat(2, 1fr); gap: 15px; }
+        .highlight { padding: 15px; background: #f0f9ff; border-left: 4px solid $primary_color; border-radius: 0 8px 8px 0; }
 
         /* Recommendations */
-        .recommendation {{ padding: 20px; margin-bottom: 15px; border-radius: 10px; border-left: 4px solid; }}
-        .recommendation.high {{ background: #fef2f2; border-color: #ef4444; }}
-        .recommendation.medium {{ background: #fffbeb; border-color: #f59e0b; }}
-        .recommendation.low {{ background: #f0fdf4; border-color: #22c55e; }}
-        .recommendation h4 {{ margin-bottom: 8px; }}
-        .recommendation p {{ color: #666; font-size: 0.9rem; }}
-        .recommendation .tags {{ margin-top: 10px; }}
-        .recommendation .tag {{ display: inline-block; padding: 3px 10px; border-radius: 20px; font-size: 0.75rem; background: rgba(0,0,0,0.1); }}
+        .recommendation { padding: 20px; margin-bottom: 15px; border-radius: 10px; border-left: 4px solid; }
+        .recommendation.high { background: #fef2f2; border-color: #ef4444; }
+        .recommendation.medium { background: #fffbeb; border-color: #f59e0b; }
+        .recommendation.low { background: #f0fdf4; border-color: #22c55e; }
+        .recommendation h4 { margin-bottom: 8px; }
+        .recommendation p { color: #666; font-size: 0.9rem; }
+        .recommendation .tags { margin-top: 10px; }
+        .recommendation .tag { display: inline-block; padding: 3px 10px; border-radius: 20px; font-size: 0.75rem; background: rgba(0,0,0,0.1); }
 
         /* Next Steps */
-        .next-steps ul {{ list-style: none; }}
-        .next-steps li {{ padding: 10px 0; padding-left: 25px; position: relative; }}
-        .next-steps li::before {{ content: '→'; position: absolute; left: 0; color: {branding['primary_color']}; }}
+        .next-steps ul { list-style: none; }
+        .next-steps li { padding: 10px 0; padding-left: 25px; position: relative; }
+        .next-steps li::before { content: '→'; position: absolute; left: 0; color: $primary_color; }
 
         /* Footer */
-        .footer {{ background: #1a1a2e; color: white; padding: 30px 40px; text-align: center; }}
-        .footer p {{ opacity: 0.8; font-size: 0.875rem; }}
-        .footer .contact {{ margin-top: 15px; }}
+        .footer { background: #1a1a2e; color: white; padding: 30px 40px; text-align: center; }
+        .footer p { opacity: 0.8; font-size: 0.875rem; }
+        .footer .contact { margin-top: 15px; }
 
-        @media print {{
-            .container {{ box-shadow: none; }}
-            .section {{ page-break-inside: avoid; }}
-        }}
+        @media print {
+            .container { box-shadow: none; }
+            .section { page-break-inside: avoid; }
+        }
     </style>
 </head>
 <body>
@@ -4299,13 +4632,13 @@ FORMAT JSON:
         <!-- Header -->
         <div class="header">
             <h1>Rapport SEO Mensuel</h1>
-            <div class="period">{report['period']['start']} au {report['period']['end']}</div>
-            <div class="company">Prepare pour: <strong>{client['business_name']}</strong> ({client['domain']})</div>
+            <div class="period">$period_start au $period_end</div>
+            <div class="company">Prepare pour: <strong>$business_name</strong> ($domain)</div>
         </div>
 
         <!-- Score -->
         <div class="score-card">
-            <div class="score">{analysis.get('overall_score', 7.5)}/10</div>
+            <div class="score">$overall_score/10</div>
             <div class="score-label">Score SEO Global</div>
         </div>
 
@@ -4313,7 +4646,7 @@ FORMAT JSON:
         <div class="section">
             <h2>Resume Executif</h2>
             <div class="highlights">
-                {''.join([f'<div class="highlight">{h}</div>' for h in summary['key_highlights']])}
+                $highlights
             </div>
         </div>
 
@@ -4322,29 +4655,29 @@ FORMAT JSON:
             <h2>Metriques Cles</h2>
             <div class="metrics-grid">
                 <div class="metric-card">
-                    <div class="metric-value">{metrics['traffic']['organic_visits']}</div>
+                    <div class="metric-value">$organic_visits</div>
                     <div class="metric-label">Visites Organiques</div>
-                    <div class="metric-change up">+{metrics['traffic']['change_percent']}%</div>
+                    <div class="metric-change up">+$traffic_change%</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-value">{metrics['keywords']['top_10']}</div>
+                    <div class="metric-value">$top_10</div>
                     <div class="metric-label">Keywords Top 10</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-value">{metrics['backlinks']['total']}</div>
+                    <div class="metric-value">$backlinks_total</div>
                     <div class="metric-label">Backlinks Totaux</div>
-                    <div class="metric-change up">+{metrics['backlinks']['new_this_month']} ce mois</div>
+                    <div class="metric-change up">+$backlinks_new ce mois</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-value">{metrics['technical']['site_health_score']}%</div>
+                    <div class="metric-value">$health_score%</div>
                     <div class="metric-label">Sante Technique</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-value">{metrics['local_seo']['gmb_views']}</div>
+                    <div class="metric-value">$gmb_views</div>
                     <div class="metric-label">Vues GMB</div>
                 </div>
                 <div class="metric-card">
-                    <div class="metric-value">{metrics['local_seo']['avg_rating']}</div>
+                    <div class="metric-value">$avg_rating</div>
                     <div class="metric-label">Note Moyenne</div>
                 </div>
             </div>
@@ -4353,17 +4686,7 @@ FORMAT JSON:
         <!-- Recommendations -->
         <div class="section">
             <h2>Recommandations</h2>
-            {''.join([f'''
-            <div class="recommendation {r['priority']}">
-                <h4>{r['title']}</h4>
-                <p>{r['description']}</p>
-                <div class="tags">
-                    <span class="tag">{r['category']}</span>
-                    <span class="tag">Impact: {r['impact']}</span>
-                    <span class="tag">Effort: {r['effort']}</span>
-                </div>
-            </div>
-            ''' for r in recommendations[:5]])}
+            $recommendations
         </div>
 
         <!-- Next Steps -->
@@ -4371,32 +4694,65 @@ FORMAT JSON:
             <h2>Prochaines Etapes</h2>
             <h4 style="margin-bottom: 10px; color: #ef4444;">Actions Immediates</h4>
             <ul>
-                {''.join([f'<li>{step}</li>' for step in report['next_steps']['immediate']])}
+                $immediate
             </ul>
             <h4 style="margin: 20px 0 10px; color: #f59e0b;">Ce Mois</h4>
             <ul>
-                {''.join([f'<li>{step}</li>' for step in report['next_steps']['this_month']])}
+                $this_month
             </ul>
         </div>
 
         <!-- Footer -->
         <div class="footer">
-            <p>Rapport genere par <strong>{branding['company_name']}</strong></p>
+            <p>Rapport genere par <strong>$company_name</strong></p>
             <div class="contact">
-                {branding['contact_email']} | {branding['contact_phone']}
+                $contact_email | $contact_phone
             </div>
-            <p style="margin-top: 15px; opacity: 0.5;">Genere le {datetime.now().strftime('%d/%m/%Y a %H:%M')}</p>
+            <p style="margin-top: 15px; opacity: 0.5;">Genere le $generated</p>
         </div>
     </div>
 </body>
-</html>"""
+</html>""")
 
-        return html
+    def _generate_html_report(self, report):
+        """Genere une version HTML complete du rapport (gabarits compiles au chargement de la classe)"""
+        branding = report['branding']
+        client = report['client']
+        metrics = report['metrics']
+        analysis = report['analysis']
+        summary = report['executive_summary']
+        recommendations = report['recommendations']
+
+        return self._REPORT_TEMPLATE.render({
+            'business_name': client['business_name'],
+            'domain': client['domain'],
+            'primary_color': branding['primary_color'],
+            'secondary_color': branding['secondary_color'],
+            'company_name': branding['company_name'],
+            'contact_email': branding['contact_email'],
+            'contact_phone': branding['contact_phone'],
+            'period_start': report['period']['start'],
+            'period_end': report['period']['end'],
+            'overall_score': analysis.get('overall_score', 7.5),
+            'highlights': ''.join(self._HIGHLIGHT_TEMPLATE.render({'text': h}) for h in summary['key_highlights']),
+            'organic_visits': metrics['traffic']['organic_visits'],
+            'traffic_change': metrics['traffic']['change_percent'],
+            'top_10': metrics['keywords']['top_10'],
+            'backlinks_total': metrics['backlinks']['total'],
+            'backlinks_new': metrics['backlinks']['new_this_month'],
+            'health_score': metrics['technical']['site_health_score'],
+            'gmb_views': metrics['local_seo']['gmb_views'],
+            'avg_rating': metrics['local_seo']['avg_rating'],
+            'recommendations': ''.join(self._RECOMMENDATION_TEMPLATE.render(r) for r in recommendations[:5]),
+            'immediate': ''.join(self._STEP_TEMPLATE.render({'text': step}) for step in report['next_steps']['immediate']),
+            'this_month': ''.join(self._STEP_TEMPLATE.render({'text': step}) for step in report['next_steps']['this_month']),
+            'generated': datetime.now().strftime('%d/%m/%Y a %H:%M')
+        })
 
     def save_report(self, report, output_path=None):
         """Sauvegarde le rapport HTML"""
         if not output_path:
-            output_path = f"/tmp/seo_report_{report['report_id']}.html"
+            output_path = os.path.join(self.REPORT_DIR, f"seo_report_{report['report_id']}.html")
 
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -4407,6 +4763,25 @@ FORMAT JSON:
             log_agent(self.name, f"Erreur sauvegarde: {e}", "ERROR")
             return None
 
+    def save_pdf(self, report, output_path=None):
+        """Rend le rapport en PDF (WeasyPrint, optionnel); None si indisponible"""
+        try:
+            from weasyprint import HTML
+        except ImportError:
+            log_agent(self.name, "PDF indisponible: installer weasyprint", "WARNING")
+            return None
+
+        if not output_path:
+            output_path = os.path.join(self.REPORT_DIR, f"seo_report_{report['report_id']}.pdf")
+
+        try:
+            HTML(string=report['html_report']).write_pdf(output_path)
+            log_agent(self.name, f"PDF sauvegarde: {output_path}")
+            return output_path
+        except Exception as e:
+            log_agent(self.name, f"Erreur PDF: {e}", "ERROR")
+            return None
+
     def generate_quick_report(self, site_id):
         """Genere un rapport rapide pour un site existant"""
         site = SITES.get(site_id, {})
@@ -6148,8 +6523,19 @@ class BacklinkMonitorAgent:
     """
     name = "Backlink Monitor Agent"
 
+    USER_AGENT = 'SeoAI-BacklinkChecker/1.0'
+    # Verification concurrente: workers globaux, requetes simultanees max par domaine source
+    VERIFY_MAX_WORKERS = 32
+    VERIFY_PER_DOMAIN = 2
+    VERIFY_CHUNK_SIZE = 16384
+    VERIFY_MAX_BYTES = 2 * 1024 * 1024  # On abandonne la lecture apres 2 Mo
+
+    _ANCHOR_RE = re.compile(r'<a\s[^>]*?href=["\x27]([^"\x27]+)["\x27][^>]*>(.*?)</a>', re.DOTALL | re.IGNORECASE)
+    _TAG_RE = re.compile(r'<[^>]+>')
+
     def __init__(self):
         self._init_db()
+        self._local = threading.local()
 
     def _init_db(self):
         """Initialise les tables pour les backlinks"""
@@ -6230,23 +6616,24 @@ class BacklinkMonitorAgent:
             4: 'seoparai.com'
         }
 
+        link_re = re.compile(r'href=["\x27](https?://' + re.escape(client_domain) + r'[^"\x27 ]*)["\x27\s]')
+        session = self._get_session()
+
         for site_id, domain in our_sites.items():
             if domain == client_domain:
                 continue
             pages_to_check = [f'https://{domain}/', f'https://{domain}/blog/']
             for page_url in pages_to_check:
                 try:
-                    resp = requests.get(page_url, timeout=10, headers={'User-Agent': 'SeoAI-BacklinkChecker/1.0'})
+                    resp = session.get(page_url, timeout=10)
                     if resp.status_code == 200 and client_domain in resp.text:
-                        links = re.findall(
-                            r'href=["\x27](https?://' + re.escape(client_domain) + r'[^"\x27 ]*)["\x27\s]',
-                            resp.text
-                        )
+                        links = link_re.findall(resp.text)
+                        anchors = self._extract_anchors(resp.text) if links else {}
                         for link in set(links):
                             discovered.append({
                                 'source_url': page_url,
                                 'target_url': link,
-                                'anchor_text': self._extract_anchor(resp.text, link),
+                                'anchor_text': anchors.get(link, ''),
                                 'source_domain': domain,
                                 'link_type': 'dofollow',
                                 'status': 'active',
@@ -6280,34 +6667,33 @@ class BacklinkMonitorAgent:
         except Exception as e:
             log_agent(self.name, f"GSC links API: {e}", "WARNING")
 
-        # Save discovered backlinks to DB
+        # Save discovered backlinks to DB (une connexion, une transaction)
         saved = 0
-        for bl in discovered:
+        if discovered:
             try:
                 conn = get_db()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO backlinks
-                    (client_id, source_url, source_domain, target_url, anchor_text,
-                     domain, link_type, status, first_seen, last_seen, last_checked,
-                     is_dofollow, is_active)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP,
-                            CURRENT_TIMESTAMP, 1, 1)
-                """, (
-                    client_id,
-                    bl['source_url'],
-                    bl['source_domain'],
-                    bl['target_url'],
-                    bl['anchor_text'],
-                    bl['source_domain'],
-                    bl['link_type'],
-                    bl['status']
-                ))
-                conn.commit()
+                with conn:
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO backlinks
+                        (client_id, source_url, source_domain, target_url, anchor_text,
+                         domain, link_type, status, first_seen, last_seen, last_checked,
+                         is_dofollow, is_active)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP,
+                                CURRENT_TIMESTAMP, 1, 1)
+                    """, [(
+                        client_id,
+                        bl['source_url'],
+                        bl['source_domain'],
+                        bl['target_url'],
+                        bl['anchor_text'],
+                        bl['source_domain'],
+                        bl['link_type'],
+                        bl['status']
+                    ) for bl in discovered])
                 conn.close()
-                saved += 1
+                saved = len(discovered)
             except Exception as e:
-                log_agent(self.name, f"Erreur save backlink: {e}", "WARNING")
+                log_agent(self.name, f"Erreur save backlinks: {e}", "WARNING")
 
         log_agent(self.name, f"Decouverte terminee: {len(discovered)} backlinks trouves, {saved} sauvegardes")
 
@@ -6320,18 +6706,103 @@ class BacklinkMonitorAgent:
             'backlinks': discovered
         }
 
+    def _extract_anchors(self, html):
+        """Extrait tous les textes d'ancrage de la page en une passe: {href: ancre}"""
+        anchors = {}
+        try:
+            for href, inner in self._ANCHOR_RE.findall(html):
+                if href not in anchors:
+                    anchors[href] = self._TAG_RE.sub('', inner).strip()[:200]
+        except Exception:
+            pass
+        return anchors
+
     def _extract_anchor(self, html, url):
         """Extrait le texte d'ancrage d'un lien dans le HTML"""
+        return self._extract_anchors(html).get(url, '')
+
+    def _get_session(self):
+        """Session HTTP par thread avec pool de connexions (keep-alive)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.VERIFY_MAX_WORKERS,
+                                                    pool_maxsize=self.VERIFY_PER_DOMAIN)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = self.USER_AGENT
+            self._local.session = session
+        return session
+
+    def _fetch_link_status(self, source_url, needles):
+        """
+        Telecharge la page source en streaming et s'arrete des qu'un des
+        needles (domaine client ou URL cible) est trouve.
+        Retourne (status, octets lus).
+        """
+        needles = [n.encode('utf-8') for n in needles if n]
+        overlap = max((len(n) for n in needles), default=1) - 1
+        read = 0
         try:
-            escaped = re.escape(url)
-            pattern = r'<a[^>]*href=["\x27]' + escaped + r'["\x27\s][^>]*>(.*?)</a>'
-            match = re.search(pattern, html, re.DOTALL | re.IGNORECASE)
-            if match:
-                anchor = re.sub(r'<[^>]+>', '', match.group(1)).strip()
-                return anchor[:200]
-        except:
-            pass
-        return ''
+            resp = self._get_session().get(source_url, timeout=15, stream=True)
+        except requests.exceptions.Timeout:
+            return 'unknown', 0
+        except Exception as e:
+            log_agent(self.name, f"Erreur check {source_url}: {e}", "WARNING")
+            return 'unknown', 0
+        try:
+            if resp.status_code == 404:
+                return 'lost', 0
+            if resp.status_code != 200:
+                return 'unknown', 0
+            tail = b''
+            for chunk in resp.iter_content(chunk_size=self.VERIFY_CHUNK_SIZE):
+                read += len(chunk)
+                window = tail + chunk
+                if any(n in window for n in needles):
+                    return 'active', read
+                if read >= self.VERIFY_MAX_BYTES:
+                    break
+                tail = window[-overlap:] if overlap else b''
+            return 'lost', read
+        except requests.exceptions.Timeout:
+            return 'unknown', read
+        except Exception as e:
+            log_agent(self.name, f"Erreur check {source_url}: {e}", "WARNING")
+            return 'unknown', read
+        finally:
+            resp.close()
+
+    def _verify_batch(self, batch, client_domain):
+        """Verifie sequentiellement un lot de backlinks d'un meme domaine source"""
+        checked = []
+        for bl_id, source_url, target_url, old_status in batch:
+            new_status, read = self._fetch_link_status(source_url, [client_domain, target_url])
+            checked.append((bl_id, source_url, target_url, old_status, new_status, read))
+        return checked
+
+    def _build_domain_batches(self, backlinks):
+        """
+        Regroupe les backlinks par domaine source puis decoupe chaque groupe en
+        VERIFY_PER_DOMAIN lots: chaque lot est traite sequentiellement, ce qui borne
+        le nombre de requetes simultanees vers un meme domaine.
+        """
+        by_domain = {}
+        for bl in backlinks:
+            bl_id, source_url, source_domain, target_url, old_status = bl
+            if not source_url:
+                continue
+            domain = source_domain or urlparse(source_url).netloc
+            by_domain.setdefault(domain, []).append(
+                (bl_id, source_url, target_url or '', old_status or 'unknown'))
+
+        batches = []
+        for items in by_domain.values():
+            n = min(self.VERIFY_PER_DOMAIN, len(items))
+            batches.extend(items[i::n] for i in range(n))
+        # Les gros domaines d'abord pour ne pas finir sur une longue queue
+        batches.sort(key=len, reverse=True)
+        return batches
 
     def _get_client_domain(self, client_id):
         """Recupere le domaine du client"""
@@ -6373,9 +6844,14 @@ class BacklinkMonitorAgent:
             pass
 
 
-    def check_backlink_status(self, client_id):
-        """Verifie le statut reel de tous les backlinks d'un client via HTTP"""
+    def check_backlink_status(self, client_id, max_workers=None):
+        """
+        Verifie le statut reel de tous les backlinks d'un client via HTTP.
+        Les pages sources sont telechargees en parallele (bornees par domaine),
+        en streaming jusqu'a trouver le lien, puis ecrites en une transaction.
+        """
         log_agent(self.name, f"Verification statut backlinks reel pour client {client_id}")
+        started = time.time()
 
         client_domain = self._get_client_domain(client_id)
 
@@ -6406,70 +6882,40 @@ class BacklinkMonitorAgent:
             if not backlinks:
                 return {'success': True, 'message': 'Aucun backlink a verifier', 'checked': 0}
 
-        results = []
-        alerts = []
-
-        for bl in backlinks:
-            bl_id = bl[0]
-            source_url = bl[1] or ''
-            source_domain = bl[2] or ''
-            target_url = bl[3] or ''
-            old_status = bl[4] or 'unknown'
-
-            if not source_url:
-                continue
-
-            # Real HTTP check
-            new_status = 'active'
-            try:
-                resp = requests.get(source_url, timeout=15, headers={'User-Agent': 'SeoAI-BacklinkChecker/1.0'})
-                if resp.status_code == 200:
-                    if client_domain and client_domain in resp.text:
-                        new_status = 'active'
-                    elif target_url and target_url in resp.text:
-                        new_status = 'active'
-                    else:
-                        new_status = 'lost'
-                elif resp.status_code == 404:
-                    new_status = 'lost'
-                elif resp.status_code == 403:
-                    new_status = 'unknown'
-                else:
-                    new_status = 'unknown'
-            except requests.exceptions.Timeout:
-                new_status = 'unknown'
-            except Exception as e:
-                new_status = 'unknown'
-                log_agent(self.name, f"Erreur check {source_url}: {e}", "WARNING")
+        batches = self._build_domain_batches(backlinks)
+        workers = max(1, min(max_workers or self.VERIFY_MAX_WORKERS, len(batches) or 1))
 
-            # Update DB
-            try:
-                conn = get_db()
-                cursor = conn.cursor()
-                is_active = 1 if new_status == 'active' else 0
-                cursor.execute(
-                    "UPDATE backlinks SET status = ?, is_active = ?, last_seen = CURRENT_TIMESTAMP, last_checked = CURRENT_TIMESTAMP WHERE id = ?",
-                    (new_status, is_active, bl_id))
+        checked = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._verify_batch, batch, client_domain) for batch in batches]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    checked.extend(future.result())
+                except Exception as e:
+                    log_agent(self.name, f"Erreur lot backlinks: {e}", "WARNING")
+        fetch_seconds = time.time() - started
 
-                # Save to history
-                cursor.execute(
-                    "INSERT INTO backlink_history (client_id, backlink_id, event_type, details, created_at) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
-                    (client_id, bl_id, new_status, f'HTTP check: {new_status}'))
+        results = []
+        alerts = []
+        updates = []
+        history = []
+        alert_rows = []
+        bytes_read = 0
 
-                conn.commit()
-                conn.close()
-            except Exception as e:
-                log_agent(self.name, f"Erreur update backlink: {e}", "WARNING")
+        for bl_id, source_url, target_url, old_status, new_status, read in checked:
+            bytes_read += read
+            updates.append((new_status, 1 if new_status == 'active' else 0, bl_id))
+            history.append((client_id, bl_id, new_status, f'HTTP check: {new_status}'))
 
             # Create alert if status changed
             if old_status != new_status:
                 if new_status == 'lost':
-                    self._create_alert(client_id, 'lost_backlink', 'warning',
-                                       f'Backlink perdu: {source_url}', bl_id)
+                    alert_rows.append((client_id, 'lost_backlink', 'warning',
+                                       f'Backlink perdu: {source_url}', bl_id))
                     alerts.append({'type': 'lost', 'source': source_url, 'target': target_url})
                 elif old_status == 'lost' and new_status == 'active':
-                    self._create_alert(client_id, 'recovered_backlink', 'info',
-                                       f'Backlink recupere: {source_url}', bl_id)
+                    alert_rows.append((client_id, 'recovered_backlink', 'info',
+                                       f'Backlink recupere: {source_url}', bl_id))
                     alerts.append({'type': 'recovered', 'source': source_url, 'target': target_url})
 
             results.append({
@@ -6479,10 +6925,30 @@ class BacklinkMonitorAgent:
                 'new_status': new_status
             })
 
+        # Update DB: une seule connexion et une seule transaction
+        try:
+            conn = get_db()
+            with conn:
+                conn.executemany(
+                    "UPDATE backlinks SET status = ?, is_active = ?, last_seen = CURRENT_TIMESTAMP, last_checked = CURRENT_TIMESTAMP WHERE id = ?",
+                    updates)
+                conn.executemany(
+                    "INSERT INTO backlink_history (client_id, backlink_id, event_type, details, created_at) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+                    history)
+                conn.executemany(
+                    'INSERT INTO backlink_alerts (client_id, alert_type, severity, message, backlink_id) VALUES (?, ?, ?, ?, ?)',
+                    alert_rows)
+            conn.close()
+        except Exception as e:
+            log_agent(self.name, f"Erreur update backlinks: {e}", "WARNING")
+
         active_count = len([r for r in results if r['new_status'] == 'active'])
         lost_count = len([r for r in results if r['new_status'] == 'lost'])
+        duration = time.time() - started
+        links_per_second = round(len(results) / duration, 1) if duration > 0 else 0
 
-        log_agent(self.name, f"Verification terminee: {len(results)} backlinks, {active_count} actifs, {lost_count} perdus")
+        log_agent(self.name, f"Verification terminee: {len(results)} backlinks, {active_count} actifs, "
+                             f"{lost_count} perdus en {duration:.1f}s ({links_per_second} liens/s)")
 
         return {
             'success': True,
@@ -6491,7 +6957,16 @@ class BacklinkMonitorAgent:
             'active': active_count,
             'lost': lost_count,
             'alerts': alerts,
-            'results': results
+            'results': results,
+            'stats': {
+                'duration_seconds': round(duration, 2),
+                'fetch_seconds': round(fetch_seconds, 2),
+                'links_per_second': links_per_second,
+                'source_domains': len({b[2] or urlparse(b[1] or '').netloc for b in backlinks if b[1]}),
+                'batches': len(batches),
+                'workers': workers,
+                'bytes_read': bytes_read
+            }
         }
 
     def _mark_backlink_lost(self, backlink_id, client_id):
@@ -7768,6 +8243,73 @@ FORMAT JSON:
 # ============================================
 # AGENT 44: COMPETITOR WATCH AGENT
 # ============================================
+class _PageSectionParser(HTMLParser):
+    """Decoupe une page HTML en sections: title, meta, headings, blocs de texte, liens"""
+
+    BLOCK_TAGS = {'p', 'li', 'blockquote', 'td', 'th', 'dd', 'dt', 'figcaption', 'pre'}
+    HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.meta = {}
+        self.headings = []
+        self.blocks = []
+        self.links = set()
+        self._capture = None
+        self._buffer = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag == 'meta':
+            key = attrs.get('name') or attrs.get('property')
+            if key and attrs.get('content') is not None:
+                self.meta[key.lower()] = attrs['content'].strip()
+        elif tag == 'link' and (attrs.get('rel') or '').lower() == 'canonical':
+            self.meta['canonical'] = (attrs.get('href') or '').strip()
+        elif tag == 'a' and attrs.get('href'):
+            self.links.add(attrs['href'].strip())
+        if tag == 'title' or tag in self.HEADING_TAGS or tag in self.BLOCK_TAGS:
+            self._flush()
+            self._capture = tag
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == self._capture:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._capture and not self._skip:
+            self._buffer.append(data)
+
+    def _flush(self):
+        text = ' '.join(''.join(self._buffer).split())
+        if text and self._capture:
+            if self._capture == 'title':
+                self.title = text
+            elif self._capture in self.HEADING_TAGS:
+                self.headings.append(f'{self._capture}: {text}')
+            else:
+                self.blocks.append(text)
+        self._capture = None
+        self._buffer = []
+
+    def sections(self):
+        self._flush()
+        return {
+            'title': self.title,
+            'meta': dict(sorted(self.meta.items())),
+            'headings': self.headings,
+            'body': self.blocks,
+            'links': sorted(self.links),
+        }
+
+
 class CompetitorWatchAgent:
     """
     Agent de surveillance concurrentielle
@@ -7775,6 +8317,10 @@ class CompetitorWatchAgent:
     """
     name = "Competitor Watch Agent"
 
+    USER_AGENT = 'SeoparAI-CompetitorWatch/1.0'
+    PAGE_SECTIONS = ('title', 'meta', 'headings', 'body', 'links')
+    MAX_WORKERS = 8
+
     def __init__(self):
         self._init_db()
 
@@ -7784,6 +8330,30 @@ class CompetitorWatchAgent:
             conn = get_db()
             cursor = conn.cursor()
 
+            # Blobs de contenu compresses, adresses par hash (dedupliques)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS competitor_blobs (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB,
+                    raw_size INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Etat courant de la page d'accueil de chaque concurrent (GET conditionnel)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS competitor_page_state (
+                    competitor_id INTEGER PRIMARY KEY,
+                    url TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    root_hash TEXT,
+                    tree_json TEXT,
+                    checked_at TIMESTAMP,
+                    changed_at TIMESTAMP
+                )
+            ''')
+
             # Concurrents suivis
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS watched_competitors (
@@ -7901,6 +8471,9 @@ class CompetitorWatchAgent:
 
     def _take_snapshot(self, competitor_id, domain):
         """Prend un snapshot de l'etat actuel du concurrent"""
+        # Snapshot page (hash tree)
+        self._snapshot_page(competitor_id, domain)
+
         # Snapshot SEO
         seo_data = self._analyze_competitor_seo(domain)
         self._save_snapshot(competitor_id, 'seo', seo_data)
@@ -8001,62 +8574,299 @@ FORMAT JSON:
 
         return {'error': 'Analyse impossible'}
 
-    def check_for_changes(self, client_id):
-        """Verifie les changements chez tous les concurrents"""
-        log_agent(self.name, f"Verification changements pour client {client_id}")
-
-        competitors = self.get_competitors(client_id)
-        changes = []
-
-        for comp in competitors:
-            # Obtenir le dernier snapshot
-            last_snapshot = self._get_last_snapshot(comp['id'], 'seo')
-
-            # Nouveau snapshot
-            current_seo = self._analyze_competitor_seo(comp['domain'])
+    # ------------------------------------------------------------------
+    # Snapshots de page: hash tree par section + blobs compresses
+    # ------------------------------------------------------------------
 
-            # Comparer
-            detected_changes = self._compare_snapshots(last_snapshot, current_seo, comp)
+    @staticmethod
+    def _hash(data):
+        raw = json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest(), raw
 
-            if detected_changes:
-                changes.extend(detected_changes)
-
-                # Sauvegarder le nouveau snapshot
-                self._save_snapshot(comp['id'], 'seo', current_seo)
-
-                # Creer des alertes
-                for change in detected_changes:
-                    self._create_alert(client_id, comp['id'], change)
+    def _build_hash_tree(self, sections):
+        """
+        Construit l'arbre de hash de la page: un hash par bloc de texte, un hash
+        par section, et un hash racine. Retourne (tree, blobs a stocker).
+        """
+        blobs = {}
+        tree = {'sections': {}, 'body_blocks': []}
+        for name in self.PAGE_SECTIONS:
+            if name == 'body':
+                block_hashes = []
+                for block in sections['body']:
+                    h, raw = self._hash(block)
+                    blobs[h] = raw
+                    block_hashes.append(h)
+                tree['body_blocks'] = block_hashes
+                section_hash = hashlib.sha256(''.join(block_hashes).encode('ascii')).hexdigest()
+            else:
+                section_hash, raw = self._hash(sections[name])
+                blobs[section_hash] = raw
+            tree['sections'][name] = section_hash
+        tree['root'] = hashlib.sha256(
+            ''.join(tree['sections'][n] for n in self.PAGE_SECTIONS).encode('ascii')).hexdigest()
+        return tree, blobs
+
+    def _store_blobs(self, cursor, blobs):
+        """Stocke les blobs absents (INSERT OR IGNORE: un contenu identique n'est stocke qu'une fois)"""
+        cursor.executemany(
+            'INSERT OR IGNORE INTO competitor_blobs (hash, data, raw_size) VALUES (?, ?, ?)',
+            [(h, zlib.compress(raw, 6), len(raw)) for h, raw in blobs.items()])
+
+    def _load_blobs(self, cursor, hashes):
+        """Charge et decompresse des blobs par hash"""
+        hashes = list(set(hashes))
+        loaded = {}
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'SELECT hash, data FROM competitor_blobs WHERE hash IN ({placeholders})', chunk)
+            for h, data in cursor.fetchall():
+                loaded[h] = json.loads(zlib.decompress(data).decode('utf-8'))
+        return loaded
+
+    def _diff_trees(self, cursor, old_tree, new_tree):
+        """Calcule le diff uniquement sur les sections dont le hash a change"""
+        changed = [n for n in self.PAGE_SECTIONS
+                   if old_tree['sections'].get(n) != new_tree['sections'].get(n)]
+        diff = {'changed_sections': changed}
+        if not changed:
+            return diff
+
+        if 'body' in changed:
+            old_blocks = set(old_tree.get('body_blocks', []))
+            new_blocks = set(new_tree.get('body_blocks', []))
+            added = [h for h in new_tree['body_blocks'] if h not in old_blocks]
+            removed = [h for h in old_tree.get('body_blocks', []) if h not in new_blocks]
+            texts = self._load_blobs(cursor, added[:20])
+            diff['body'] = {
+                'blocks_added': len(added),
+                'blocks_removed': len(removed),
+                'sample_added': [texts[h][:200] for h in added[:20] if h in texts][:5]
+            }
 
-        return {
-            'client_id': client_id,
-            'competitors_checked': len(competitors),
-            'changes_detected': len(changes),
-            'changes': changes
-        }
+        wanted = [s[n] for n in changed if n != 'body' for s in (old_tree['sections'], new_tree['sections'])]
+        contents = self._load_blobs(cursor, wanted)
+        for name in changed:
+            if name == 'body':
+                continue
+            old = contents.get(old_tree['sections'].get(name))
+            new = contents.get(new_tree['sections'].get(name))
+            if name == 'title':
+                diff['title'] = {'old': old, 'new': new}
+            elif name == 'meta':
+                old, new = old or {}, new or {}
+                diff['meta'] = {k: {'old': old.get(k), 'new': new.get(k)}
+                                for k in sorted(set(old) | set(new)) if old.get(k) != new.get(k)}
+            else:
+                old_set, new_set = set(old or []), set(new or [])
+                diff[name] = {'added': sorted(new_set - old_set)[:50],
+                              'removed': sorted(old_set - new_set)[:50]}
+        return diff
 
-    def _get_last_snapshot(self, competitor_id, snapshot_type):
-        """Recupere le dernier snapshot"""
+    def _snapshot_page(self, competitor_id, domain):
+        """
+        Snapshot de la page d'accueil d'un concurrent.
+        GET conditionnel (ETag / Last-Modified): une page non modifiee s'arrete
+        la. Sinon la page est decoupee en sections hashees; seules les sections
+        dont le hash a change sont chargees et comparees.
+        Retourne {'status': new|not_modified|unchanged|changed|error, ...}.
+        """
+        url = f'https://{domain}/'
+        conn = None
         try:
             conn = get_db()
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT data_json FROM competitor_snapshots
-                WHERE competitor_id = ? AND snapshot_type = ?
-                ORDER BY created_at DESC LIMIT 1
-            ''', (competitor_id, snapshot_type))
-            row = cursor.fetchone()
-            conn.close()
-            if row:
-                return json.loads(row[0])
-        except Exception as e:
-            import logging
-            logging.warning(f'_call_ai error: {e}')
-            return None
+            cursor.execute('SELECT etag, last_modified, root_hash, tree_json FROM competitor_page_state WHERE competitor_id = ?',
+                           (competitor_id,))
+            state = cursor.fetchone()
+
+            headers = {'User-Agent': self.USER_AGENT}
+            if state and state[0]:
+                headers['If-None-Match'] = state[0]
+            if state and state[1]:
+                headers['If-Modified-Since'] = state[1]
+
+            resp = requests.get(url, headers=headers, timeout=15)
+            if resp.status_code == 304 and state:
+                cursor.execute('UPDATE competitor_page_state SET checked_at = CURRENT_TIMESTAMP WHERE competitor_id = ?',
+                               (competitor_id,))
+                conn.commit()
+                return {'status': 'not_modified', 'bytes': 0}
+            if resp.status_code != 200:
+                return {'status': 'error', 'error': f'HTTP {resp.status_code}', 'bytes': len(resp.content)}
 
-    def _compare_snapshots(self, old_snapshot, new_snapshot, competitor):
-        """Compare deux snapshots et detecte les changements"""
-        changes = []
+            parser = _PageSectionParser()
+            parser.feed(resp.text)
+            tree, blobs = self._build_hash_tree(parser.sections())
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+
+            old_tree = json.loads(state[3]) if state and state[3] else None
+            if old_tree and old_tree.get('root') == tree['root']:
+                cursor.execute('''
+                    UPDATE competitor_page_state SET etag = ?, last_modified = ?, checked_at = CURRENT_TIMESTAMP
+                    WHERE competitor_id = ?
+                ''', (etag, last_modified, competitor_id))
+                conn.commit()
+                return {'status': 'unchanged', 'bytes': len(resp.content)}
+
+            self._store_blobs(cursor, blobs)
+            diff = self._diff_trees(cursor, old_tree, tree) if old_tree else None
+            tree_json = json.dumps(tree)
+            cursor.execute('''
+                INSERT OR REPLACE INTO competitor_page_state
+                (competitor_id, url, etag, last_modified, root_hash, tree_json, checked_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ''', (competitor_id, url, etag, last_modified, tree['root'], tree_json))
+            cursor.execute('''
+                INSERT INTO competitor_snapshots (competitor_id, snapshot_type, data_json)
+                VALUES (?, 'page', ?)
+            ''', (competitor_id, tree_json))
+            conn.commit()
+            return {'status': 'changed' if old_tree else 'new', 'diff': diff, 'bytes': len(resp.content)}
+        except Exception as e:
+            log_agent(self.name, f"Erreur snapshot page {domain}: {e}", "WARNING")
+            return {'status': 'error', 'error': str(e), 'bytes': 0}
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _page_changes(self, page_diff, competitor):
+        """Transforme un diff de sections en changements (meme format que _compare_snapshots)"""
+        changes = []
+        if not page_diff or not page_diff.get('changed_sections'):
+            return changes
+        name = competitor['name']
+        if 'title' in page_diff or 'meta' in page_diff:
+            details = []
+            if 'title' in page_diff:
+                details.append(f"Title: {page_diff['title']['old']} -> {page_diff['title']['new']}")
+            for key in list(page_diff.get('meta', {}))[:5]:
+                details.append(f"Meta {key} modifiee")
+            changes.append({
+                'type': 'onpage_change',
+                'severity': 'medium',
+                'title': f"Balises SEO modifiees chez {name}",
+                'description': '; '.join(details)
+            })
+        if 'headings' in page_diff:
+            added = page_diff['headings']['added']
+            changes.append({
+                'type': 'headings_change',
+                'severity': 'medium',
+                'title': f"Structure de titres modifiee chez {name}",
+                'description': f"{len(added)} titres ajoutes, {len(page_diff['headings']['removed'])} retires",
+                'headings_added': added[:10]
+            })
+        if 'body' in page_diff:
+            body = page_diff['body']
+            changes.append({
+                'type': 'content_change',
+                'severity': 'low' if body['blocks_added'] < 3 else 'medium',
+                'title': f"Contenu modifie chez {name}",
+                'description': f"{body['blocks_added']} blocs ajoutes, {body['blocks_removed']} retires",
+                'sample': body['sample_added']
+            })
+        if 'links' in page_diff:
+            changes.append({
+                'type': 'links_change',
+                'severity': 'low',
+                'title': f"Liens modifies chez {name}",
+                'description': f"{len(page_diff['links']['added'])} liens ajoutes, {len(page_diff['links']['removed'])} retires",
+                'links_added': page_diff['links']['added'][:10]
+            })
+        return changes
+
+    def _check_competitor(self, comp):
+        """Verifie un concurrent: snapshot de page puis analyse SEO seulement si la page a change"""
+        page = self._snapshot_page(comp['id'], comp['domain'])
+        if page['status'] in ('not_modified', 'unchanged'):
+            return page, []
+
+        detected_changes = self._page_changes(page.get('diff'), comp)
+
+        # Obtenir le dernier snapshot
+        last_snapshot = self._get_last_snapshot(comp['id'], 'seo')
+
+        # Nouveau snapshot
+        current_seo = self._analyze_competitor_seo(comp['domain'])
+
+        # Comparer
+        seo_changes = self._compare_snapshots(last_snapshot, current_seo, comp)
+        if seo_changes or not last_snapshot:
+            # Sauvegarder le nouveau snapshot
+            self._save_snapshot(comp['id'], 'seo', current_seo)
+        detected_changes.extend(seo_changes)
+        return page, detected_changes
+
+    def check_for_changes(self, client_id):
+        """
+        Verifie les changements chez tous les concurrents.
+        Les pages non modifiees (304 ou hash racine identique) sont ignorees
+        sans appel IA; les concurrents sont verifies en parallele.
+        """
+        log_agent(self.name, f"Verification changements pour client {client_id}")
+        started = time.time()
+
+        competitors = self.get_competitors(client_id)
+        changes = []
+        page_status = {}
+        bytes_downloaded = 0
+
+        workers = max(1, min(self.MAX_WORKERS, len(competitors)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self._check_competitor, comp): comp for comp in competitors}
+            for future in concurrent.futures.as_completed(futures):
+                comp = futures[future]
+                try:
+                    page, detected_changes = future.result()
+                except Exception as e:
+                    log_agent(self.name, f"Erreur verification {comp['domain']}: {e}", "WARNING")
+                    page, detected_changes = {'status': 'error', 'bytes': 0}, []
+                page_status[page['status']] = page_status.get(page['status'], 0) + 1
+                bytes_downloaded += page.get('bytes', 0)
+
+                if detected_changes:
+                    changes.extend(detected_changes)
+
+                    # Creer des alertes
+                    for change in detected_changes:
+                        self._create_alert(client_id, comp['id'], change)
+
+        return {
+            'client_id': client_id,
+            'competitors_checked': len(competitors),
+            'unchanged': page_status.get('not_modified', 0) + page_status.get('unchanged', 0),
+            'page_status': page_status,
+            'bytes_downloaded': bytes_downloaded,
+            'duration_seconds': round(time.time() - started, 2),
+            'changes_detected': len(changes),
+            'changes': changes
+        }
+
+    def _get_last_snapshot(self, competitor_id, snapshot_type):
+        """Recupere le dernier snapshot"""
+        try:
+            conn = get_db()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT data_json FROM competitor_snapshots
+                WHERE competitor_id = ? AND snapshot_type = ?
+                ORDER BY created_at DESC LIMIT 1
+            ''', (competitor_id, snapshot_type))
+            row = cursor.fetchone()
+            conn.close()
+            if row:
+                return json.loads(row[0])
+        except Exception as e:
+            import logging
+            logging.warning(f'_call_ai error: {e}')
+            return None
+
+    def _compare_snapshots(self, old_snapshot, new_snapshot, competitor):
+        """Compare deux snapshots et detecte les changements"""
+        changes = []
 
         if not old_snapshot:
             return []
@@ -9911,6 +10721,49 @@ FORMAT JSON:
             return {'error': str(e)}
 
 
+def load_contact_features(cursor, contact_ids=None, candidate_sql=None, params=()):
+    """
+    Charge les features de scoring de plusieurs contacts CRM en requetes ensemblistes.
+    Les contacts cibles sont places dans une table temporaire (ids explicites ou
+    resultat de candidate_sql), puis contact, nombre d'interactions et
+    d'opportunites sont charges en une requete chacun.
+    Retourne un dict de colonnes: {'id': [...], 'source': [...], ...}
+    """
+    # pos: ordre des candidats (ORDER BY de candidate_sql ou ordre des ids), conserve dans le resultat
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS _feature_candidates (pos INTEGER PRIMARY KEY, contact_id INTEGER UNIQUE)')
+    cursor.execute('DELETE FROM _feature_candidates')
+    if candidate_sql:
+        cursor.execute(f'INSERT OR IGNORE INTO _feature_candidates (contact_id) {candidate_sql}', params)
+    else:
+        cursor.executemany('INSERT OR IGNORE INTO _feature_candidates (contact_id) VALUES (?)',
+                           [(cid,) for cid in contact_ids or []])
+
+    cursor.execute('''
+        SELECT c.id, c.source, c.company, c.email, c.phone, c.website
+        FROM _feature_candidates f JOIN crm_contacts c ON c.id = f.contact_id
+        ORDER BY f.pos
+    ''')
+    rows = cursor.fetchall()
+    features = {'id': [r[0] for r in rows]}
+    for i, key in enumerate(('source', 'company', 'email', 'phone', 'website'), start=1):
+        features[key] = [r[i] for r in rows]
+
+    for key, table in (('interactions', 'crm_interactions'), ('opportunities', 'crm_opportunities')):
+        try:
+            cursor.execute(f'''
+                SELECT contact_id, COUNT(*) FROM {table}
+                WHERE contact_id IN (SELECT contact_id FROM _feature_candidates)
+                GROUP BY contact_id
+            ''')
+            counts = dict(cursor.fetchall())
+        except sqlite3.OperationalError:
+            counts = {}
+        features[key] = [counts.get(cid, 0) for cid in features['id']]
+
+    cursor.execute('DELETE FROM _feature_candidates')
+    return features
+
+
 # ============================================
 # AGENT 53: LEAD SCORING AGENT - Qualification IA des leads
 # ============================================
@@ -9966,6 +10819,7 @@ class LeadScoringAgent:
                 scored_by TEXT DEFAULT 'system'
             )
         ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lead_scores_contact ON lead_scores(contact_id, scored_at)')
 
         # Table des criteres personnalises
         cursor.execute('''
@@ -10010,62 +10864,19 @@ class LeadScoringAgent:
             conn = get_db()
             cursor = conn.cursor()
 
-            # Recuperer les infos du contact si pas fournies
+            # Recuperer les infos du contact si pas fournies (meme chargement que batch_score)
             if not data:
-                cursor.execute('''
-                    SELECT source, company, notes FROM crm_contacts WHERE id = ?
-                ''', (contact_id,))
-                contact = cursor.fetchone()
-                if not contact:
+                features = load_contact_features(cursor, contact_ids=[contact_id])
+                if not features['id']:
+                    conn.close()
                     return {'error': 'Contact non trouve'}
-                data = {
-                    'source': contact[0] or 'direct',
-                    'company': contact[1],
-                    'notes': contact[2]
-                }
-
-            # Calculer les scores par categorie
-            source_score = self.SCORING_CRITERIA['source'].get(data.get('source', 'direct'), 15)
-            engagement_score = self.SCORING_CRITERIA['engagement'].get(data.get('engagement', 'medium'), 15)
-            budget_score = self.SCORING_CRITERIA['budget'].get(data.get('budget', 'medium'), 15)
-            timeline_score = self.SCORING_CRITERIA['timeline'].get(data.get('timeline', 'long'), 10)
-            fit_score = self.SCORING_CRITERIA['fit'].get(data.get('fit', 'partial'), 10)
-
-            # Bonus/malus
-            bonus = 0
-            if data.get('interactions', 0) > 5:
-                bonus += 10
-            if data.get('page_views', 0) > 10:
-                bonus += 5
-            if data.get('downloaded_content'):
-                bonus += 10
-            if data.get('visited_pricing'):
-                bonus += 15
-            if data.get('company'):
-                bonus += 5
-
-            # Score total
-            total_score = min(100, source_score + engagement_score + budget_score + timeline_score + fit_score + bonus)
-
-            # Label
-            label = 'cold'
-            for (low, high), lbl in self.SCORE_LABELS.items():
-                if low <= total_score <= high:
-                    label = lbl
-                    break
-
-            # Probabilite de conversion
-            conversion_prob = round(total_score * 0.8 / 100, 2)
-
-            # Action recommandee
-            if total_score >= 80:
-                action = "Appeler immediatement - lead tres chaud"
-            elif total_score >= 60:
-                action = "Envoyer une proposition personnalisee"
-            elif total_score >= 40:
-                action = "Envoyer du contenu educatif"
             else:
-                action = "Ajouter a la sequence de nurturing"
+                features = {'id': [contact_id]}
+                for key in self.FEATURE_KEYS:
+                    features[key] = [data.get(key)]
+
+            scores = self._score_columns(features)
+            row = self._score_rows(scores)[0]
 
             # Sauvegarder le score
             cursor.execute('''
@@ -10073,8 +10884,7 @@ class LeadScoringAgent:
                 (contact_id, score, label, source_score, engagement_score, budget_score,
                  timeline_score, fit_score, conversion_probability, recommended_action)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (contact_id, total_score, label, source_score, engagement_score,
-                  budget_score, timeline_score, fit_score, conversion_prob, action))
+            ''', row)
 
             score_id = cursor.lastrowid
 
@@ -10082,7 +10892,7 @@ class LeadScoringAgent:
             cursor.execute('''
                 UPDATE crm_contacts SET score = ?, updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
-            ''', (total_score, contact_id))
+            ''', (row[1], contact_id))
 
             conn.commit()
             conn.close()
@@ -10090,23 +10900,112 @@ class LeadScoringAgent:
             return {
                 'score_id': score_id,
                 'contact_id': contact_id,
-                'score': total_score,
-                'label': label,
+                'score': row[1],
+                'label': row[2],
                 'breakdown': {
-                    'source': source_score,
-                    'engagement': engagement_score,
-                    'budget': budget_score,
-                    'timeline': timeline_score,
-                    'fit': fit_score,
-                    'bonus': bonus
+                    'source': row[3],
+                    'engagement': row[4],
+                    'budget': row[5],
+                    'timeline': row[6],
+                    'fit': row[7],
+                    'bonus': int(scores['bonus'][0])
                 },
-                'conversion_probability': conversion_prob,
-                'recommended_action': action
+                'conversion_probability': row[8],
+                'recommended_action': row[9]
             }
 
         except Exception as e:
             return {'error': str(e)}
 
+    # Colonnes utilisees par le scoring (voir load_contact_features)
+    FEATURE_KEYS = ('source', 'engagement', 'budget', 'timeline', 'fit', 'interactions',
+                    'page_views', 'downloaded_content', 'visited_pricing', 'company')
+
+    # Valeur par defaut quand la donnee manque, puis points si la valeur est inconnue
+    CATEGORY_DEFAULTS = {
+        'source': ('direct', 15),
+        'engagement': ('medium', 15),
+        'budget': ('medium', 15),
+        'timeline': ('long', 10),
+        'fit': ('partial', 10)
+    }
+
+    RECOMMENDED_ACTIONS = (
+        (80, "Appeler immediatement - lead tres chaud"),
+        (60, "Envoyer une proposition personnalisee"),
+        (40, "Envoyer du contenu educatif"),
+        (0, "Ajouter a la sequence de nurturing")
+    )
+
+    def _score_columns(self, features):
+        """
+        Calcule les scores de tous les contacts en une passe vectorisee (NumPy).
+        features: dict de colonnes (listes de meme longueur), cf. FEATURE_KEYS.
+        """
+        import numpy as np
+
+        n = len(features['id'])
+
+        def column(key):
+            return features.get(key) or [None] * n
+
+        def category(key):
+            default, fallback = self.CATEGORY_DEFAULTS[key]
+            points = self.SCORING_CRITERIA[key]
+            return np.fromiter((points.get(v or default, fallback) for v in column(key)),
+                               dtype=np.int64, count=n)
+
+        def numeric(key):
+            return np.fromiter((v or 0 for v in column(key)), dtype=np.float64, count=n)
+
+        def flag(key):
+            return np.fromiter((bool(v) for v in column(key)), dtype=bool, count=n)
+
+        cat = {key: category(key) for key in self.CATEGORY_DEFAULTS}
+
+        # Bonus/malus
+        bonus = (np.where(numeric('interactions') > 5, 10, 0)
+                 + np.where(numeric('page_views') > 10, 5, 0)
+                 + np.where(flag('downloaded_content'), 10, 0)
+                 + np.where(flag('visited_pricing'), 15, 0)
+                 + np.where(flag('company'), 5, 0))
+
+        total = np.minimum(100, sum(cat.values()) + bonus)
+
+        # Label (bornes basses de SCORE_LABELS, de la plus haute a la plus basse)
+        label = np.full(n, 'cold', dtype=object)
+        for (low, high), lbl in sorted(self.SCORE_LABELS.items(), reverse=True):
+            label[(total >= low) & (total <= high)] = lbl
+
+        action = np.full(n, self.RECOMMENDED_ACTIONS[-1][1], dtype=object)
+        for threshold, text in reversed(self.RECOMMENDED_ACTIONS[:-1]):
+            action[total >= threshold] = text
+
+        return {
+            'id': features['id'],
+            'score': total,
+            'label': label,
+            'bonus': bonus,
+            'conversion_probability': np.round(total * 0.8 / 100, 2),
+            'recommended_action': action,
+            **{f'{key}_score': points for key, points in cat.items()}
+        }
+
+    def _score_rows(self, scores):
+        """Convertit les colonnes de scores en tuples pour INSERT INTO lead_scores"""
+        return list(zip(
+            scores['id'],
+            scores['score'].tolist(),
+            scores['label'].tolist(),
+            scores['source_score'].tolist(),
+            scores['engagement_score'].tolist(),
+            scores['budget_score'].tolist(),
+            scores['timeline_score'].tolist(),
+            scores['fit_score'].tolist(),
+            scores['conversion_probability'].tolist(),
+            scores['recommended_action'].tolist()
+        ))
+
     def score_lead_ai(self, contact_id):
         """Score un lead avec analyse IA complete"""
         try:
@@ -10213,39 +11112,53 @@ REPONDS EN JSON:
             return {'error': str(e)}
 
     def batch_score(self, limit=50):
-        """Score tous les leads non scores ou anciens"""
+        """
+        Score tous les leads non scores ou anciens.
+        Les features sont chargees en quelques requetes ensemblistes, les scores
+        calcules en une passe vectorisee et ecrits en une transaction.
+        """
         try:
+            started = time.time()
             self.init_db()
             conn = get_db()
             cursor = conn.cursor()
 
             # Leads sans score recent (> 7 jours)
-            cursor.execute('''
+            features = load_contact_features(cursor, candidate_sql='''
                 SELECT c.id FROM crm_contacts c
-                LEFT JOIN lead_scores ls ON c.id = ls.contact_id
                 WHERE c.type = 'lead'
-                AND (ls.id IS NULL OR ls.scored_at < datetime('now', '-7 days'))
+                AND NOT EXISTS (
+                    SELECT 1 FROM lead_scores ls
+                    WHERE ls.contact_id = c.id AND ls.scored_at >= datetime('now', '-7 days')
+                )
                 ORDER BY c.created_at DESC
                 LIMIT ?
-            ''', (limit,))
-
-            leads = [r[0] for r in cursor.fetchall()]
-            conn.close()
+            ''', params=(limit,))
 
             results = {'scored': 0, 'errors': 0, 'scores': []}
+            if not features['id']:
+                conn.close()
+                return results
+
+            scores = self._score_columns(features)
+            rows = self._score_rows(scores)
+
+            with conn:
+                cursor.executemany('''
+                    INSERT INTO lead_scores
+                    (contact_id, score, label, source_score, engagement_score, budget_score,
+                     timeline_score, fit_score, conversion_probability, recommended_action)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                cursor.executemany('''
+                    UPDATE crm_contacts SET score = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', [(r[1], r[0]) for r in rows])
+            conn.close()
 
-            for lead_id in leads:
-                result = self.score_lead(lead_id)
-                if 'error' in result:
-                    results['errors'] += 1
-                else:
-                    results['scored'] += 1
-                    results['scores'].append({
-                        'contact_id': lead_id,
-                        'score': result['score'],
-                        'label': result['label']
-                    })
-
+            results['scored'] = len(rows)
+            results['scores'] = [{'contact_id': r[0], 'score': r[1], 'label': r[2]} for r in rows]
+            results['duration_seconds'] = round(time.time() - started, 3)
             return results
 
         except Exception as e:
@@ -10752,9 +11665,14 @@ class CRMAgent:
                     conditions.append("assigned_to = ?")
                     params.append(filters['assigned_to'])
                 if filters.get('search'):
-                    conditions.append("(first_name LIKE ? OR last_name LIKE ? OR email LIKE ? OR company LIKE ?)")
-                    search = f"%{filters['search']}%"
-                    params.extend([search, search, search, search])
+                    fts = search_index.fts_condition(conn, 'contacts', filters['search'])
+                    if fts:
+                        conditions.append(fts[0])
+                        params.extend(fts[1])
+                    else:
+                        conditions.append("(first_name LIKE ? OR last_name LIKE ? OR email LIKE ? OR company LIKE ?)")
+                        search = f"%{filters['search']}%"
+                        params.extend([search, search, search, search])
 
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
@@ -11108,9 +12026,15 @@ class CRMAgent:
         """Calcule le score d'un lead avec IA"""
         log_agent(self.name, f"Scoring lead {contact_id}")
 
-        contact = self.get_contact(contact_id)
-        if 'error' in contact:
-            return contact
+        try:
+            conn = get_db()
+            features = load_contact_features(conn.cursor(), contact_ids=[contact_id])
+            conn.close()
+        except Exception as e:
+            return {'error': str(e)}
+        if not features['id']:
+            return {'error': 'Contact non trouve'}
+        contact = {key: values[0] for key, values in features.items()}
 
         # Criteres de scoring
         score = 0
@@ -11138,7 +12062,7 @@ class CRMAgent:
             factors.append("Site web fourni (+10)")
 
         # Nombre d'interactions
-        interactions = len(contact.get('interactions', []))
+        interactions = contact.get('interactions', 0)
         if interactions >= 3:
             score += 20
             factors.append(f"Engagement eleve ({interactions} interactions) (+20)")
@@ -12052,6 +12976,8 @@ class CalendarAgent:
             )
         ''')
 
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calendar_events_start ON calendar_events(start_datetime)')
+
         # Disponibilites par defaut Lun-Ven 9h-17h
         cursor.execute('SELECT COUNT(*) FROM calendar_availability')
         if cursor.fetchone()[0] == 0:
@@ -12212,78 +13138,136 @@ class CalendarAgent:
         except Exception as e:
             return {'error': str(e)}
 
-    def get_availability(self, date=None, service_id=None):
-        """Creneaux disponibles pour une date"""
+    DAY_NAMES = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+    MAX_AVAILABILITY_DAYS = 90
+
+    @staticmethod
+    def _parse_event_dt(value):
+        """Parse une date d'evenement ('YYYY-MM-DD HH:MM[:SS]', 'T', fractions, fuseau ignores)"""
+        value = str(value).replace('T', ' ').replace('Z', '').split('+')[0].split('.')[0].strip()
+        return datetime.fromisoformat(value)
+
+    def _load_busy_intervals(self, cursor, range_start, range_end):
+        """
+        Charge en une requete les evenements qui chevauchent [range_start, range_end)
+        et les fusionne en intervalles occupes tries et disjoints.
+        Retourne (debuts, fins): deux listes paralleles pour la recherche par bisect.
+        """
+        cursor.execute('''
+            SELECT start_datetime, end_datetime FROM calendar_events
+            WHERE start_datetime < ? AND end_datetime > ? AND status != 'cancelled'
+            ORDER BY start_datetime
+        ''', (range_end.strftime('%Y-%m-%d %H:%M:%S'), range_start.strftime('%Y-%m-%d %H:%M:%S')))
+
+        intervals = []
+        for ev_start, ev_end in cursor.fetchall():
+            try:
+                intervals.append((self._parse_event_dt(ev_start), self._parse_event_dt(ev_end)))
+            except (TypeError, ValueError):
+                continue
+        intervals.sort()
+
+        starts, ends = [], []
+        for es, ee in intervals:
+            if ends and es <= ends[-1]:
+                ends[-1] = max(ends[-1], ee)
+            else:
+                starts.append(es)
+                ends.append(ee)
+        return starts, ends
+
+    def get_availability_range(self, start_date=None, days=7, service_id=None):
+        """
+        Creneaux disponibles sur plusieurs jours (widget de reservation).
+        Les evenements de la periode sont charges une seule fois, fusionnes en
+        intervalles tries, puis tous les creneaux sont evalues en un balayage.
+        """
         try:
             self.init_db()
             conn = get_db()
             cursor = conn.cursor()
 
-            if not date:
-                date = datetime.now().strftime('%Y-%m-%d')
-
-            target_date = datetime.strptime(date, '%Y-%m-%d')
-            day_of_week = target_date.weekday()
+            if not start_date:
+                start_date = datetime.now().strftime('%Y-%m-%d')
+            days = max(1, min(int(days or 1), self.MAX_AVAILABILITY_DAYS))
+            first_day = datetime.strptime(start_date, '%Y-%m-%d')
+            range_end = first_day + timedelta(days=days)
 
             cursor.execute('''
-                SELECT start_time, end_time, slot_duration, buffer_time
-                FROM calendar_availability WHERE day_of_week = ? AND is_available = 1
-            ''', (day_of_week,))
-
-            avail = cursor.fetchone()
-            if not avail:
-                conn.close()
-                return {'date': date, 'available': False, 'slots': []}
-
-            start_time, end_time, slot_duration, buffer_time = avail
+                SELECT day_of_week, start_time, end_time, slot_duration, buffer_time
+                FROM calendar_availability WHERE is_available = 1
+                ORDER BY id
+            ''')
+            weekly = {}
+            for row in cursor.fetchall():
+                weekly.setdefault(row[0], row[1:])
 
+            service_duration = None
             if service_id:
                 cursor.execute('SELECT duration FROM calendar_services WHERE id = ?', (service_id,))
                 svc = cursor.fetchone()
                 if svc:
-                    slot_duration = svc[0]
+                    service_duration = svc[0]
 
-            cursor.execute('''
-                SELECT start_datetime, end_datetime FROM calendar_events
-                WHERE DATE(start_datetime) = ? AND status != 'cancelled'
-            ''', (date,))
-            existing = [(r[0], r[1]) for r in cursor.fetchall()]
+            busy_starts, busy_ends = self._load_busy_intervals(cursor, first_day, range_end)
             conn.close()
 
-            slots = []
-            current = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
-            end = datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
-
-            while current + timedelta(minutes=slot_duration) <= end:
-                slot_end = current + timedelta(minutes=slot_duration)
-                is_free = True
-
-                for ev_start, ev_end in existing:
-                    es = datetime.strptime(ev_start.split('.')[0], '%Y-%m-%d %H:%M:%S')
-                    ee = datetime.strptime(ev_end.split('.')[0], '%Y-%m-%d %H:%M:%S')
-                    if not (slot_end <= es or current >= ee):
-                        is_free = False
-                        break
-
-                slots.append({
-                    'start': current.strftime('%H:%M'),
-                    'end': slot_end.strftime('%H:%M'),
-                    'available': is_free
+            result_days = []
+            for offset in range(days):
+                day = first_day + timedelta(days=offset)
+                date = day.strftime('%Y-%m-%d')
+                day_of_week = day.weekday()
+                avail = weekly.get(day_of_week)
+                if not avail:
+                    result_days.append({'date': date, 'available': False, 'slots': []})
+                    continue
+
+                start_time, end_time, slot_duration, buffer_time = avail
+                slot_duration = service_duration or slot_duration
+
+                slots = []
+                current = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+                end = datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
+                # Premier intervalle occupe qui finit apres le debut de journee
+                i = bisect.bisect_right(busy_ends, current)
+
+                while current + timedelta(minutes=slot_duration) <= end:
+                    slot_end = current + timedelta(minutes=slot_duration)
+                    while i < len(busy_ends) and busy_ends[i] <= current:
+                        i += 1
+                    is_free = i >= len(busy_starts) or busy_starts[i] >= slot_end
+
+                    slots.append({
+                        'start': current.strftime('%H:%M'),
+                        'end': slot_end.strftime('%H:%M'),
+                        'available': is_free
+                    })
+                    current = slot_end + timedelta(minutes=buffer_time or 0)
+
+                result_days.append({
+                    'date': date,
+                    'day_name': self.DAY_NAMES[day_of_week],
+                    'available': True,
+                    'slots': slots,
+                    'available_count': len([s for s in slots if s['available']])
                 })
-                current = slot_end + timedelta(minutes=buffer_time)
 
-            days = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
             return {
-                'date': date,
-                'day_name': days[day_of_week],
-                'available': True,
-                'slots': slots,
-                'available_count': len([s for s in slots if s['available']])
+                'start_date': start_date,
+                'days': result_days,
+                'available_count': sum(d.get('available_count', 0) for d in result_days)
             }
 
         except Exception as e:
             return {'error': str(e)}
 
+    def get_availability(self, date=None, service_id=None):
+        """Creneaux disponibles pour une date"""
+        result = self.get_availability_range(date, days=1, service_id=service_id)
+        if 'error' in result:
+            return result
+        return result['days'][0]
+
     def create_booking(self, data):
         """Cree une reservation"""
         try:
@@ -12722,6 +13706,10 @@ class ChatbotAgent:
             for key, value in defaults:
                 cursor.execute('INSERT INTO chatbot_config (key, value) VALUES (?, ?)', (key, value))
 
+        # Index de recherche FAQ/reponses/KB + journal des reponses (part sans LLM, latences)
+        faq_index.ensure_index(conn)
+        faq_index.init_answer_log(conn)
+
         conn.commit()
         conn.close()
         log_agent(self.name, "Tables chatbot initialisees")
@@ -12769,6 +13757,7 @@ class ChatbotAgent:
     def send_message(self, session_id, message, use_ai=True):
         """Envoie un message et obtient une reponse"""
         try:
+            started = time.perf_counter()
             self.init_db()
             conn = get_db()
             cursor = conn.cursor()
@@ -12796,25 +13785,26 @@ class ChatbotAgent:
                 UPDATE chatbot_conversations SET last_message_at = CURRENT_TIMESTAMP WHERE id = ?
             ''', (conversation_id,))
 
-            # Generer reponse
-            if use_ai and confidence < 0.7:
+            # Generer reponse: FAQ/KB locale si assez proche, sinon reponse pre-configuree ou AI
+            direct, passages = self._retrieve(conn, message, language)
+            ref_id = None
+            if direct:
+                response, source, ref_id = direct['answer'], direct['source'], direct['id']
+            elif use_ai and confidence < 0.7:
                 # Utiliser AI pour reponse complexe (Ollama d'abord, puis Fireworks)
-                response = self._generate_ai_response(message, conversation_id, cursor)
+                response, source = self._generate_ai_response(message, conversation_id, cursor, passages), 'llm'
             else:
                 # Reponse pre-configuree
-                cursor.execute('''
-                    SELECT response FROM chatbot_responses
-                    WHERE intent = ? AND language = ? AND is_active = 1
-                    ORDER BY priority DESC LIMIT 1
-                ''', (intent, language))
-                resp = cursor.fetchone()
-                response = resp[0] if resp else self._generate_ai_response(message, conversation_id, cursor)
+                response, source = self._canned_response(cursor, intent, language), 'canned'
+                if not response:
+                    response, source = self._generate_ai_response(message, conversation_id, cursor, passages), 'llm'
 
             # Sauvegarder reponse assistant
             cursor.execute('''
                 INSERT INTO chatbot_messages (conversation_id, role, content)
                 VALUES (?, 'assistant', ?)
             ''', (conversation_id, response))
+            faq_index.record_answer(conn, conversation_id, source, (time.perf_counter() - started) * 1000, ref_id)
 
             conn.commit()
             conn.close()
@@ -12823,12 +13813,36 @@ class ChatbotAgent:
                 'success': True,
                 'response': response,
                 'intent': intent,
-                'confidence': confidence
+                'confidence': confidence,
+                'source': source
             }
 
         except Exception as e:
             return {'error': str(e)}
 
+    def _canned_response(self, cursor, intent, language):
+        cursor.execute('''
+            SELECT response FROM chatbot_responses
+            WHERE intent = ? AND language = ? AND is_active = 1
+            ORDER BY priority DESC LIMIT 1
+        ''', (intent, language))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _retrieve(self, conn, message, language):
+        """
+        Recherche locale (FTS5/BM25, < 1 ms): une FAQ/KB tres proche passe avant la reponse
+        generique de l'intention. Retourne (reponse directe ou None, passages pour le prompt AI).
+        """
+        try:
+            direct, passages = faq_index.retrieve(conn, message, language)
+        except sqlite3.Error as e:
+            log_agent(self.name, f"Recherche FAQ indisponible: {e}", 'WARNING')
+            return None, []
+        if direct and direct['source'] == 'faq':
+            conn.execute('UPDATE chatbot_faq SET views = views + 1 WHERE id = ?', (direct['id'],))
+        return direct, passages
+
     def _detect_intent(self, message):
         """Detecte l'intention du message"""
         message_lower = message.lower()
@@ -12848,23 +13862,27 @@ class ChatbotAgent:
         confidence = min(best_score / 2, 1.0) if best_score > 0 else 0
         return best_intent, confidence
 
-    def _generate_ai_response(self, message, conversation_id, cursor):
-        """Genere une reponse avec AI"""
-        try:
-            # Obtenir historique recent
-            cursor.execute('''
-                SELECT role, content FROM chatbot_messages
-                WHERE conversation_id = ?
-                ORDER BY created_at DESC LIMIT 6
-            ''', (conversation_id,))
-            history = cursor.fetchall()[::-1]
-
-            history_text = "\n".join([f"{r[0]}: {r[1]}" for r in history])
+    FALLBACK_RESPONSE = "Je comprends votre demande. Un conseiller vous contactera sous peu pour mieux vous aider."
 
-            prompt = f"""Tu es un assistant virtuel professionnel pour une entreprise.
+    def _ai_prompt(self, message, conversation_id, cursor, passages=None):
+        """Prompt AI avec l'historique recent de la conversation (+ passages FAQ/KB pertinents)"""
+        cursor.execute('''
+            SELECT role, content FROM chatbot_messages
+            WHERE conversation_id = ?
+            ORDER BY created_at DESC LIMIT 6
+        ''', (conversation_id,))
+        history = cursor.fetchall()[::-1]
+
+        history_text = "\n".join([f"{r[0]}: {r[1]}" for r in history])
+        knowledge = ""
+        if passages:
+            knowledge = "INFORMATIONS DE L'ENTREPRISE (a utiliser si pertinentes):\n" + "\n".join(
+                f"- {p['title']}: {p['answer']}" for p in passages) + "\n\n"
+
+        return f"""Tu es un assistant virtuel professionnel pour une entreprise.
 Reponds de maniere concise, amicale et utile.
 
-HISTORIQUE:
+{knowledge}HISTORIQUE:
 {history_text}
 
 MESSAGE CLIENT: {message}
@@ -12877,6 +13895,18 @@ REGLES:
 
 REPONSE:"""
 
+    @staticmethod
+    def _clean_ai_response(response):
+        response = (response or '').strip()
+        if response.startswith('"') and response.endswith('"'):
+            response = response[1:-1]
+        return response
+
+    def _generate_ai_response(self, message, conversation_id, cursor, passages=None):
+        """Genere une reponse avec AI"""
+        try:
+            prompt = self._ai_prompt(message, conversation_id, cursor, passages)
+
             # Hybride: Ollama LOCAL d'abord (gratuit), puis Fireworks
             response = call_ollama(prompt, 300)
             if not response:
@@ -12884,16 +13914,73 @@ REPONSE:"""
 
             if response:
                 # Nettoyer la reponse
-                response = response.strip()
-                if response.startswith('"') and response.endswith('"'):
-                    response = response[1:-1]
-                return response
+                return self._clean_ai_response(response)
 
-            return "Je comprends votre demande. Un conseiller vous contactera sous peu pour mieux vous aider."
+            return self.FALLBACK_RESPONSE
 
         except Exception:
             return "Merci pour votre message. Comment puis-je vous aider davantage?"
 
+    def stream_message(self, session_id, message, use_ai=True):
+        """
+        Variante streaming de send_message. Le message client est enregistre tout de suite;
+        retourne {'chunks': texte au fil de l'eau, 'finish': fn(texte) qui enregistre
+        la reponse assistant, 'intent', 'confidence'} ou {'error': ...}.
+        """
+        started = time.perf_counter()
+        self.init_db()
+        conn = get_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, language FROM chatbot_conversations WHERE session_id = ?', (session_id,))
+            conv = cursor.fetchone()
+            if not conv:
+                return {'error': 'Conversation non trouvee'}
+            conversation_id, language = conv
+
+            intent, confidence = self._detect_intent(message)
+            cursor.execute('''
+                INSERT INTO chatbot_messages (conversation_id, role, content, intent, confidence)
+                VALUES (?, 'user', ?, ?, ?)
+            ''', (conversation_id, message, intent, confidence))
+            cursor.execute('''
+                UPDATE chatbot_conversations SET last_message_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (conversation_id,))
+
+            direct, passages = self._retrieve(conn, message, language)
+            canned, source, ref_id = None, 'llm', None
+            if direct:
+                canned, source, ref_id = direct['answer'], direct['source'], direct['id']
+            elif not (use_ai and confidence < 0.7):
+                canned = self._canned_response(cursor, intent, language)
+                source = 'canned' if canned else 'llm'
+            prompt = None if canned else self._ai_prompt(message, conversation_id, cursor, passages)
+            conn.commit()
+        finally:
+            conn.close()
+
+        if canned:
+            chunks = iter([canned])
+        else:
+            chunks = first_available(lambda: stream_ollama(prompt, 300), lambda: stream_qwen(prompt, 300),
+                                     label='Chatbot')
+
+        def finish(text):
+            response = (text if canned else self._clean_ai_response(text)) or self.FALLBACK_RESPONSE
+            db = get_db()
+            try:
+                with db:
+                    db.execute('''
+                        INSERT INTO chatbot_messages (conversation_id, role, content)
+                        VALUES (?, 'assistant', ?)
+                    ''', (conversation_id, response))
+                    faq_index.record_answer(db, conversation_id, source, (time.perf_counter() - started) * 1000, ref_id)
+            finally:
+                db.close()
+            return {'response': response, 'intent': intent, 'confidence': confidence, 'source': source}
+
+        return {'chunks': chunks, 'finish': finish, 'intent': intent, 'confidence': confidence}
+
     def capture_lead(self, session_id, name=None, email=None, phone=None):
         """Capture les infos du lead"""
         try:
@@ -13089,22 +14176,23 @@ REPONSE:"""
             conn = get_db()
             cursor = conn.cursor()
 
-            search = f"%{query}%"
-            cursor.execute('''
-                SELECT id, question, answer, keywords
-                FROM chatbot_faq
-                WHERE language = ? AND is_active = 1
-                AND (question LIKE ? OR answer LIKE ? OR keywords LIKE ?)
-                ORDER BY views DESC LIMIT 5
-            ''', (language, search, search, search))
-
-            rows = cursor.fetchall()
+            # Classement BM25 via l'index FTS5 (repli LIKE integre a faq_index)
+            hits = faq_index.search(conn, query, language, limit=5, sources=('faq',))
+            ids = [h['id'] for h in hits]
+            rows = {}
+            if ids:
+                cursor.execute(f'''
+                    SELECT id, question, answer, keywords FROM chatbot_faq
+                    WHERE id IN ({','.join('?' * len(ids))})
+                ''', ids)
+                rows = {r[0]: r for r in cursor.fetchall()}
             conn.close()
 
             return [{
                 'id': r[0], 'question': r[1], 'answer': r[2],
-                'keywords': r[3].split(',') if r[3] else []
-            } for r in rows]
+                'keywords': r[3].split(',') if r[3] else [],
+                'score': h['similarity']
+            } for h in hits for r in [rows.get(h['id'])] if r]
 
         except Exception as e:
             return {'error': str(e)}
@@ -13212,6 +14300,8 @@ REPONSE:"""
             ''', (start_date, end_date))
             top_intents = [{'intent': r[0], 'count': r[1]} for r in cursor.fetchall()]
 
+            answers = faq_index.answer_stats(conn, start_date, end_date)
+
             conn.close()
 
             total_conv = conv_stats[0] or 0
@@ -13229,7 +14319,8 @@ REPONSE:"""
                     'conversion_rate': round(leads / total_conv * 100, 1) if total_conv > 0 else 0
                 },
                 'messages': {'total': msg_count},
-                'top_intents': top_intents
+                'top_intents': top_intents,
+                'answers': answers
             }
 
         except Exception as e:
@@ -13244,6 +14335,102 @@ REPONSE:"""
 # AGENT 51: NOTIFICATION AGENT - Email/SMS/Push
 # ============================================
 
+class SMTPConnectionPool:
+    """
+    Pool de connexions SMTP persistantes, un pool par relais et identifiants
+    (host, port, user, password, tls). Les connexions sont reutilisees entre envois
+    et verifiees par NOOP.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, host, port=25, user=None, password=None, use_tls=False, max_size=8, timeout=30):
+        self.host = host
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+
+    @classmethod
+    def for_relay(cls, host, port=25, user=None, password=None, use_tls=False, max_size=8):
+        """
+        Retourne le pool partage du relais (cree au premier appel). Un changement de mot
+        de passe ou de TLS cree un nouveau pool; l'ancien du meme relais est ferme.
+        """
+        key = (host, int(port), user, password, bool(use_tls))
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                for old_key in [k for k in cls._pools if k[:3] == key[:3]]:
+                    cls._pools.pop(old_key).close()
+                pool = cls(host, port, user, password, use_tls, max_size)
+                cls._pools[key] = pool
+            return pool
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        return server
+
+    def _acquire(self):
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._discard(server)
+
+    def _release(self, server):
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self._discard(server)
+
+    @staticmethod
+    def _discard(server):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    def send(self, from_addr, to_addrs, message):
+        """Envoie un message; reessaie une fois sur une connexion neuve si le relais a coupe"""
+        server = self._acquire()
+        try:
+            server.sendmail(from_addr, to_addrs, message)
+        except smtplib.SMTPServerDisconnected:
+            self._discard(server)
+            server = self._connect()
+            try:
+                server.sendmail(from_addr, to_addrs, message)
+            except Exception:
+                self._discard(server)
+                raise
+        except Exception:
+            self._discard(server)
+            raise
+        self._release(server)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
 class NotificationAgent:
     """
     Agent de notifications multi-canal
@@ -13271,6 +14458,17 @@ class NotificationAgent:
         {'code': 'CUSTOM', 'name': 'Personnalise', 'channels': ['email', 'sms', 'push']},
     ]
 
+    # Dispatcher: workers par canal, bail de reservation, retries exponentiels
+    CHANNEL_WORKERS = {'email': 8, 'sms': 4, 'push': 4}
+    DEFAULT_CHANNEL_WORKERS = 2
+    CLAIM_BATCH = 25
+    LEASE_SECONDS = 300
+    MAX_ATTEMPTS = 5
+    FINALIZE_ATTEMPTS = 3
+    SMTP_SETTINGS_TTL = 60        # agent partage (registre): reglages SMTP relus au plus tard apres ce delai
+    RETRY_BASE_SECONDS = 60
+    RETRY_MAX_SECONDS = 6 * 3600
+
     def init_db(self):
         """Initialise les tables notifications"""
         conn = get_db()
@@ -13341,6 +14539,18 @@ class NotificationAgent:
             )
         ''')
 
+        # Colonnes du dispatcher (bail, retries, metriques)
+        for column in ('lease_owner TEXT', 'lease_expires TIMESTAMP', 'next_attempt_at TIMESTAMP',
+                       'last_error TEXT', 'sent_at TIMESTAMP', 'latency_ms INTEGER'):
+            try:
+                cursor.execute(f'ALTER TABLE notification_queue ADD COLUMN {column}')
+            except sqlite3.OperationalError:
+                pass
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notification_queue_claim
+            ON notification_queue(status, channel, priority, created_at)
+        ''')
+
         # Templates par defaut
         cursor.execute('SELECT COUNT(*) FROM notification_templates')
         if cursor.fetchone()[0] == 0:
@@ -13456,58 +14666,26 @@ Cordialement,
         """
         try:
             self.init_db()
-            conn = get_db()
-            cursor = conn.cursor()
+            subject, content = self._render(notification_type, channel, data, template_id)
 
-            # Obtenir template
-            if template_id:
-                cursor.execute('SELECT subject, content, variables FROM notification_templates WHERE id = ?', (template_id,))
-            else:
-                cursor.execute('''
-                    SELECT subject, content, variables FROM notification_templates
-                    WHERE type = ? AND channel = ? AND is_active = 1 LIMIT 1
-                ''', (notification_type, channel))
+            # Envoyer selon le canal (aucune connexion DB ouverte pendant l'envoi)
+            success, error = self._deliver(channel, recipient, subject, content)
 
-            template = cursor.fetchone()
-
-            if not template:
-                # Generer contenu avec AI si pas de template
-                content = self._generate_notification_content(notification_type, data)
-                subject = data.get('subject', notification_type)
-            else:
-                subject, content, variables = template
-                # Remplacer les variables
-                content = self._replace_variables(content, data)
-                if subject:
-                    subject = self._replace_variables(subject, data)
-
-            # Creer notification
+            # Creer notification avec son statut final
+            status = 'sent' if success else 'failed'
+            conn = get_db()
+            cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO notifications
-                (type, channel, recipient_email, recipient_phone, recipient_name, subject, content, template_id, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending')
+                (type, channel, recipient_email, recipient_phone, recipient_name, subject, content,
+                 template_id, status, sent_at, error_message)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
             ''', (
                 notification_type, channel,
                 recipient.get('email'), recipient.get('phone'), recipient.get('name'),
-                subject, content, template_id
+                subject, content, template_id, status, error
             ))
-
             notification_id = cursor.lastrowid
-
-            # Envoyer selon le canal
-            if channel == 'email':
-                success = self._send_email(recipient.get('email'), subject, content)
-            elif channel == 'sms':
-                success = self._send_sms(recipient.get('phone'), content)
-            else:
-                success = True  # Push/autre
-
-            # Mettre a jour statut
-            status = 'sent' if success else 'failed'
-            cursor.execute('''
-                UPDATE notifications SET status = ?, sent_at = CURRENT_TIMESTAMP WHERE id = ?
-            ''', (status, notification_id))
-
             conn.commit()
             conn.close()
 
@@ -13524,6 +14702,54 @@ Cordialement,
             log_agent(self.name, f"Erreur notification: {e}")
             return {'error': str(e)}
 
+    def _render(self, notification_type, channel, data, template_id=None, templates=None):
+        """
+        Construit (subject, content) depuis le template actif.
+        templates: cache optionnel {(type, channel) ou id: template} partage par le dispatcher
+        """
+        key = template_id or (notification_type, channel)
+        if templates is not None and key in templates:
+            template = templates[key]
+        else:
+            conn = get_db()
+            cursor = conn.cursor()
+            if template_id:
+                cursor.execute('SELECT subject, content, variables FROM notification_templates WHERE id = ?', (template_id,))
+            else:
+                cursor.execute('''
+                    SELECT subject, content, variables FROM notification_templates
+                    WHERE type = ? AND channel = ? AND is_active = 1 LIMIT 1
+                ''', (notification_type, channel))
+            template = cursor.fetchone()
+            conn.close()
+            if templates is not None:
+                templates[key] = template
+
+        if not template:
+            # Generer contenu avec AI si pas de template
+            content = self._generate_notification_content(notification_type, data)
+            subject = data.get('subject', notification_type)
+        else:
+            subject, content, variables = template
+            # Remplacer les variables
+            content = self._replace_variables(content, data)
+            if subject:
+                subject = self._replace_variables(subject, data)
+        return subject, content
+
+    def _deliver(self, channel, recipient, subject, content):
+        """Envoie sur le canal; retourne (succes, message d'erreur)"""
+        try:
+            if channel == 'email':
+                success = self._send_email(recipient.get('email'), subject, content)
+            elif channel == 'sms':
+                success = self._send_sms(recipient.get('phone'), content)
+            else:
+                success = True  # Push/autre
+            return success, None if success else f'Envoi {channel} refuse'
+        except Exception as e:
+            return False, str(e)[:500]
+
     def _replace_variables(self, template, data):
         """Remplace {{variable}} par les valeurs"""
         result = template
@@ -13531,16 +14757,58 @@ Cordialement,
             result = result.replace('{{' + key + '}}', str(value or ''))
         return result
 
-    def _send_email(self, to_email, subject, content):
-        """Envoie email (placeholder - a connecter avec SMTP/SendGrid)"""
+    def _smtp_settings(self):
+        """
+        Relais SMTP: cles smtp_* de notification_config, sinon variables SMTP_*.
+        Sans smtp_host, les emails sont seulement journalises.
+        """
+        settings = {}
         try:
-            # TODO: Integrer avec service email reel
-            # Pour l'instant, log seulement
-            log_agent(self.name, f"EMAIL -> {to_email}: {subject[:50]}...")
+            conn = get_db()
+            cursor = conn.cursor()
+            cursor.execute("SELECT key, value FROM notification_config WHERE key LIKE 'smtp_%'")
+            settings = dict(cursor.fetchall())
+            conn.close()
+        except sqlite3.Error:
+            pass
+        for key in ('host', 'port', 'user', 'password', 'from', 'tls'):
+            env = os.getenv(f'SMTP_{key.upper()}')
+            if env and not settings.get(f'smtp_{key}'):
+                settings[f'smtp_{key}'] = env
+        return settings
+
+    def _get_smtp_pool(self):
+        """
+        (pool SMTP du relais configure ou None, adresse d'expedition).
+        Reglages relus a chaque process_queue et au plus tard apres SMTP_SETTINGS_TTL.
+        """
+        cached = getattr(self, '_smtp', None)
+        if cached is not None and time.monotonic() - cached[0] < self.SMTP_SETTINGS_TTL:
+            return cached[1], cached[2]
+        settings = self._smtp_settings()
+        from_addr = settings.get('smtp_from') or settings.get('smtp_user') or 'noreply@seoparai.com'
+        pool = None
+        if settings.get('smtp_host'):
+            pool = SMTPConnectionPool.for_relay(
+                settings['smtp_host'], settings.get('smtp_port') or 25,
+                settings.get('smtp_user'), settings.get('smtp_password'),
+                use_tls=str(settings.get('smtp_tls', '')).lower() in ('1', 'true', 'yes'),
+                max_size=self.CHANNEL_WORKERS['email'])
+        self._smtp = (time.monotonic(), pool, from_addr)
+        return pool, from_addr
+
+    def _send_email(self, to_email, subject, content):
+        """Envoie email via le pool SMTP du relais configure (log seulement sans relais)"""
+        pool, from_addr = self._get_smtp_pool()
+        if pool is None:
+            log_agent(self.name, f"EMAIL -> {to_email}: {(subject or '')[:50]}...")
             return True
-        except Exception as e:
-            log_agent(self.name, f"Erreur email: {e}")
-            return False
+        msg = MIMEText(content, 'plain', 'utf-8')
+        msg['Subject'] = subject or ''
+        msg['From'] = from_addr
+        msg['To'] = to_email
+        pool.send(from_addr, [to_email], msg.as_string())
+        return True
 
     def _send_sms(self, to_phone, content):
         """Envoie SMS (placeholder - a connecter avec Twilio)"""
@@ -13601,48 +14869,231 @@ MESSAGE:"""
         except Exception as e:
             return {'error': str(e)}
 
-    def process_queue(self, limit=10):
-        """Traite les notifications en attente"""
+    def _claim(self, channel, worker_id, batch_size):
+        """
+        Reserve atomiquement un lot de la file (UPDATE ... RETURNING) avec un bail.
+        Les elements dont le bail a expire (worker mort) redeviennent reservables.
+        La transaction ne dure que le temps de l'UPDATE.
+        """
+        conn = get_db()
         try:
-            self.init_db()
-            conn = get_db()
-            cursor = conn.cursor()
+            rows = conn.execute('''
+                UPDATE notification_queue
+                SET status = 'processing', lease_owner = ?,
+                    lease_expires = datetime('now', ?), attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM notification_queue
+                    WHERE channel = ? AND (
+                        (status = 'queued'
+                         AND (scheduled_at IS NULL OR scheduled_at <= datetime('now'))
+                         AND (next_attempt_at IS NULL OR next_attempt_at <= datetime('now')))
+                        OR (status = 'processing' AND lease_expires < datetime('now'))
+                    )
+                    ORDER BY priority DESC, created_at ASC
+                    LIMIT ?
+                )
+                RETURNING id, notification_type, channel, recipient, data, attempts
+            ''', (worker_id, f'+{self.LEASE_SECONDS} seconds', channel, batch_size)).fetchall()
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
 
-            cursor.execute('''
-                SELECT id, notification_type, channel, recipient, data
-                FROM notification_queue
-                WHERE status = 'queued' AND (scheduled_at IS NULL OR scheduled_at <= datetime('now'))
-                ORDER BY priority DESC, created_at ASC
-                LIMIT ?
-            ''', (limit,))
+    def _finalize(self, worker_id, outcomes):
+        """Ecrit les resultats d'un lot en une courte transaction (seulement si le bail est encore a nous)"""
+        sent, retry, failed, notifications = [], [], [], []
+        for item in outcomes:
+            if item['success']:
+                sent.append((item['latency_ms'], item['id'], worker_id))
+            elif item['attempts'] >= self.MAX_ATTEMPTS:
+                failed.append((item['error'], item['id'], worker_id))
+            else:
+                delay = min(self.RETRY_MAX_SECONDS, self.RETRY_BASE_SECONDS * 2 ** (item['attempts'] - 1))
+                retry.append((f'+{delay} seconds', item['error'], item['id'], worker_id))
+            if item['success'] or item['attempts'] >= self.MAX_ATTEMPTS:
+                recipient = item['recipient']
+                notifications.append((
+                    item['type'], item['channel'], recipient.get('email'), recipient.get('phone'),
+                    recipient.get('name'), item['subject'], item['content'],
+                    'sent' if item['success'] else 'failed', item['error']))
 
-            items = cursor.fetchall()
-            processed = 0
+        conn = get_db()
+        try:
+            with conn:
+                conn.executemany('''
+                    UPDATE notification_queue
+                    SET status = 'sent', sent_at = CURRENT_TIMESTAMP, latency_ms = ?, lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ? AND lease_owner = ?
+                ''', sent)
+                conn.executemany('''
+                    UPDATE notification_queue
+                    SET status = 'failed', last_error = ?, lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ? AND lease_owner = ?
+                ''', failed)
+                conn.executemany('''
+                    UPDATE notification_queue
+                    SET status = 'queued', next_attempt_at = datetime('now', ?), last_error = ?,
+                        lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ? AND lease_owner = ?
+                ''', retry)
+                conn.executemany('''
+                    INSERT INTO notifications
+                    (type, channel, recipient_email, recipient_phone, recipient_name, subject, content,
+                     status, sent_at, error_message)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ''', notifications)
+        finally:
+            conn.close()
+        return len(sent), len(retry), len(failed)
 
-            for item in items:
-                queue_id, ntype, channel, recipient_json, data_json = item
+    def _split_budget(self, limit, pending):
+        """
+        Partage max-min du budget entre canaux: un canal peu charge recoit ce qu'il lui faut,
+        le reste est reparti a parts egales entre les autres (aucun canal n'affame les autres)
+        """
+        budgets = {channel: 0 for channel in pending}
+        remaining = {channel: n for channel, n in pending.items() if n > 0}
+        left = limit
+        while left > 0 and remaining:
+            share = max(1, left // len(remaining))
+            for channel in sorted(remaining, key=remaining.get):
+                take = min(share, remaining[channel], left)
+                budgets[channel] += take
+                remaining[channel] -= take
+                left -= take
+                if not remaining[channel]:
+                    del remaining[channel]
+                if left <= 0:
+                    break
+        return budgets
+
+    def _channel_worker(self, channel, worker_id, budget, budget_lock, metrics, templates):
+        """Worker d'un canal: reserve, envoie, finalise, jusqu'a epuisement de la file ou du budget du canal"""
+        while True:
+            with budget_lock:
+                size = min(self.CLAIM_BATCH, budget[channel])
+                budget[channel] -= size
+            if size <= 0:
+                return
+            try:
+                items = self._claim(channel, worker_id, size)
+            except Exception as e:
+                log_agent(self.name, f"Reservation {channel} impossible: {e}", "ERROR")
+                with budget_lock:
+                    metrics[channel]['errors'] += 1
+                return
+            with budget_lock:
+                budget[channel] += size - len(items)
+            if not items:
+                return
 
+            outcomes = []
+            for queue_id, ntype, item_channel, recipient_json, data_json, attempts in items:
+                started = time.time()
+                recipient, subject, content = {}, None, ''
                 try:
                     recipient = json.loads(recipient_json)
                     data = json.loads(data_json) if data_json else {}
+                    subject, content = self._render(ntype, item_channel, data, templates=templates)
+                    success, error = self._deliver(item_channel, recipient, subject, content)
+                except Exception as e:
+                    success, error = False, str(e)[:500]
+                latency_ms = int((time.time() - started) * 1000)
+                outcomes.append({
+                    'id': queue_id, 'type': ntype, 'channel': item_channel, 'recipient': recipient,
+                    'subject': subject, 'content': content, 'attempts': attempts,
+                    'success': success, 'error': error, 'latency_ms': latency_ms
+                })
 
-                    result = self.send_notification(ntype, channel, recipient, data)
-
-                    status = 'sent' if result.get('success') else 'failed'
-                    cursor.execute('''
-                        UPDATE notification_queue SET status = ?, attempts = attempts + 1 WHERE id = ?
-                    ''', (status, queue_id))
-
-                    processed += 1
+            for attempt in range(self.FINALIZE_ATTEMPTS):
+                try:
+                    sent, retried, failed = self._finalize(worker_id, outcomes)
+                    break
                 except Exception as e:
-                    cursor.execute('''
-                        UPDATE notification_queue SET status = 'failed', attempts = attempts + 1 WHERE id = ?
-                    ''', (queue_id,))
+                    log_agent(self.name, f"Finalisation {channel} (essai {attempt + 1}): {e}", "ERROR")
+                    time.sleep(0.5 * 2 ** attempt)
+            else:
+                # Envois faits mais non enregistres: les lignes restent 'processing' jusqu'a la fin du bail
+                with budget_lock:
+                    metrics[channel]['errors'] += 1
+                    metrics[channel]['latencies_ms'].extend(o['latency_ms'] for o in outcomes)
+                continue
+            with budget_lock:
+                m = metrics[channel]
+                m['sent'] += sent
+                m['retried'] += retried
+                m['failed'] += failed
+                m['latencies_ms'].extend(o['latency_ms'] for o in outcomes)
 
-            conn.commit()
+    def process_queue(self, limit=10):
+        """
+        Traite les notifications en attente.
+        Chaque canal a ses propres workers et sa part du budget (limit); les lignes sont reservees par bail
+        (deux dispatchers ne peuvent pas envoyer le meme element), envoyees hors
+        transaction, puis finalisees par lot. Les echecs sont replanifies avec
+        un delai exponentiel jusqu'a MAX_ATTEMPTS.
+        """
+        try:
+            self.init_db()
+            started = time.time()
+            self._smtp = None       # reglages SMTP relus a chaque passage
+            conn = get_db()
+            cursor = conn.cursor()
+            # Elements reservables par canal (memes criteres que _claim) pour partager le budget
+            cursor.execute('''
+                SELECT channel, COUNT(*) FROM notification_queue
+                WHERE (status = 'queued'
+                       AND (scheduled_at IS NULL OR scheduled_at <= datetime('now'))
+                       AND (next_attempt_at IS NULL OR next_attempt_at <= datetime('now')))
+                   OR (status = 'processing' AND lease_expires < datetime('now'))
+                GROUP BY channel
+            ''')
+            pending = dict(cursor.fetchall())
             conn.close()
 
-            return {'success': True, 'processed': processed}
+            budget = self._split_budget(limit, pending)
+            channels = [c for c, n in budget.items() if n > 0]
+            budget_lock = threading.Lock()
+            templates = {}
+            metrics = {c: {'sent': 0, 'retried': 0, 'failed': 0, 'errors': 0, 'latencies_ms': []} for c in channels}
+            dispatcher_id = f'{os.getpid()}-{threading.get_ident()}-{int(started * 1000)}'
+
+            threads = []
+            for channel in channels:
+                for n in range(self.CHANNEL_WORKERS.get(channel, self.DEFAULT_CHANNEL_WORKERS)):
+                    t = threading.Thread(target=self._channel_worker, daemon=True, args=(
+                        channel, f'{dispatcher_id}-{channel}-{n}', budget, budget_lock, metrics, templates))
+                    t.start()
+                    threads.append(t)
+            for t in threads:
+                t.join()
+
+            duration = time.time() - started
+            report = {}
+            for channel, m in metrics.items():
+                latencies = sorted(m.pop('latencies_ms'))
+                count = len(latencies)
+                if not count:
+                    if m['errors']:
+                        report[channel] = {**m, 'processed': 0}
+                    continue
+                report[channel] = {
+                    **m,
+                    'processed': count,
+                    'per_second': round(count / duration, 1) if duration > 0 else 0,
+                    'latency_p50_ms': latencies[count // 2],
+                    'latency_p95_ms': latencies[min(count - 1, int(count * 0.95))],
+                    'latency_max_ms': latencies[-1]
+                }
+
+            processed = sum(m['processed'] for m in report.values())
+            log_agent(self.name, f"File traitee: {processed} notifications en {duration:.1f}s")
+            return {
+                'success': True,
+                'processed': processed,
+                'duration_seconds': round(duration, 2),
+                'metrics': report
+            }
 
         except Exception as e:
             return {'error': str(e)}
@@ -14878,6 +16329,15 @@ Propose des solutions concretes si possible."""
                 if filters.get('assigned_to'):
                     query += ' AND assigned_to = ?'
                     params.append(filters['assigned_to'])
+                if filters.get('search'):
+                    fts = search_index.fts_condition(conn, 'tickets', filters['search'])
+                    if fts:
+                        query += ' AND ' + fts[0]
+                        params.extend(fts[1])
+                    else:
+                        search = f"%{filters['search']}%"
+                        query += ' AND (ticket_number LIKE ? OR subject LIKE ? OR email LIKE ? OR name LIKE ?)'
+                        params.extend([search, search, search, search])
 
             query += ' ORDER BY CASE priority WHEN "urgent" THEN 1 WHEN "high" THEN 2 WHEN "medium" THEN 3 ELSE 4 END, created_at DESC LIMIT ?'
             params.append(limit)
@@ -15256,11 +16716,19 @@ Retourne en JSON: {{"title": "...", "content": "...(markdown)...", "excerpt": ".
             conn = get_db()
             cursor = conn.cursor()
 
-            search_term = f'%{query}%'
-            cursor.execute('''SELECT id, slug, title, excerpt, view_count FROM kb_articles
-                WHERE status = 'published' AND (title LIKE ? OR content LIKE ? OR tags LIKE ?)
-                ORDER BY view_count DESC LIMIT ?''', (search_term, search_term, search_term, limit))
-            rows = cursor.fetchall()
+            ids = search_index.ranked_ids(conn, 'kb', query, limit, where="t.status = 'published'")
+            if ids is not None:
+                # Ordre BM25 conserve
+                cursor.execute(f'''SELECT id, slug, title, excerpt, view_count FROM kb_articles
+                    WHERE id IN ({','.join('?' * len(ids))})''', ids)
+                found = {r[0]: r for r in cursor.fetchall()}
+                rows = [found[i] for i in ids if i in found]
+            else:
+                search_term = f'%{query}%'
+                cursor.execute('''SELECT id, slug, title, excerpt, view_count FROM kb_articles
+                    WHERE status = 'published' AND (title LIKE ? OR content LIKE ? OR tags LIKE ?)
+                    ORDER BY view_count DESC LIMIT ?''', (search_term, search_term, search_term, limit))
+                rows = cursor.fetchall()
 
             # Log search
             cursor.execute('INSERT INTO kb_searches (query, results_count) VALUES (?, ?)', (query, len(rows)))
@@ -15278,12 +16746,19 @@ Retourne en JSON: {{"title": "...", "content": "...(markdown)...", "excerpt": ".
             conn = get_db()
             cursor = conn.cursor()
 
-            # Chercher articles pertinents
-            search_term = f'%{question}%'
-            cursor.execute('''SELECT title, content FROM kb_articles
-                WHERE status = 'published' AND (title LIKE ? OR content LIKE ?)
-                LIMIT 3''', (search_term, search_term))
-            articles = cursor.fetchall()
+            # Chercher articles pertinents (BM25, un terme significatif suffit)
+            ids = search_index.ranked_ids(conn, 'kb', question, 3, where="t.status = 'published'", any_term=True)
+            if ids is not None:
+                cursor.execute(f'''SELECT id, title, content FROM kb_articles
+                    WHERE id IN ({','.join('?' * len(ids))})''', ids)
+                found = {r[0]: r[1:] for r in cursor.fetchall()}
+                articles = [found[i] for i in ids if i in found]
+            else:
+                search_term = f'%{question}%'
+                cursor.execute('''SELECT title, content FROM kb_articles
+                    WHERE status = 'published' AND (title LIKE ? OR content LIKE ?)
+                    LIMIT 3''', (search_term, search_term))
+                articles = cursor.fetchall()
             conn.close()
 
             context = "\n\n".join([f"Article: {a[0]}\n{a[1][:500]}" for a in articles]) if articles else "Aucun article trouve"
@@ -7,6 +7,7 @@ import json
 import base64
 import requests
 from datetime import datetime
+import llm_usage
 
 # Fireworks API Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
@@ -38,6 +39,10 @@ def ai_chat():
         'general': "Tu es un assistant AI polyvalent. Reponds en francais de maniere concise et utile."
     }
 
+    if not llm_usage.check_budget('ai_chat', 'groq', GROQ_MODEL):
+        return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+    usage = llm_usage.LLMCall('ai_chat')
+    usage.attempt('groq')
     try:
         headers = {
             "Content-Type": "application/json",
@@ -57,10 +62,12 @@ def ai_chat():
         response = requests.post(GROQ_URL, headers=headers, json=payload, timeout=60)
 
         if response.status_code != 200:
+            usage.failure(GROQ_MODEL)
             return jsonify({'error': f'Erreur Fireworks: {response.status_code}'}), 500
 
         result = response.json()
         ai_response = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        usage.success('groq', GROQ_MODEL, result.get('usage'), message, ai_response)
 
         # Sauvegarder dans l'historique
         conn = get_db()
@@ -145,13 +152,19 @@ REPONDS UNIQUEMENT en JSON valide:
             "temperature": 0.2
         }
 
+        if not llm_usage.check_budget('ai_analyze_document', 'groq', GROQ_VISION):
+            return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+        usage = llm_usage.LLMCall('ai_analyze_document')
+        usage.attempt('groq')
         response = requests.post(GROQ_URL, headers=headers, json=payload, timeout=120)
 
         if response.status_code != 200:
+            usage.failure(GROQ_VISION)
             return jsonify({'error': f'Erreur Fireworks: {response.status_code}'}), 500
 
         result = response.json()
         text_response = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        usage.success('groq', GROQ_VISION, result.get('usage'), prompt, text_response)
 
         # Parser le JSON
         try:
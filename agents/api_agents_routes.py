@@ -5,47 +5,13 @@ A integrer dans api_server.py
 """
 
 from flask import request, jsonify
-from agents_system import (
-    MasterOrchestrator, KeywordResearchAgent, ContentGenerationAgent,
-    FAQGenerationAgent, TechnicalSEOAuditAgent, PerformanceAgent,
-    BacklinkAnalysisAgent, LocalSEOAgent, CompetitorAnalysisAgent,
-    ContentOptimizationAgent, SchemaMarkupAgent, SocialMediaAgent,
-    EmailMarketingAgent, ImageOptimizationAgent, InternalLinkingAgent,
-    URLOptimizationAgent, TitleTagAgent, ContentCalendarAgent,
-    PricingStrategyAgent, ReviewManagementAgent, ConversionOptimizationAgent,
-    MonitoringAgent, SSLAgent, BackupAgent, AnalyticsAgent,
-    ReportingAgent, LandingPageAgent, BlogIdeaAgent,
-    VideoScriptAgent, ServiceDescriptionAgent,
-    RedditAgent, ForumAgent, DirectoryAgent, GuestPostAgent, ContentSchedulerAgent,
-    ClientOnboardingAgent,
-    WhiteLabelReportAgent,
-    SERPTrackerAgent,
-    KeywordGapAgent,
-    ContentBriefAgent,
-    BacklinkMonitorAgent,
-    SiteSpeedAgent,
-    ROICalculatorAgent,
-    CompetitorWatchAgent,
-    InvoiceAgent,
-    CRMAgent,
-    AccountingAgent,
-    CalendarAgent,
-    ChatbotAgent,
-    NotificationAgent,
-    DashboardAgent,
-    LeadScoringAgent,
-    EmailCampaignAgent,
-    SupportTicketAgent,
-    KnowledgeBaseAgent,
-    SurveyAgent,
-    WebhookAgent,
-    AutomationAgent,
-    AffiliateAgent,
-    LoyaltyAgent,
-    SITES
-)
-
-# Initialize orchestrator
+from agents_system import MasterOrchestrator, SITES, get_db
+from agent_registry import get_agent, coalesced
+from singleflight import flight
+from job_queue import submit
+from llm_stream import sse_response
+
+# Orchestrateur: ses agents sont construits au premier usage
 orchestrator = MasterOrchestrator()
 
 def register_all_agent_routes(app):
@@ -57,7 +23,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/keyword-research', methods=['POST'])
     def agent_keyword_research():
         data = request.get_json() or {}
-        agent = KeywordResearchAgent()
+        agent = coalesced('KeywordResearchAgent')
         keywords = agent.find_keywords(
             int(data.get('site_id', 1)),
             data.get('seed_keyword', ''),
@@ -68,7 +34,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/keyword-research/serp', methods=['POST'])
     def agent_serp_analysis():
         data = request.get_json() or {}
-        agent = KeywordResearchAgent()
+        agent = coalesced('KeywordResearchAgent')
         analysis = agent.analyze_serp(data.get('keyword', ''))
         return jsonify({'success': True, 'analysis': analysis})
 
@@ -78,7 +44,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/content/article', methods=['POST'])
     def agent_generate_article():
         data = request.get_json() or {}
-        agent = ContentGenerationAgent()
+        agent = coalesced('ContentGenerationAgent')
         article = agent.generate_article(
             int(data.get('site_id', 1)),
             data.get('keyword', ''),
@@ -86,10 +52,36 @@ def register_all_agent_routes(app):
         )
         return jsonify({'success': True, 'article': article})
 
+    @app.route('/api/agent/content/article/stream', methods=['POST'])
+    def agent_generate_article_stream():
+        """Meme generation en SSE; l'article parse est enregistre en brouillon a la fin"""
+        data = request.get_json() or {}
+        site_id = int(data.get('site_id', 1))
+        keyword = data.get('keyword', '')
+        agent = get_agent('ContentGenerationAgent')
+
+        def save_draft(text):
+            article = agent.parse_article(text, keyword)
+            if not article:
+                return {'success': False, 'error': 'Generation vide'}
+            conn = get_db()
+            try:
+                with conn:
+                    cursor = conn.execute('''
+                        INSERT INTO drafts (site_id, titre, contenu, mot_cle, status, created_at)
+                        VALUES (?, ?, ?, ?, 'pending', datetime('now'))
+                    ''', (site_id, article.get('titre', keyword), article.get('contenu', ''), keyword))
+            finally:
+                conn.close()
+            return {'success': True, 'article': article, 'draft_id': cursor.lastrowid}
+
+        return sse_response(agent.stream_article(site_id, keyword, int(data.get('word_count', 1500))),
+                            on_complete=save_draft)
+
     @app.route('/api/agent/content/meta', methods=['POST'])
     def agent_generate_meta():
         data = request.get_json() or {}
-        agent = ContentGenerationAgent()
+        agent = coalesced('ContentGenerationAgent')
         meta = agent.generate_meta_tags(
             data.get('content', ''),
             data.get('keyword', '')
@@ -102,7 +94,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/faq', methods=['POST'])
     def agent_generate_faq():
         data = request.get_json() or {}
-        agent = FAQGenerationAgent()
+        agent = coalesced('FAQGenerationAgent')
         faq = agent.generate_faq(
             int(data.get('site_id', 1)),
             data.get('topic', ''),
@@ -116,7 +108,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/audit/technical', methods=['POST'])
     def agent_technical_audit():
         data = request.get_json() or {}
-        agent = TechnicalSEOAuditAgent()
+        agent = coalesced('TechnicalSEOAuditAgent')
 
         site_id = int(data.get('site_id', 1))
         site = SITES.get(site_id, {})
@@ -139,7 +131,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/performance', methods=['POST'])
     def agent_performance():
         data = request.get_json() or {}
-        agent = PerformanceAgent()
+        agent = coalesced('PerformanceAgent')
 
         site_id = int(data.get('site_id', 1))
         site = SITES.get(site_id, {})
@@ -154,7 +146,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/backlinks', methods=['POST'])
     def agent_backlinks():
         data = request.get_json() or {}
-        agent = BacklinkAnalysisAgent()
+        agent = coalesced('BacklinkAnalysisAgent')
         opportunities = agent.analyze_opportunities(int(data.get('site_id', 1)))
         return jsonify({'success': True, 'opportunities': opportunities})
 
@@ -164,14 +156,14 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/gmb', methods=['POST'])
     def agent_gmb():
         data = request.get_json() or {}
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         gmb = agent.optimize_gmb(int(data.get('site_id', 1)))
         return jsonify({'success': True, 'gmb': gmb})
 
     @app.route('/api/agent/local-seo/citations', methods=['POST'])
     def agent_citations():
         data = request.get_json() or {}
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         citations = agent.generate_local_citations(int(data.get('site_id', 1)))
         return jsonify({'success': True, 'citations': citations})
 
@@ -181,7 +173,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/competitors', methods=['POST'])
     def agent_competitors():
         data = request.get_json() or {}
-        agent = CompetitorAnalysisAgent()
+        agent = coalesced('CompetitorAnalysisAgent')
         competitors = agent.identify_competitors(int(data.get('site_id', 1)))
         return jsonify({'success': True, 'competitors': competitors})
 
@@ -191,7 +183,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/optimize-content', methods=['POST'])
     def agent_optimize_content():
         data = request.get_json() or {}
-        agent = ContentOptimizationAgent()
+        agent = coalesced('ContentOptimizationAgent')
         suggestions = agent.optimize_existing(
             data.get('content', ''),
             data.get('keyword', '')
@@ -204,21 +196,21 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/schema/local-business', methods=['POST'])
     def agent_schema_business():
         data = request.get_json() or {}
-        agent = SchemaMarkupAgent()
+        agent = get_agent('SchemaMarkupAgent')
         schema = agent.generate_local_business_schema(int(data.get('site_id', 1)))
         return jsonify({'success': True, 'schema': schema})
 
     @app.route('/api/agent/schema/faq', methods=['POST'])
     def agent_schema_faq():
         data = request.get_json() or {}
-        agent = SchemaMarkupAgent()
+        agent = get_agent('SchemaMarkupAgent')
         schema = agent.generate_faq_schema(data.get('faqs', []))
         return jsonify({'success': True, 'schema': schema})
 
     @app.route('/api/agent/schema/article', methods=['POST'])
     def agent_schema_article():
         data = request.get_json() or {}
-        agent = SchemaMarkupAgent()
+        agent = get_agent('SchemaMarkupAgent')
         schema = agent.generate_article_schema(
             data.get('title', ''),
             data.get('author', ''),
@@ -233,7 +225,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/social-posts', methods=['POST'])
     def agent_social_posts():
         data = request.get_json() or {}
-        agent = SocialMediaAgent()
+        agent = coalesced('SocialMediaAgent')
         posts = agent.generate_social_posts(
             data.get('article_title', ''),
             data.get('article_url', '')
@@ -246,7 +238,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/newsletter', methods=['POST'])
     def agent_newsletter():
         data = request.get_json() or {}
-        agent = EmailMarketingAgent()
+        agent = coalesced('EmailMarketingAgent')
         newsletter = agent.generate_newsletter(
             int(data.get('site_id', 1)),
             data.get('articles', [])
@@ -259,7 +251,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/image-alt', methods=['POST'])
     def agent_image_alt():
         data = request.get_json() or {}
-        agent = ImageOptimizationAgent()
+        agent = get_agent('ImageOptimizationAgent')
         alts = agent.generate_alt_texts(
             data.get('context', ''),
             data.get('keyword', '')
@@ -272,7 +264,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/internal-links', methods=['POST'])
     def agent_internal_links():
         data = request.get_json() or {}
-        agent = InternalLinkingAgent()
+        agent = get_agent('InternalLinkingAgent')
         links = agent.suggest_links(
             int(data.get('site_id', 1)),
             data.get('topic', '')
@@ -285,7 +277,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/url-slug', methods=['POST'])
     def agent_url_slug():
         data = request.get_json() or {}
-        agent = URLOptimizationAgent()
+        agent = get_agent('URLOptimizationAgent')
         slug = agent.generate_slug(
             data.get('title', ''),
             data.get('keyword', '')
@@ -298,7 +290,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/title-tag', methods=['POST'])
     def agent_title_tag():
         data = request.get_json() or {}
-        agent = TitleTagAgent()
+        agent = get_agent('TitleTagAgent')
         title = agent.optimize_title(
             data.get('current_title', ''),
             data.get('keyword', ''),
@@ -312,7 +304,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/calendar', methods=['POST'])
     def agent_calendar():
         data = request.get_json() or {}
-        agent = ContentCalendarAgent()
+        agent = get_agent('ContentCalendarAgent')
         calendar = agent.generate_calendar(
             int(data.get('site_id', 1)),
             int(data.get('weeks', 4))
@@ -325,7 +317,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/pricing', methods=['POST'])
     def agent_pricing():
         data = request.get_json() or {}
-        agent = PricingStrategyAgent()
+        agent = get_agent('PricingStrategyAgent')
         pricing = agent.analyze_competitor_pricing(
             int(data.get('site_id', 1)),
             data.get('service', '')
@@ -338,7 +330,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/review-response', methods=['POST'])
     def agent_review_response():
         data = request.get_json() or {}
-        agent = ReviewManagementAgent()
+        agent = get_agent('ReviewManagementAgent')
         response = agent.generate_review_response(
             data.get('review_text', ''),
             int(data.get('rating', 5)),
@@ -352,7 +344,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/cta', methods=['POST'])
     def agent_cta():
         data = request.get_json() or {}
-        agent = ConversionOptimizationAgent()
+        agent = get_agent('ConversionOptimizationAgent')
         ctas = agent.analyze_cta(
             data.get('current_cta', ''),
             data.get('page_type', '')
@@ -364,7 +356,7 @@ def register_all_agent_routes(app):
     # ============================================
     @app.route('/api/agent/uptime-check', methods=['GET'])
     def agent_uptime_check():
-        agent = MonitoringAgent()
+        agent = coalesced('MonitoringAgent')
         results = agent.check_uptime(SITES)
         return jsonify({'success': True, 'uptime': results})
 
@@ -374,7 +366,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/ssl-check', methods=['POST'])
     def agent_ssl_check():
         data = request.get_json() or {}
-        agent = SSLAgent()
+        agent = coalesced('SSLAgent')
 
         site_id = int(data.get('site_id', 1))
         site = SITES.get(site_id, {})
@@ -388,16 +380,30 @@ def register_all_agent_routes(app):
     # ============================================
     @app.route('/api/agent/backup', methods=['POST'])
     def agent_backup():
-        agent = BackupAgent()
+        agent = get_agent('BackupAgent')
         result = agent.backup_database()
         return jsonify({'success': result.get('success', False), 'backup': result})
 
+    @app.route('/api/agent/backup/snapshots', methods=['GET'])
+    def agent_backup_snapshots():
+        agent = get_agent('BackupAgent')
+        return jsonify({'success': True, 'backups': agent.list_backups()})
+
+    @app.route('/api/agent/backup/verify', methods=['POST'])
+    def agent_backup_verify():
+        data = request.get_json() or {}
+        snapshot_id = data.get('snapshot', '')
+        if not snapshot_id:
+            return jsonify({'success': False, 'error': 'snapshot requis'}), 400
+        result = get_agent('BackupAgent').verify_backup(snapshot_id)
+        return jsonify({'success': result['ok'], 'verify': result})
+
     # ============================================
     # AGENT 24: ANALYTICS
     # ============================================
     @app.route('/api/agent/analytics/<int:site_id>', methods=['GET'])
     def agent_analytics(site_id):
-        agent = AnalyticsAgent()
+        agent = coalesced('AnalyticsAgent')
         stats = agent.get_site_stats(site_id)
         return jsonify({'success': True, 'analytics': stats})
 
@@ -406,7 +412,7 @@ def register_all_agent_routes(app):
     # ============================================
     @app.route('/api/agent/report/<int:site_id>', methods=['GET'])
     def agent_report(site_id):
-        agent = ReportingAgent()
+        agent = coalesced('ReportingAgent')
         report = agent.generate_weekly_report(site_id)
         return jsonify({'success': True, 'report': report})
 
@@ -416,7 +422,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/landing-page', methods=['POST'])
     def agent_landing_page():
         data = request.get_json() or {}
-        agent = LandingPageAgent()
+        agent = coalesced('LandingPageAgent')
         page = agent.generate_landing_page(
             int(data.get('site_id', 1)),
             data.get('service', ''),
@@ -429,7 +435,7 @@ def register_all_agent_routes(app):
     # ============================================
     @app.route('/api/agent/blog-ideas/<int:site_id>', methods=['GET'])
     def agent_blog_ideas(site_id):
-        agent = BlogIdeaAgent()
+        agent = coalesced('BlogIdeaAgent')
         ideas = agent.generate_ideas(site_id, 20)
         return jsonify({'success': True, 'ideas': ideas})
 
@@ -439,7 +445,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/video-script', methods=['POST'])
     def agent_video_script():
         data = request.get_json() or {}
-        agent = VideoScriptAgent()
+        agent = coalesced('VideoScriptAgent')
         script = agent.generate_script(
             data.get('topic', ''),
             int(data.get('duration', 60))
@@ -452,7 +458,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/service-page', methods=['POST'])
     def agent_service_page():
         data = request.get_json() or {}
-        agent = ServiceDescriptionAgent()
+        agent = coalesced('ServiceDescriptionAgent')
         page = agent.generate_service_page(
             int(data.get('site_id', 1)),
             data.get('service_name', '')
@@ -464,8 +470,8 @@ def register_all_agent_routes(app):
     # ============================================
     @app.route('/api/agent/full-audit/<int:site_id>', methods=['POST'])
     def agent_full_audit(site_id):
-        results = orchestrator.run_full_audit(site_id)
-        return jsonify({'success': True, 'audit': results})
+        """Lance l'audit en arriere-plan; suivi via /api/jobs/<job_id>"""
+        return submit('full_audit', {'site_id': site_id})
 
     @app.route('/api/agent/full-content', methods=['POST'])
     def agent_full_content():
@@ -476,6 +482,11 @@ def register_all_agent_routes(app):
         )
         return jsonify({'success': True, 'content': results})
 
+    @app.route('/api/agents/coalescing', methods=['GET'])
+    def agents_coalescing():
+        """Compteurs single-flight: appels, executions, appels fusionnes, hits de cache"""
+        return jsonify({'success': True, **flight.stats()})
+
     @app.route('/api/agents/status', methods=['GET'])
     def agents_status():
         agents = orchestrator.get_all_agents_status()
@@ -492,7 +503,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/reddit/post', methods=['POST'])
     def agent_reddit_post():
         data = request.get_json() or {}
-        agent = RedditAgent()
+        agent = get_agent('RedditAgent')
         post = agent.generate_reddit_post(
             int(data.get('site_id', 1)),
             data.get('topic', '')
@@ -502,7 +513,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/reddit/comment', methods=['POST'])
     def agent_reddit_comment():
         data = request.get_json() or {}
-        agent = RedditAgent()
+        agent = get_agent('RedditAgent')
         comment = agent.generate_reddit_comment(
             int(data.get('site_id', 1)),
             data.get('context', '')
@@ -515,7 +526,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/forum/reply', methods=['POST'])
     def agent_forum_reply():
         data = request.get_json() or {}
-        agent = ForumAgent()
+        agent = get_agent('ForumAgent')
         reply = agent.generate_forum_reply(
             int(data.get('site_id', 1)),
             data.get('question', '')
@@ -528,7 +539,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/directory/listing', methods=['POST'])
     def agent_directory_listing():
         data = request.get_json() or {}
-        agent = DirectoryAgent()
+        agent = get_agent('DirectoryAgent')
         listing = agent.generate_business_listing(
             int(data.get('site_id', 1))
         )
@@ -537,7 +548,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/directory/checklist', methods=['POST'])
     def agent_directory_checklist():
         data = request.get_json() or {}
-        agent = DirectoryAgent()
+        agent = get_agent('DirectoryAgent')
         checklist = agent.get_submission_checklist(
             int(data.get('site_id', 1))
         )
@@ -549,7 +560,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/guest-post/outreach', methods=['POST'])
     def agent_guest_post_outreach():
         data = request.get_json() or {}
-        agent = GuestPostAgent()
+        agent = get_agent('GuestPostAgent')
         outreach = agent.generate_outreach_email(
             int(data.get('site_id', 1)),
             data.get('target_blog', '')
@@ -562,7 +573,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/scheduler/calendar', methods=['POST'])
     def agent_content_scheduler():
         data = request.get_json() or {}
-        agent = ContentSchedulerAgent()
+        agent = get_agent('ContentSchedulerAgent')
         calendar = agent.generate_content_calendar(
             int(data.get('site_id', 1)),
             int(data.get('weeks', 4))
@@ -595,18 +606,13 @@ def register_all_agent_routes(app):
                 'error': 'business_name et domain sont requis'
             }), 400
 
-        agent = ClientOnboardingAgent()
-        result = agent.onboard_new_client(data)
-
-        return jsonify({
-            'success': True,
-            'onboarding': result
-        })
+        # Crawl + appels LLM: execute par la file de jobs, resultat via /api/jobs/<job_id>
+        return submit('client_onboarding', data)
 
     @app.route('/api/agent/onboarding/clients', methods=['GET'])
     def agent_list_clients():
         """Liste tous les clients"""
-        agent = ClientOnboardingAgent()
+        agent = get_agent('ClientOnboardingAgent')
         clients = agent.list_all_clients()
         return jsonify({
             'success': True,
@@ -617,7 +623,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/onboarding/client/<int:client_id>', methods=['GET'])
     def agent_get_client(client_id):
         """Recupere les details d'un client"""
-        agent = ClientOnboardingAgent()
+        agent = get_agent('ClientOnboardingAgent')
         client = agent.get_client_status(client_id)
 
         if client:
@@ -646,34 +652,29 @@ def register_all_agent_routes(app):
         client_id = data.get('client_id') or data.get('site_id', 1)
         branding = data.get('branding')
 
-        agent = WhiteLabelReportAgent()
-        report = agent.generate_monthly_report(int(client_id), branding)
-
-        if 'error' in report:
-            return jsonify({'success': False, 'error': report['error']}), 404
+        # Resultat ({'report': ..., 'html_url': ...}) via /api/jobs/<job_id>
+        return submit('white_label_report', {'client_id': int(client_id), 'branding': branding})
 
-        # Ne pas renvoyer le HTML complet dans la reponse JSON (trop gros)
-        report_summary = {
-            'report_id': report['report_id'],
-            'generated_at': report['generated_at'],
-            'period': report['period'],
-            'client': report['client'],
-            'executive_summary': report['executive_summary'],
-            'analysis': report['analysis'],
-            'recommendations': report['recommendations'],
-            'next_steps': report['next_steps']
-        }
-
-        return jsonify({
-            'success': True,
-            'report': report_summary,
-            'html_url': f"/api/agent/report/{report['report_id']}/html"
+    @app.route('/api/agent/report/batch', methods=['POST'])
+    def agent_generate_report_batch():
+        """
+        Genere les rapports white label de tous les clients actifs (ou client_ids)
+        Body: {"client_ids": [1, 2], "branding": {...}, "refresh": false, "pdf": false}
+        Progression (rapports termines / total) et resultat via /api/jobs/<job_id>
+        """
+        data = request.get_json() or {}
+        client_ids = data.get('client_ids')
+        return submit('white_label_batch', {
+            'client_ids': [int(cid) for cid in client_ids] if client_ids else None,
+            'branding': data.get('branding'),
+            'refresh': bool(data.get('refresh')),
+            'pdf': bool(data.get('pdf'))
         })
 
     @app.route('/api/agent/report/<int:site_id>/quick', methods=['GET'])
     def agent_quick_report(site_id):
         """Genere un rapport rapide pour un site existant"""
-        agent = WhiteLabelReportAgent()
+        agent = coalesced('WhiteLabelReportAgent')
         report = agent.generate_quick_report(site_id)
 
         if 'error' in report:
@@ -694,7 +695,7 @@ def register_all_agent_routes(app):
         from flask import Response
 
         # Simuler un rapport pour demo
-        agent = WhiteLabelReportAgent()
+        agent = get_agent('WhiteLabelReportAgent')
         report = agent.generate_monthly_report(1)  # Site 1 par defaut
 
         return Response(
@@ -708,19 +709,21 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         branding = data.get('branding')
 
-        agent = WhiteLabelReportAgent()
+        agent = get_agent('WhiteLabelReportAgent')
         report = agent.generate_monthly_report(client_id, branding)
 
         if 'error' in report:
             return jsonify({'success': False, 'error': report['error']}), 404
 
-        # Sauvegarder le fichier
+        # Sauvegarder le fichier (+ PDF si demande et WeasyPrint installe)
         file_path = agent.save_report(report)
+        pdf_path = agent.save_pdf(report) if data.get('format') == 'pdf' else None
 
         return jsonify({
             'success': True,
             'report_id': report['report_id'],
-            'file_path': file_path
+            'file_path': file_path,
+            'pdf_path': pdf_path
         })
 
     # ============================================
@@ -740,7 +743,7 @@ def register_all_agent_routes(app):
         if not keyword:
             return jsonify({'success': False, 'error': 'keyword requis'}), 400
 
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         result = agent.add_keyword(int(client_id), keyword, target_url)
 
         return jsonify(result)
@@ -758,7 +761,7 @@ def register_all_agent_routes(app):
         if not keywords:
             return jsonify({'success': False, 'error': 'keywords requis'}), 400
 
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         result = agent.add_keywords_bulk(int(client_id), keywords)
 
         return jsonify(result)
@@ -766,7 +769,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/serp/track/<int:client_id>', methods=['POST'])
     def agent_serp_track(client_id):
         """Lance le tracking de tous les mots-cles d'un client"""
-        agent = SERPTrackerAgent()
+        agent = coalesced('SERPTrackerAgent')
         result = agent.track_all_keywords(client_id)
 
         return jsonify(result)
@@ -774,7 +777,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/serp/keywords/<int:client_id>', methods=['GET'])
     def agent_serp_get_keywords(client_id):
         """Recupere tous les mots-cles suivis"""
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         keywords = agent.get_tracked_keywords(client_id)
 
         return jsonify({
@@ -797,7 +800,7 @@ def register_all_agent_routes(app):
         if not keyword or not domain:
             return jsonify({'success': False, 'error': 'keyword et domain requis'}), 400
 
-        agent = SERPTrackerAgent()
+        agent = coalesced('SERPTrackerAgent')
         result = agent.check_position(keyword, domain)
 
         return jsonify({'success': True, 'result': result})
@@ -807,7 +810,7 @@ def register_all_agent_routes(app):
         """Recupere l'historique d'un mot-cle"""
         days = request.args.get('days', 30, type=int)
 
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         history = agent.get_keyword_history(keyword_id, days)
 
         return jsonify({
@@ -821,7 +824,7 @@ def register_all_agent_routes(app):
         """Recupere les alertes SERP"""
         unread_only = request.args.get('unread', 'false').lower() == 'true'
 
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         alerts = agent.get_alerts(client_id, unread_only)
 
         return jsonify({
@@ -840,7 +843,7 @@ def register_all_agent_routes(app):
         if not alert_ids:
             return jsonify({'success': False, 'error': 'alert_ids requis'}), 400
 
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         result = agent.mark_alerts_read(alert_ids)
 
         return jsonify({'success': result})
@@ -848,7 +851,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/serp/report/<int:client_id>', methods=['GET'])
     def agent_serp_report(client_id):
         """Genere un rapport de classement complet"""
-        agent = SERPTrackerAgent()
+        agent = coalesced('SERPTrackerAgent')
         report = agent.get_ranking_report(client_id)
 
         if 'error' in report:
@@ -859,7 +862,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/serp/keyword/<int:keyword_id>', methods=['DELETE'])
     def agent_serp_remove_keyword(keyword_id):
         """Supprime un mot-cle du suivi"""
-        agent = SERPTrackerAgent()
+        agent = get_agent('SERPTrackerAgent')
         result = agent.remove_keyword(keyword_id)
 
         return jsonify(result)
@@ -883,7 +886,7 @@ def register_all_agent_routes(app):
         if not competitors:
             return jsonify({'success': False, 'error': 'competitors requis'}), 400
 
-        agent = KeywordGapAgent()
+        agent = coalesced('KeywordGapAgent')
         result = agent.analyze_gap(int(client_id), competitors)
 
         if 'error' in result:
@@ -905,7 +908,7 @@ def register_all_agent_routes(app):
         if not domain1 or not domain2:
             return jsonify({'success': False, 'error': 'domain1 et domain2 requis'}), 400
 
-        agent = KeywordGapAgent()
+        agent = coalesced('KeywordGapAgent')
         result = agent.compare_two_domains(domain1, domain2, niche)
 
         return jsonify({'success': True, 'comparison': result})
@@ -923,7 +926,7 @@ def register_all_agent_routes(app):
         if not competitors:
             return jsonify({'success': False, 'error': 'competitors requis'}), 400
 
-        agent = KeywordGapAgent()
+        agent = coalesced('KeywordGapAgent')
         result = agent.find_content_gaps(int(client_id), competitors)
 
         return jsonify({'success': True, 'content_gaps': result})
@@ -942,7 +945,7 @@ def register_all_agent_routes(app):
         if not domain:
             return jsonify({'success': False, 'error': 'domain requis'}), 400
 
-        agent = KeywordGapAgent()
+        agent = coalesced('KeywordGapAgent')
         keywords = agent.get_competitor_keywords(domain, niche, limit)
 
         return jsonify({
@@ -975,7 +978,7 @@ def register_all_agent_routes(app):
         if not target_keyword:
             return jsonify({'success': False, 'error': 'target_keyword requis'}), 400
 
-        agent = ContentBriefAgent()
+        agent = coalesced('ContentBriefAgent')
         brief = agent.generate_brief(int(client_id), target_keyword, content_type, word_count)
 
         return jsonify({'success': True, 'brief': brief})
@@ -994,7 +997,7 @@ def register_all_agent_routes(app):
         if not target_keyword:
             return jsonify({'success': False, 'error': 'target_keyword requis'}), 400
 
-        agent = ContentBriefAgent()
+        agent = coalesced('ContentBriefAgent')
         outline = agent.generate_outline(target_keyword, content_type, niche)
 
         return jsonify({'success': True, 'outline': outline})
@@ -1012,7 +1015,7 @@ def register_all_agent_routes(app):
         if not target_keyword:
             return jsonify({'success': False, 'error': 'target_keyword requis'}), 400
 
-        agent = ContentBriefAgent()
+        agent = coalesced('ContentBriefAgent')
         keywords = agent.get_semantic_keywords(target_keyword, niche)
 
         return jsonify({'success': True, 'semantic_keywords': keywords})
@@ -1031,7 +1034,7 @@ def register_all_agent_routes(app):
         if not target_keyword:
             return jsonify({'success': False, 'error': 'target_keyword requis'}), 400
 
-        agent = ContentBriefAgent()
+        agent = coalesced('ContentBriefAgent')
         meta = agent.generate_meta_data(target_keyword, content_type, niche)
 
         return jsonify({'success': True, 'meta': meta})
@@ -1048,7 +1051,7 @@ def register_all_agent_routes(app):
         if not brief:
             return jsonify({'success': False, 'error': 'brief requis'}), 400
 
-        agent = ContentBriefAgent()
+        agent = get_agent('ContentBriefAgent')
         brief_id = agent.save_brief(brief)
 
         if brief_id:
@@ -1064,7 +1067,7 @@ def register_all_agent_routes(app):
         client_id = request.args.get('client_id')
         status = request.args.get('status')
 
-        agent = ContentBriefAgent()
+        agent = get_agent('ContentBriefAgent')
         briefs = agent.get_briefs(
             client_id=int(client_id) if client_id else None,
             status=status
@@ -1075,7 +1078,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/content-brief/<int:brief_id>', methods=['GET'])
     def agent_content_brief_get(brief_id):
         """Recupere un brief complet"""
-        agent = ContentBriefAgent()
+        agent = get_agent('ContentBriefAgent')
         brief = agent.get_brief(brief_id)
 
         if brief:
@@ -1094,7 +1097,7 @@ def register_all_agent_routes(app):
         if not status:
             return jsonify({'success': False, 'error': 'status requis'}), 400
 
-        agent = ContentBriefAgent()
+        agent = get_agent('ContentBriefAgent')
         if agent.update_brief_status(brief_id, status):
             return jsonify({'success': True, 'message': f'Status mis a jour: {status}'})
         return jsonify({'success': False, 'error': 'Erreur mise a jour'}), 500
@@ -1102,7 +1105,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/content-brief/<int:brief_id>/html', methods=['GET'])
     def agent_content_brief_html(brief_id):
         """Genere la version HTML d'un brief"""
-        agent = ContentBriefAgent()
+        agent = get_agent('ContentBriefAgent')
         brief = agent.get_brief(brief_id)
 
         if not brief:
@@ -1123,7 +1126,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         client_id = data.get('client_id') or data.get('site_id', 1)
 
-        agent = BacklinkMonitorAgent()
+        agent = coalesced('BacklinkMonitorAgent')
         result = agent.discover_backlinks(int(client_id))
 
         return jsonify({'success': True, 'result': result})
@@ -1137,7 +1140,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         client_id = data.get('client_id') or data.get('site_id', 1)
 
-        agent = BacklinkMonitorAgent()
+        agent = coalesced('BacklinkMonitorAgent')
         result = agent.check_backlink_status(int(client_id))
 
         return jsonify({'success': True, 'result': result})
@@ -1151,7 +1154,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status')
         limit = int(request.args.get('limit', 100))
 
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         backlinks = agent.get_backlinks(client_id, status, limit)
 
         return jsonify({
@@ -1163,7 +1166,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/backlink/stats/<int:client_id>', methods=['GET'])
     def agent_backlink_stats(client_id):
         """Statistiques des backlinks d'un client"""
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         stats = agent.get_backlink_stats(client_id)
 
         return jsonify({'success': True, 'stats': stats})
@@ -1176,7 +1179,7 @@ def register_all_agent_routes(app):
         """
         threshold = int(request.args.get('threshold', 50))
 
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         result = agent.get_toxic_backlinks(client_id, threshold)
 
         return jsonify({'success': True, 'result': result})
@@ -1184,7 +1187,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/backlink/anchors/<int:client_id>', methods=['GET'])
     def agent_backlink_anchors(client_id):
         """Analyse la distribution des textes d'ancrage"""
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         result = agent.analyze_anchor_distribution(client_id)
 
         return jsonify({'success': True, 'result': result})
@@ -1192,7 +1195,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/backlink/domains/<int:client_id>', methods=['GET'])
     def agent_backlink_domains(client_id):
         """Liste des domaines referents"""
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         result = agent.get_referring_domains(client_id)
 
         return jsonify({'success': True, 'result': result})
@@ -1205,7 +1208,7 @@ def register_all_agent_routes(app):
         """
         unread_only = request.args.get('unread_only', 'true').lower() == 'true'
 
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         alerts = agent.get_alerts(client_id, unread_only)
 
         return jsonify({'success': True, 'alerts': alerts, 'count': len(alerts)})
@@ -1219,7 +1222,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         alert_ids = data.get('alert_ids')
 
-        agent = BacklinkMonitorAgent()
+        agent = get_agent('BacklinkMonitorAgent')
         if agent.mark_alerts_read(client_id, alert_ids):
             return jsonify({'success': True, 'message': 'Alertes marquees comme lues'})
         return jsonify({'success': False, 'error': 'Erreur'}), 500
@@ -1237,7 +1240,7 @@ def register_all_agent_routes(app):
         client_id = data.get('client_id') or data.get('site_id', 1)
         url = data.get('url')
 
-        agent = SiteSpeedAgent()
+        agent = coalesced('SiteSpeedAgent')
         result = agent.analyze_speed(int(client_id), url)
 
         return jsonify({'success': True, 'result': result})
@@ -1251,7 +1254,7 @@ def register_all_agent_routes(app):
         days = int(request.args.get('days', 30))
         device = request.args.get('device', 'mobile')
 
-        agent = SiteSpeedAgent()
+        agent = get_agent('SiteSpeedAgent')
         history = agent.get_speed_history(client_id, days, device)
 
         return jsonify({'success': True, 'history': history, 'count': len(history)})
@@ -1264,7 +1267,7 @@ def register_all_agent_routes(app):
         """
         status = request.args.get('status')
 
-        agent = SiteSpeedAgent()
+        agent = get_agent('SiteSpeedAgent')
         recommendations = agent.get_recommendations(client_id, status)
 
         return jsonify({
@@ -1285,7 +1288,7 @@ def register_all_agent_routes(app):
         if not status:
             return jsonify({'success': False, 'error': 'status requis'}), 400
 
-        agent = SiteSpeedAgent()
+        agent = get_agent('SiteSpeedAgent')
         if agent.update_recommendation_status(rec_id, status):
             return jsonify({'success': True, 'message': f'Status mis a jour: {status}'})
         return jsonify({'success': False, 'error': 'Erreur'}), 500
@@ -1303,7 +1306,7 @@ def register_all_agent_routes(app):
         if not competitor_urls:
             return jsonify({'success': False, 'error': 'competitor_urls requis'}), 400
 
-        agent = SiteSpeedAgent()
+        agent = coalesced('SiteSpeedAgent')
         result = agent.compare_with_competitors(int(client_id), competitor_urls)
 
         return jsonify({'success': True, 'result': result})
@@ -1311,7 +1314,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/speed/report/<int:client_id>', methods=['GET'])
     def agent_speed_report(client_id):
         """Genere un rapport de vitesse complet"""
-        agent = SiteSpeedAgent()
+        agent = coalesced('SiteSpeedAgent')
         report = agent.generate_speed_report(client_id)
 
         return jsonify({'success': True, 'report': report})
@@ -1345,7 +1348,7 @@ def register_all_agent_routes(app):
             'organic_traffic_after': data.get('organic_traffic_after', 2000)
         }
 
-        agent = ROICalculatorAgent()
+        agent = get_agent('ROICalculatorAgent')
         result = agent.calculate_roi(int(client_id), params)
 
         return jsonify({'success': True, 'result': result})
@@ -1358,7 +1361,7 @@ def register_all_agent_routes(app):
         """
         growth = int(request.args.get('growth', 50))
 
-        agent = ROICalculatorAgent()
+        agent = coalesced('ROICalculatorAgent')
         result = agent.estimate_potential_roi(client_id, growth)
 
         return jsonify({'success': True, 'result': result})
@@ -1371,7 +1374,7 @@ def register_all_agent_routes(app):
         """
         limit = int(request.args.get('limit', 12))
 
-        agent = ROICalculatorAgent()
+        agent = get_agent('ROICalculatorAgent')
         history = agent.get_roi_history(client_id, limit)
 
         return jsonify({'success': True, 'history': history, 'count': len(history)})
@@ -1389,7 +1392,7 @@ def register_all_agent_routes(app):
         if not keywords:
             return jsonify({'success': False, 'error': 'keywords requis'}), 400
 
-        agent = ROICalculatorAgent()
+        agent = get_agent('ROICalculatorAgent')
         result = agent.calculate_keyword_value(keywords, client_id)
 
         return jsonify({'success': True, 'result': result})
@@ -1416,7 +1419,7 @@ def register_all_agent_routes(app):
             'organic_traffic_after': data.get('organic_traffic_after', 2000)
         }
 
-        agent = ROICalculatorAgent()
+        agent = coalesced('ROICalculatorAgent')
         report = agent.generate_roi_report(int(client_id), params)
 
         return jsonify({'success': True, 'report': report})
@@ -1439,7 +1442,7 @@ def register_all_agent_routes(app):
         if not domain:
             return jsonify({'success': False, 'error': 'domain requis'}), 400
 
-        agent = CompetitorWatchAgent()
+        agent = get_agent('CompetitorWatchAgent')
         result = agent.add_competitor(int(client_id), domain, name, notes)
 
         return jsonify(result)
@@ -1447,7 +1450,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/competitor/remove/<int:competitor_id>', methods=['DELETE'])
     def agent_competitor_remove(competitor_id):
         """Retire un concurrent de la surveillance"""
-        agent = CompetitorWatchAgent()
+        agent = get_agent('CompetitorWatchAgent')
         if agent.remove_competitor(competitor_id):
             return jsonify({'success': True, 'message': 'Concurrent retire'})
         return jsonify({'success': False, 'error': 'Erreur'}), 500
@@ -1455,7 +1458,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/competitor/list/<int:client_id>', methods=['GET'])
     def agent_competitor_list(client_id):
         """Liste les concurrents surveilles"""
-        agent = CompetitorWatchAgent()
+        agent = get_agent('CompetitorWatchAgent')
         competitors = agent.get_competitors(client_id)
 
         return jsonify({
@@ -1467,7 +1470,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/competitor/check/<int:client_id>', methods=['POST'])
     def agent_competitor_check(client_id):
         """Verifie les changements chez tous les concurrents"""
-        agent = CompetitorWatchAgent()
+        agent = coalesced('CompetitorWatchAgent')
         result = agent.check_for_changes(client_id)
 
         return jsonify({'success': True, 'result': result})
@@ -1475,7 +1478,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/competitor/profile/<int:competitor_id>', methods=['GET'])
     def agent_competitor_profile(competitor_id):
         """Profil complet d'un concurrent"""
-        agent = CompetitorWatchAgent()
+        agent = get_agent('CompetitorWatchAgent')
         profile = agent.get_competitor_profile(competitor_id)
 
         if 'error' in profile:
@@ -1496,7 +1499,7 @@ def register_all_agent_routes(app):
         if not competitor_id:
             return jsonify({'success': False, 'error': 'competitor_id requis'}), 400
 
-        agent = CompetitorWatchAgent()
+        agent = coalesced('CompetitorWatchAgent')
         result = agent.compare_with_client(int(client_id), int(competitor_id))
 
         if 'error' in result:
@@ -1512,7 +1515,7 @@ def register_all_agent_routes(app):
         """
         unread_only = request.args.get('unread_only', 'true').lower() == 'true'
 
-        agent = CompetitorWatchAgent()
+        agent = get_agent('CompetitorWatchAgent')
         alerts = agent.get_alerts(client_id, unread_only)
 
         return jsonify({'success': True, 'alerts': alerts, 'count': len(alerts)})
@@ -1529,7 +1532,7 @@ def register_all_agent_routes(app):
         if not alert_ids:
             return jsonify({'success': False, 'error': 'alert_ids requis'}), 400
 
-        agent = CompetitorWatchAgent()
+        agent = get_agent('CompetitorWatchAgent')
         if agent.mark_alerts_read(alert_ids):
             return jsonify({'success': True, 'message': 'Alertes marquees comme lues'})
         return jsonify({'success': False, 'error': 'Erreur'}), 500
@@ -1537,7 +1540,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/competitor/report/<int:client_id>', methods=['GET'])
     def agent_competitor_report(client_id):
         """Rapport concurrentiel complet"""
-        agent = CompetitorWatchAgent()
+        agent = coalesced('CompetitorWatchAgent')
         report = agent.generate_competitive_report(client_id)
 
         return jsonify({'success': True, 'report': report})
@@ -1555,7 +1558,7 @@ def register_all_agent_routes(app):
         client_id = data.get('client_id') or data.get('site_id', 1)
         profile_data = data.get('profile', data)
 
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         result = agent.create_gmb_profile(int(client_id), profile_data)
 
         if 'error' in result:
@@ -1566,7 +1569,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/gmb/profile/<int:client_id>', methods=['GET'])
     def agent_local_seo_gmb_get(client_id):
         """Recupere le profil GMB du client"""
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         profile = agent.get_gmb_profile(client_id)
 
         if not profile:
@@ -1580,7 +1583,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/gmb/audit/<int:client_id>', methods=['GET'])
     def agent_local_seo_gmb_audit(client_id):
         """Audit complet du profil GMB"""
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         audit = agent.audit_gmb_profile(client_id)
 
         if 'error' in audit:
@@ -1597,7 +1600,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         client_id = data.get('client_id') or data.get('site_id', 1)
 
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         result = agent.add_citation(int(client_id), data)
 
         if 'error' in result:
@@ -1608,7 +1611,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/citations/<int:client_id>', methods=['GET'])
     def agent_local_seo_citations_list(client_id):
         """Liste toutes les citations NAP d'un client"""
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         citations = agent.get_citations(client_id)
 
         if isinstance(citations, dict) and 'error' in citations:
@@ -1619,7 +1622,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/nap/audit/<int:client_id>', methods=['GET'])
     def agent_local_seo_nap_audit(client_id):
         """Verifie la coherence NAP sur toutes les citations"""
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         audit = agent.audit_nap_consistency(client_id)
 
         if 'error' in audit:
@@ -1636,7 +1639,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         client_id = data.get('client_id') or data.get('site_id', 1)
 
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         result = agent.add_review(int(client_id), data)
 
         if 'error' in result:
@@ -1652,7 +1655,7 @@ def register_all_agent_routes(app):
         """
         platform = request.args.get('platform')
 
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         reviews = agent.get_reviews(client_id, platform)
 
         if isinstance(reviews, dict) and 'error' in reviews:
@@ -1663,7 +1666,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/reviews/analyze/<int:client_id>', methods=['GET'])
     def agent_local_seo_reviews_analyze(client_id):
         """Analyse complete des avis"""
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         analysis = agent.analyze_reviews(client_id)
 
         return jsonify({'success': True, 'analysis': analysis})
@@ -1681,7 +1684,7 @@ def register_all_agent_routes(app):
         if not review_id:
             return jsonify({'success': False, 'error': 'review_id requis'}), 400
 
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         result = agent.generate_review_response(int(client_id), int(review_id))
 
         if 'error' in result:
@@ -1698,7 +1701,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         client_id = data.get('client_id') or data.get('site_id', 1)
 
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         result = agent.add_service_area(int(client_id), data)
 
         if 'error' in result:
@@ -1709,7 +1712,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/service-areas/<int:client_id>', methods=['GET'])
     def agent_local_seo_areas_list(client_id):
         """Liste les zones de service"""
-        agent = LocalSEOAgent()
+        agent = get_agent('LocalSEOAgent')
         areas = agent.get_service_areas(client_id)
 
         if isinstance(areas, dict) and 'error' in areas:
@@ -1730,7 +1733,7 @@ def register_all_agent_routes(app):
         if not area_name:
             return jsonify({'success': False, 'error': 'area_name requis'}), 400
 
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         result = agent.generate_local_landing_page(int(client_id), area_name)
 
         if 'error' in result:
@@ -1741,7 +1744,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/local-seo/score/<int:client_id>', methods=['GET'])
     def agent_local_seo_score(client_id):
         """Calcule le score SEO local global"""
-        agent = LocalSEOAgent()
+        agent = coalesced('LocalSEOAgent')
         score = agent.get_local_seo_score(client_id)
 
         return jsonify({'success': True, 'score': score})
@@ -1758,7 +1761,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         client_id = data.get('client_id') or data.get('site_id', 1)
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         result = agent.create_billing_client(int(client_id), data)
 
         if 'error' in result:
@@ -1769,7 +1772,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/invoice/client/<int:billing_client_id>', methods=['GET'])
     def agent_invoice_client_get(billing_client_id):
         """Recupere un client facturation"""
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         client = agent.get_billing_client(billing_client_id)
 
         if not client:
@@ -1795,7 +1798,7 @@ def register_all_agent_routes(app):
         if not items:
             return jsonify({'success': False, 'error': 'items requis'}), 400
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         result = agent.create_quote(int(billing_client_id), items, notes, valid_days)
 
         if 'error' in result:
@@ -1806,7 +1809,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/invoice/quote/<int:quote_id>', methods=['GET'])
     def agent_invoice_quote_get(quote_id):
         """Recupere un devis"""
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         quote = agent.get_quote(quote_id)
 
         if 'error' in quote:
@@ -1817,7 +1820,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/invoice/quote/<int:quote_id>/convert', methods=['POST'])
     def agent_invoice_quote_convert(quote_id):
         """Convertit un devis en facture"""
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         result = agent.convert_quote_to_invoice(quote_id)
 
         if 'error' in result:
@@ -1843,7 +1846,7 @@ def register_all_agent_routes(app):
         if not items:
             return jsonify({'success': False, 'error': 'items requis'}), 400
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         result = agent.create_invoice(int(billing_client_id), items, notes, due_days)
 
         if 'error' in result:
@@ -1854,7 +1857,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/invoice/<int:invoice_id>', methods=['GET'])
     def agent_invoice_get(invoice_id):
         """Recupere une facture"""
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         invoice = agent.get_invoice(invoice_id)
 
         if 'error' in invoice:
@@ -1871,7 +1874,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status')
         limit = int(request.args.get('limit', 50))
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         invoices = agent.list_invoices(status, limit)
 
         if isinstance(invoices, dict) and 'error' in invoices:
@@ -1894,7 +1897,7 @@ def register_all_agent_routes(app):
         if not invoice_id or not amount:
             return jsonify({'success': False, 'error': 'invoice_id et amount requis'}), 400
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         result = agent.record_payment(int(invoice_id), float(amount), method, reference)
 
         if 'error' in result:
@@ -1905,7 +1908,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/invoice/overdue', methods=['GET'])
     def agent_invoice_overdue():
         """Liste les factures en retard"""
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         invoices = agent.get_overdue_invoices()
 
         if isinstance(invoices, dict) and 'error' in invoices:
@@ -1925,7 +1928,7 @@ def register_all_agent_routes(app):
         if not invoice_id:
             return jsonify({'success': False, 'error': 'invoice_id requis'}), 400
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         result = agent.generate_reminder(int(invoice_id))
 
         if 'error' in result:
@@ -1941,7 +1944,7 @@ def register_all_agent_routes(app):
         """
         period = request.args.get('period', 'month')
 
-        agent = InvoiceAgent()
+        agent = get_agent('InvoiceAgent')
         stats = agent.get_revenue_stats(period)
 
         if 'error' in stats:
@@ -1959,7 +1962,7 @@ def register_all_agent_routes(app):
         Body: {"first_name": "...", "last_name": "...", "email": "...", ...}
         """
         data = request.get_json() or {}
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.create_contact(data)
 
         if 'error' in result:
@@ -1970,7 +1973,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/crm/contact/<int:contact_id>', methods=['GET'])
     def agent_crm_contact_get(contact_id):
         """Recupere un contact avec historique"""
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         contact = agent.get_contact(contact_id)
 
         if 'error' in contact:
@@ -1982,7 +1985,7 @@ def register_all_agent_routes(app):
     def agent_crm_contact_update(contact_id):
         """Met a jour un contact"""
         data = request.get_json() or {}
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.update_contact(contact_id, data)
 
         if 'error' in result:
@@ -2005,7 +2008,7 @@ def register_all_agent_routes(app):
         filters = {k: v for k, v in filters.items() if v}
         limit = int(request.args.get('limit', 50))
 
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         contacts = agent.list_contacts(filters if filters else None, limit)
 
         if isinstance(contacts, dict) and 'error' in contacts:
@@ -2020,7 +2023,7 @@ def register_all_agent_routes(app):
         Body: {"type": "call|email|meeting|note", "subject": "...", "description": "...", ...}
         """
         data = request.get_json() or {}
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.add_interaction(contact_id, data)
 
         if 'error' in result:
@@ -2035,7 +2038,7 @@ def register_all_agent_routes(app):
         Body: {"title": "...", "value": 5000, "stage": "qualification", ...}
         """
         data = request.get_json() or {}
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.create_opportunity(contact_id, data)
 
         if 'error' in result:
@@ -2057,7 +2060,7 @@ def register_all_agent_routes(app):
         if not stage:
             return jsonify({'success': False, 'error': 'stage requis'}), 400
 
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.update_opportunity_stage(opportunity_id, stage, won, loss_reason)
 
         if 'error' in result:
@@ -2068,7 +2071,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/crm/pipeline', methods=['GET'])
     def agent_crm_pipeline():
         """Recupere le pipeline complet"""
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         pipeline = agent.get_pipeline()
 
         if 'error' in pipeline:
@@ -2083,7 +2086,7 @@ def register_all_agent_routes(app):
         Body: {"contact_id": 1, "title": "...", "due_date": "...", "priority": "high|medium|low", ...}
         """
         data = request.get_json() or {}
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.create_task(data)
 
         if 'error' in result:
@@ -2104,7 +2107,7 @@ def register_all_agent_routes(app):
         }
         filters = {k: v for k, v in filters.items() if v}
 
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         tasks = agent.get_tasks(filters if filters else None)
 
         if isinstance(tasks, dict) and 'error' in tasks:
@@ -2115,7 +2118,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/crm/task/<int:task_id>/complete', methods=['POST'])
     def agent_crm_task_complete(task_id):
         """Complete une tache"""
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         result = agent.complete_task(task_id)
 
         if 'error' in result:
@@ -2126,7 +2129,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/crm/dashboard', methods=['GET'])
     def agent_crm_dashboard():
         """Statistiques CRM pour dashboard"""
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         stats = agent.get_dashboard_stats()
 
         if 'error' in stats:
@@ -2137,7 +2140,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/crm/contact/<int:contact_id>/score', methods=['GET'])
     def agent_crm_lead_score(contact_id):
         """Calcule le score d'un lead"""
-        agent = CRMAgent()
+        agent = get_agent('CRMAgent')
         score = agent.score_lead(contact_id)
 
         if 'error' in score:
@@ -2152,7 +2155,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/accounting/init', methods=['POST'])
     def agent_accounting_init():
         """Initialise les tables comptables"""
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -2166,7 +2169,7 @@ def register_all_agent_routes(app):
         }
         """
         data = request.get_json() or {}
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         result = agent.add_transaction(data)
 
         if 'error' in result:
@@ -2189,7 +2192,7 @@ def register_all_agent_routes(app):
         filters = {k: v for k, v in filters.items() if v}
         limit = int(request.args.get('limit', 50))
 
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         transactions = agent.list_transactions(filters if filters else None, limit)
 
         if isinstance(transactions, dict) and 'error' in transactions:
@@ -2206,7 +2209,7 @@ def register_all_agent_routes(app):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         summary = agent.get_financial_summary(start_date, end_date)
 
         if 'error' in summary:
@@ -2223,7 +2226,7 @@ def register_all_agent_routes(app):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         statement = agent.get_income_statement(start_date, end_date)
 
         if 'error' in statement:
@@ -2234,7 +2237,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/accounting/balance-sheet', methods=['GET'])
     def agent_accounting_balance_sheet():
         """Bilan comptable"""
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         balance = agent.get_balance_sheet()
 
         if 'error' in balance:
@@ -2251,7 +2254,7 @@ def register_all_agent_routes(app):
         quarter = request.args.get('quarter', type=int)
         year = request.args.get('year', type=int)
 
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         report = agent.get_tax_report(quarter, year)
 
         if 'error' in report:
@@ -2268,7 +2271,7 @@ def register_all_agent_routes(app):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         breakdown = agent.get_expense_breakdown(start_date, end_date)
 
         if 'error' in breakdown:
@@ -2284,7 +2287,7 @@ def register_all_agent_routes(app):
         """
         months = int(request.args.get('months', 6))
 
-        agent = AccountingAgent()
+        agent = coalesced('AccountingAgent')
         insights = agent.generate_financial_insights(months)
 
         if 'error' in insights:
@@ -2295,7 +2298,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/accounting/categories', methods=['GET'])
     def agent_accounting_categories():
         """Retourne les categories de depenses et revenus"""
-        agent = AccountingAgent()
+        agent = get_agent('AccountingAgent')
         categories = agent.get_categories()
         return jsonify({'success': True, 'categories': categories})
 
@@ -2306,7 +2309,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/calendar/init', methods=['POST'])
     def agent_calendar_init():
         """Initialise les tables calendrier"""
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -2318,7 +2321,7 @@ def register_all_agent_routes(app):
                location, video_link, contact_name, contact_email, assigned_to, notes}
         """
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.create_event(data)
 
         if 'error' in result:
@@ -2340,7 +2343,7 @@ def register_all_agent_routes(app):
         }
         filters = {k: v for k, v in filters.items() if v}
 
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         events = agent.get_events(start_date, end_date, filters if filters else None)
 
         if isinstance(events, dict) and 'error' in events:
@@ -2352,7 +2355,7 @@ def register_all_agent_routes(app):
     def agent_calendar_update_event(event_id):
         """Met a jour un evenement"""
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.update_event(event_id, data)
 
         if 'error' in result:
@@ -2364,7 +2367,7 @@ def register_all_agent_routes(app):
     def agent_calendar_cancel_event(event_id):
         """Annule un evenement"""
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.cancel_event(event_id, data.get('reason'))
 
         if 'error' in result:
@@ -2381,7 +2384,7 @@ def register_all_agent_routes(app):
         date = request.args.get('date')
         service_id = request.args.get('service_id', type=int)
 
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         availability = agent.get_availability(date, service_id)
 
         if 'error' in availability:
@@ -2389,11 +2392,29 @@ def register_all_agent_routes(app):
 
         return jsonify({'success': True, 'availability': availability})
 
+    @app.route('/api/agent/calendar/availability/range', methods=['GET'])
+    def agent_calendar_availability_range():
+        """
+        Creneaux disponibles sur plusieurs jours (widget de reservation)
+        Query: ?start_date=2024-01-15&days=14&service_id=1
+        """
+        start_date = request.args.get('start_date')
+        days = request.args.get('days', 7, type=int)
+        service_id = request.args.get('service_id', type=int)
+
+        agent = get_agent('CalendarAgent')
+        availability = agent.get_availability_range(start_date, days, service_id)
+
+        if 'error' in availability:
+            return jsonify({'success': False, 'error': availability['error']}), 400
+
+        return jsonify({'success': True, 'availability': availability})
+
     @app.route('/api/agent/calendar/availability', methods=['POST'])
     def agent_calendar_set_availability():
         """Configure les disponibilites"""
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.set_availability(data)
 
         if 'error' in result:
@@ -2408,7 +2429,7 @@ def register_all_agent_routes(app):
         Body: {service_id, client_name, client_email, client_phone, booking_date, start_time, notes}
         """
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.create_booking(data)
 
         if 'error' in result:
@@ -2429,7 +2450,7 @@ def register_all_agent_routes(app):
         filters = {k: v for k, v in filters.items() if v}
         limit = int(request.args.get('limit', 50))
 
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         bookings = agent.get_bookings(filters if filters else None, limit)
 
         if isinstance(bookings, dict) and 'error' in bookings:
@@ -2441,7 +2462,7 @@ def register_all_agent_routes(app):
     def agent_calendar_confirm_booking():
         """Confirme une reservation par ID ou code"""
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.confirm_booking(data.get('booking_id'), data.get('confirmation_code'))
 
         if 'error' in result:
@@ -2453,7 +2474,7 @@ def register_all_agent_routes(app):
     def agent_calendar_cancel_booking():
         """Annule une reservation par ID ou code"""
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.cancel_booking(data.get('booking_id'), data.get('confirmation_code'))
 
         if 'error' in result:
@@ -2468,7 +2489,7 @@ def register_all_agent_routes(app):
         Body: {name, description, duration, price, buffer_after, max_advance_days, color}
         """
         data = request.get_json() or {}
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         result = agent.create_service(data)
 
         if 'error' in result:
@@ -2481,7 +2502,7 @@ def register_all_agent_routes(app):
         """Liste les services reservables"""
         active_only = request.args.get('active_only', 'true').lower() == 'true'
 
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         services = agent.get_services(active_only)
 
         if isinstance(services, dict) and 'error' in services:
@@ -2495,7 +2516,7 @@ def register_all_agent_routes(app):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         stats = agent.get_stats(start_date, end_date)
 
         if 'error' in stats:
@@ -2506,7 +2527,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/calendar/event-types', methods=['GET'])
     def agent_calendar_event_types():
         """Types d'evenements disponibles"""
-        agent = CalendarAgent()
+        agent = get_agent('CalendarAgent')
         return jsonify({'success': True, 'event_types': agent.get_event_types()})
 
     # ============================================
@@ -2516,7 +2537,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/chatbot/init', methods=['POST'])
     def agent_chatbot_init():
         """Initialise les tables chatbot"""
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -2533,7 +2554,7 @@ def register_all_agent_routes(app):
             import uuid
             session_id = str(uuid.uuid4())
 
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.start_conversation(
             session_id,
             data.get('source', 'website'),
@@ -2556,7 +2577,7 @@ def register_all_agent_routes(app):
         if not data.get('session_id') or not data.get('message'):
             return jsonify({'success': False, 'error': 'session_id et message requis'}), 400
 
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.send_message(
             data['session_id'],
             data['message'],
@@ -2568,6 +2589,24 @@ def register_all_agent_routes(app):
 
         return jsonify({'success': True, 'result': result})
 
+    @app.route('/api/agent/chatbot/message/stream', methods=['POST'])
+    def agent_chatbot_message_stream():
+        """
+        Comme /api/agent/chatbot/message mais en SSE (premier token des qu'il arrive)
+        Body: {session_id, message, use_ai}
+        """
+        data = request.get_json() or {}
+
+        if not data.get('session_id') or not data.get('message'):
+            return jsonify({'success': False, 'error': 'session_id et message requis'}), 400
+
+        agent = get_agent('ChatbotAgent')
+        stream = agent.stream_message(data['session_id'], data['message'], data.get('use_ai', True))
+        if 'error' in stream:
+            return jsonify({'success': False, 'error': stream['error']}), 400
+
+        return sse_response(stream['chunks'], on_complete=stream['finish'])
+
     @app.route('/api/agent/chatbot/lead', methods=['POST'])
     def agent_chatbot_capture_lead():
         """
@@ -2579,7 +2618,7 @@ def register_all_agent_routes(app):
         if not data.get('session_id'):
             return jsonify({'success': False, 'error': 'session_id requis'}), 400
 
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.capture_lead(
             data['session_id'],
             data.get('name'),
@@ -2596,7 +2635,7 @@ def register_all_agent_routes(app):
     def agent_chatbot_end():
         """Termine une conversation"""
         data = request.get_json() or {}
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.end_conversation(data.get('session_id'))
 
         if 'error' in result:
@@ -2607,7 +2646,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/chatbot/conversation/<session_id>', methods=['GET'])
     def agent_chatbot_get_conversation(session_id):
         """Obtient une conversation"""
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.get_conversation(session_id)
 
         if 'error' in result:
@@ -2626,7 +2665,7 @@ def register_all_agent_routes(app):
         filters = {k: v for k, v in filters.items() if v}
         limit = int(request.args.get('limit', 50))
 
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         conversations = agent.list_conversations(filters if filters else None, limit)
 
         if isinstance(conversations, dict) and 'error' in conversations:
@@ -2638,7 +2677,7 @@ def register_all_agent_routes(app):
     def agent_chatbot_add_faq():
         """Ajoute une FAQ"""
         data = request.get_json() or {}
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.add_faq(
             data.get('question', ''),
             data.get('answer', ''),
@@ -2655,7 +2694,7 @@ def register_all_agent_routes(app):
     def agent_chatbot_list_faqs():
         """Liste les FAQs"""
         language = request.args.get('language', 'fr')
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         faqs = agent.get_faqs(language)
 
         if isinstance(faqs, dict) and 'error' in faqs:
@@ -2669,7 +2708,7 @@ def register_all_agent_routes(app):
         query = request.args.get('q', '')
         language = request.args.get('language', 'fr')
 
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         results = agent.search_faq(query, language)
 
         if isinstance(results, dict) and 'error' in results:
@@ -2681,7 +2720,7 @@ def register_all_agent_routes(app):
     def agent_chatbot_add_response():
         """Ajoute une reponse pre-configuree"""
         data = request.get_json() or {}
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         result = agent.add_response(
             data.get('intent', ''),
             data.get('response', ''),
@@ -2697,7 +2736,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/chatbot/config', methods=['GET'])
     def agent_chatbot_get_config():
         """Obtient la config chatbot"""
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         config = agent.get_config()
 
         if isinstance(config, dict) and 'error' in config:
@@ -2709,7 +2748,7 @@ def register_all_agent_routes(app):
     def agent_chatbot_update_config():
         """Met a jour la config"""
         data = request.get_json() or {}
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
 
         for key, value in data.items():
             agent.update_config(key, value)
@@ -2722,7 +2761,7 @@ def register_all_agent_routes(app):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         stats = agent.get_stats(start_date, end_date)
 
         if 'error' in stats:
@@ -2733,7 +2772,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/chatbot/intents', methods=['GET'])
     def agent_chatbot_intents():
         """Liste les intentions"""
-        agent = ChatbotAgent()
+        agent = get_agent('ChatbotAgent')
         return jsonify({'success': True, 'intents': agent.get_intents()})
 
     # ============================================
@@ -2743,7 +2782,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/notification/init', methods=['POST'])
     def agent_notification_init():
         """Initialise les tables notifications"""
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -2754,7 +2793,7 @@ def register_all_agent_routes(app):
         Body: {type, channel, recipient: {email, phone, name}, data: {...}, template_id}
         """
         data = request.get_json() or {}
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         result = agent.send_notification(
             data.get('type', 'CUSTOM'),
             data.get('channel', 'email'),
@@ -2775,7 +2814,7 @@ def register_all_agent_routes(app):
         Body: {type, channel, recipient, data, scheduled_at}
         """
         data = request.get_json() or {}
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         result = agent.schedule_notification(
             data.get('type', 'CUSTOM'),
             data.get('channel', 'email'),
@@ -2795,7 +2834,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         limit = int(data.get('limit', 10))
 
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         result = agent.process_queue(limit)
 
         if 'error' in result:
@@ -2814,7 +2853,7 @@ def register_all_agent_routes(app):
         filters = {k: v for k, v in filters.items() if v}
         limit = int(request.args.get('limit', 50))
 
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         notifications = agent.get_notifications(filters if filters else None, limit)
 
         if isinstance(notifications, dict) and 'error' in notifications:
@@ -2826,7 +2865,7 @@ def register_all_agent_routes(app):
     def agent_notification_create_template():
         """Cree un template"""
         data = request.get_json() or {}
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         result = agent.create_template(data)
 
         if 'error' in result:
@@ -2840,7 +2879,7 @@ def register_all_agent_routes(app):
         channel = request.args.get('channel')
         notification_type = request.args.get('type')
 
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         templates = agent.get_templates(channel, notification_type)
 
         if isinstance(templates, dict) and 'error' in templates:
@@ -2854,7 +2893,7 @@ def register_all_agent_routes(app):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         stats = agent.get_stats(start_date, end_date)
 
         if 'error' in stats:
@@ -2865,7 +2904,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/notification/types', methods=['GET'])
     def agent_notification_types():
         """Types de notifications"""
-        agent = NotificationAgent()
+        agent = get_agent('NotificationAgent')
         return jsonify({'success': True, 'types': agent.get_notification_types()})
 
     # ============================================
@@ -2875,7 +2914,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/dashboard/init', methods=['POST'])
     def agent_dashboard_init():
         """Initialise les tables dashboard"""
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -2886,7 +2925,7 @@ def register_all_agent_routes(app):
         Query: ?period_days=30
         """
         period_days = int(request.args.get('period_days', 30))
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         overview = agent.get_overview(period_days)
 
         if 'error' in overview:
@@ -2901,7 +2940,7 @@ def register_all_agent_routes(app):
         Query: ?months=6
         """
         months = int(request.args.get('months', 6))
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         revenue = agent.get_revenue_trend(months)
 
         if isinstance(revenue, dict) and 'error' in revenue:
@@ -2912,7 +2951,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/dashboard/metrics', methods=['GET'])
     def agent_dashboard_metrics():
         """Metriques cles pour widgets"""
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         metrics = agent.get_top_metrics()
 
         if 'error' in metrics:
@@ -2927,7 +2966,7 @@ def register_all_agent_routes(app):
         Query: ?limit=20
         """
         limit = int(request.args.get('limit', 20))
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         activity = agent.get_recent_activity(limit)
 
         if isinstance(activity, dict) and 'error' in activity:
@@ -2938,7 +2977,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/dashboard/alerts', methods=['GET'])
     def agent_dashboard_alerts():
         """Alertes et actions requises"""
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         alerts = agent.get_alerts()
 
         if 'error' in alerts:
@@ -2949,7 +2988,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/dashboard/insights', methods=['GET'])
     def agent_dashboard_insights():
         """Insights AI generes"""
-        agent = DashboardAgent()
+        agent = get_agent('DashboardAgent')
         insights = agent.generate_insights()
 
         if 'error' in insights:
@@ -2964,7 +3003,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/lead-scoring/init', methods=['POST'])
     def agent_lead_scoring_init():
         """Initialise les tables lead scoring"""
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -2975,7 +3014,7 @@ def register_all_agent_routes(app):
         Body: {contact_id, data: {source, engagement, budget, timeline, fit, ...}}
         """
         data = request.get_json() or {}
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         result = agent.score_lead(
             data.get('contact_id'),
             data.get('data')
@@ -2989,7 +3028,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/lead-scoring/score-ai/<int:contact_id>', methods=['POST'])
     def agent_lead_scoring_score_ai(contact_id):
         """Score un lead avec analyse IA complete"""
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         result = agent.score_lead_ai(contact_id)
 
         if 'error' in result:
@@ -3003,7 +3042,7 @@ def register_all_agent_routes(app):
         data = request.get_json() or {}
         limit = int(data.get('limit', 50))
 
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         result = agent.batch_score(limit)
 
         if 'error' in result:
@@ -3017,7 +3056,7 @@ def register_all_agent_routes(app):
         min_score = int(request.args.get('min_score', 70))
         limit = int(request.args.get('limit', 20))
 
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         leads = agent.get_hot_leads(min_score, limit)
 
         if isinstance(leads, dict) and 'error' in leads:
@@ -3030,7 +3069,7 @@ def register_all_agent_routes(app):
         """Historique des scores d'un contact"""
         limit = int(request.args.get('limit', 10))
 
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         history = agent.get_score_history(contact_id, limit)
 
         if isinstance(history, dict) and 'error' in history:
@@ -3042,7 +3081,7 @@ def register_all_agent_routes(app):
     def agent_lead_scoring_create_action():
         """Cree une action pour un lead"""
         data = request.get_json() or {}
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         result = agent.create_action(
             data.get('contact_id'),
             data.get('action_type', 'call'),
@@ -3062,7 +3101,7 @@ def register_all_agent_routes(app):
         """Actions en attente"""
         limit = int(request.args.get('limit', 50))
 
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         actions = agent.get_pending_actions(limit)
 
         if isinstance(actions, dict) and 'error' in actions:
@@ -3073,7 +3112,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/lead-scoring/action/<int:action_id>/complete', methods=['POST'])
     def agent_lead_scoring_complete_action(action_id):
         """Marque une action comme terminee"""
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         result = agent.complete_action(action_id)
 
         if 'error' in result:
@@ -3084,7 +3123,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/lead-scoring/stats', methods=['GET'])
     def agent_lead_scoring_stats():
         """Statistiques de scoring"""
-        agent = LeadScoringAgent()
+        agent = get_agent('LeadScoringAgent')
         stats = agent.get_stats()
 
         if 'error' in stats:
@@ -3099,7 +3138,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/email-campaign/init', methods=['POST'])
     def agent_email_campaign_init():
         """Initialise les tables email campaign"""
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -3110,7 +3149,7 @@ def register_all_agent_routes(app):
         Body: {name, subject, content_html, content_text, segment_id, ab_test, send_at}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.create_campaign(data)
 
         if 'error' in result:
@@ -3125,7 +3164,7 @@ def register_all_agent_routes(app):
         Body: {campaign_type, context}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.generate_email_ai(
             data.get('campaign_type', 'newsletter'),
             data.get('context', {})
@@ -3140,7 +3179,7 @@ def register_all_agent_routes(app):
     def agent_email_campaign_list():
         """Liste les campagnes"""
         limit = int(request.args.get('limit', 50))
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         campaigns = agent.get_campaigns(limit)
 
         if isinstance(campaigns, dict) and 'error' in campaigns:
@@ -3155,7 +3194,7 @@ def register_all_agent_routes(app):
         Body: {name, trigger_type}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.create_sequence(
             data.get('name', 'New Sequence'),
             data.get('trigger_type', 'signup')
@@ -3173,7 +3212,7 @@ def register_all_agent_routes(app):
         Body: {subject, content_html, delay_days, content_text}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.add_sequence_step(
             sequence_id,
             data.get('subject', ''),
@@ -3191,7 +3230,7 @@ def register_all_agent_routes(app):
     def agent_email_campaign_list_sequences():
         """Liste les sequences"""
         limit = int(request.args.get('limit', 50))
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         sequences = agent.get_sequences(limit)
 
         if isinstance(sequences, dict) and 'error' in sequences:
@@ -3206,7 +3245,7 @@ def register_all_agent_routes(app):
         Body: {sequence_id, contact_id}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.enroll_contact(
             int(data.get('sequence_id')),
             int(data.get('contact_id'))
@@ -3224,7 +3263,7 @@ def register_all_agent_routes(app):
         Body: {name, conditions: {source, status, min_score, tags}}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.create_segment(
             data.get('name', 'New Segment'),
             data.get('conditions', {})
@@ -3242,7 +3281,7 @@ def register_all_agent_routes(app):
         Body: {email, reason}
         """
         data = request.get_json() or {}
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         result = agent.unsubscribe(
             data.get('email'),
             data.get('reason')
@@ -3257,7 +3296,7 @@ def register_all_agent_routes(app):
     def agent_email_campaign_stats():
         """Statistiques email marketing"""
         days = int(request.args.get('days', 30))
-        agent = EmailCampaignAgent()
+        agent = get_agent('EmailCampaignAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
@@ -3272,7 +3311,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/support/init', methods=['POST'])
     def agent_support_init():
         """Initialise les tables support"""
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -3283,7 +3322,7 @@ def register_all_agent_routes(app):
         Body: {email, name, subject, description, category, priority, channel, tags}
         """
         data = request.get_json() or {}
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.create_ticket(data)
 
         if 'error' in result:
@@ -3294,7 +3333,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/support/ticket/<int:ticket_id>', methods=['GET'])
     def agent_support_get_ticket(ticket_id):
         """Recupere un ticket avec messages"""
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         ticket = agent.get_ticket(ticket_id)
 
         if 'error' in ticket:
@@ -3309,7 +3348,7 @@ def register_all_agent_routes(app):
         Body: {status, priority, category, assigned_to, tags}
         """
         data = request.get_json() or {}
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.update_ticket(ticket_id, data)
 
         if 'error' in result:
@@ -3324,7 +3363,7 @@ def register_all_agent_routes(app):
         Body: {message, sender_type, sender_name, is_internal}
         """
         data = request.get_json() or {}
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.reply_ticket(
             ticket_id,
             data.get('message', ''),
@@ -3341,7 +3380,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/support/ticket/<int:ticket_id>/ai-response', methods=['POST'])
     def agent_support_ai_response(ticket_id):
         """Genere reponse IA pour un ticket"""
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.generate_response_ai(ticket_id)
 
         if 'error' in result:
@@ -3356,7 +3395,7 @@ def register_all_agent_routes(app):
         Body: {score (1-5), feedback}
         """
         data = request.get_json() or {}
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.rate_ticket(ticket_id, int(data.get('score', 5)), data.get('feedback'))
 
         if 'error' in result:
@@ -3379,7 +3418,7 @@ def register_all_agent_routes(app):
         filters = {k: v for k, v in filters.items() if v}
         limit = int(request.args.get('limit', 50))
 
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         tickets = agent.get_tickets(filters if filters else None, limit)
 
         if isinstance(tickets, dict) and 'error' in tickets:
@@ -3390,7 +3429,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/support/overdue', methods=['GET'])
     def agent_support_overdue():
         """Tickets en retard SLA"""
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         tickets = agent.get_overdue_tickets()
 
         if isinstance(tickets, dict) and 'error' in tickets:
@@ -3405,7 +3444,7 @@ def register_all_agent_routes(app):
         Body: {name, content, category, shortcut}
         """
         data = request.get_json() or {}
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         result = agent.add_canned_response(
             data.get('name', 'Reponse'),
             data.get('content', ''),
@@ -3422,7 +3461,7 @@ def register_all_agent_routes(app):
     def agent_support_list_canned():
         """Liste reponses predefinies"""
         category = request.args.get('category')
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         responses = agent.get_canned_responses(category)
 
         if isinstance(responses, dict) and 'error' in responses:
@@ -3434,7 +3473,7 @@ def register_all_agent_routes(app):
     def agent_support_stats():
         """Statistiques support"""
         days = int(request.args.get('days', 30))
-        agent = SupportTicketAgent()
+        agent = get_agent('SupportTicketAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
@@ -3449,7 +3488,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/kb/init', methods=['POST'])
     def agent_kb_init():
         """Initialise les tables knowledge base"""
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -3460,7 +3499,7 @@ def register_all_agent_routes(app):
         Body: {title, content, excerpt, category_id, author, status, tags, meta_title, meta_description}
         """
         data = request.get_json() or {}
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.create_article(data)
 
         if 'error' in result:
@@ -3475,7 +3514,7 @@ def register_all_agent_routes(app):
         Body: {topic, category}
         """
         data = request.get_json() or {}
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.generate_article_ai(data.get('topic', ''), data.get('category'))
 
         if 'error' in result:
@@ -3486,7 +3525,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/kb/article/<int:article_id>', methods=['GET'])
     def agent_kb_get_article(article_id):
         """Recupere un article par ID"""
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         article = agent.get_article(article_id=article_id)
 
         if 'error' in article:
@@ -3497,7 +3536,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/kb/article/slug/<slug>', methods=['GET'])
     def agent_kb_get_article_by_slug(slug):
         """Recupere un article par slug"""
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         article = agent.get_article(slug=slug)
 
         if 'error' in article:
@@ -3509,7 +3548,7 @@ def register_all_agent_routes(app):
     def agent_kb_update_article(article_id):
         """Met a jour un article"""
         data = request.get_json() or {}
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.update_article(article_id, data)
 
         if 'error' in result:
@@ -3524,7 +3563,7 @@ def register_all_agent_routes(app):
         Body: {is_helpful (bool), comment, email}
         """
         data = request.get_json() or {}
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.rate_article(article_id, data.get('is_helpful', True), data.get('comment'), data.get('email'))
 
         if 'error' in result:
@@ -3542,7 +3581,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status', 'published')
         limit = int(request.args.get('limit', 50))
 
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         articles = agent.get_articles(int(category_id) if category_id else None, status, limit)
 
         if isinstance(articles, dict) and 'error' in articles:
@@ -3559,7 +3598,7 @@ def register_all_agent_routes(app):
         query = request.args.get('q', '')
         limit = int(request.args.get('limit', 20))
 
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         results = agent.search_articles(query, limit)
 
         if isinstance(results, dict) and 'error' in results:
@@ -3574,7 +3613,7 @@ def register_all_agent_routes(app):
         Body: {question}
         """
         data = request.get_json() or {}
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.answer_question_ai(data.get('question', ''))
 
         if 'error' in result:
@@ -3589,7 +3628,7 @@ def register_all_agent_routes(app):
         Body: {question, answer, category_id}
         """
         data = request.get_json() or {}
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         result = agent.add_faq(data.get('question', ''), data.get('answer', ''), data.get('category_id'))
 
         if 'error' in result:
@@ -3606,7 +3645,7 @@ def register_all_agent_routes(app):
         category_id = request.args.get('category_id')
         limit = int(request.args.get('limit', 50))
 
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         faqs = agent.get_faqs(int(category_id) if category_id else None, limit)
 
         if isinstance(faqs, dict) and 'error' in faqs:
@@ -3617,7 +3656,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/kb/categories', methods=['GET'])
     def agent_kb_categories():
         """Liste les categories"""
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         categories = agent.get_categories()
 
         if isinstance(categories, dict) and 'error' in categories:
@@ -3629,7 +3668,7 @@ def register_all_agent_routes(app):
     def agent_kb_popular():
         """Articles populaires"""
         limit = int(request.args.get('limit', 10))
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         articles = agent.get_popular_articles(limit)
 
         if isinstance(articles, dict) and 'error' in articles:
@@ -3640,7 +3679,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/kb/stats', methods=['GET'])
     def agent_kb_stats():
         """Statistiques knowledge base"""
-        agent = KnowledgeBaseAgent()
+        agent = get_agent('KnowledgeBaseAgent')
         stats = agent.get_stats()
 
         if 'error' in stats:
@@ -3655,7 +3694,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/survey/init', methods=['POST'])
     def agent_survey_init():
         """Initialise les tables survey"""
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -3666,7 +3705,7 @@ def register_all_agent_routes(app):
         Body: {name, description, type, status, is_anonymous, thank_you_message}
         """
         data = request.get_json() or {}
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.create_survey(data)
 
         if 'error' in result:
@@ -3678,7 +3717,7 @@ def register_all_agent_routes(app):
     def agent_survey_create_nps():
         """Cree un sondage NPS predifini"""
         data = request.get_json() or {}
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.create_nps_survey(data.get('name', 'Enquete NPS'))
 
         if 'error' in result:
@@ -3690,7 +3729,7 @@ def register_all_agent_routes(app):
     def agent_survey_create_csat():
         """Cree un sondage CSAT predifini"""
         data = request.get_json() or {}
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.create_csat_survey(data.get('name', 'Satisfaction Client'))
 
         if 'error' in result:
@@ -3705,7 +3744,7 @@ def register_all_agent_routes(app):
         Body: {question_type, question_text, description, options, is_required, settings}
         """
         data = request.get_json() or {}
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.add_question(survey_id, data)
 
         if 'error' in result:
@@ -3716,7 +3755,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/survey/<int:survey_id>', methods=['GET'])
     def agent_survey_get(survey_id):
         """Recupere un sondage avec questions"""
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         survey = agent.get_survey(survey_id)
 
         if 'error' in survey:
@@ -3731,7 +3770,7 @@ def register_all_agent_routes(app):
         Body: {answers: {question_id: answer, ...}, contact_info: {email, contact_id}}
         """
         data = request.get_json() or {}
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.submit_response(survey_id, data.get('answers', {}), data.get('contact_info'))
 
         if 'error' in result:
@@ -3743,7 +3782,7 @@ def register_all_agent_routes(app):
     def agent_survey_responses(survey_id):
         """Liste les reponses d'un sondage"""
         limit = int(request.args.get('limit', 100))
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         responses = agent.get_responses(survey_id, limit)
 
         if isinstance(responses, dict) and 'error' in responses:
@@ -3754,7 +3793,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/survey/<int:survey_id>/analyze', methods=['POST'])
     def agent_survey_analyze(survey_id):
         """Analyse les feedbacks avec IA"""
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.analyze_feedback_ai(survey_id)
 
         if 'error' in result:
@@ -3771,7 +3810,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status')
         limit = int(request.args.get('limit', 50))
 
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         surveys = agent.get_surveys(status, limit)
 
         if isinstance(surveys, dict) and 'error' in surveys:
@@ -3786,7 +3825,7 @@ def register_all_agent_routes(app):
         Body: {score, email, contact_id, feedback, source}
         """
         data = request.get_json() or {}
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.record_nps(
             int(data.get('score', 0)),
             data.get('email'),
@@ -3807,7 +3846,7 @@ def register_all_agent_routes(app):
         Query: ?days=90
         """
         days = int(request.args.get('days', 90))
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         result = agent.get_nps_score(days)
 
         if 'error' in result:
@@ -3819,7 +3858,7 @@ def register_all_agent_routes(app):
     def agent_survey_stats():
         """Statistiques sondages"""
         days = int(request.args.get('days', 30))
-        agent = SurveyAgent()
+        agent = get_agent('SurveyAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
@@ -3834,7 +3873,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/webhook/init', methods=['POST'])
     def agent_webhook_init():
         """Initialise les tables webhook"""
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -3845,7 +3884,7 @@ def register_all_agent_routes(app):
         Body: {name, url, event_type, method, headers, retry_count, timeout_seconds}
         """
         data = request.get_json() or {}
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.create_outgoing_webhook(data)
 
         if 'error' in result:
@@ -3860,7 +3899,7 @@ def register_all_agent_routes(app):
         Body: {name, description, action_type, action_config, require_signature, allowed_ips}
         """
         data = request.get_json() or {}
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.create_incoming_webhook(data)
 
         if 'error' in result:
@@ -3875,7 +3914,7 @@ def register_all_agent_routes(app):
         Body: {event_type, payload}
         """
         data = request.get_json() or {}
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.trigger_webhook(data.get('event_type', 'test'), data.get('payload', {}))
 
         if 'error' in result:
@@ -3890,7 +3929,7 @@ def register_all_agent_routes(app):
         headers = dict(request.headers)
         ip = request.remote_addr
 
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.receive_webhook(endpoint_key, payload, headers, ip)
 
         if 'error' in result:
@@ -3904,7 +3943,7 @@ def register_all_agent_routes(app):
         is_active = request.args.get('active')
         limit = int(request.args.get('limit', 50))
 
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         webhooks = agent.get_webhooks('outgoing', bool(int(is_active)) if is_active else None, limit)
 
         if isinstance(webhooks, dict) and 'error' in webhooks:
@@ -3918,7 +3957,7 @@ def register_all_agent_routes(app):
         is_active = request.args.get('active')
         limit = int(request.args.get('limit', 50))
 
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         webhooks = agent.get_webhooks('incoming', bool(int(is_active)) if is_active else None, limit)
 
         if isinstance(webhooks, dict) and 'error' in webhooks:
@@ -3936,7 +3975,7 @@ def register_all_agent_routes(app):
         direction = request.args.get('direction')
         limit = int(request.args.get('limit', 100))
 
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         logs = agent.get_logs(int(webhook_id) if webhook_id else None, direction, limit)
 
         if isinstance(logs, dict) and 'error' in logs:
@@ -3951,7 +3990,7 @@ def register_all_agent_routes(app):
         Body: {direction, is_active}
         """
         data = request.get_json() or {}
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.toggle_webhook(webhook_id, data.get('direction', 'outgoing'), data.get('is_active', True))
 
         if 'error' in result:
@@ -3963,7 +4002,7 @@ def register_all_agent_routes(app):
     def agent_webhook_delete(webhook_id):
         """Supprime un webhook"""
         direction = request.args.get('direction', 'outgoing')
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         result = agent.delete_webhook(webhook_id, direction)
 
         if 'error' in result:
@@ -3974,14 +4013,14 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/webhook/events', methods=['GET'])
     def agent_webhook_events():
         """Liste des types d'evenements"""
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         return jsonify({'success': True, 'events': agent.get_event_types()})
 
     @app.route('/api/agent/webhook/stats', methods=['GET'])
     def agent_webhook_stats():
         """Statistiques webhooks"""
         days = int(request.args.get('days', 30))
-        agent = WebhookAgent()
+        agent = get_agent('WebhookAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
@@ -3996,7 +4035,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/automation/init', methods=['POST'])
     def agent_automation_init():
         """Initialise les tables automation"""
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -4007,7 +4046,7 @@ def register_all_agent_routes(app):
         Body: {name, description, trigger_type, trigger_config, is_active}
         """
         data = request.get_json() or {}
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.create_automation(data)
 
         if 'error' in result:
@@ -4022,7 +4061,7 @@ def register_all_agent_routes(app):
         Body: {action_type, action_config, delay_minutes, condition}
         """
         data = request.get_json() or {}
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.add_action(automation_id, data)
 
         if 'error' in result:
@@ -4033,7 +4072,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/automation/template/<template_name>', methods=['POST'])
     def agent_automation_template(template_name):
         """Cree une automation depuis un template"""
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.create_workflow_template(template_name)
 
         if 'error' in result:
@@ -4048,7 +4087,7 @@ def register_all_agent_routes(app):
         Body: {trigger_type, trigger_data}
         """
         data = request.get_json() or {}
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.trigger_automation(data.get('trigger_type', 'manual'), data.get('trigger_data', {}))
 
         if 'error' in result:
@@ -4059,7 +4098,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/automation/<int:automation_id>', methods=['GET'])
     def agent_automation_get(automation_id):
         """Recupere une automation avec actions"""
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         automation = agent.get_automation(automation_id)
 
         if 'error' in automation:
@@ -4073,7 +4112,7 @@ def register_all_agent_routes(app):
         is_active = request.args.get('active')
         limit = int(request.args.get('limit', 50))
 
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         automations = agent.get_automations(bool(int(is_active)) if is_active else None, limit)
 
         if isinstance(automations, dict) and 'error' in automations:
@@ -4085,7 +4124,7 @@ def register_all_agent_routes(app):
     def agent_automation_toggle(automation_id):
         """Active/desactive une automation"""
         data = request.get_json() or {}
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.toggle_automation(automation_id, data.get('is_active', True))
 
         if 'error' in result:
@@ -4096,7 +4135,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/automation/<int:automation_id>', methods=['DELETE'])
     def agent_automation_delete(automation_id):
         """Supprime une automation"""
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         result = agent.delete_automation(automation_id)
 
         if 'error' in result:
@@ -4111,7 +4150,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status')
         limit = int(request.args.get('limit', 100))
 
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         logs = agent.get_logs(int(automation_id) if automation_id else None, status, limit)
 
         if isinstance(logs, dict) and 'error' in logs:
@@ -4122,20 +4161,20 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/automation/triggers', methods=['GET'])
     def agent_automation_triggers():
         """Liste des types de triggers"""
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         return jsonify({'success': True, 'triggers': agent.get_trigger_types()})
 
     @app.route('/api/agent/automation/actions', methods=['GET'])
     def agent_automation_actions():
         """Liste des types d'actions"""
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         return jsonify({'success': True, 'actions': agent.get_action_types()})
 
     @app.route('/api/agent/automation/stats', methods=['GET'])
     def agent_automation_stats():
         """Statistiques automations"""
         days = int(request.args.get('days', 30))
-        agent = AutomationAgent()
+        agent = get_agent('AutomationAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
@@ -4150,7 +4189,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/affiliate/init', methods=['POST'])
     def agent_affiliate_init():
         """Initialise les tables affiliation"""
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -4161,7 +4200,7 @@ def register_all_agent_routes(app):
         Body: {name, email, phone, company, website, payment_method, payment_details, notes}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.register_affiliate(data)
 
         if 'error' in result:
@@ -4176,7 +4215,7 @@ def register_all_agent_routes(app):
         Body: {commission_rate, tier}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.approve_affiliate(affiliate_id, data.get('commission_rate'), data.get('tier', 'standard'))
 
         if 'error' in result:
@@ -4191,7 +4230,7 @@ def register_all_agent_routes(app):
         Body: {ip, user_agent, page, referer, source}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.track_click(referral_code, data)
 
         if 'error' in result:
@@ -4206,7 +4245,7 @@ def register_all_agent_routes(app):
         Body: {customer_email, customer_name, order_id, amount}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.record_conversion(referral_code, data)
 
         if 'error' in result:
@@ -4217,7 +4256,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/affiliate/<int:affiliate_id>', methods=['GET'])
     def agent_affiliate_get(affiliate_id):
         """Recupere un affilie"""
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         affiliate = agent.get_affiliate(affiliate_id)
 
         if 'error' in affiliate:
@@ -4235,7 +4274,7 @@ def register_all_agent_routes(app):
         tier = request.args.get('tier')
         limit = int(request.args.get('limit', 50))
 
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         affiliates = agent.get_affiliates(status, tier, limit)
 
         if isinstance(affiliates, dict) and 'error' in affiliates:
@@ -4253,7 +4292,7 @@ def register_all_agent_routes(app):
         converted = request.args.get('converted')
         limit = int(request.args.get('limit', 100))
 
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         referrals = agent.get_referrals(
             int(affiliate_id) if affiliate_id else None,
             bool(int(converted)) if converted else None,
@@ -4272,7 +4311,7 @@ def register_all_agent_routes(app):
         Body: {amount}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.request_payout(affiliate_id, data.get('amount'))
 
         if 'error' in result:
@@ -4287,7 +4326,7 @@ def register_all_agent_routes(app):
         Body: {payment_reference}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.process_payout(payout_id, data.get('payment_reference'))
 
         if 'error' in result:
@@ -4305,7 +4344,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status')
         limit = int(request.args.get('limit', 50))
 
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         payouts = agent.get_payouts(int(affiliate_id) if affiliate_id else None, status, limit)
 
         if isinstance(payouts, dict) and 'error' in payouts:
@@ -4320,7 +4359,7 @@ def register_all_agent_routes(app):
         Body: {name, min_sales, commission_rate, bonus_rate, description, benefits}
         """
         data = request.get_json() or {}
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.create_tier(data)
 
         if 'error' in result:
@@ -4331,7 +4370,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/affiliate/tiers', methods=['GET'])
     def agent_affiliate_list_tiers():
         """Liste les paliers"""
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         tiers = agent.get_tiers()
 
         if isinstance(tiers, dict) and 'error' in tiers:
@@ -4342,7 +4381,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/affiliate/tiers/setup', methods=['POST'])
     def agent_affiliate_setup_tiers():
         """Configure les paliers par defaut (Bronze, Silver, Gold, Platinum)"""
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.setup_default_tiers()
 
         if 'error' in result:
@@ -4353,7 +4392,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/affiliate/<int:affiliate_id>/update-tier', methods=['POST'])
     def agent_affiliate_update_tier(affiliate_id):
         """Met a jour le palier selon les ventes"""
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         result = agent.update_affiliate_tier(affiliate_id)
 
         if 'error' in result:
@@ -4364,7 +4403,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/affiliate/<int:affiliate_id>/dashboard', methods=['GET'])
     def agent_affiliate_dashboard(affiliate_id):
         """Dashboard affilie avec stats"""
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         dashboard = agent.get_affiliate_dashboard(affiliate_id)
 
         if 'error' in dashboard:
@@ -4376,7 +4415,7 @@ def register_all_agent_routes(app):
     def agent_affiliate_stats():
         """Statistiques globales programme affiliation"""
         days = int(request.args.get('days', 30))
-        agent = AffiliateAgent()
+        agent = get_agent('AffiliateAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
@@ -4391,7 +4430,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/init', methods=['POST'])
     def agent_loyalty_init():
         """Initialise les tables fidelite"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.init_db()
         return jsonify({'success': True, 'result': result})
 
@@ -4402,7 +4441,7 @@ def register_all_agent_routes(app):
         Body: {email, name, phone, customer_id, birthday, referral_code}
         """
         data = request.get_json() or {}
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.enroll_member(data)
 
         if 'error' in result:
@@ -4417,7 +4456,7 @@ def register_all_agent_routes(app):
         Body: {amount, order_id}
         """
         data = request.get_json() or {}
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.earn_points(member_id, data)
 
         if 'error' in result:
@@ -4428,7 +4467,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/<int:member_id>/redeem/<int:reward_id>', methods=['POST'])
     def agent_loyalty_redeem(member_id, reward_id):
         """Echange points contre recompense"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.redeem_reward(member_id, reward_id)
 
         if 'error' in result:
@@ -4439,7 +4478,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/use/<redemption_code>', methods=['POST'])
     def agent_loyalty_use_redemption(redemption_code):
         """Utilise un code d'echange"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.use_redemption(redemption_code)
 
         if 'error' in result:
@@ -4450,7 +4489,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/member/<int:member_id>', methods=['GET'])
     def agent_loyalty_get_member(member_id):
         """Recupere un membre par ID"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         member = agent.get_member(member_id=member_id)
 
         if 'error' in member:
@@ -4461,7 +4500,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/member/email/<email>', methods=['GET'])
     def agent_loyalty_get_member_by_email(email):
         """Recupere un membre par email"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         member = agent.get_member(email=email)
 
         if 'error' in member:
@@ -4479,7 +4518,7 @@ def register_all_agent_routes(app):
         status = request.args.get('status', 'active')
         limit = int(request.args.get('limit', 50))
 
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         members = agent.get_members(tier, status, limit)
 
         if isinstance(members, dict) and 'error' in members:
@@ -4496,7 +4535,7 @@ def register_all_agent_routes(app):
         trans_type = request.args.get('type')
         limit = int(request.args.get('limit', 50))
 
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         transactions = agent.get_transactions(member_id, trans_type, limit)
 
         if isinstance(transactions, dict) and 'error' in transactions:
@@ -4511,7 +4550,7 @@ def register_all_agent_routes(app):
         Body: {name, description, points_cost, type, value, code, stock, tier_required}
         """
         data = request.get_json() or {}
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.create_reward(data)
 
         if 'error' in result:
@@ -4528,7 +4567,7 @@ def register_all_agent_routes(app):
         active = request.args.get('active')
         tier = request.args.get('tier')
 
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         is_active = bool(int(active)) if active else True
         rewards = agent.get_rewards(is_active, tier)
 
@@ -4544,7 +4583,7 @@ def register_all_agent_routes(app):
         Body: {name, min_points, multiplier, benefits, color}
         """
         data = request.get_json() or {}
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.create_tier(data)
 
         if 'error' in result:
@@ -4555,7 +4594,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/tiers', methods=['GET'])
     def agent_loyalty_list_tiers():
         """Liste les niveaux"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         tiers = agent.get_tiers()
 
         if isinstance(tiers, dict) and 'error' in tiers:
@@ -4566,7 +4605,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/tiers/setup', methods=['POST'])
     def agent_loyalty_setup_tiers():
         """Configure les niveaux par defaut (Bronze, Silver, Gold, Platinum, Diamond)"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.setup_default_tiers()
 
         if 'error' in result:
@@ -4577,7 +4616,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/rewards/setup', methods=['POST'])
     def agent_loyalty_setup_rewards():
         """Configure les recompenses par defaut"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.setup_default_rewards()
 
         if 'error' in result:
@@ -4592,7 +4631,7 @@ def register_all_agent_routes(app):
         Body: {name, description, type, value, conditions, valid_from, valid_until}
         """
         data = request.get_json() or {}
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.create_promotion(data)
 
         if 'error' in result:
@@ -4605,7 +4644,7 @@ def register_all_agent_routes(app):
         """Liste les promotions"""
         active = request.args.get('active', '1')
 
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         promotions = agent.get_promotions(bool(int(active)))
 
         if isinstance(promotions, dict) and 'error' in promotions:
@@ -4616,7 +4655,7 @@ def register_all_agent_routes(app):
     @app.route('/api/agent/loyalty/<int:member_id>/dashboard', methods=['GET'])
     def agent_loyalty_member_dashboard(member_id):
         """Dashboard membre avec stats"""
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         dashboard = agent.get_member_dashboard(member_id)
 
         if 'error' in dashboard:
@@ -4631,7 +4670,7 @@ def register_all_agent_routes(app):
         Body: {points, reason}
         """
         data = request.get_json() or {}
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         result = agent.adjust_points(member_id, data.get('points', 0), data.get('reason', 'Ajustement manuel'))
 
         if 'error' in result:
@@ -4643,7 +4682,7 @@ def register_all_agent_routes(app):
     def agent_loyalty_stats():
         """Statistiques programme fidelite"""
         days = int(request.args.get('days', 30))
-        agent = LoyaltyAgent()
+        agent = get_agent('LoyaltyAgent')
         stats = agent.get_stats(days)
 
         if 'error' in stats:
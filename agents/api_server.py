@@ -7,13 +7,16 @@ Port: 8002
 import os
 import json
 import sqlite3
-import yaml
 import subprocess
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
 import requests
+from config_service import get_service as get_config_service
+from llm_stream import stream_chat, strip_think, sse_response
+import llm_usage
+import asset_pipeline
 
 app = Flask(__name__)
 CORS(app)
@@ -23,13 +26,18 @@ logger = logging.getLogger(__name__)
 DB_PATH = "/opt/seo-agent/db/seo_agent.db"
 CONFIG_PATH = "/opt/seo-agent/config.yaml"
 
+_config = get_config_service(CONFIG_PATH, default={"general": {"pause_active": False}})
+
 def get_config():
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            return yaml.safe_load(f)
-    except:
+        return _config.get()
+    except Exception:
         return {"general": {"pause_active": False}}
 
+def set_pause_active(value):
+    """Bascule le killswitch (ecriture atomique sous verrou)"""
+    _config.update(lambda config: config.setdefault('general', {}).__setitem__('pause_active', value))
+
 def get_db():
     return sqlite3.connect(DB_PATH)
 
@@ -39,17 +47,16 @@ def get_db():
 
 @app.route('/api/check-killswitch', methods=['GET'])
 def check_killswitch():
-    config = get_config()
-    pause_active = config.get('general', {}).get('pause_active', False)
+    try:
+        pause_active = _config.snapshot().pause_active
+    except Exception:
+        pause_active = False
     return jsonify({"pause_active": pause_active, "timestamp": datetime.now().isoformat()})
 
 @app.route('/api/activate-killswitch', methods=['POST'])
 def activate_killswitch():
     try:
-        config = get_config()
-        config['general']['pause_active'] = True
-        with open(CONFIG_PATH, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
+        set_pause_active(True)
         return jsonify({"status": "ok", "pause_active": True})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -57,10 +64,7 @@ def activate_killswitch():
 @app.route('/api/deactivate-killswitch', methods=['POST'])
 def deactivate_killswitch():
     try:
-        config = get_config()
-        config['general']['pause_active'] = False
-        with open(CONFIG_PATH, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
+        set_pause_active(False)
         return jsonify({"status": "ok", "pause_active": False})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -87,8 +91,7 @@ def get_global_stats():
     cursor.execute("SELECT COUNT(*) FROM mon_alerts WHERE resolved = 0")
     stats['active_alerts'] = cursor.fetchone()[0]
     conn.close()
-    config = get_config()
-    stats['pause_active'] = config.get('general', {}).get('pause_active', False)
+    stats['pause_active'] = _config.snapshot().pause_active
     return jsonify(stats)
 
 # ============================================
@@ -410,6 +413,13 @@ DEEPSEEK_R1 = 'accounts/fireworks/models/deepseek-r1-0528'
 ACTIVE_MODEL = GROQ_MODEL
 QWEN_VL_MODEL = 'accounts/fireworks/models/qwen3-vl-235b-a22b-instruct'
 
+AI_CHAT_PROMPTS = {
+    'seo': 'Tu es un expert SEO. Aide avec les strategies de referencement. Reponds en francais.',
+    'content': 'Tu es un redacteur SEO expert. Cree du contenu optimise. Reponds en francais.',
+    'analysis': 'Tu es un analyste de donnees SEO. Analyse les metriques. Reponds en francais.',
+    'general': 'Tu es un assistant AI polyvalent. Reponds en francais.'
+}
+
 @app.route('/api/ai/chat', methods=['POST'])
 def ai_chat():
     data = request.json or {}
@@ -417,20 +427,21 @@ def ai_chat():
     context = str(data.get("context", "seo")) if not isinstance(data.get("context"), dict) else "general"
     if not message:
         return jsonify({'error': 'Message requis'}), 400
-    prompts = {
-        'seo': 'Tu es un expert SEO. Aide avec les strategies de referencement. Reponds en francais.',
-        'content': 'Tu es un redacteur SEO expert. Cree du contenu optimise. Reponds en francais.',
-        'analysis': 'Tu es un analyste de donnees SEO. Analyse les metriques. Reponds en francais.',
-        'general': 'Tu es un assistant AI polyvalent. Reponds en francais.'
-    }
+    prompts = AI_CHAT_PROMPTS
+    if not llm_usage.check_budget('ai_chat', 'groq', ACTIVE_MODEL):
+        return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+    usage = llm_usage.LLMCall('ai_chat')
+    usage.attempt('groq')
     try:
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {GROQ_API_KEY}'}
         payload = {'model': ACTIVE_MODEL, 'messages': [{'role': 'system', 'content': prompts.get(context, prompts['general'])}, {'role': 'user', 'content': message}], 'max_tokens': 2048, 'temperature': 0.7}
         response = requests.post(GROQ_URL, headers=headers, json=payload, timeout=60)
         if response.status_code != 200:
+            usage.failure(ACTIVE_MODEL)
             return jsonify({'error': f'Erreur Fireworks: {response.status_code}'}), 500
         result = response.json()
         ai_response = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        usage.success('groq', ACTIVE_MODEL, result.get('usage'), message, ai_response)
         # Strip DeepSeek R1 <think> reasoning tags
         import re as _re
         ai_response = _re.sub(r'<think>.*?</think>', '', ai_response, flags=_re.DOTALL).strip()
@@ -443,6 +454,33 @@ def ai_chat():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ai/chat/stream', methods=['POST'])
+def ai_chat_stream():
+    """Comme /api/ai/chat mais en SSE; l'historique est enregistre une fois la reponse complete"""
+    data = request.json or {}
+    message = data.get('message', '')
+    context = str(data.get("context", "seo")) if not isinstance(data.get("context"), dict) else "general"
+    if not message:
+        return jsonify({'error': 'Message requis'}), 400
+    system = AI_CHAT_PROMPTS.get(context, AI_CHAT_PROMPTS['general'])
+    messages = [{'role': 'system', 'content': system}, {'role': 'user', 'content': message}]
+    if not llm_usage.check_budget('ai_chat', 'groq', ACTIVE_MODEL):
+        return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+    chunks = strip_think(llm_usage.tracked_stream(
+        stream_chat(GROQ_URL, GROQ_API_KEY, ACTIVE_MODEL, messages, max_tokens=2048, timeout=60),
+        'ai_chat', 'groq', ACTIVE_MODEL, system + message))
+
+    def save_history(ai_response):
+        ai_response = ai_response.strip()
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO ai_chat_history (context, user_message, ai_response, model, created_at) VALUES (?, ?, ?, ?, datetime("now"))', (context, message, ai_response, ACTIVE_MODEL))
+        conn.commit()
+        conn.close()
+        return {'response': ai_response, 'model': ACTIVE_MODEL, 'context': context}
+
+    return sse_response(chunks, on_complete=save_history)
+
 @app.route('/api/ai/history', methods=['GET'])
 def ai_history():
     limit = int(request.args.get('limit', 20))
@@ -481,11 +519,17 @@ def ai_analyze_document():
         prompt = 'Extrais les informations de ce document concurrent. REPONDS en JSON: {"nom_client": "", "adresse": "", "ville": "", "telephone": "", "services": "", "prix_concurrent": 0}'
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {GROQ_API_KEY}'}
         payload = {'model': QWEN_VL_MODEL, 'messages': [{'role': 'user', 'content': [{'type': 'text', 'text': prompt}, {'type': 'image_url', 'image_url': {'url': f'data:{mime};base64,{file_data}'}}]}], 'max_tokens': 2048, 'temperature': 0.2}
+        if not llm_usage.check_budget('ai_analyze_document', 'groq', QWEN_VL_MODEL):
+            return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+        usage = llm_usage.LLMCall('ai_analyze_document')
+        usage.attempt('groq')
         response = requests.post(GROQ_URL, headers=headers, json=payload, timeout=120)
         if response.status_code != 200:
+            usage.failure(QWEN_VL_MODEL)
             return jsonify({'error': f'Erreur: {response.status_code}'}), 500
         result = response.json()
         text = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        usage.success('groq', QWEN_VL_MODEL, result.get('usage'), prompt, text)
         if '{' in text:
             text = text[text.find('{'):text.rfind('}')+1]
         extracted = json.loads(text)
@@ -502,11 +546,7 @@ def update_config():
     value = data.get('value')
     if not section or not key:
         return jsonify({'error': 'Section et key requis'}), 400
-    try:
-        import yaml
-        config_path = '/opt/seo-agent/config/config.yaml'
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+    def apply(config):
         parts = section.split('.')
         target = config
         for p in parts[:-1]:
@@ -519,8 +559,8 @@ def update_config():
             config[parts[0]][key] = value
         else:
             target[parts[-1]] = {key: value} if parts[-1] not in target else {**target[parts[-1]], key: value}
-        with open(config_path, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
+    try:
+        get_config_service('/opt/seo-agent/config/config.yaml').update(apply)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -611,12 +651,9 @@ def n8n_restart():
 # AGENTS SYSTEM INTEGRATION
 # ============================================
 try:
-    from agents_system import (
-        MasterOrchestrator, KeywordResearchAgent, ContentGenerationAgent,
-        FAQGenerationAgent, TechnicalSEOAuditAgent, PerformanceAgent,
-        LocalSEOAgent, CompetitorAnalysisAgent, SchemaMarkupAgent,
-        ContentCalendarAgent, BlogIdeaAgent, MonitoringAgent, SITES
-    )
+    # Les agents sont importes/instancies au premier usage (agent_registry)
+    from agents_system import MasterOrchestrator, SITES
+    from agent_registry import get_agent
     AGENTS_LOADED = True
     from api_agents_routes import register_all_agent_routes
     register_all_agent_routes(app)
@@ -643,7 +680,7 @@ def agent_audit(site_id):
 def agent_uptime():
     if not AGENTS_LOADED:
         return jsonify({"error": "Agents not loaded"}), 500
-    agent = MonitoringAgent()
+    agent = get_agent('MonitoringAgent')
     results = agent.check_uptime(SITES)
     return jsonify(results)
 
@@ -652,7 +689,7 @@ def agent_uptime():
 def revalidate_alerts():
     if not AGENTS_LOADED:
         return jsonify({"error": "Agents not loaded"}), 500
-    agent = MonitoringAgent()
+    agent = get_agent('MonitoringAgent')
     results = agent.revalidate_old_alerts()
     return jsonify(results)
 
@@ -662,7 +699,7 @@ def mark_alert_corrected(alert_id):
         return jsonify({"error": "Agents not loaded"}), 500
     data = request.json or {}
     agent_name = data.get("agent_name", "unknown_agent")
-    agent = MonitoringAgent()
+    agent = get_agent('MonitoringAgent')
     result = agent.mark_corrected_by_agent(alert_id, agent_name)
     return jsonify(result)
 
@@ -671,7 +708,7 @@ def get_site_alerts(site_id):
     if not AGENTS_LOADED:
         return jsonify({"error": "Agents not loaded"}), 500
     alert_type = request.args.get("type")
-    agent = MonitoringAgent()
+    agent = get_agent('MonitoringAgent')
     alerts = agent.find_alerts_for_site(site_id, alert_type)
     return jsonify({"alerts": alerts})
 # NOTIFICATIONS WHATSAPP
@@ -883,8 +920,7 @@ register_self_audit_routes(app)
 @app.route("/api/agent/self-audit", methods=["POST"])
 def run_self_audit_agent():
     try:
-        from self_audit_agent import SelfAuditAgent
-        agent = SelfAuditAgent()
+        agent = get_agent('SelfAuditAgent')
         results = {}
         for site in ["deneigement-excellence.ca", "paysagiste-excellence.ca", "jcpeintre.com", "seoparai.com"]:
             r = agent.check_live_site(site)
@@ -928,7 +964,8 @@ def command_deploy():
         def delayed_restart():
             import time
             time.sleep(2)
-            subprocess.run(["sudo", "systemctl", "restart", "seo-api"], capture_output=True, timeout=15)
+            # Graceful (HUP) sous serve.py/gunicorn, restart classique sinon
+            subprocess.run(["sudo", "systemctl", "reload-or-restart", "seo-api"], capture_output=True, timeout=15)
         threading.Thread(target=delayed_restart, daemon=True).start()
         steps.append("seo-api: restart scheduled in 2s")
 
@@ -957,7 +994,8 @@ def command_restart_services():
         def delayed_restart():
             import time
             time.sleep(2)
-            subprocess.run(["sudo", "systemctl", "restart", "seo-api"], capture_output=True, timeout=15)
+            # Graceful (HUP) sous serve.py/gunicorn, restart classique sinon
+            subprocess.run(["sudo", "systemctl", "reload-or-restart", "seo-api"], capture_output=True, timeout=15)
         threading.Thread(target=delayed_restart, daemon=True).start()
         results.append("seo-api: scheduled restart in 2s")
 
@@ -1184,26 +1222,26 @@ def get_scheduler_runs():
 # CHART DATA ENDPOINTS
 # ════════════════════════════════════════════════════════
 
+from chart_cache import cached_json, read_summary, refresh_summaries, invalidate as invalidate_chart_cache
+
 @app.route("/api/charts/agent-runs-daily", methods=["GET"])
+@cached_json(ttl=30)
 def chart_agent_runs_daily():
     days = request.args.get("days", 7, type=int)
-    conn = sqlite3.connect(DB_PATH)
-    rows = conn.execute(
-        "SELECT date(started_at) as day, COUNT(*) as total, SUM(CASE WHEN status='success' THEN 1 ELSE 0 END) as success FROM agent_runs WHERE started_at > datetime('now', ?) GROUP BY date(started_at) ORDER BY day",
-        (f"-{days} days",)
-    ).fetchall()
-    conn.close()
+    rows = read_summary(
+        "SELECT day, SUM(total), SUM(success) FROM chart_daily_agent_runs WHERE day >= date('now', ?) GROUP BY day ORDER BY day",
+        (f"-{days} days",), DB_PATH
+    )
     return jsonify({"days": [r[0] for r in rows], "total": [r[1] for r in rows], "success": [r[2] for r in rows]})
 
 @app.route("/api/charts/uptime-daily", methods=["GET"])
+@cached_json(ttl=30)
 def chart_uptime_daily():
     days = request.args.get("days", 7, type=int)
-    conn = sqlite3.connect(DB_PATH)
-    rows = conn.execute(
-        "SELECT date(checked_at) as day, site_id, COUNT(*) as total, SUM(CASE WHEN is_up=1 THEN 1 ELSE 0 END) as up_count FROM mon_uptime WHERE checked_at > datetime('now', ?) GROUP BY date(checked_at), site_id ORDER BY day",
-        (f"-{days} days",)
-    ).fetchall()
-    conn.close()
+    rows = read_summary(
+        "SELECT day, site_id, total, up_count FROM chart_daily_uptime WHERE day >= date('now', ?) ORDER BY day",
+        (f"-{days} days",), DB_PATH
+    )
     sites = {}
     days_list = sorted(set(r[0] for r in rows))
     for r in rows:
@@ -1217,6 +1255,7 @@ def chart_uptime_daily():
     return jsonify({"days": days_list, "sites": result})
 
 @app.route("/api/charts/keyword-positions", methods=["GET"])
+@cached_json(ttl=60)
 def chart_keyword_positions():
     site_id = request.args.get("site_id", "1")
     conn = sqlite3.connect(DB_PATH)
@@ -1235,6 +1274,7 @@ def chart_keyword_positions():
     return jsonify(keywords)
 
 @app.route("/api/charts/content-pipeline", methods=["GET"])
+@cached_json(ttl=60)
 def chart_content_pipeline():
     conn = sqlite3.connect(DB_PATH)
     stats = {}
@@ -1252,6 +1292,7 @@ def chart_content_pipeline():
     return jsonify(stats)
 
 @app.route("/api/charts/alert-severity", methods=["GET"])
+@cached_json(ttl=30)
 def chart_alert_severity():
     conn = sqlite3.connect(DB_PATH)
     rows = conn.execute("SELECT severity, COUNT(*) FROM mon_alerts WHERE resolved=0 GROUP BY severity").fetchall()
@@ -1259,14 +1300,13 @@ def chart_alert_severity():
     return jsonify({r[0]: r[1] for r in rows})
 
 @app.route("/api/charts/scheduler-daily", methods=["GET"])
+@cached_json(ttl=30)
 def chart_scheduler_daily():
     days = request.args.get("days", 7, type=int)
-    conn = sqlite3.connect(DB_PATH)
-    rows = conn.execute(
-        "SELECT date(started_at) as day, task_type, COUNT(*) as total, SUM(CASE WHEN status='success' THEN 1 ELSE 0 END) as ok FROM agent_runs WHERE task_type LIKE 'cycle_%%' AND started_at > datetime('now', ?) GROUP BY day, task_type ORDER BY day",
-        (f"-{days} days",)
-    ).fetchall()
-    conn.close()
+    rows = read_summary(
+        "SELECT day, task_type, total, success FROM chart_daily_agent_runs WHERE task_type LIKE 'cycle_%%' AND day >= date('now', ?) ORDER BY day",
+        (f"-{days} days",), DB_PATH
+    )
     days_list = sorted(set(r[0] for r in rows))
     cycles = {}
     for r in rows:
@@ -1276,6 +1316,14 @@ def chart_scheduler_daily():
         cycles[c][r[0]] = {"total": r[2], "ok": r[3]}
     return jsonify({"days": days_list, "cycles": cycles})
 
+@app.route("/api/charts/refresh", methods=["POST"])
+def chart_refresh():
+    """Reconstruit les resumes journaliers (full=1 pour tout recalculer)"""
+    full = request.args.get("full", "0") == "1"
+    result = refresh_summaries(DB_PATH, full=full)
+    invalidate_chart_cache()
+    return jsonify({"status": "ok", "refreshed": result})
+
 # ════════════════════════════════════════════════════════
 # KEYWORD CLUSTER & TOPICAL MAP ENDPOINTS
 # ════════════════════════════════════════════════════════
@@ -1285,10 +1333,7 @@ def api_keyword_cluster():
     data = request.json or {}
     site_id = data.get("site_id", "1")
     try:
-        from agents_system import KeywordClusterAgent
-        agent = KeywordClusterAgent()
-        result = agent.cluster_keywords(site_id)
-        return jsonify(result)
+        return submit_job("keyword_cluster", {"site_id": site_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1307,8 +1352,7 @@ def api_topical_map_generate():
     site_id = data.get("site_id", "1")
     seed = data.get("seed", "")
     try:
-        from agents_system import TopicalMapAgent
-        agent = TopicalMapAgent()
+        agent = get_agent('TopicalMapAgent')
         result = agent.generate_map(site_id, seed)
         return jsonify(result)
     except Exception as e:
@@ -1331,8 +1375,7 @@ def api_content_score():
     if not content:
         return jsonify({"error": "content required"}), 400
     try:
-        from agents_system import ContentScoringAgent
-        agent = ContentScoringAgent()
+        agent = get_agent('ContentScoringAgent')
         result = agent.score_content(content, keyword)
         return jsonify(result)
     except Exception as e:
@@ -1348,18 +1391,8 @@ def api_report_generate():
     site_id = data.get("site_id", "1")
     branding = data.get("branding", None)
     try:
-        from agents_system import WhiteLabelReportAgent
-        agent = WhiteLabelReportAgent()
-        result = agent.generate_monthly_report(site_id, branding)
-        # Save to DB
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute(
-            "INSERT INTO reports (site_id, report_type, period, html_content, metrics_json, created_at) VALUES (?,?,?,?,?,datetime('now'))",
-            (site_id, "monthly", datetime.now().strftime("%Y-%m"), str(result.get("html_report",""))[:50000], json.dumps(result.get("metrics",{})))
-        )
-        conn.commit()
-        conn.close()
-        return jsonify(result)
+        # Generation + sauvegarde dans reports par la file de jobs
+        return submit_job("report_builder", {"site_id": site_id, "branding": branding})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1419,8 +1452,7 @@ def generate_review_response_api():
         is_positive = data.get("is_positive", True)
         if not review_text:
             return jsonify({"error": "Review text required"}), 400
-        from agents_system import ReviewManagementAgent
-        agent = ReviewManagementAgent()
+        agent = get_agent('ReviewManagementAgent')
         result = agent.generate_review_response(review_text, rating, is_positive)
         return jsonify(result)
     except Exception as e:
@@ -1431,6 +1463,12 @@ def generate_review_response_api():
 from seoai_analytics import register_analytics_routes
 register_analytics_routes(app)
 
+from job_queue import register_job_routes, submit as submit_job
+register_job_routes(app)
+from search_index import register_search_routes
+register_search_routes(app)
+llm_usage.register_llm_usage_routes(app)
+
 # ============================================
 # AUTO-FIX SEO API ENDPOINTS
 # ============================================
@@ -1474,7 +1512,7 @@ def autofix_diagnostic(site_id):
 
     # --- title_tag agent ---
     try:
-        tech = TechnicalSEOAuditAgent()
+        tech = get_agent('TechnicalSEOAuditAgent')
         url = "https://" + domain
         audit = tech.audit_page(url)
         title_issues = [i for i in audit.get("issues", []) if "title" in i.get("message", "").lower()]
@@ -1489,7 +1527,7 @@ def autofix_diagnostic(site_id):
 
     # --- schema agent ---
     try:
-        schema_agent = SchemaMarkupAgent()
+        schema_agent = get_agent('SchemaMarkupAgent')
         schema_data = schema_agent.generate_complete_schema(site_id)
         import requests as _req
         resp = _req.get("https://" + domain, timeout=10, headers={"User-Agent": "SeoparAI-Agent/1.0"})
@@ -1505,7 +1543,7 @@ def autofix_diagnostic(site_id):
 
     # --- opengraph agent ---
     try:
-        og_agent = OpenGraphAgent()
+        og_agent = get_agent('OpenGraphAgent')
         og_data = og_agent.generate_og_tags(site_id)
         missing_count = len(og_data.get("missing_og", [])) + len(og_data.get("missing_tw", []))
         results["agents"]["opengraph"] = {
@@ -1522,7 +1560,7 @@ def autofix_diagnostic(site_id):
 
     # --- social agent ---
     try:
-        social_agent = SocialMediaAgent()
+        social_agent = get_agent('SocialMediaAgent')
         sample = social_agent.generate_social_posts(site.get("nom", domain), "https://" + domain)
         has_posts = bool(sample)
         results["agents"]["social"] = {
@@ -1574,7 +1612,7 @@ def autofix_run(site_id):
         # --- Fix schema ---
         if agent_name == "schema":
             try:
-                schema_agent = SchemaMarkupAgent()
+                schema_agent = get_agent('SchemaMarkupAgent')
                 schema_data = schema_agent.generate_local_business_schema(site_id)
                 schema_json = json.dumps(schema_data, indent=2, ensure_ascii=False)
                 snippet = '<script type="application/ld+json">\n' + schema_json + '\n</script>'
@@ -1584,8 +1622,7 @@ def autofix_run(site_id):
                         html = f.read()
                     if "application/ld+json" not in html:
                         html = html.replace("</head>", snippet + "\n</head>", 1)
-                        with open(index_path, "w", encoding="utf-8") as f:
-                            f.write(html)
+                        asset_pipeline.write_site_file(index_path, html)
                         fix_results["fixes"]["schema"] = {"status": "injected", "file": index_path}
                     else:
                         fix_results["fixes"]["schema"] = {"status": "already_present", "file": index_path}
@@ -1597,7 +1634,7 @@ def autofix_run(site_id):
         # --- Fix opengraph ---
         elif agent_name == "opengraph":
             try:
-                og_agent = OpenGraphAgent()
+                og_agent = get_agent('OpenGraphAgent')
                 og_data = og_agent.generate_og_tags(site_id)
                 og_html = og_data.get("html_tags", "")
                 index_path = os.path.join(site_path, "index.html")
@@ -1606,8 +1643,7 @@ def autofix_run(site_id):
                         html = f.read()
                     if "og:title" not in html:
                         html = html.replace("</head>", og_html + "\n</head>", 1)
-                        with open(index_path, "w", encoding="utf-8") as f:
-                            f.write(html)
+                        asset_pipeline.write_site_file(index_path, html)
                         fix_results["fixes"]["opengraph"] = {"status": "injected", "file": index_path, "tags_added": len(og_data.get("missing_og", [])) + len(og_data.get("missing_tw", []))}
                     else:
                         fix_results["fixes"]["opengraph"] = {"status": "already_present", "file": index_path}
@@ -1619,7 +1655,7 @@ def autofix_run(site_id):
         # --- Fix title_tag ---
         elif agent_name == "title_tag":
             try:
-                title_agent = TitleTagAgent()
+                title_agent = get_agent('TitleTagAgent')
                 optimized = title_agent.optimize_title(
                     site.get("nom", ""), site.get("niche", ""), site.get("nom", "")
                 )
@@ -1633,8 +1669,7 @@ def autofix_run(site_id):
                         old_title = _re.search(r"<title>(.*?)</title>", html, _re.IGNORECASE | _re.DOTALL)
                         if old_title:
                             html = html.replace(old_title.group(0), "<title>" + new_title + "</title>", 1)
-                            with open(index_path, "w", encoding="utf-8") as f:
-                                f.write(html)
+                            asset_pipeline.write_site_file(index_path, html)
                             fix_results["fixes"]["title_tag"] = {"status": "updated", "old": old_title.group(1).strip(), "new": new_title, "file": index_path}
                         else:
                             fix_results["fixes"]["title_tag"] = {"status": "no_title_found", "file": index_path}
@@ -0,0 +1,764 @@
+#!/usr/bin/env python3
+"""
+Asset Pipeline — CSS critique, bundles CSS, minification et pre-compression des sites deployes
+- Les blocs <style> du <head> identiques sur plusieurs pages (blog_deployer injecte le meme
+  bloc dans chaque article et index) sont extraits dans /assets/css/styles.<hash>.css:
+  minifie, nom derive du contenu -> cache long (immutable) sans invalidation
+- Par bundle, seules les regles utilisees en haut de page (CRITICAL_ELEMENTS premiers
+  elements du <body>, union sur les pages du bundle) restent inline (<style data-critical>);
+  la feuille complete est chargee sans bloquer le rendu (media="print" onload) + <noscript>
+- Minification HTML (espaces, commentaires), CSS et JS inline, fichiers .css/.js du site
+  (JS: prudente, lignes seulement — ASI inchange)
+- Fichiers .gz (et .br si le module brotli est installe) a cote de chaque fichier texte,
+  pour nginx gzip_static / brotli_static: plus de compression a la volee
+- Reecritures HTML et minification .css/.js par html_rewriter (atomiques, journalisees dans
+  html_rewrites, rollback possible)
+- write_site_file(): ecriture d'un fichier servi + .gz/.br regeneres; precompress() supprime
+  les copies compressees dont la source a disparu
+- Mesure par page: octets transferes (HTML + CSS/JS locaux, compresses) avant / apres
+Usage:
+    python3 asset_pipeline.py                          # Tous les sites actifs (config.yaml)
+    python3 asset_pipeline.py /var/www/deneigement     # Un site
+    python3 asset_pipeline.py --dry-run --pages        # Mesure seule, detail par page
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import html_rewriter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = '/opt/seo-agent'
+DB_PATH = os.path.join(BASE_DIR, 'db', 'seo_agent.db')
+CONFIG_PATH = os.path.join(BASE_DIR, 'config.yaml')
+
+ASSETS_DIR = os.path.join('assets', 'css')     # relatif a la racine du site
+HTML_EXTENSIONS = ('.html', '.htm')
+COMPRESS_EXTENSIONS = ('.html', '.htm', '.css', '.js', '.svg', '.json', '.xml', '.txt')
+SKIP_DIRS = {'node_modules', '.git', 'backup', '__pycache__'}
+CRITICAL_ELEMENTS = 60          # elements du <body> consideres au-dessus de la ligne de flottaison
+MIN_SHARED_PAGES = 2            # un bloc <style> devient un bundle des qu'il est partage
+COMPRESS_MIN_BYTES = 256        # en dessous, l'en-tete gzip coute plus qu'il ne gagne
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+DYNAMIC_GZIP_LEVEL = 6          # compression a la volee de nginx (mesure "avant")
+PRESERVED_COMMENTS = ('[if', '<![', '#', 'googleo')
+
+
+class AssetError(Exception):
+    pass
+
+
+# =========================================
+# MINIFICATION
+# =========================================
+
+_CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?(?:\*/|$))|(\s+)|([^"'/\s]+|/)''', re.S)
+_HTML_SPACE = re.compile(r'[ \t\r\n\f]+')
+_JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+_JSON_TYPES = ('application/ld+json', 'application/json')
+
+
+def minify_css(css):
+    """Commentaires et espaces superflus (chaines intactes); ' ' avant '(' et ':' conserve"""
+    out, space = [], False
+    for string, comment, blank, other in _CSS_TOKEN.findall(css):
+        if comment or blank:
+            space = True
+            continue
+        tok = string or other.replace(';}', '}')
+        if out:
+            if space and out[-1][-1] not in '{};,>:' and tok[0] not in '{};,>!':
+                out.append(' ')
+            elif tok[0] == '}' and out[-1].endswith(';'):
+                out[-1] = out[-1][:-1]
+        space = False
+        out.append(tok)
+    return ''.join(out)
+
+
+def minify_js(js):
+    """Indentation, lignes vides et commentaires '//' en debut de ligne; les sauts de ligne restent"""
+    if '`' in js or '\\\n' in js:
+        return js       # gabarits / chaines multi-lignes: espaces significatifs
+    out, in_block = [], False
+    for line in js.splitlines():
+        line = line.strip()
+        if not line or (not in_block and line.startswith('//') and not line.startswith('//#')):
+            continue
+        out.append(line)
+        in_block = _ends_in_block_comment(line, in_block)
+    return '\n'.join(out)
+
+
+def _ends_in_block_comment(line, in_block):
+    """Ligne terminee dans un commentaire /* */ ? (prudent: un '/*' dans une chaine compte aussi)"""
+    pos = 0
+    while True:
+        marker = line.find('*/' if in_block else '/*', pos)
+        if marker < 0:
+            return in_block
+        pos, in_block = marker + 2, not in_block
+
+
+def minify_script(text, script_type=''):
+    script_type = script_type.strip().lower()
+    if script_type in _JS_TYPES:
+        return minify_js(text)
+    if script_type in _JSON_TYPES:
+        try:
+            compact = json.dumps(json.loads(text), ensure_ascii=False, separators=(',', ':'))
+        except ValueError:
+            return text
+        return text if '</' in compact or '<!--' in compact else compact
+    return text
+
+
+def _collapse(m):
+    return '\n' if '\n' in m.group(0) else ' '
+
+
+class MinifyHTML(html_rewriter.Transform):
+    """Espaces entre balises, commentaires, CSS et JS inline (hors <pre>/<textarea>)"""
+    name = 'minify_html'
+
+    def begin(self, ctx):
+        self.space_before = False       # dernier texte emis termine par un espace
+        self.trim = False               # commentaire supprime entre deux espaces: n'en garder qu'un
+
+    def start_tag(self, tag, ctx):
+        self.space_before = self.trim = False
+
+    def end_tag(self, tag, ctx):
+        self.space_before = self.trim = False
+
+    def text(self, text, ctx):
+        tag = ctx.raw_tag
+        if tag is not None:
+            if tag.name == 'style':
+                new = minify_css(text)
+            elif not tag.has('src'):
+                new = minify_script(text, tag.get('type', ''))
+            else:
+                new = text
+        elif ctx.inside('pre') or ctx.inside('textarea'):
+            return text
+        else:
+            new = _HTML_SPACE.sub(_collapse, text)
+            if self.trim:
+                new = new.lstrip(' \t\r\n\f')
+            self.space_before = new[-1:] in (' ', '\n') or (self.space_before and not new)
+            self.trim = False
+        if new != text and not ctx.changes[self.name]:
+            ctx.count(self.name)
+        return new
+
+    def other(self, raw, ctx):
+        if raw.startswith('<!--') and not raw[4:].lstrip().startswith(PRESERVED_COMMENTS):
+            ctx.count('html_comments')
+            self.trim = self.space_before
+            return ''
+        self.space_before = self.trim = False
+        return raw
+
+
+# =========================================
+# CSS CRITIQUE
+# =========================================
+
+_GROUP_RULES = ('@media', '@supports', '@layer', '@container')
+_KEEP_RULES = ('@font-face', '@import', '@charset', '@namespace')
+_SIMPLE_SELECTOR = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+_ATTR_SELECTOR = re.compile(r'\[[^\]]*\]')
+_PSEUDO = re.compile(r'::?[\w-]+(\([^()]*\))?')
+
+
+def _split_top(text, sep):
+    """Decoupe sur sep hors chaines / parentheses / crochets"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, c in enumerate(text):
+        if quote:
+            if c == quote and text[i - 1] != '\\':
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_css(css):
+    """CSS minifie -> [(prelude, corps)]: corps = liste (groupes @media...), texte, ou None (@import ...;)"""
+    nodes, i, n = [], 0, len(css)
+    while i < n:
+        start, quote = i, None
+        while i < n:
+            c = css[i]
+            if quote:
+                if c == quote and css[i - 1] != '\\':
+                    quote = None
+            elif c in '"\'':
+                quote = c
+            elif c in '{;':
+                break
+            i += 1
+        prelude = css[start:i].strip()
+        if i >= n or css[i] == ';':
+            if prelude:
+                nodes.append((prelude, None))
+            i += 1
+            continue
+        depth, body_start, quote = 1, i + 1, None
+        i += 1
+        while i < n and depth:
+            c = css[i]
+            if quote:
+                if c == quote and css[i - 1] != '\\':
+                    quote = None
+            elif c in '"\'':
+                quote = c
+            elif c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+            i += 1
+        body = css[body_start:i - 1]
+        nodes.append((prelude, parse_css(body) if prelude.lower().startswith(_GROUP_RULES) else body))
+    return nodes
+
+
+def render_css(nodes):
+    out = []
+    for prelude, body in nodes:
+        if body is None:
+            out.append(prelude + ';')
+        elif isinstance(body, list):
+            out.append(prelude + '{' + render_css(body) + '}')
+        else:
+            out.append(prelude + '{' + body + '}')
+    return ''.join(out)
+
+
+def _selector_needs(selector):
+    """Balises, .classes et #ids qu'un selecteur exige (pseudo-classes et attributs ignores)"""
+    s = _PSEUDO.sub('', _ATTR_SELECTOR.sub('', selector))
+    return {prefix + (name if prefix else name.lower()) for prefix, name in _SIMPLE_SELECTOR.findall(s)}
+
+
+def critical_css(css, used):
+    """Regles dont au moins un selecteur ne vise que des balises/classes/ids de `used`"""
+    def keep(nodes):
+        kept = []
+        for prelude, body in nodes:
+            lower = prelude.lower()
+            if isinstance(body, list):
+                children = keep(body)
+                if children:
+                    kept.append((prelude, children))
+            elif lower.startswith(_KEEP_RULES):
+                kept.append((prelude, body))
+            elif lower.startswith('@'):
+                continue        # @keyframes, @page...: appliques au chargement de la feuille complete
+            else:
+                selectors = [s for s in _split_top(prelude, ',') if _selector_needs(s) <= used]
+                if selectors:
+                    kept.append((','.join(selectors), body))
+        return kept
+    return render_css(keep(parse_css(css)))
+
+
+# =========================================
+# ANALYSE D'UNE PAGE
+# =========================================
+
+def _block_hash(css):
+    return hashlib.sha256(css.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+
+
+def _extractable(tag, ctx):
+    """<style> du <head>, pour tous les medias, hors CSS critique deja emis"""
+    return (tag.name == 'style' and ctx.inside('head') and not tag.has('data-critical')
+            and tag.get('media', 'all').strip().lower() in ('', 'all')
+            and tag.get('type', 'text/css').strip().lower() in ('', 'text/css')
+            and not (ctx.inside('noscript') or ctx.inside('template') or ctx.inside('svg')))
+
+
+class _PageScan(html_rewriter.Transform):
+    """Lecture seule: blocs <style> extractibles, selecteurs du haut de page, CSS/JS charges"""
+    name = 'asset_scan'
+
+    def begin(self, ctx):
+        self.blocks = []            # [(hash, css minifie)] dans l'ordre du document
+        self.used = set()
+        self.assets = []
+        self.elements = 0
+        self._style = None
+
+    def start_tag(self, tag, ctx):
+        if tag.name in ('html', 'body') or ctx.inside('body'):
+            self.elements += 1
+            if self.elements <= CRITICAL_ELEMENTS or tag.name in ('html', 'body'):
+                self.used.add(tag.name)
+                self.used.update('.' + c for c in tag.get('class', '').split())
+                if tag.get('id'):
+                    self.used.add('#' + tag.get('id'))
+        if ctx.inside('noscript'):
+            return
+        if tag.name == 'link' and 'stylesheet' in tag.get('rel', '').lower().split() and tag.get('href'):
+            self.assets.append(tag.get('href'))
+        elif tag.name == 'script' and tag.get('src'):
+            self.assets.append(tag.get('src'))
+        elif _extractable(tag, ctx):
+            self._style = tag
+            self.blocks.append((_block_hash(''), ''))
+
+    def text(self, text, ctx):
+        if self._style is not None and ctx.raw_tag is self._style:
+            css = minify_css(text)
+            self.blocks[-1] = (_block_hash(css), css)
+        return text
+
+    def end_tag(self, tag, ctx):
+        if tag.name == 'style':
+            self._style = None
+
+
+def scan_page(text, path=None):
+    scan = _PageScan()
+    html_rewriter.rewrite_text(text, [scan], path)
+    return scan
+
+
+class _BundleRewrite(html_rewriter.Transform):
+    """Remplace les blocs du bundle par CSS critique + <link> asynchrone (au premier bloc)"""
+    name = 'css_bundle'
+
+    def __init__(self, plan, replacement):
+        self.plan = plan                    # [(hash, en bundle?)] par bloc extractible (cf _PageScan)
+        self.replacement = replacement
+
+    def begin(self, ctx):
+        self.index = -1
+        self.current = None
+        self.emitted = False
+
+    def start_tag(self, tag, ctx):
+        if not _extractable(tag, ctx):
+            return
+        self.index += 1
+        if self.index >= len(self.plan):
+            raise AssetError(f"{ctx.path}: blocs <style> modifies depuis l'analyse")
+        block_hash, bundled = self.plan[self.index]
+        self.current = (tag, block_hash, bundled)
+        if bundled:
+            tag.remove()
+            if not self.emitted:
+                tag.before = self.replacement
+                self.emitted = True
+                ctx.count(self.name)
+
+    def text(self, text, ctx):
+        if self.current is None or ctx.raw_tag is not self.current[0]:
+            return text
+        if _block_hash(minify_css(text)) != self.current[1]:
+            raise AssetError(f"{ctx.path}: blocs <style> modifies depuis l'analyse")
+        return '' if self.current[2] else text
+
+    def end_tag(self, tag, ctx):
+        if tag.name == 'style' and self.current is not None:
+            if self.current[2]:
+                tag.remove()
+            self.current = None
+
+
+# =========================================
+# FICHIERS
+# =========================================
+
+def _walk(base, extensions):
+    for root, dirs, files in os.walk(base):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        for fname in files:
+            if fname.lower().endswith(extensions):
+                yield os.path.join(root, fname)
+
+
+def _read_text(path):
+    with open(path, 'r', **html_rewriter.ENCODING) as f:
+        return f.read()
+
+
+def _write_bytes(path, data, mtime_ns=None):
+    tmp = f'{path}.ap{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    if mtime_ns is not None:
+        os.utime(tmp, ns=(mtime_ns, mtime_ns))
+    os.replace(tmp, path)
+
+
+def _encode(text):
+    return text.encode('utf-8', 'surrogateescape')
+
+
+def _gzip(data, level=GZIP_LEVEL):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compressors():
+    yield '.gz', _gzip
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def _compress_file(path, stats, dry_run=False):
+    """.gz / .br d'un fichier (meme mtime que la source: regeneres si elle change)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    eligible = st.st_size >= COMPRESS_MIN_BYTES
+    if eligible:
+        stats["files"] += 1
+    data = None
+    for ext, compress in _compressors():
+        target = path + ext
+        packed = None
+        if eligible:
+            try:
+                if os.stat(target).st_mtime_ns == st.st_mtime_ns:
+                    stats["up_to_date"] += 1
+                    continue
+            except FileNotFoundError:
+                pass
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            packed = compress(data)
+        if packed is not None and len(packed) < len(data):
+            stats["written"] += 1
+            stats["kb_before"] += len(data) / 1024
+            stats["kb_after"] += len(packed) / 1024
+            if not dry_run:
+                _write_bytes(target, packed, st.st_mtime_ns)
+        elif os.path.exists(target):
+            # Obsolete (source trop petite ou incompressible): nginx servirait une ancienne version
+            stats["removed"] += 1
+            if not dry_run:
+                os.remove(target)
+
+
+def _new_compress_stats():
+    return {"files": 0, "written": 0, "up_to_date": 0, "removed": 0, "kb_before": 0.0, "kb_after": 0.0}
+
+
+def precompress(base, dry_run=False):
+    """.gz / .br a cote des fichiers texte; supprime ceux dont la source a disparu"""
+    stats = _new_compress_stats()
+    suffixes = tuple(ext for ext, _ in _compressors()) + ('.gz', '.br')
+    for path in _walk(base, COMPRESS_EXTENSIONS + suffixes):
+        if path.endswith(suffixes):
+            source = path[:path.rindex('.')]
+            if source.lower().endswith(COMPRESS_EXTENSIONS) and not os.path.exists(source):
+                stats["removed"] += 1
+                if not dry_run:
+                    os.remove(path)
+            continue
+        _compress_file(path, stats, dry_run)
+    stats["kb_before"] = round(stats["kb_before"], 1)
+    stats["kb_after"] = round(stats["kb_after"], 1)
+    return stats
+
+
+def refresh_compressed(path):
+    """A appeler apres toute ecriture d'un fichier servi: .gz / .br regeneres ou supprimes"""
+    if path.lower().endswith(COMPRESS_EXTENSIONS):
+        _compress_file(path, _new_compress_stats())
+
+
+def write_site_file(path, text):
+    """Ecriture atomique d'un fichier d'un site deploye + mise a jour de ses copies compressees"""
+    html_rewriter.write_atomic(path, text)
+    refresh_compressed(path)
+
+
+def minify_site_files(base, dry_run=False, conn=None):
+    """
+    Fichiers .css/.js du site (hors *.min.*): reecrits seulement s'ils retrecissent.
+    Chaque reecriture est journalisee dans html_rewrites (rollback par html_rewriter.rollback).
+    """
+    minified = {}
+    for path in _walk(base, ('.css', '.js')):
+        if '.min.' in os.path.basename(path) or os.path.join(base, ASSETS_DIR) in path:
+            continue
+        try:
+            text = _read_text(path)
+        except OSError:
+            continue
+        new = minify_css(text) if path.endswith('.css') else minify_js(text)
+        if len(new) < len(text):
+            minified[path] = _encode(new)
+            if not dry_run:
+                result = html_rewriter.Result(path)
+                result.edits = [(0, text, new)]
+                result.changes = {'minify': 1}
+                result.hash_before = hashlib.sha256(_encode(text)).hexdigest()
+                result.hash_after = hashlib.sha256(minified[path]).hexdigest()
+                write_site_file(path, new)
+                if conn is not None:
+                    html_rewriter.record(conn, result, 'asset_pipeline')
+                    conn.commit()
+    return minified
+
+
+# =========================================
+# MESURE
+# =========================================
+
+class _TransferMeter:
+    """Octets transferes par page: HTML + CSS/JS locaux, compresses comme nginx les servirait"""
+
+    def __init__(self, base, level):
+        self.base = base
+        self.level = level
+        self.overrides = {}         # chemin -> contenu pas (encore) ecrit (dry-run)
+        self._sizes = {}
+
+    def size(self, data):
+        return len(_gzip(data, self.level))
+
+    def asset(self, path):
+        if path not in self._sizes:
+            data = self.overrides.get(path)
+            if data is None:
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    data = b''
+            self._sizes[path] = self.size(data) if data else 0
+        return self._sizes[path]
+
+    def page(self, html_path, text, scan):
+        html = self.size(_encode(text))
+        assets = 0
+        for url in dict.fromkeys(scan.assets):
+            local = html_rewriter.local_path(self.base, html_path, url)
+            if local:
+                assets += self.asset(local)
+        return html, html + assets
+
+
+# =========================================
+# PIPELINE D'UN SITE
+# =========================================
+
+def _db(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS asset_bundles (
+            site TEXT NOT NULL,
+            bundle TEXT NOT NULL,
+            href TEXT NOT NULL,
+            blocks TEXT NOT NULL,
+            used TEXT,
+            critical_bytes INTEGER,
+            css_bytes INTEGER,
+            pages INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (site, bundle)
+        )
+    ''')
+    return conn
+
+
+def _replacement(href, critical):
+    if not critical:
+        return f'<link rel="stylesheet" href="{href}">'
+    return (f'<style data-critical>{critical}</style>\n'
+            f'<link rel="stylesheet" href="{href}" media="print" onload="this.media=\'all\'">\n'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+
+def build_site(base, dry_run=False, compress=True, db_path=None, log=None):
+    """
+    Bundles CSS + CSS critique + minification + pre-compression d'un site.
+    Retourne les stats et, par page, les octets transferes avant / apres.
+    """
+    log = log or (lambda msg: None)
+    base = os.path.abspath(base)
+    started = time.perf_counter()
+    before = _TransferMeter(base, DYNAMIC_GZIP_LEVEL)
+    after = _TransferMeter(base, GZIP_LEVEL)
+    conn = _db(db_path)
+    try:
+        rows = conn.execute('SELECT bundle, blocks, used FROM asset_bundles WHERE site = ?', (base,)).fetchall()
+        known_used = {bundle: set(json.loads(used or '[]')) for bundle, _, used in rows}
+        known_blocks = {h for _, blocks, _ in rows for h in json.loads(blocks)}
+
+        # 1. Analyse: blocs <style>, haut de page et mesure "avant" (nginx gzip a la volee)
+        pages, usage = {}, Counter()
+        for path in sorted(_walk(base, HTML_EXTENSIONS)):
+            try:
+                text = _read_text(path)
+                scan = scan_page(text, path)
+            except (OSError, html_rewriter.RewriteError) as e:
+                log(f"  Asset scan error {path}: {e}")
+                continue
+            pages[path] = {"scan": scan, "bytes_before": before.page(path, text, scan)}
+            usage.update({h for h, css in scan.blocks if css})
+
+        # 2. Bundles: suite ordonnee des blocs partages de chaque page
+        shared = {h for h, n in usage.items() if n >= MIN_SHARED_PAGES} | known_blocks
+        bundles = {}
+        for path, page in pages.items():
+            blocks = [(h, css) for h, css in page["scan"].blocks if css and h in shared]
+            if not blocks:
+                continue
+            ids = list(dict.fromkeys(h for h, _ in blocks))
+            key = _block_hash('\n'.join(ids))
+            bundle = bundles.setdefault(key, {"blocks": ids, "css": {}, "used": set(), "pages": []})
+            bundle["css"].update(blocks)
+            bundle["used"] |= page["scan"].used
+            bundle["pages"].append(path)
+            page["bundle"] = key
+
+        if bundles and not dry_run:
+            os.makedirs(os.path.join(base, ASSETS_DIR), exist_ok=True)
+        for key, bundle in bundles.items():
+            css = ''.join(bundle["css"][h] for h in bundle["blocks"])
+            data = _encode(css)
+            name = f'styles.{hashlib.sha256(data).hexdigest()[:12]}.css'
+            path = os.path.join(base, ASSETS_DIR, name)
+            bundle["href"] = '/' + os.path.relpath(path, base).replace(os.sep, '/')
+            used = bundle["used"] | known_used.get(key, set())
+            critical = critical_css(css, used)
+            bundle["replacement"] = _replacement(bundle["href"], critical)
+            after.overrides[path] = data
+            if not dry_run:
+                if not os.path.exists(path):
+                    _write_bytes(path, data)
+                conn.execute('''
+                    INSERT OR REPLACE INTO asset_bundles
+                    (site, bundle, href, blocks, used, critical_bytes, css_bytes, pages, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                ''', (base, key, bundle["href"], json.dumps(bundle["blocks"]), json.dumps(sorted(used)),
+                      len(critical), len(data), len(bundle["pages"])))
+            log(f"  Bundle {bundle['href']}: {len(data) / 1024:.1f}KB, critical {len(critical) / 1024:.1f}KB, "
+                f"{len(bundle['pages'])} pages")
+
+        # 3. Fichiers .css/.js du site, puis pages HTML (une reecriture atomique journalisee)
+        minified = minify_site_files(base, dry_run, conn)
+        after.overrides.update(minified)
+        rewritten, per_page = 0, []
+        for path, page in pages.items():
+            transforms = [MinifyHTML()]
+            bundle = bundles.get(page.get("bundle"))
+            if bundle:
+                plan = [(h, bool(css) and h in shared) for h, css in page["scan"].blocks]
+                transforms.insert(0, _BundleRewrite(plan, bundle["replacement"]))
+            try:
+                text = _read_text(path)
+                result = html_rewriter.rewrite_text(text, transforms, path)
+            except (OSError, html_rewriter.RewriteError, AssetError) as e:
+                log(f"  Asset rewrite error {path}: {e}")
+                result = None
+            if result is not None and result.changed:
+                text = result.text
+                rewritten += 1
+                if not dry_run:
+                    write_site_file(path, text)
+                    html_rewriter.record(conn, result, 'asset_pipeline')
+                    conn.commit()
+            html_before, transfer_before = page["bytes_before"]
+            html_after, transfer_after = after.page(path, text, scan_page(text, path))
+            per_page.append({"path": os.path.relpath(path, base), "html_before": html_before,
+                             "html_after": html_after, "transfer_before": transfer_before,
+                             "transfer_after": transfer_after})
+        if not dry_run:
+            conn.commit()
+    finally:
+        conn.close()
+
+    stats = {
+        "site": base,
+        "pages": len(pages),
+        "pages_rewritten": rewritten,
+        "bundles": len(bundles),
+        "files_minified": len(minified),
+        "precompressed": precompress(base, dry_run) if compress else None,
+        "transfer_before": sum(p["transfer_before"] for p in per_page),
+        "transfer_after": sum(p["transfer_after"] for p in per_page),
+        "html_before": sum(p["html_before"] for p in per_page),
+        "html_after": sum(p["html_after"] for p in per_page),
+        "per_page": per_page,
+        "brotli": brotli is not None,
+        "dry_run": dry_run,
+    }
+    for kind in ('transfer', 'html'):
+        total = stats[f"{kind}_before"]
+        stats[f"{kind}_saved_pct"] = round((total - stats[f"{kind}_after"]) * 100 / total, 1) if total else 0.0
+    stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+    n = stats["pages"] or 1
+    log(f"  Assets: {stats['pages']} pages, {rewritten} rewritten, {stats['bundles']} bundles; bytes/page "
+        f"first visit {stats['transfer_before'] / n:.0f} -> {stats['transfer_after'] / n:.0f} "
+        f"({-stats['transfer_saved_pct']:+.1f}%), CSS/JS cached {stats['html_before'] / n:.0f} -> "
+        f"{stats['html_after'] / n:.0f} ({-stats['html_saved_pct']:+.1f}%)")
+    return stats
+
+
+def _config_sites():
+    import yaml
+    with open(CONFIG_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    return [s['chemin'] for s in config.get('sites', []) if s.get('actif', True)]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Bundles CSS, CSS critique, minification, .gz/.br')
+    parser.add_argument('sites', nargs='*', help='Racines des sites (defaut: sites actifs de config.yaml)')
+    parser.add_argument('--dry-run', action='store_true', help='Mesurer sans rien ecrire')
+    parser.add_argument('--pages', action='store_true', help='Detail des octets transferes par page')
+    parser.add_argument('--no-compress', action='store_true', help='Sans fichiers .gz/.br')
+    args = parser.parse_args()
+
+    totals = Counter()
+    for base in args.sites or _config_sites():
+        if not os.path.isdir(base):
+            print(f"{base}: introuvable")
+            continue
+        stats = build_site(base, dry_run=args.dry_run, compress=not args.no_compress, log=print)
+        if args.pages:
+            print(f"  {'page':<50} {'HTML avant':>11} {'apres':>8} {'total avant':>12} {'apres':>8}")
+            for p in stats["per_page"]:
+                print(f"  {p['path'][:50]:<50} {p['html_before']:>11} {p['html_after']:>8} "
+                      f"{p['transfer_before']:>12} {p['transfer_after']:>8}")
+        totals.update({k: stats[k] for k in ('pages', 'transfer_before', 'transfer_after', 'html_before', 'html_after')})
+    if totals["pages"]:
+        n = totals["pages"]
+        print(f"TOTAL {n} pages — octets transferes par page (compresses):")
+        print(f"  1re visite (HTML + CSS/JS):       {totals['transfer_before'] / n:8.0f} -> {totals['transfer_after'] / n:8.0f}")
+        print(f"  visites suivantes (CSS/JS caches): {totals['html_before'] / n:8.0f} -> {totals['html_after'] / n:8.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,13 +12,13 @@ Crontab:
   0 6 * * *     auto_scheduler.py business
   0 4 * * 0     auto_scheduler.py cwv
   0 3 * * 0     auto_scheduler.py maintenance
+  * * * * *     auto_scheduler.py charts       (resumes des graphiques du dashboard)
 """
 
 import sys
 import os
 import time
 import sqlite3
-import yaml
 import signal
 import traceback
 from datetime import datetime, timedelta
@@ -32,12 +32,14 @@ LOG_PATH = os.path.join(BASE_DIR, 'logs', 'scheduler.log')
 
 sys.path.insert(0, AGENTS_DIR)
 
-# Import all 59 agent classes
-from agents_system import *
+# Agents importes et instancies a la demande: un cycle ne charge que ce qu'il utilise
+from agent_registry import get_agent
+from config_service import get_service as get_config_service
 
 # Import deployment & CWV agents
 try:
-    from blog_deployer import deploy_pending_articles as _deploy_pending, update_blog_index, update_sitemap, add_internal_links
+    from blog_deployer import (deploy_pending_articles as _deploy_pending, update_blog_index, update_sitemap,
+                               add_internal_links, precompress_site)
     DEPLOYER_AVAILABLE = True
 except ImportError:
     DEPLOYER_AVAILABLE = False
@@ -116,16 +118,20 @@ def was_cycle_run_recently(cycle_name, minutes=30):
         return False
 
 # ─── Config ───
+_config = get_config_service(CONFIG_PATH, default={})
+
 def load_config():
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            return yaml.safe_load(f)
-    except:
+        return _config.get()
+    except Exception:
         return {}
 
 def is_paused(config=None):
     if config is None:
-        config = load_config()
+        try:
+            return _config.snapshot().pause_active
+        except Exception:
+            return False
     return config.get('general', {}).get('pause_active', False)
 
 def get_sites(config=None):
@@ -175,13 +181,13 @@ def cycle_seo_core(sites):
     log("═══ CYCLE: SEO-CORE ═══")
     stats = {"ok": 0, "fail": 0}
 
-    tech_audit = TechnicalSEOAuditAgent()
-    schema_agent = SchemaMarkupAgent()
-    img_agent = ImageOptimizationAgent()
-    link_agent = InternalLinkingAgent()
-    title_agent = TitleTagAgent()
-    speed_agent = SiteSpeedAgent()
-    url_agent = URLOptimizationAgent()
+    tech_audit = get_agent('TechnicalSEOAuditAgent')
+    schema_agent = get_agent('SchemaMarkupAgent')
+    img_agent = get_agent('ImageOptimizationAgent')
+    link_agent = get_agent('InternalLinkingAgent')
+    title_agent = get_agent('TitleTagAgent')
+    speed_agent = get_agent('SiteSpeedAgent')
+    url_agent = get_agent('URLOptimizationAgent')
 
     for i, site in enumerate(sites, 1):
         site_id = str(i)
@@ -227,13 +233,13 @@ def cycle_content(sites):
     log("═══ CYCLE: CONTENT ═══")
     stats = {"ok": 0, "fail": 0}
 
-    kw_agent = KeywordResearchAgent()
-    content_agent = ContentGenerationAgent()
-    faq_agent = FAQGenerationAgent()
-    blog_agent = BlogIdeaAgent()
-    opt_agent = ContentOptimizationAgent()
-    brief_agent = ContentBriefAgent()
-    calendar_agent = ContentCalendarAgent()
+    kw_agent = get_agent('KeywordResearchAgent')
+    content_agent = get_agent('ContentGenerationAgent')
+    faq_agent = get_agent('FAQGenerationAgent')
+    blog_agent = get_agent('BlogIdeaAgent')
+    opt_agent = get_agent('ContentOptimizationAgent')
+    brief_agent = get_agent('ContentBriefAgent')
+    calendar_agent = get_agent('ContentCalendarAgent')
 
     for i, site in enumerate(sites, 1):
         site_id = str(i)
@@ -354,14 +360,14 @@ def cycle_marketing(sites):
     log("═══ CYCLE: MARKETING ═══")
     stats = {"ok": 0, "fail": 0}
 
-    social_agent = SocialMediaAgent()
-    backlink_agent = BacklinkAnalysisAgent()
-    competitor_agent = CompetitorAnalysisAgent()
-    local_agent = LocalSEOAgent()
-    review_agent = ReviewManagementAgent()
-    directory_agent = DirectoryAgent()
-    reddit_agent = RedditAgent()
-    forum_agent = ForumAgent()
+    social_agent = get_agent('SocialMediaAgent')
+    backlink_agent = get_agent('BacklinkAnalysisAgent')
+    competitor_agent = get_agent('CompetitorAnalysisAgent')
+    local_agent = get_agent('LocalSEOAgent')
+    review_agent = get_agent('ReviewManagementAgent')
+    directory_agent = get_agent('DirectoryAgent')
+    reddit_agent = get_agent('RedditAgent')
+    forum_agent = get_agent('ForumAgent')
 
     for i, site in enumerate(sites, 1):
         site_id = str(i)
@@ -396,11 +402,11 @@ def cycle_business(sites):
     log("═══ CYCLE: BUSINESS ═══")
     stats = {"ok": 0, "fail": 0}
 
-    serp_agent = SERPTrackerAgent()
-    gap_agent = KeywordGapAgent()
-    blink_monitor = BacklinkMonitorAgent()
-    comp_watch = CompetitorWatchAgent()
-    reporting_agent = ReportingAgent()
+    serp_agent = get_agent('SERPTrackerAgent')
+    gap_agent = get_agent('KeywordGapAgent')
+    blink_monitor = get_agent('BacklinkMonitorAgent')
+    comp_watch = get_agent('CompetitorWatchAgent')
+    reporting_agent = get_agent('ReportingAgent')
 
     for i, site in enumerate(sites, 1):
         site_id = str(i)
@@ -440,10 +446,10 @@ def cycle_maintenance(sites):
     log("═══ CYCLE: MAINTENANCE ═══")
     stats = {"ok": 0, "fail": 0}
 
-    backup_agent = BackupAgent()
-    ssl_agent = SSLAgent()
-    monitoring_agent = MonitoringAgent()
-    perf_agent = PerformanceAgent()
+    backup_agent = get_agent('BackupAgent')
+    ssl_agent = get_agent('SSLAgent')
+    monitoring_agent = get_agent('MonitoringAgent')
+    perf_agent = get_agent('PerformanceAgent')
 
     # 1. Full backup
     r = run_agent("Backup_DB", backup_agent.backup_database, (), 120, "all")
@@ -489,6 +495,8 @@ def cycle_maintenance(sites):
                 total_auto += s.get("auto_fixed", 0)
                 total_issues += s.get("total_issues", 0)
                 log(f"  {sid}: {s.get('auto_fixed', 0)} auto-fixed, {s.get('pending_confirm', 0)} pending, {s.get('critical', 0)} critical")
+            elif isinstance(data, dict) and "error" in data:
+                log(f"  {sid}: audit error: {data['error']}", "ERROR")
         log(f"  Self-Audit total: {total_auto} auto-fixed / {total_issues} issues")
         log_agent_run("SelfAudit", "self_audit_all", "all", "success",
                       f"Auto-fixed:{total_auto} Total:{total_issues}", 0)
@@ -548,6 +556,11 @@ def cycle_deploy(sites):
         r = run_agent(f"InternalLinks_{i}", add_internal_links, (i,), 120, str(i))
         stats["ok" if r["status"] == "success" else "fail"] += 1
 
+    # 4. .gz/.br copies for nginx gzip_static: match the files rewritten above, prune orphans
+    for i, site in enumerate(sites, 1):
+        r = run_agent(f"Precompress_{i}", precompress_site, (i,), 120, str(i))
+        stats["ok" if r["status"] == "success" else "fail"] += 1
+
     return stats
 
 
@@ -580,6 +593,18 @@ CYCLES = {
     "maintenance": {"func": cycle_maintenance, "cooldown": 1440, "cron": "0 3 * * 0"},
 }
 
+def refresh_charts():
+    """Resumes journaliers des graphiques (/api/charts/*): incremental, hors requetes HTTP"""
+    from chart_cache import refresh_summaries
+    start_time = time.time()
+    try:
+        refreshed = refresh_summaries(DB_PATH)
+    except Exception as e:
+        log(f"Charts refresh error: {e}", "ERROR")
+        return
+    log(f"Charts refreshed in {time.time() - start_time:.1f}s: {refreshed}")
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python3 auto_scheduler.py [cycle_name]")
@@ -588,6 +613,11 @@ def main():
 
     cycle_name = sys.argv[1].lower()
 
+    # Pas un cycle: ni killswitch, ni cooldown, ni ligne agent_runs (chaque minute)
+    if cycle_name == "charts":
+        refresh_charts()
+        return
+
     # Run all cycles
     if cycle_name == "all":
         for name in CYCLES:
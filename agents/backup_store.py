@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Backup Store — sauvegardes incrementales dedupliquees (stockage adresse par contenu)
+- Fichiers decoupes en blocs de CHUNK_SIZE, chaque bloc identifie par son SHA-256 et ecrit
+  une seule fois dans objects/ab/<sha256>.zst (zstandard si installe, sinon .gz)
+- Un snapshot = un manifeste JSON (snapshots/<source>/<id>.json): fichiers, mode, mtime
+  et liste ordonnee des blocs. Un fichier inchange (taille + mtime) reprend les blocs du
+  snapshot precedent sans etre relu.
+- Base SQLite: copie coherente via l'API backup par pas de DB_BACKUP_PAGES pages (la base
+  source n'est verrouillee que pendant chaque pas), puis decoupee en blocs alignes sur
+  les pages: seules les pages modifiees depuis le dernier snapshot produisent des blocs neufs
+- gc(): garde les keep derniers snapshots par source, supprime les blocs non references
+- restore() / verify(): chaque bloc relu est recompare a son SHA-256
+Usage:
+    import backup_store
+    backup_store.snapshot_database('/opt/seo-agent/db/seo_agent.db')
+    backup_store.snapshot_directory('/var/www/site', 'site-example.com')
+    backup_store.verify('db-seo_agent/20260101_030000')
+    backup_store.restore('db-seo_agent/20260101_030000', '/tmp/restore')
+"""
+import os
+import gzip
+import json
+import time
+import fcntl
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STORE_DIR = os.environ.get('SEO_BACKUP_STORE', '/opt/seo-agent/backups/store')
+CHUNK_SIZE = 1024 * 1024          # multiple de toutes les tailles de page SQLite (512..65536)
+DB_BACKUP_PAGES = 1024            # pages copiees par pas de sqlite3.backup
+DB_BACKUP_SLEEP = 0.05            # pause entre deux tentatives si la base est occupee
+EXTENSIONS = ('.zst', '.gz')
+EXCLUDE_DIRS = frozenset({'.git', 'node_modules', '__pycache__', '.cache'})
+
+
+class BackupError(Exception):
+    pass
+
+
+def _paths(store):
+    store = store or STORE_DIR
+    return store, os.path.join(store, 'objects'), os.path.join(store, 'snapshots')
+
+
+@contextmanager
+def _locked(store):
+    """Un seul backup/gc a la fois: le gc ne doit pas supprimer les blocs d'un backup en cours"""
+    os.makedirs(store, exist_ok=True)
+    with open(os.path.join(store, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data), '.zst'
+    return gzip.compress(data, compresslevel=6), '.gz'
+
+
+def _object_path(objects, digest, ext):
+    return os.path.join(objects, digest[:2], digest + ext)
+
+
+def _find_object(objects, digest):
+    for ext in EXTENSIONS:
+        path = _object_path(objects, digest, ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _read_object(objects, digest):
+    """Contenu d'un bloc, verifie contre son SHA-256"""
+    path = _find_object(objects, digest)
+    if path is None:
+        raise BackupError(f'Bloc manquant: {digest}')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if path.endswith('.zst') and zstandard is None:
+        raise BackupError(f'Bloc zstd sans module zstandard: {digest}')
+    try:
+        if path.endswith('.zst'):
+            data = zstandard.ZstdDecompressor().decompress(raw)
+        else:
+            data = gzip.decompress(raw)
+    except Exception as e:
+        # zlib.error, zstandard.ZstdError...: un bloc illisible est un bloc corrompu
+        raise BackupError(f'Bloc corrompu: {digest}: {e}')
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise BackupError(f'Bloc corrompu: {digest}')
+    return data
+
+
+class _Writer:
+    """Ecrit les blocs absents du store et compte ce qui a reellement ete ajoute"""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.chunks = 0
+        self.new_chunks = 0
+        self.new_bytes = 0
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        self.chunks += 1
+        if _find_object(self.objects, digest) is None:
+            payload, ext = _compress(data)
+            path = _object_path(self.objects, digest, ext)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.tmp{os.getpid()}'
+            with open(tmp, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+            self.new_chunks += 1
+            self.new_bytes += len(payload)
+        return digest
+
+    def put_file(self, path):
+        chunks = []
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                chunks.append(self.put(data))
+        return chunks
+
+
+def _source_dir(snapshots, source):
+    return os.path.join(snapshots, source.replace('/', '_'))
+
+
+def _manifest_path(snapshots, snapshot_id):
+    source, _, name = snapshot_id.partition('/')
+    if not name or os.sep in name or name.startswith('.'):
+        raise BackupError(f'Snapshot invalide: {snapshot_id}')
+    return os.path.join(_source_dir(snapshots, source), name + '.json')
+
+
+def _new_id(snapshots, source):
+    name = datetime.now().strftime('%Y%m%d_%H%M%S')
+    directory = _source_dir(snapshots, source)
+    candidate, n = name, 1
+    while os.path.exists(os.path.join(directory, candidate + '.json')):
+        n += 1
+        candidate = f'{name}_{n}'
+    return f'{source}/{candidate}'
+
+
+def _save_manifest(snapshots, manifest):
+    path = _manifest_path(snapshots, manifest['id'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def load_manifest(snapshot_id, store=None):
+    _, _, snapshots = _paths(store)
+    path = _manifest_path(snapshots, snapshot_id)
+    if not os.path.exists(path):
+        raise BackupError(f'Snapshot inconnu: {snapshot_id}')
+    with open(path) as f:
+        return json.load(f)
+
+
+def _source_snapshots(snapshots, source):
+    """Ids des snapshots d'une source, du plus recent au plus ancien"""
+    directory = _source_dir(snapshots, source)
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((f[:-5] for f in os.listdir(directory) if f.endswith('.json')), reverse=True)
+    return [f'{source}/{name}' for name in names]
+
+
+def _latest_manifest(snapshots, source, store):
+    for snapshot_id in _source_snapshots(snapshots, source):
+        try:
+            return load_manifest(snapshot_id, store)
+        except (OSError, ValueError, BackupError):
+            continue
+    return None
+
+
+def _summary(manifest, writer, started):
+    stats = {
+        'files': len(manifest['files']),
+        'size_bytes': sum(f['size'] for f in manifest['files']),
+        'chunks': writer.chunks,
+        'new_chunks': writer.new_chunks,
+        'stored_bytes': writer.new_bytes,
+        'duration_s': round(time.monotonic() - started, 2),
+    }
+    manifest['stats'] = stats
+    return stats
+
+
+def snapshot_directory(path, source, store=None):
+    """Snapshot incremental d'un dossier. Retourne le manifeste (avec 'stats')."""
+    store, objects, snapshots = _paths(store)
+    if not os.path.isdir(path):
+        raise BackupError(f'Dossier inexistant: {path}')
+    started = time.monotonic()
+    with _locked(store):
+        previous = _latest_manifest(snapshots, source, store)
+        known = {f['path']: f for f in previous['files']} if previous else {}
+        writer = _Writer(objects)
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in EXCLUDE_DIRS)
+            for name in sorted(names):
+                full = os.path.join(root, name)
+                if os.path.islink(full) or not os.path.isfile(full):
+                    continue
+                try:
+                    st = os.stat(full)
+                    rel = os.path.relpath(full, path)
+                    entry = {'path': rel, 'size': st.st_size, 'mode': st.st_mode & 0o7777,
+                             'mtime_ns': st.st_mtime_ns}
+                    old = known.get(rel)
+                    if (old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns
+                            and all(_find_object(objects, c) for c in old['chunks'])):
+                        entry['chunks'] = old['chunks']
+                        writer.chunks += len(old['chunks'])
+                    else:
+                        entry['chunks'] = writer.put_file(full)
+                except OSError:
+                    continue            # fichier supprime ou illisible pendant le parcours
+                files.append(entry)
+        manifest = {'id': _new_id(snapshots, source), 'source': source, 'kind': 'directory',
+                    'origin': os.path.abspath(path), 'created_at': datetime.now().isoformat(),
+                    'chunk_size': CHUNK_SIZE, 'parent': previous['id'] if previous else None,
+                    'files': files}
+        _summary(manifest, writer, started)
+        _save_manifest(snapshots, manifest)
+    return manifest
+
+
+def snapshot_database(db_path, source=None, store=None):
+    """
+    Snapshot incremental d'une base SQLite: copie coherente par l'API backup en pas de
+    DB_BACKUP_PAGES pages dans un fichier temporaire, puis decoupage en blocs.
+    """
+    store, objects, snapshots = _paths(store)
+    source = source or 'db-' + os.path.splitext(os.path.basename(db_path))[0]
+    started = time.monotonic()
+    with _locked(store):
+        tmp_dir = os.path.join(store, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.db', dir=tmp_dir)
+        os.close(fd)
+        try:
+            src = sqlite3.connect(db_path)
+            dest = sqlite3.connect(tmp)
+            try:
+                # Entre deux pas le verrou de lecture est relache: les ecritures continuent
+                src.backup(dest, pages=DB_BACKUP_PAGES, sleep=DB_BACKUP_SLEEP)
+                # Copie autonome: pas de WAL a cote du fichier decoupe
+                dest.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                dest.close()
+                src.close()
+            previous = _latest_manifest(snapshots, source, store)
+            writer = _Writer(objects)
+            entry = {'path': os.path.basename(db_path), 'size': os.path.getsize(tmp), 'mode': 0o644,
+                     'mtime_ns': os.stat(db_path).st_mtime_ns, 'chunks': writer.put_file(tmp)}
+        finally:
+            os.remove(tmp)
+        manifest = {'id': _new_id(snapshots, source), 'source': source, 'kind': 'sqlite',
+                    'origin': os.path.abspath(db_path), 'created_at': datetime.now().isoformat(),
+                    'chunk_size': CHUNK_SIZE, 'parent': previous['id'] if previous else None,
+                    'files': [entry]}
+        _summary(manifest, writer, started)
+        _save_manifest(snapshots, manifest)
+    return manifest
+
+
+def list_snapshots(source=None, store=None):
+    """[{'id', 'source', 'kind', 'created_at', 'stats'}] du plus recent au plus ancien"""
+    store, _, snapshots = _paths(store)
+    if not os.path.isdir(snapshots):
+        return []
+    sources = [source] if source else sorted(os.listdir(snapshots))
+    result = []
+    for src in sources:
+        for snapshot_id in _source_snapshots(snapshots, src):
+            try:
+                manifest = load_manifest(snapshot_id, store)
+            except (OSError, ValueError, BackupError):
+                result.append({'id': snapshot_id, 'source': src, 'error': 'manifeste illisible'})
+                continue
+            result.append({key: manifest.get(key) for key in ('id', 'source', 'kind', 'created_at', 'stats')})
+    result.sort(key=lambda s: s.get('created_at') or '', reverse=True)
+    return result
+
+
+def verify(snapshot_id, store=None):
+    """Relit et controle chaque bloc d'un snapshot (SHA-256 + taille des fichiers)"""
+    store, objects, _ = _paths(store)
+    manifest = load_manifest(snapshot_id, store)
+    errors, checked = [], set()
+    for entry in manifest['files']:
+        size = 0
+        for digest in entry['chunks']:
+            try:
+                data = _read_object(objects, digest)
+            except (OSError, ValueError, EOFError, BackupError) as e:
+                errors.append(f"{entry['path']}: {e}")
+                break
+            size += len(data)
+            checked.add(digest)
+        else:
+            if size != entry['size']:
+                errors.append(f"{entry['path']}: taille {size} != {entry['size']}")
+    return {'id': snapshot_id, 'ok': not errors, 'files': len(manifest['files']),
+            'chunks_checked': len(checked), 'errors': errors[:50]}
+
+
+def restore(snapshot_id, target_dir, store=None):
+    """
+    Reconstruit un snapshot dans target_dir (jamais sur la source). Chaque bloc est verifie;
+    une base SQLite restauree passe en plus PRAGMA integrity_check.
+    """
+    store, objects, _ = _paths(store)
+    manifest = load_manifest(snapshot_id, store)
+    target_dir = os.path.abspath(target_dir)
+    restored = []
+    for entry in manifest['files']:
+        dest = os.path.abspath(os.path.join(target_dir, entry['path']))
+        if not dest.startswith(target_dir + os.sep):
+            raise BackupError(f"Chemin hors cible: {entry['path']}")
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + '.restore'
+        try:
+            with open(tmp, 'wb') as f:
+                for digest in entry['chunks']:
+                    f.write(_read_object(objects, digest))
+            if os.path.getsize(tmp) != entry['size']:
+                raise BackupError(f"Taille incorrecte: {entry['path']}")
+            os.chmod(tmp, entry.get('mode', 0o644))
+            os.replace(tmp, dest)
+        except BaseException:
+            # Pas de fichier .restore a moitie ecrit laisse dans la cible
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.utime(dest, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        restored.append(dest)
+    result = {'id': snapshot_id, 'target': target_dir, 'files': len(restored)}
+    if manifest['kind'] == 'sqlite' and restored:
+        conn = sqlite3.connect(restored[0])
+        try:
+            result['integrity'] = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        finally:
+            conn.close()
+        if result['integrity'] != 'ok':
+            raise BackupError(f"integrity_check: {result['integrity']}")
+    return result
+
+
+def gc(keep=30, store=None):
+    """
+    Garde les keep derniers snapshots de chaque source, puis supprime les blocs
+    qui ne sont plus references par aucun manifeste restant.
+    """
+    store, objects, snapshots = _paths(store)
+    result = {'snapshots_removed': 0, 'objects_removed': 0, 'bytes_freed': 0, 'objects_kept': 0}
+    if not os.path.isdir(snapshots):
+        return result
+    with _locked(store):
+        live = set()
+        for source in os.listdir(snapshots):
+            ids = _source_snapshots(snapshots, source)
+            for snapshot_id in ids[keep:]:
+                os.remove(_manifest_path(snapshots, snapshot_id))
+                result['snapshots_removed'] += 1
+            for snapshot_id in ids[:keep]:
+                try:
+                    manifest = load_manifest(snapshot_id, store)
+                except (OSError, ValueError, BackupError):
+                    # Manifeste illisible: on ne sait pas ce qu'il reference, ne rien supprimer
+                    return dict(result, error=f'manifeste illisible: {snapshot_id}')
+                for entry in manifest['files']:
+                    live.update(entry['chunks'])
+        if os.path.isdir(objects):
+            for prefix in os.listdir(objects):
+                directory = os.path.join(objects, prefix)
+                for name in os.listdir(directory):
+                    digest = name.split('.', 1)[0]
+                    if digest in live and '.tmp' not in name:
+                        result['objects_kept'] += 1
+                        continue
+                    path = os.path.join(directory, name)
+                    result['bytes_freed'] += os.path.getsize(path)
+                    os.remove(path)
+                    result['objects_removed'] += 1
+                if not os.listdir(directory):
+                    os.rmdir(directory)
+        shutil.rmtree(os.path.join(store, 'tmp'), ignore_errors=True)
+    return result
+
+
+def store_usage(store=None):
+    """Taille reelle du store (blocs compresses) et nombre de blocs"""
+    _, objects, _ = _paths(store)
+    count = size = 0
+    if os.path.isdir(objects):
+        for root, _, names in os.walk(objects):
+            for name in names:
+                count += 1
+                size += os.path.getsize(os.path.join(root, name))
+    return {'objects': count, 'size_mb': round(size / (1024 * 1024), 2)}
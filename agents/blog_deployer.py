@@ -16,13 +16,14 @@ import os
 import sys
 import re
 import sqlite3
-import yaml
 import json
 import html as html_lib
 import subprocess
 from datetime import datetime
 from urllib.parse import quote
 import requests
+from config_service import get_service as get_config_service
+import asset_pipeline
 
 # Path setup
 BASE_DIR = '/opt/seo-agent'
@@ -49,17 +50,14 @@ def get_db():
     return conn
 
 # ─── Config ───
+_config = get_config_service(CONFIG_PATH)
+
 def load_config():
-    with open(CONFIG_PATH, 'r') as f:
-        return yaml.safe_load(f)
+    return _config.get()
 
 def get_site_config(site_id):
-    config = load_config()
-    sites = config.get('sites', [])
-    idx = int(site_id) - 1
-    if 0 <= idx < len(sites):
-        return sites[idx]
-    return None
+    """Config d'un site (mapping en lecture seule, partage entre appels)"""
+    return _config.snapshot().site(site_id)
 
 # ─── Slug generation ───
 def generate_slug(title, max_len=80):
@@ -759,8 +757,7 @@ def deploy_article(content_row, dry_run=False):
     os.makedirs(blog_path, exist_ok=True)
 
     # Write HTML file
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(final_html)
+    asset_pipeline.write_site_file(html_path, final_html)
     os.chmod(html_path, 0o644)
 
     log(f"Deployed: {html_path} ({len(final_html)} bytes)")
@@ -1022,8 +1019,7 @@ def update_blog_index(site_id):
 </body>
 </html>"""
 
-    with open(index_path, 'w', encoding='utf-8') as f:
-        f.write(index_html)
+    asset_pipeline.write_site_file(index_path, index_html)
 
     log(f"Updated blog index: {index_path} ({len(articles)} articles)")
     return True
@@ -1096,8 +1092,7 @@ def update_sitemap(site_id):
   </url>
 {new_entries}</urlset>"""
 
-    with open(sitemap_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    asset_pipeline.write_site_file(sitemap_path, content)
 
     log(f"Updated sitemap: {sitemap_path} (+{len(new_urls)} URLs)")
     return True
@@ -1270,14 +1265,35 @@ def add_internal_links(site_id):
         else:
             continue
 
-        with open(fpath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        asset_pipeline.write_site_file(fpath, content)
         fixed += 1
         log(f"Added internal links to: {fname}")
 
     return fixed
 
 
+def build_assets(site_id):
+    """New articles and the regenerated index carry the full inline <style>: move it to the site CSS bundle."""
+    site_config = get_site_config(site_id)
+    if not site_config:
+        return None
+    try:
+        return asset_pipeline.build_site(site_config['chemin'], log=log)
+    except Exception as e:
+        log(f"Asset pipeline failed for site {site_id}: {e}", "WARNING")
+        return None
+
+
+def precompress_site(site_id):
+    """Final pass after index/sitemap/link updates: refresh stale .gz/.br and drop those whose source is gone."""
+    site_config = get_site_config(site_id)
+    if not site_config:
+        return None
+    stats = asset_pipeline.precompress(site_config['chemin'])
+    log(f"Precompressed site {site_id}: {stats['written']} written, {stats['removed']} removed")
+    return stats
+
+
 def deploy_pending_articles(site_id=None, dry_run=False):
     """Main entry point: deploy all pending approved articles."""
     log("=" * 60)
@@ -1306,6 +1322,7 @@ def deploy_pending_articles(site_id=None, dry_run=False):
         for sid in sites_updated:
             update_blog_index(sid)
             update_sitemap(sid)
+            build_assets(sid)
 
         # Collect deployed URLs and submit to Google Indexing API
         deployed_urls = []
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Chart Cache — resumes journaliers materialises + cache HTTP pour /api/charts/*
+- chart_daily_agent_runs / chart_daily_uptime: agregats par jour, rafraichis
+  de facon incrementale hors requete HTTP (auto_scheduler.py charts, chaque minute);
+  les routes GET ne font que lire les resumes (read_summary)
+- les requetes source utilisent des bornes sur la colonne brute (index utilisables)
+- cache en memoire avec TTL + ETag: le polling du dashboard recoit des 304
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import request, Response
+
+DB_PATH = '/opt/seo-agent/db/seo_agent.db'
+
+RECOMPUTE_DAYS = 2      # jours recalcules a chaque rafraichissement (statuts encore en cours)
+
+SUMMARIES = {
+    'agent_runs': {
+        'table': 'chart_daily_agent_runs',
+        'create': '''
+            CREATE TABLE IF NOT EXISTS chart_daily_agent_runs (
+                day TEXT NOT NULL,
+                task_type TEXT NOT NULL,
+                total INTEGER DEFAULT 0,
+                success INTEGER DEFAULT 0,
+                PRIMARY KEY (day, task_type)
+            )
+        ''',
+        'index': 'CREATE INDEX IF NOT EXISTS idx_agent_runs_started_at ON agent_runs(started_at)',
+        'aggregate': '''
+            INSERT INTO chart_daily_agent_runs (day, task_type, total, success)
+            SELECT date(started_at), COALESCE(task_type, ''), COUNT(*),
+                   SUM(CASE WHEN status='success' THEN 1 ELSE 0 END)
+            FROM agent_runs
+            WHERE started_at >= ? AND date(started_at) IS NOT NULL
+            GROUP BY 1, 2
+        ''',
+    },
+    'uptime': {
+        'table': 'chart_daily_uptime',
+        'create': '''
+            CREATE TABLE IF NOT EXISTS chart_daily_uptime (
+                day TEXT NOT NULL,
+                site_id TEXT NOT NULL,
+                total INTEGER DEFAULT 0,
+                up_count INTEGER DEFAULT 0,
+                PRIMARY KEY (day, site_id)
+            )
+        ''',
+        'index': 'CREATE INDEX IF NOT EXISTS idx_mon_uptime_checked_at ON mon_uptime(checked_at)',
+        'aggregate': '''
+            INSERT INTO chart_daily_uptime (day, site_id, total, up_count)
+            SELECT date(checked_at), site_id, COUNT(*),
+                   SUM(CASE WHEN is_up=1 THEN 1 ELSE 0 END)
+            FROM mon_uptime
+            WHERE checked_at >= ? AND date(checked_at) IS NOT NULL
+            GROUP BY 1, 2
+        ''',
+    },
+}
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _get_db(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH)
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def refresh_summaries(db_path=None, full=False):
+    """
+    Rafraichit les resumes journaliers.
+    Premier passage (ou full=True): reconstruction complete. Ensuite les jours depuis
+    le dernier passage (moins RECOMPUTE_DAYS: statuts encore en cours a ce moment-la)
+    sont supprimes et re-agreges: aucun trou si les graphiques n'ont pas ete demandes
+    pendant plusieurs jours.
+    """
+    conn = _get_db(db_path)
+    refreshed = {}
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS chart_summary_state (
+                name TEXT PRIMARY KEY,
+                refreshed_at TIMESTAMP
+            )
+        ''')
+        window = f'-{RECOMPUTE_DAYS} days'
+        for name, summary in SUMMARIES.items():
+            try:
+                with conn:
+                    conn.execute(summary['create'])
+                    conn.execute(summary['index'])
+                    state = conn.execute('SELECT refreshed_at FROM chart_summary_state WHERE name = ?',
+                                         (name,)).fetchone()
+                    if full or not state or not state[0]:
+                        start = ''
+                    else:
+                        start = conn.execute("SELECT MIN(date(?, ?), date('now', ?))",
+                                             (state[0], window, window)).fetchone()[0] or ''
+                    conn.execute(f"DELETE FROM {summary['table']} WHERE day >= ?", (start,))
+                    conn.execute(summary['aggregate'], (start,))
+                    conn.execute('INSERT OR REPLACE INTO chart_summary_state (name, refreshed_at) VALUES (?, CURRENT_TIMESTAMP)',
+                                 (name,))
+                refreshed[name] = start or 'full'
+            except sqlite3.OperationalError as e:
+                # Table source absente sur cette instance
+                refreshed[name] = f'error: {e}'
+    finally:
+        conn.close()
+    return refreshed
+
+
+def read_summary(query, params=(), db_path=None):
+    """Lignes d'un resume journalier; [] tant que le scheduler ne l'a pas encore construit"""
+    conn = _get_db(db_path)
+    try:
+        return conn.execute(query, params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def invalidate():
+    """Vide le cache HTTP (apres un rafraichissement force par exemple)"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def cached_json(ttl=30):
+    """
+    Decorateur de route: garde le corps JSON en memoire pendant ttl secondes
+    et repond 304 si le client renvoie le meme ETag (If-None-Match).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, request.query_string)
+            now = time.time()
+            with _cache_lock:
+                entry = _cache.get(key)
+            if entry is None or entry[0] < now:
+                resp = fn(*args, **kwargs)
+                if not isinstance(resp, Response) or resp.status_code != 200:
+                    return resp
+                body = resp.get_data()
+                entry = (now + ttl, hashlib.sha1(body).hexdigest(), body, resp.mimetype)
+                with _cache_lock:
+                    _cache[key] = entry
+            _, etag, body, mimetype = entry
+
+            if request.if_none_match.contains(etag):
+                resp = Response(status=304)
+            else:
+                resp = Response(body, mimetype=mimetype)
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = f'private, max-age={ttl}'
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Config Service — config.yaml parse une seule fois, partage en memoire
+- snapshot() retourne un ConfigSnapshot immuable (dict -> mapping en lecture seule, list -> tuple)
+- rechargement automatique quand le fichier change (mtime/taille/inode, verifie au plus
+  une fois par check_interval)
+- update() ecrit sous verrou (flock) et de facon atomique (fichier temporaire + os.replace)
+Usage:
+    from config_service import get_service
+    config = get_service('/opt/seo-agent/config.yaml')
+    if config.snapshot().pause_active: ...
+"""
+import os
+import copy
+import fcntl
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+import yaml
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class ConfigSnapshot:
+    """Vue immuable de la config a un instant donne"""
+    __slots__ = ('data', 'mtime', 'loaded_at')
+
+    def __init__(self, data, mtime=None):
+        object.__setattr__(self, 'data', _freeze(data or {}))
+        object.__setattr__(self, 'mtime', mtime)
+        object.__setattr__(self, 'loaded_at', time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ConfigSnapshot est immuable')
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    @property
+    def general(self):
+        return self.data.get('general', MappingProxyType({}))
+
+    @property
+    def pause_active(self):
+        return bool(self.general.get('pause_active', False))
+
+    @property
+    def sites(self):
+        return self.data.get('sites', ())
+
+    @property
+    def active_sites(self):
+        return tuple(s for s in self.sites if s.get('actif', True))
+
+    def site(self, site_id):
+        """Site par id (1-based, ordre du fichier), None si absent"""
+        idx = int(site_id) - 1
+        return self.sites[idx] if 0 <= idx < len(self.sites) else None
+
+    def to_dict(self):
+        """Copie profonde modifiable (pour jsonify ou code legacy qui modifie la config)"""
+        return _thaw(self.data)
+
+
+class ConfigService:
+    """Config YAML en memoire, rechargee sur changement du fichier"""
+
+    def __init__(self, path, default=None, check_interval=1.0):
+        self.path = path
+        self.default = default
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _read(self):
+        with open(self.path, 'r') as f:
+            return yaml.safe_load(f) or {}
+
+    def _reload(self, signature):
+        try:
+            data = self._read()
+        except (OSError, yaml.YAMLError):
+            if self._snapshot is not None:
+                return  # Fichier en cours d'ecriture ou invalide: on garde la derniere version valide
+            if self.default is None:
+                raise
+            data = copy.deepcopy(self.default)
+        self._snapshot = ConfigSnapshot(data, signature[0] if signature else None)
+        self._signature = signature
+
+    def snapshot(self):
+        """Snapshot courant; re-stat le fichier au plus une fois par check_interval"""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or now - self._checked_at >= self.check_interval:
+                signature = self._stat_signature()
+                if self._snapshot is None or signature != self._signature:
+                    self._reload(signature)
+                self._checked_at = now
+            return self._snapshot
+
+    def get(self):
+        """Config sous forme de dict modifiable (compatibilite avec les anciens load_config)"""
+        return self.snapshot().to_dict()
+
+    def update(self, mutator):
+        """
+        Modifie la config de facon sure entre processus:
+        verrou exclusif, relecture du fichier, mutator(dict), ecriture atomique.
+        Retourne le nouveau snapshot.
+        """
+        with self._lock:
+            with open(self.path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    try:
+                        data = self._read()
+                    except FileNotFoundError:
+                        data = copy.deepcopy(self.default) if self.default is not None else {}
+                    mutator(data)
+
+                    directory = os.path.dirname(self.path) or '.'
+                    fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.yaml', dir=directory)
+                    try:
+                        with os.fdopen(fd, 'w') as f:
+                            yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+                            f.flush()
+                            os.fsync(f.fileno())
+                        if os.path.exists(self.path):
+                            os.chmod(tmp_path, os.stat(self.path).st_mode & 0o777)
+                        os.replace(tmp_path, self.path)
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.unlink(tmp_path)
+                        raise
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+            signature = self._stat_signature()
+            self._snapshot = ConfigSnapshot(data, signature[0] if signature else None)
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_service(path, default=None, check_interval=1.0):
+    """Service partage par chemin de fichier (un seul parse par processus)"""
+    with _services_lock:
+        service = _services.get(path)
+        if service is None:
+            service = ConfigService(path, default, check_interval)
+            _services[path] = service
+        return service
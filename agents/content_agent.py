@@ -9,6 +9,7 @@ import json
 import sqlite3
 import requests
 from datetime import datetime
+import llm_usage
 
 # Configuration
 DB_PATH = '/opt/seo-agent/db/seo_agent.db'
@@ -31,7 +32,11 @@ def get_db():
 
 def call_qwen(prompt, max_tokens=2500):
     """Appel Groq (gratuit) avec fallback Fireworks"""
+    if not llm_usage.check_budget('content_agent', 'groq', GROQ_MODEL):
+        return None
+    usage = llm_usage.LLMCall('content_agent')
     if GROQ_API_KEY:
+        usage.attempt('groq')
         try:
             r = requests.post(GROQ_URL, headers={
                 'Content-Type': 'application/json',
@@ -46,11 +51,15 @@ def call_qwen(prompt, max_tokens=2500):
                 'temperature': 0.7
             }, timeout=120)
             if r.status_code == 200:
-                return r.json()['choices'][0]['message']['content']
+                data = r.json()
+                text = data['choices'][0]['message']['content']
+                usage.success('groq', GROQ_MODEL, data.get('usage'), prompt, text)
+                return text
             print(f"[content_agent] Groq {r.status_code}")
         except Exception as e:
             print(f"[content_agent] Groq error: {e}")
     if FIREWORKS_API_KEY:
+        usage.attempt('fireworks')
         try:
             r = requests.post(FIREWORKS_URL, headers={
                 'Content-Type': 'application/json',
@@ -65,9 +74,13 @@ def call_qwen(prompt, max_tokens=2500):
                 'temperature': 0.7
             }, timeout=120)
             if r.status_code == 200:
-                return r.json()['choices'][0]['message']['content']
+                data = r.json()
+                text = data['choices'][0]['message']['content']
+                usage.success('fireworks', FIREWORKS_MODEL, data.get('usage'), prompt, text)
+                return text
         except Exception as e:
             print(f"[content_agent] Fireworks fallback error: {e}")
+    usage.failure(FIREWORKS_MODEL if FIREWORKS_API_KEY else GROQ_MODEL)
     return None
 
 def get_keywords_for_site(site_id, limit=5):
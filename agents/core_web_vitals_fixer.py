@@ -3,15 +3,22 @@
 core_web_vitals_fixer.py — Optimize Core Web Vitals for all SeoAI client sites.
 
 Functions:
-- compress_images: Find and compress images >500KB
+- compress_images: Compress images >400KB and build JPEG/WebP(/AVIF) srcset variants
+  (single walk, process pool, skips images whose content hash is already optimized)
+- add_responsive_images: <picture> + srcset for optimized images
 - convert_to_webp: Convert PNG/JPG to WebP
 - add_lazy_loading: Add loading="lazy" to images missing it
+- rewrite_site_html: all HTML fixes in one streaming pass per file (html_rewriter),
+  atomic writes, every rewrite logged in html_rewrites for rollback
+- build_site_assets: shared <style> blocks -> hashed CSS bundle + inline critical CSS,
+  HTML/CSS/JS minification, .gz/.br siblings for gzip_static (asset_pipeline)
 - fix_gzip_config: Verify nginx gzip config is optimal
 
 Usage:
     python3 core_web_vitals_fixer.py                   # Fix all sites
     python3 core_web_vitals_fixer.py --site 1          # Fix specific site
     python3 core_web_vitals_fixer.py --images-only     # Only compress images
+    python3 core_web_vitals_fixer.py --workers 4 --avif # Encoder processes, AVIF variants
     python3 core_web_vitals_fixer.py --lazy-only       # Only add lazy loading
     python3 core_web_vitals_fixer.py --dry-run         # Preview changes
 """
@@ -19,11 +26,18 @@ Usage:
 import os
 import sys
 import re
-import glob
+import json
+import time
 import yaml
+import sqlite3
+import hashlib
 import subprocess
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import html_rewriter
+import asset_pipeline
+
 # Path setup
 BASE_DIR = '/opt/seo-agent'
 CONFIG_PATH = os.path.join(BASE_DIR, 'config.yaml')
@@ -70,105 +84,391 @@ def get_site_dirs(site_id=None):
 
 
 # ═══════════════════════════════════════════════════════
-#  IMAGE COMPRESSION
+#  IMAGE PIPELINE (single walk -> process pool encoder)
 # ═══════════════════════════════════════════════════════
 
-def compress_images(site_dir, dry_run=False):
-    """Find and compress images larger than MAX_IMAGE_KB."""
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+SKIP_DIRS = {'node_modules', '.git', 'backup', '__pycache__'}
+VARIANT_WIDTHS = (480, 800, 1200)   # srcset breakpoints (capped at MAX_WIDTH / original width)
+MIN_VARIANT_WIDTH = 320             # icons and logos: no variants
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+IMAGE_WORKERS = int(os.environ.get('CWV_IMAGE_WORKERS', '0')) or os.cpu_count() or 1
+ENABLE_AVIF = os.environ.get('CWV_AVIF', '0') == '1'
+DB_PATH = os.path.join(BASE_DIR, 'db', 'seo_agent.db')
+
+
+def _images_db():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cwv_images (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            options TEXT NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            has_alpha INTEGER DEFAULT 0,
+            outputs TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn
+
+
+def avif_supported():
+    """AVIF encoding: Pillow >= 11.3 built with libavif, or the pillow-avif-plugin package."""
     try:
-        from PIL import Image
+        from PIL import features
+        if features.check('avif'):
+            return True
+    except Exception:
+        pass
+    try:
+        import pillow_avif  # noqa: F401 (registers the AVIF plugin)
+        return True
     except ImportError:
-        log("Pillow not installed. Run: pip3 install Pillow", "ERROR")
-        return {"compressed": 0, "saved_kb": 0}
+        return False
 
-    compressed = 0
-    total_saved = 0
-    base = site_dir['chemin']
 
-    for ext in ('*.png', '*.jpg', '*.jpeg', '*.PNG', '*.JPG', '*.JPEG'):
-        for fpath in glob.glob(os.path.join(base, '**', ext), recursive=True):
-            # Skip backup files
-            if '.bak' in fpath or '/backup/' in fpath:
+def scan_site_files(base):
+    """Single os.walk: (images, html files)."""
+    images, html = [], []
+    for root, dirs, files in os.walk(base):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for fname in files:
+            lower = fname.lower()
+            if '.bak' in lower:
                 continue
+            if lower.endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.join(root, fname))
+            elif lower.endswith('.html'):
+                html.append(os.path.join(root, fname))
+    return images, html
 
-            size_kb = os.path.getsize(fpath) / 1024
-            if size_kb < MAX_IMAGE_KB:
+
+def variant_path(path, width, fmt):
+    stem = os.path.splitext(path)[0]
+    return f"{stem}-{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def _save_atomic(img, path, fmt, **params):
+    tmp = f"{path}.tmp{os.getpid()}"
+    img.save(tmp, fmt.upper(), **params)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _encode_image(task):
+    """
+    Worker (process pool): recompress an oversized original in place (as before), then
+    write resized JPEG/WebP (+ AVIF) variants next to it. Returns stats + CPU time used.
+    """
+    path, known_hash, options = task
+    cpu_start = time.process_time()
+    result = {'path': path, 'outputs': [], 'saved_bytes': 0}
+    try:
+        import io
+        from PIL import Image, ImageOps
+        if options['avif']:
+            avif_supported()    # registers pillow-avif-plugin in this worker if needed
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == known_hash:
+            result['unchanged'] = True
+            return result
+
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        is_png = path.lower().endswith('.png')
+
+        # Legacy in-place compression: JPEG and transparent PNG above MAX_IMAGE_KB
+        if len(raw) > options['max_kb'] * 1024 and (not is_png or has_alpha):
+            optimized = img if is_png else img.convert('RGB')
+            if optimized.width > options['max_width']:
+                ratio = options['max_width'] / optimized.width
+                optimized = optimized.resize((options['max_width'], int(optimized.height * ratio)), Image.LANCZOS)
+            buf = io.BytesIO()
+            if is_png:
+                optimized.save(buf, 'PNG', optimize=True)
+            else:
+                optimized.save(buf, 'JPEG', quality=options['jpeg_quality'], optimize=True)
+            if len(raw) - buf.tell() > 10 * 1024:
+                tmp = f"{path}.tmp{os.getpid()}"
+                with open(tmp, 'wb') as f:
+                    f.write(buf.getvalue())
+                os.replace(tmp, path)
+                result['saved_bytes'] = len(raw) - buf.tell()
+                raw = buf.getvalue()
+                digest = hashlib.sha256(raw).hexdigest()
+                img = Image.open(io.BytesIO(raw))
+                img.load()
+
+        # Variants are stripped of EXIF: apply the orientation first
+        img = ImageOps.exif_transpose(img)
+        width, height = img.size
+        result.update(hash=digest, bytes_in=len(raw), width=width, height=height, has_alpha=has_alpha)
+
+        if width >= MIN_VARIANT_WIDTH:
+            top = min(width, options['max_width'])
+            widths = sorted({w for w in options['widths'] if w < top} | {top})
+            base = img.convert('RGBA' if has_alpha else 'RGB')
+            for w in widths:
+                resized = base if w == width else base.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+                formats = [('webp', {'quality': options['webp_quality'], 'method': 4})]
+                if not has_alpha:
+                    formats.append(('jpeg', {'quality': options['jpeg_quality'], 'optimize': True,
+                                             'progressive': True}))
+                if options['avif']:
+                    formats.append(('avif', {'quality': options['avif_quality']}))
+                for fmt, params in formats:
+                    out = variant_path(path, w, fmt)
+                    size = _save_atomic(resized, out, fmt, **params)
+                    result['outputs'].append({'path': out, 'format': fmt, 'width': w, 'bytes': size})
+
+        st = os.stat(path)
+        result.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['cpu_s'] = time.process_time() - cpu_start
+    return result
+
+
+def compress_images(site_dir, dry_run=False, workers=None, avif=None):
+    """
+    Optimize all images of a site: one walk, encoding in a process pool, JPEG/WebP
+    (+ AVIF) srcset variants. Images whose content hash already has its variants
+    recorded (cwv_images) are skipped. Reports bytes saved, images/s, CPU utilization.
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        log("Pillow not installed. Run: pip3 install Pillow", "ERROR")
+        return {"compressed": 0, "saved_kb": 0}
+
+    avif = ENABLE_AVIF if avif is None else avif
+    if avif and not avif_supported():
+        log("AVIF requested but not supported by this Pillow build, skipping AVIF", "WARNING")
+        avif = False
+    options = {'widths': list(VARIANT_WIDTHS), 'max_width': MAX_WIDTH, 'max_kb': MAX_IMAGE_KB,
+               'jpeg_quality': JPEG_QUALITY, 'webp_quality': WEBP_QUALITY,
+               'avif_quality': AVIF_QUALITY, 'avif': avif}
+    options_key = json.dumps(options, sort_keys=True)
+    workers = workers or IMAGE_WORKERS
+
+    stats = {"compressed": 0, "saved_kb": 0, "processed": 0, "skipped": 0, "errors": 0,
+             "variants": 0, "variant_saved_kb": 0, "images_per_s": 0, "cpu_utilization": 0}
+    started = time.monotonic()
+    images, _ = scan_site_files(site_dir['chemin'])
+
+    conn = _images_db()
+    try:
+        known = {row[0]: row[1:] for row in conn.execute(
+            "SELECT path, size, mtime_ns, content_hash, options, outputs FROM cwv_images")}
+        produced = {o['path'] for row in known.values() for o in json.loads(row[4] or '[]')}
+
+        tasks = []
+        for path in images:
+            if path in produced:
+                continue            # our own JPEG variant
+            row = known.get(path)
+            outputs_ok = row is not None and row[3] == options_key and all(
+                os.path.exists(o['path']) for o in json.loads(row[4] or '[]'))
+            if outputs_ok:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if row[0] == st.st_size and row[1] == st.st_mtime_ns:
+                    stats["skipped"] += 1
+                    continue
+            tasks.append((path, row[2] if outputs_ok else None, options))
+
+        if dry_run:
+            log(f"[DRY-RUN] Would optimize {len(tasks)} images ({stats['skipped']} already optimized)")
+            return stats
+
+        if workers > 1 and len(tasks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_encode_image, tasks))
+        else:
+            outcomes = [_encode_image(task) for task in tasks]
+
+        cpu_s = 0.0
+        for r in outcomes:
+            cpu_s += r['cpu_s']
+            if 'error' in r:
+                stats["errors"] += 1
+                log(f"  Error optimizing {r['path']}: {r['error']}", "WARNING")
+                continue
+            if r.get('unchanged'):
+                # Touched but identical (deploy/copy): variants still valid, refresh size/mtime
+                st = os.stat(r['path'])
+                conn.execute("UPDATE cwv_images SET size = ?, mtime_ns = ? WHERE path = ?",
+                             (st.st_size, st.st_mtime_ns, r['path']))
+                stats["skipped"] += 1
                 continue
+            stats["processed"] += 1
+            if r['saved_bytes']:
+                stats["compressed"] += 1
+                stats["saved_kb"] += r['saved_bytes'] / 1024
+                log(f"  Compressed {os.path.basename(r['path'])} (saved {r['saved_bytes'] // 1024}KB)")
+            stats["variants"] += len(r['outputs'])
+            webp = [o for o in r['outputs'] if o['format'] == 'webp']
+            if webp:
+                # Largest WebP vs the original: what the widest breakpoint no longer downloads
+                stats["variant_saved_kb"] += max(0, r['bytes_in'] - webp[-1]['bytes']) / 1024
+            conn.execute('''
+                INSERT OR REPLACE INTO cwv_images
+                (path, size, mtime_ns, content_hash, options, width, height, has_alpha, outputs, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            ''', (r['path'], r['size'], r['mtime_ns'], r['hash'], options_key, r['width'], r['height'],
+                  int(r['has_alpha']), json.dumps(r['outputs'])))
+        conn.commit()
+    finally:
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    stats["saved_kb"] = round(stats["saved_kb"], 1)
+    stats["variant_saved_kb"] = round(stats["variant_saved_kb"], 1)
+    stats["seconds"] = round(elapsed, 2)
+    stats["workers"] = workers
+    if elapsed > 0:
+        stats["images_per_s"] = round(stats["processed"] / elapsed, 1)
+        stats["cpu_utilization"] = round(min(100.0, cpu_s / (elapsed * min(workers, os.cpu_count() or 1)) * 100), 1)
+    log(f"  Images: {stats['processed']} optimized, {stats['skipped']} unchanged, {stats['variants']} variants, "
+        f"{stats['images_per_s']} img/s, CPU {stats['cpu_utilization']}% x{workers}")
+    return stats
 
-            try:
-                img = Image.open(fpath)
-                orig_size = os.path.getsize(fpath)
-                fname = os.path.basename(fpath)
-
-                # Check if it's a PNG without transparency (can convert to JPEG)
-                if fpath.lower().endswith('.png') and img.mode == 'RGB':
-                    # Convert to JPEG (much smaller)
-                    jpg_path = re.sub(r'\.png$', '.jpg', fpath, flags=re.IGNORECASE)
-
-                    if dry_run:
-                        log(f"[DRY-RUN] Would convert {fname} PNG->JPG ({size_kb:.0f}KB)")
-                        continue
-
-                    img_rgb = img.convert('RGB')
-                    if img_rgb.width > MAX_WIDTH:
-                        ratio = MAX_WIDTH / img_rgb.width
-                        new_h = int(img_rgb.height * ratio)
-                        img_rgb = img_rgb.resize((MAX_WIDTH, new_h), Image.LANCZOS)
-
-                    img_rgb.save(jpg_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
-                    new_size = os.path.getsize(jpg_path)
-
-                    # Backup original PNG
-                    os.rename(fpath, fpath + '.bak')
-
-                    saved = (orig_size - new_size) / 1024
-                    total_saved += saved
-                    compressed += 1
-                    log(f"  PNG->JPG {fname}: {orig_size//1024}KB -> {new_size//1024}KB (saved {saved:.0f}KB)")
-
-                elif fpath.lower().endswith('.png') and img.mode in ('RGBA', 'LA', 'P'):
-                    # PNG with transparency — optimize in place
-                    if dry_run:
-                        log(f"[DRY-RUN] Would optimize {fname} PNG ({size_kb:.0f}KB)")
-                        continue
-
-                    if img.width > MAX_WIDTH:
-                        ratio = MAX_WIDTH / img.width
-                        new_h = int(img.height * ratio)
-                        img = img.resize((MAX_WIDTH, new_h), Image.LANCZOS)
-
-                    img.save(fpath, 'PNG', optimize=True)
-                    new_size = os.path.getsize(fpath)
-                    saved = (orig_size - new_size) / 1024
-                    if saved > 10:
-                        total_saved += saved
-                        compressed += 1
-                        log(f"  PNG opt {fname}: {orig_size//1024}KB -> {new_size//1024}KB (saved {saved:.0f}KB)")
-
-                elif fpath.lower().endswith(('.jpg', '.jpeg')):
-                    # Optimize JPEG
-                    if dry_run:
-                        log(f"[DRY-RUN] Would optimize {fname} JPG ({size_kb:.0f}KB)")
-                        continue
-
-                    img_rgb = img.convert('RGB')
-                    if img_rgb.width > MAX_WIDTH:
-                        ratio = MAX_WIDTH / img_rgb.width
-                        new_h = int(img_rgb.height * ratio)
-                        img_rgb = img_rgb.resize((MAX_WIDTH, new_h), Image.LANCZOS)
-
-                    img_rgb.save(fpath, 'JPEG', quality=JPEG_QUALITY, optimize=True)
-                    new_size = os.path.getsize(fpath)
-                    saved = (orig_size - new_size) / 1024
-                    if saved > 10:
-                        total_saved += saved
-                        compressed += 1
-                        log(f"  JPG opt {fname}: {orig_size//1024}KB -> {new_size//1024}KB (saved {saved:.0f}KB)")
 
+# ═══════════════════════════════════════════════════════
+#  HTML REWRITE (single pass per file, see html_rewriter)
+# ═══════════════════════════════════════════════════════
+
+def rewrite_site_html(site_dir, transforms, dry_run=False, source='cwv_fixer'):
+    """
+    Apply all enabled transforms to every HTML file of a site in one read/write per file
+    (atomic, only when something changes). Each rewrite is logged in html_rewrites for rollback.
+    """
+    base = site_dir['chemin']
+    totals, touched, files = {}, {}, 0
+    _, html_files = scan_site_files(base)
+    conn = _images_db() if not dry_run else None
+    try:
+        for fpath in html_files:
+            try:
+                result = html_rewriter.rewrite_file(fpath, transforms, dry_run=dry_run)
             except Exception as e:
-                log(f"  Error compressing {fpath}: {e}", "WARNING")
+                log(f"  Error processing {fpath}: {e}", "WARNING")
+                continue
+            if not result.changed:
+                continue
+            files += 1
+            for name, count in result.changes.items():
+                totals[name] = totals.get(name, 0) + count
+                touched[name] = touched.get(name, 0) + 1
+            summary = ', '.join(f"{name} +{count}" for name, count in sorted(result.changes.items()))
+            if dry_run:
+                log(f"[DRY-RUN] Would rewrite {os.path.basename(fpath)} ({summary})")
+            else:
+                asset_pipeline.refresh_compressed(fpath)
+                html_rewriter.record(conn, result, source)
+                conn.commit()
+                log(f"  Rewrite: {os.path.basename(fpath)} ({summary})")
+    finally:
+        if conn is not None:
+            conn.close()
+    return {"files": files, "changes": totals, "files_by_change": touched}
+
+
+def _image_variants(base):
+    """Optimized images of a site (cwv_images): path -> {'outputs', 'width', 'height'}."""
+    conn = _images_db()
+    try:
+        rows = conn.execute(
+            "SELECT path, outputs, width, height FROM cwv_images WHERE path LIKE ?",
+            (os.path.join(base, '') + '%',)).fetchall()
+    finally:
+        conn.close()
+    return {r[0]: {'outputs': json.loads(r[1] or '[]'), 'width': r[2], 'height': r[3]} for r in rows}
+
+
+class ResponsiveImages(html_rewriter.Transform):
+    """Wrap optimized <img> in <picture> (AVIF/WebP sources) and add a JPEG srcset."""
+    name = 'responsive_images'
+
+    def __init__(self, base, variants):
+        self.base = base
+        self.variants = variants
+
+    def start_tag(self, tag, ctx):
+        src = tag.get('src')
+        if tag.name != 'img' or not src or tag.has('srcset') or ctx.inside('picture'):
+            return
+        local = html_rewriter.local_path(self.base, ctx.path, src)
+        outputs = (self.variants.get(local) or {}).get('outputs')
+        if not outputs:
+            return
+        top = max(o['width'] for o in outputs)
+        sizes = f'(max-width: {top}px) 100vw, {top}px'
+        sources = ''.join(
+            f'<source type="image/{fmt}" srcset="{_picture_sources(src, outputs, fmt)}" sizes="{sizes}">'
+            for fmt in ('avif', 'webp') if any(o['format'] == fmt for o in outputs))
+        jpeg = _picture_sources(src, outputs, 'jpeg')
+        if jpeg:
+            tag.set('srcset', jpeg)
+            tag.set('sizes', sizes)
+        tag.before = '<picture>' + sources
+        tag.after = '</picture>' + tag.after
+        ctx.count(self.name)
+
+
+def image_size_lookup(base, variants=None):
+    """size(src, ctx) for ImageDimensions: cwv_images dimensions, else the image header (Pillow)."""
+    variants = variants if variants is not None else _image_variants(base)
+    cache = {}
+
+    def size(src, ctx):
+        local = html_rewriter.local_path(base, ctx.path, src)
+        if not local:
+            return None
+        known = variants.get(local)
+        if known and known['width']:
+            return known['width'], known['height']
+        if local not in cache:
+            cache[local] = None
+            try:
+                from PIL import Image
+                with Image.open(local) as img:     # header only, no decoding
+                    w, h = img.size
+                    # EXIF orientation 5-8: displayed rotated by 90 degrees
+                    cache[local] = (h, w) if img.getexif().get(0x0112, 1) in (5, 6, 7, 8) else (w, h)
+            except Exception:
+                pass
+        return cache[local]
+    return size
+
 
-    return {"compressed": compressed, "saved_kb": total_saved}
+def _picture_sources(src, outputs, fmt):
+    """srcset for one format, URLs built from the <img> src (variants live next to the original)."""
+    prefix = src.rsplit('/', 1)[0] + '/' if '/' in src else ''
+    items = [o for o in outputs if o['format'] == fmt]
+    return ', '.join(f"{prefix}{os.path.basename(o['path'])} {o['width']}w" for o in items)
+
+
+def add_responsive_images(site_dir, dry_run=False):
+    """Wrap optimized <img> in <picture> (AVIF/WebP sources) and add a JPEG srcset."""
+    variants = _image_variants(site_dir['chemin'])
+    if not variants:
+        return {"files": 0, "images": 0}
+    result = rewrite_site_html(site_dir, [ResponsiveImages(site_dir['chemin'], variants)], dry_run)
+    return {"files": result["files"], "images": result["changes"].get('responsive_images', 0)}
 
 
 def convert_to_webp(image_path, quality=80):
@@ -200,38 +500,8 @@ def convert_to_webp(image_path, quality=80):
 
 def add_lazy_loading(site_dir, dry_run=False):
     """Add loading='lazy' to all img tags that don't have it."""
-    base = site_dir['chemin']
-    fixed_files = 0
-    fixed_images = 0
-
-    for fpath in glob.glob(os.path.join(base, '**', '*.html'), recursive=True):
-        try:
-            with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            original = content
-            # Add loading="lazy" to img tags that don't have it
-            content = re.sub(
-                r'<img(?![^>]*loading=)([^>]*?)(/?)>',
-                r'<img loading="lazy"\1\2>',
-                content
-            )
-
-            if content != original:
-                count = content.count('loading="lazy"') - original.count('loading="lazy"')
-                if dry_run:
-                    log(f"[DRY-RUN] Would add lazy loading to {count} images in {os.path.basename(fpath)}")
-                else:
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                    log(f"  Lazy loading: {os.path.basename(fpath)} (+{count} images)")
-                fixed_files += 1
-                fixed_images += count
-
-        except Exception as e:
-            log(f"  Error processing {fpath}: {e}", "WARNING")
-
-    return {"files": fixed_files, "images": fixed_images}
+    result = rewrite_site_html(site_dir, [html_rewriter.LazyLoading()], dry_run)
+    return {"files": result["files"], "images": result["changes"].get('lazy_loading', 0)}
 
 
 # ═══════════════════════════════════════════════════════
@@ -239,45 +509,19 @@ def add_lazy_loading(site_dir, dry_run=False):
 # ═══════════════════════════════════════════════════════
 
 def optimize_html(site_dir, dry_run=False):
-    """Minor HTML optimizations for performance."""
-    base = site_dir['chemin']
-    fixed = 0
-
-    for fpath in glob.glob(os.path.join(base, '**', '*.html'), recursive=True):
-        try:
-            with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            original = content
-
-            # Add width/height to images that are missing them (CLS fix)
-            # This is a best-effort approach using standard dimensions
+    """Minor HTML optimizations for performance (preconnect for Google Fonts)."""
+    return rewrite_site_html(site_dir, [html_rewriter.Preconnect()], dry_run)["files"]
 
-            # Ensure font-display: swap on Google Fonts
-            content = content.replace(
-                'family=Inter:wght@400;500;600;700&display=swap',
-                'family=Inter:wght@400;500;600;700&display=swap'
-            )
 
-            # Add preconnect for Google Fonts if missing
-            if 'fonts.googleapis.com' in content and 'rel="preconnect"' not in content:
-                content = content.replace(
-                    '<link href="https://fonts.googleapis.com',
-                    '<link rel="preconnect" href="https://fonts.googleapis.com">\n    '
-                    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n    '
-                    '<link href="https://fonts.googleapis.com'
-                )
-
-            if content != original:
-                if not dry_run:
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                fixed += 1
-
-        except Exception:
-            pass
-
-    return fixed
+def build_site_assets(site_dir, dry_run=False):
+    """CSS bundle + critical CSS, minification and .gz/.br siblings (see asset_pipeline)."""
+    try:
+        result = asset_pipeline.build_site(site_dir['chemin'], dry_run=dry_run, db_path=DB_PATH, log=log)
+    except Exception as e:
+        log(f"  Asset pipeline error for {site_dir['domaine']}: {e}", "WARNING")
+        return None
+    result.pop("per_page", None)
+    return result
 
 
 # ═══════════════════════════════════════════════════════
@@ -298,7 +542,7 @@ def check_gzip_config():
             main_conf = f.read()
     except PermissionError:
         log("Cannot read nginx.conf (permission denied)", "WARNING")
-        return {"ok": False, "issues": ["Cannot read nginx.conf"]}
+        return {"ok": False, "issues": ["Cannot read nginx.conf"], "gzip_static": False}
 
     if 'gzip on' not in main_conf:
         issues.append("gzip not enabled in nginx.conf")
@@ -322,49 +566,38 @@ def check_gzip_config():
             issues.append(f"{directive} not configured")
             gzip_ok = False
 
+    # Precompressed .gz/.br siblings (asset_pipeline) are only used with gzip_static
+    gzip_static = bool(re.search(r'^\s*gzip_static\s+(on|always)', all_conf, re.MULTILINE))
+    if not gzip_static:
+        log("Nginx gzip_static not enabled: precompressed .gz files are ignored", "WARNING")
+
     if gzip_ok:
         log("Nginx gzip: OK (fully configured)")
     else:
         log(f"Nginx gzip issues: {', '.join(issues)}", "WARNING")
 
-    return {"ok": gzip_ok, "issues": issues}
+    return {"ok": gzip_ok, "issues": issues, "gzip_static": gzip_static}
 
 
 def update_html_references(site_dir, old_ext, new_ext):
     """Update image references in HTML files when converting formats."""
-    base = site_dir['chemin']
-    updated = 0
-
-    for fpath in glob.glob(os.path.join(base, '**', '*.html'), recursive=True):
-        try:
-            with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            original = content
-            # Replace .png references with .jpg (for converted images)
-            content = re.sub(
-                rf'(src=["\'][^"\']*?)\.{old_ext}(["\'])',
-                rf'\1.{new_ext}\2',
-                content,
-                flags=re.IGNORECASE
-            )
-
-            if content != original:
-                with open(fpath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                updated += 1
+    suffix = re.compile(rf'\.{re.escape(old_ext)}$', re.IGNORECASE)
 
-        except Exception:
-            pass
+    def rewrite(url, tag, ctx):
+        path, sep, query = url.partition('?')
+        if suffix.search(path):
+            return suffix.sub(f'.{new_ext}', path) + sep + query
+        return None
 
-    return updated
+    transform = html_rewriter.AssetReferences(rewrite, attrs=('src',))
+    return rewrite_site_html(site_dir, [transform])["files"]
 
 
 # ═══════════════════════════════════════════════════════
 #  MAIN
 # ═══════════════════════════════════════════════════════
 
-def fix_all(site_id=None, dry_run=False, images_only=False, lazy_only=False):
+def fix_all(site_id=None, dry_run=False, images_only=False, lazy_only=False, workers=None, avif=None):
     """Run all Core Web Vitals fixes."""
     log("=" * 60)
     log("CORE WEB VITALS FIXER: Starting")
@@ -374,29 +607,66 @@ def fix_all(site_id=None, dry_run=False, images_only=False, lazy_only=False):
     results = {
         "images_compressed": 0,
         "kb_saved": 0,
+        "images_optimized": 0,
+        "image_variants": 0,
+        "variant_kb_saved": 0,
+        "responsive_images": 0,
+        "image_runs": [],
         "lazy_files": 0,
         "lazy_images": 0,
+        "image_dimensions": 0,
+        "html_files_rewritten": 0,
+        "asset_bundles": 0,
+        "transfer_bytes_before": 0,
+        "transfer_bytes_after": 0,
+        "html_bytes_before": 0,
+        "html_bytes_after": 0,
+        "asset_runs": [],
         "gzip_ok": True,
     }
 
     for site in sites:
         log(f"\n── Site: {site['nom']} ({site['domaine']})")
 
+        transforms = []
         if not lazy_only:
             # Compress images
-            img_result = compress_images(site, dry_run)
+            img_result = compress_images(site, dry_run, workers=workers, avif=avif)
             results["images_compressed"] += img_result["compressed"]
             results["kb_saved"] += img_result["saved_kb"]
+            results["images_optimized"] += img_result.get("processed", 0)
+            results["image_variants"] += img_result.get("variants", 0)
+            results["variant_kb_saved"] += img_result.get("variant_saved_kb", 0)
+            results["image_runs"].append(dict(img_result, site=site['domaine']))
 
-        if not images_only:
-            # Add lazy loading
-            lazy_result = add_lazy_loading(site, dry_run)
-            results["lazy_files"] += lazy_result["files"]
-            results["lazy_images"] += lazy_result["images"]
+            # <picture>/srcset + width/height for optimized images
+            variants = _image_variants(site['chemin'])
+            transforms.append(ResponsiveImages(site['chemin'], variants))
+            transforms.append(html_rewriter.ImageDimensions(image_size_lookup(site['chemin'], variants)))
 
-            # HTML optimizations
-            if not dry_run:
-                optimize_html(site, dry_run)
+        if not images_only:
+            transforms.append(html_rewriter.LazyLoading())
+            transforms.append(html_rewriter.Preconnect())
+
+        # All HTML fixes in one read/write per file
+        html_result = rewrite_site_html(site, transforms, dry_run)
+        changes = html_result["changes"]
+        results["html_files_rewritten"] += html_result["files"]
+        results["responsive_images"] += changes.get('responsive_images', 0)
+        results["image_dimensions"] += changes.get('image_dimensions', 0)
+        results["lazy_images"] += changes.get('lazy_loading', 0)
+        results["lazy_files"] += html_result["files_by_change"].get('lazy_loading', 0)
+
+        # CSS bundles + critical CSS, minification, precompressed siblings (last: sees final HTML)
+        if not images_only and not lazy_only:
+            asset_result = build_site_assets(site, dry_run)
+            if asset_result:
+                results["asset_bundles"] += asset_result["bundles"]
+                results["transfer_bytes_before"] += asset_result["transfer_before"]
+                results["transfer_bytes_after"] += asset_result["transfer_after"]
+                results["html_bytes_before"] += asset_result["html_before"]
+                results["html_bytes_after"] += asset_result["html_after"]
+                results["asset_runs"].append(dict(asset_result, site=site['domaine']))
 
     # Check gzip
     if not images_only and not lazy_only:
@@ -406,7 +676,13 @@ def fix_all(site_id=None, dry_run=False, images_only=False, lazy_only=False):
     log("\n" + "=" * 60)
     log(f"CWV FIXER DONE:")
     log(f"  Images compressed: {results['images_compressed']} (saved {results['kb_saved']:.0f}KB)")
-    log(f"  Lazy loading: {results['lazy_images']} images in {results['lazy_files']} files")
+    log(f"  Images optimized: {results['images_optimized']} ({results['image_variants']} variants, "
+        f"WebP saves {results['variant_kb_saved']:.0f}KB, {results['responsive_images']} srcset added)")
+    log(f"  Lazy loading: {results['lazy_images']} images, width/height: {results['image_dimensions']} images")
+    log(f"  HTML rewritten: {results['html_files_rewritten']} files (one pass each)")
+    log(f"  Assets: {results['asset_bundles']} CSS bundles, all pages {results['transfer_bytes_before'] / 1024:.0f}KB "
+        f"-> {results['transfer_bytes_after'] / 1024:.0f}KB first visit, {results['html_bytes_before'] / 1024:.0f}KB "
+        f"-> {results['html_bytes_after'] / 1024:.0f}KB with CSS/JS cached")
     log(f"  Gzip: {'OK' if results['gzip_ok'] else 'NEEDS FIX'}")
     log("=" * 60)
 
@@ -420,6 +696,8 @@ if __name__ == "__main__":
     parser.add_argument('--dry-run', action='store_true', help='Preview changes')
     parser.add_argument('--images-only', action='store_true', help='Only compress images')
     parser.add_argument('--lazy-only', action='store_true', help='Only add lazy loading')
+    parser.add_argument('--workers', type=int, help='Image encoder processes (default: CPU count)')
+    parser.add_argument('--avif', action='store_true', default=None, help='Also build AVIF variants')
     args = parser.parse_args()
 
     fix_all(
@@ -427,4 +705,6 @@ if __name__ == "__main__":
         dry_run=args.dry_run,
         images_only=args.images_only,
         lazy_only=args.lazy_only,
+        workers=args.workers,
+        avif=args.avif,
     )
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+FAQ Index — recherche locale pour ChatbotAgent (SQLite FTS5 + BM25)
+- Table FTS5 'chatbot_search' sur chatbot_faq, chatbot_responses et kb_articles (publies),
+  tenue a jour par triggers (creee et remplie au premier ensure_index)
+- search(): passages classes par BM25 puis par similarite 0..1 (couverture des termes
+  + cosinus de trigrammes de caracteres, calcules localement, sans modele)
+- Similarite >= DIRECT_ANSWER_THRESHOLD: le chatbot repond sans appel LLM;
+  sinon les meilleurs passages sont injectes dans le prompt
+- SQLite compile sans FTS5: repli sur LIKE (chatbot_faq seulement)
+- record_answer() / answer_stats(): part des messages servis sans LLM et latences
+"""
+import re
+import math
+import sqlite3
+import unicodedata
+from collections import Counter
+
+DIRECT_ANSWER_THRESHOLD = 0.6
+PASSAGE_MIN_SIMILARITY = 0.2
+STEM_LENGTH = 6          # prefixe des termes longs: 'horaires' -> 'horair'* (pluriels, conjugaisons)
+
+# rowid FTS = id * 4 + code de la source (suppression/mise a jour directe par rowid)
+SOURCES = {'faq': 1, 'response': 2, 'kb': 3}
+SOURCE_NAMES = {code: name for name, code in SOURCES.items()}
+
+STOPWORDS = frozenset('''
+a au aux avec ce ces cette dans de des du elle en est et etre il ils je la le les leur lui ma mais me
+mes moi mon ne nos notre nous on ou par pas pour qu que quel quelle quelles quels qui sa se ses si son
+sur ta te tes toi ton tu un une vos votre vous y c d j l m n s t est-ce estce ca cela comment quoi
+the an and are be can do does for from how i in is it my of on or that the this to we what when where
+which who why will with you your
+'''.split())
+
+# (table, source, colonnes title/body/keywords/language, condition d'indexation, colonnes surveillees)
+_TABLES = (
+    ('chatbot_faq', 'faq', ('NEW.question', 'NEW.answer', 'NEW.keywords', 'NEW.language'),
+     'NEW.is_active = 1', 'question, answer, keywords, language, is_active'),
+    ('chatbot_responses', 'response', ('NEW.intent', 'NEW.response', "''", 'NEW.language'),
+     'NEW.is_active = 1', 'intent, response, language, is_active'),
+    ('kb_articles', 'kb', ('NEW.title', "COALESCE(NEW.excerpt, '') || ' ' || COALESCE(NEW.content, '')",
+                           'NEW.tags', "''"),
+     "NEW.status = 'published'", 'title, content, excerpt, tags, status'),
+)
+
+_WORD = re.compile(r'\w+')
+_fts5_available = None
+
+
+def normalize(text):
+    """Minuscules sans accents"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def terms(text):
+    """Termes significatifs (sans mots vides), tronques a STEM_LENGTH"""
+    result = []
+    for word in _WORD.findall(normalize(text)):
+        if len(word) < 2 or word in STOPWORDS or word.isdigit():
+            continue
+        stem = word[:STEM_LENGTH]
+        if stem not in result:
+            result.append(stem)
+    return result
+
+
+def match_query(stems):
+    """Expression MATCH FTS5: termes en OU, prefixe pour les termes tronques"""
+    return ' OR '.join(f'"{s}"*' if len(s) >= STEM_LENGTH else f'"{s}"' for s in stems)
+
+
+def _trigrams(text):
+    text = '  ' + ' '.join(_WORD.findall(normalize(text))) + ' '
+    return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def similarity(query, title, keywords=''):
+    """
+    Similarite 0..1 entre le message et une entree:
+    60% couverture des termes du message par titre+mots-cles, 40% cosinus de trigrammes
+    """
+    stems = terms(query)
+    if not stems:
+        return 0.0
+    doc = set(terms(f'{title} {keywords}'))
+    coverage = sum(1 for s in stems if s in doc) / len(stems)
+    a, b = _trigrams(query), _trigrams(title)
+    dot = sum(count * b[gram] for gram, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    cosine = dot / norm if norm else 0.0
+    return round(0.6 * coverage + 0.4 * cosine, 3)
+
+
+def fts5_available(conn):
+    global _fts5_available
+    if _fts5_available is None:
+        try:
+            conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts5_probe USING fts5(x)')
+            conn.execute('DROP TABLE temp._fts5_probe')
+            _fts5_available = True
+        except sqlite3.OperationalError:
+            _fts5_available = False
+    return _fts5_available
+
+
+def _install_source(conn, table, source, columns, condition, watched):
+    """Triggers de synchronisation + remplissage initial d'une table source"""
+    code = SOURCES[source]
+    title, body, keywords, language = columns
+    values = f"NEW.id * 4 + {code}, {title}, {body}, {keywords}, {language}"
+    insert = f"INSERT INTO chatbot_search (rowid, title, body, keywords, language) SELECT {values} WHERE {condition};"
+    delete = f"DELETE FROM chatbot_search WHERE rowid = OLD.id * 4 + {code};"
+    prefix = f'chatbot_search_{source}'
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {prefix}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {prefix}_au AFTER UPDATE OF {watched} ON {table} "
+                 f"BEGIN {delete} {insert} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {prefix}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+
+    conn.execute('DELETE FROM chatbot_search WHERE rowid % 4 = ?', (code,))
+    select = values.replace('NEW.', '')
+    conn.execute(f"INSERT INTO chatbot_search (rowid, title, body, keywords, language) "
+                 f"SELECT {select} FROM {table} WHERE {condition.replace('NEW.', '')}")
+
+
+def ensure_index(conn):
+    """
+    Cree l'index et branche les tables sources existantes (kb_articles peut arriver plus tard).
+    Retourne False si FTS5 n'est pas disponible.
+    """
+    if not fts5_available(conn):
+        return False
+    existing = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+    pending = [t for t in _TABLES if t[0] in existing and f'chatbot_search_{t[1]}_ad' not in existing]
+    if 'chatbot_search' in existing and not pending:
+        return True
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS chatbot_search USING fts5(
+            title, body, keywords, language UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+    for spec in pending:
+        _install_source(conn, *spec)
+    return True
+
+
+def _answer_text(source, body):
+    if source == 'kb' and len(body) > 500:
+        return body[:500].rsplit(' ', 1)[0].strip() + '...'
+    return body.strip()
+
+
+def search(conn, message, language='fr', limit=3, sources=None):
+    """
+    Passages les plus proches du message:
+    [{'source', 'id', 'title', 'answer', 'bm25', 'similarity'}], similarite decroissante
+    """
+    stems = terms(message)
+    if not stems:
+        return []
+    hits = []
+    if ensure_index(conn):
+        codes = [SOURCES[s] for s in (sources or SOURCES)]
+        rows = conn.execute(f'''
+            SELECT rowid, title, body, keywords, bm25(chatbot_search, 10.0, 1.0, 5.0) AS score
+            FROM chatbot_search
+            WHERE chatbot_search MATCH ? AND language IN (?, '')
+            AND rowid % 4 IN ({','.join('?' * len(codes))})
+            ORDER BY score LIMIT ?
+        ''', [match_query(stems), language, *codes, limit * 4]).fetchall()
+        for rowid, title, body, keywords, score in rows:
+            source = SOURCE_NAMES[rowid % 4]
+            hits.append({'source': source, 'id': rowid // 4, 'title': title,
+                         'answer': _answer_text(source, body or ''), 'bm25': round(score, 3),
+                         'similarity': similarity(message, title, keywords or '')})
+    else:
+        like = ' OR '.join(['question LIKE ? OR keywords LIKE ?'] * len(stems))
+        params = [language] + [f'%{s}%' for s in stems for _ in range(2)]
+        rows = conn.execute(f'''
+            SELECT id, question, answer, keywords FROM chatbot_faq
+            WHERE language = ? AND is_active = 1 AND ({like})
+            ORDER BY views DESC LIMIT 20
+        ''', params).fetchall()
+        hits = [{'source': 'faq', 'id': r[0], 'title': r[1], 'answer': r[2], 'bm25': None,
+                 'similarity': similarity(message, r[1], r[3] or '')} for r in rows]
+    hits.sort(key=lambda h: -h['similarity'])
+    return hits[:limit]
+
+
+def retrieve(conn, message, language='fr', limit=3):
+    """
+    (reponse_directe, passages): reponse_directe = meilleur passage FAQ/KB assez proche
+    pour repondre sans LLM, sinon None; passages = contexte a injecter dans le prompt
+    """
+    hits = search(conn, message, language, limit)
+    if hits and hits[0]['source'] in ('faq', 'kb') and hits[0]['similarity'] >= DIRECT_ANSWER_THRESHOLD:
+        return hits[0], []
+    return None, [h for h in hits if h['similarity'] >= PASSAGE_MIN_SIMILARITY]
+
+
+def init_answer_log(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS chatbot_answer_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER,
+            source TEXT NOT NULL,
+            ref_id INTEGER,
+            llm_used INTEGER DEFAULT 0,
+            latency_ms REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_chatbot_answer_log_date ON chatbot_answer_log(created_at)')
+
+
+def record_answer(conn, conversation_id, source, latency_ms, ref_id=None):
+    """source: faq | kb | response | canned | llm"""
+    conn.execute('''
+        INSERT INTO chatbot_answer_log (conversation_id, source, ref_id, llm_used, latency_ms)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (conversation_id, source, ref_id, 1 if source == 'llm' else 0, round(latency_ms, 1)))
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    values = sorted(values)
+
+    def pick(p):
+        return values[min(len(values) - 1, int(math.ceil(p * len(values))) - 1)]
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': values[-1]}
+
+
+def answer_stats(conn, start_date, end_date):
+    """Part des reponses sans LLM, repartition par source et distribution des latences (ms)"""
+    rows = conn.execute('''
+        SELECT source, llm_used, latency_ms FROM chatbot_answer_log
+        WHERE DATE(created_at) BETWEEN ? AND ?
+    ''', (start_date, end_date)).fetchall()
+    total = len(rows)
+    without_llm = sum(1 for r in rows if not r[1])
+    return {
+        'total': total,
+        'without_llm': without_llm,
+        'without_llm_rate': round(without_llm / total * 100, 1) if total else 0,
+        'by_source': dict(Counter(r[0] for r in rows)),
+        'latency_ms': {
+            'all': _percentiles([r[2] for r in rows if r[2] is not None]),
+            'without_llm': _percentiles([r[2] for r in rows if r[2] is not None and not r[1]]),
+            'llm': _percentiles([r[2] for r in rows if r[2] is not None and r[1]]),
+        },
+    }
@@ -9,9 +9,13 @@ import json
 import sqlite3
 import subprocess
 import re
+import sys
 from datetime import datetime
 from typing import Dict, List, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import asset_pipeline
+
 SITES = {
     "deneigement": {
         "domain": "deneigement-excellence.ca",
@@ -229,8 +233,7 @@ class FaviconAgent:
             svg_content = self.generate_favicon_svg(site_id)
             if svg_content:
                 if not dry_run:
-                    with open(svg_path, "w") as f:
-                        f.write(svg_content)
+                    asset_pipeline.write_site_file(svg_path, svg_content)
                     subprocess.run(
                         ["sudo", "chown", "www-data:www-data", svg_path],
                         capture_output=True
@@ -330,8 +333,7 @@ class FaviconAgent:
             else:
                 return
 
-            with open(index_path, "w", encoding="utf-8") as f:
-                f.write(html)
+            asset_pipeline.write_site_file(index_path, html)
 
             subprocess.run(["sudo", "chown", "www-data:www-data", index_path], capture_output=True)
             self.log(f"  Favicon link injecte dans {index_path}")
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""
+HTML Rewriter — reecriture HTML en une seule passe, en flux, avec transformations enfichables
+- Lexer incremental (blocs de 64 Ko): balises, commentaires, doctype, blocs <?php ?>, texte;
+  le contenu de <script>/<style> est transmis tel quel, en un seul jeton. Les attributs
+  entre guillemets peuvent contenir '>' sans casser la balise (contrairement aux regex
+  <img(?![^>]*...)).
+- Tout jeton non modifie est recopie a l'identique (octets invalides compris): seules les
+  balises touchees par une transformation sont re-ecrites
+- Transformations (Transform): start_tag / end_tag / head_end (injection avant </head>),
+  text / other (texte, contenu de <script>/<style>, commentaires) pour les minifications
+  LazyLoading, ScriptDefer, Doctype, HeadMeta, HeadInjection, Preconnect, ImageDimensions,
+  AssetReferences
+- rewrite_file(): toutes les transformations en une lecture / une ecriture, fichier
+  temporaire + os.replace (atomique), rien n'est ecrit si rien ne change
+- Chaque modification est gardee (offset, avant, apres): record() la journalise dans
+  html_rewrites, rollback() la defait (refuse si le fichier a change depuis)
+Usage:
+    from html_rewriter import rewrite_file, LazyLoading, Preconnect
+    result = rewrite_file(path, [LazyLoading(), Preconnect()])
+    result.changed, result.changes -> {'lazy_loading': 3, 'preconnect': 1}
+"""
+import io
+import os
+import re
+import json
+import hashlib
+from collections import Counter
+
+CHUNK_SIZE = 64 * 1024
+MAX_TOKEN = 1024 * 1024      # au-dela, un '<' sans fin de balise est traite comme du texte
+RAW_TEXT = ('script', 'style')
+TRACKED = ('head', 'body', 'picture', 'noscript', 'svg', 'template', 'pre', 'textarea')
+ENCODING = dict(encoding='utf-8', errors='surrogateescape', newline='')
+
+_TOKEN = re.compile(r'''
+    (?P<comment><!--.*?-->)
+  | (?P<decl><![^>]*>)
+  | (?P<php><\?.*?\?>)
+  | (?P<end></(?P<end_name>[a-zA-Z][\w:.-]*)\s*>)
+  | (?P<start><(?P<name>[a-zA-Z][\w:.-]*)(?P<attrs>(?:
+        "[^"]*" | '[^']*' | [^'"=>]
+      | =(?=(?P<value>\s*(?:"[^"]*"|'[^']*'|[^\s"'>][^\s>]*)?))(?P=value)
+    )*)>)
+''', re.S | re.X)
+# '=valeur' consomme d'un bloc (lookahead + reference arriere = groupe atomique): une
+# apostrophe dans une valeur non quotee (title=l'eau) n'ouvre pas de chaine, et un
+# guillemet non ferme en debut de valeur fait echouer le jeton (la suite est lue)
+_ATTR = re.compile(r'''([^\s"'>/=]+)(\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>][^\s>]*))?''')
+_RAW_END = {name: re.compile(f'</{name}', re.I) for name in RAW_TEXT}
+
+
+class RewriteError(Exception):
+    pass
+
+
+def _quote(value):
+    return '"' + str(value).replace('"', '&quot;') + '"'
+
+
+class Tag:
+    """Balise ouvrante: lecture des attributs, modifications re-serialisees a la demande"""
+
+    def __init__(self, raw, name, attrs_start):
+        self.raw = raw
+        self.name = name.lower()
+        self.before = ''
+        self.after = ''
+        self.self_closing = raw.endswith('/>')
+        self.removed = False
+        self._attrs = {}                 # nom -> (valeur, debut, fin de '=valeur' dans raw)
+        self._set = {}
+        self._added = []
+        end = len(raw) - (2 if self.self_closing else 1)
+        for m in _ATTR.finditer(raw, attrs_start, end):
+            attr = m.group(1).lower()
+            if attr in self._attrs:
+                continue
+            value = None
+            if m.group(2):
+                value = m.group(2).split('=', 1)[1].strip()
+                if value[:1] in ('"', "'"):
+                    value = value[1:-1]
+            self._attrs[attr] = (value, m.end(1), m.end())
+
+    def has(self, name):
+        return name in self._attrs or name in self._added
+
+    def get(self, name, default=None):
+        if name in self._set:
+            return self._set[name]
+        if name in self._attrs:
+            value = self._attrs[name][0]
+            return '' if value is None else value
+        return default
+
+    def set(self, name, value=None):
+        """value=None: attribut booleen (defer, async)"""
+        self._set[name] = value
+        if name not in self._attrs and name not in self._added:
+            self._added.append(name)
+
+    def remove(self):
+        """Supprime la balise (before/after restent emis)"""
+        self.removed = True
+
+    @property
+    def modified(self):
+        return bool(self._set or self.before or self.after or self.removed)
+
+    def render(self):
+        if self.removed:
+            return self.before + self.after
+        if not self._set:
+            return self.before + self.raw + self.after
+        raw = self.raw
+        existing = sorted((n for n in self._set if n in self._attrs), key=lambda n: -self._attrs[n][1])
+        for attr in existing:
+            _, start, end = self._attrs[attr]
+            value = self._set[attr]
+            raw = raw[:start] + ('' if value is None else '=' + _quote(value)) + raw[end:]
+        if self._added:
+            added = ' '.join(n if self._set[n] is None else f'{n}={_quote(self._set[n])}' for n in self._added)
+            end = len(raw) - (2 if raw.endswith('/>') else 1)
+            head = raw[:end]
+            sep = '' if head.endswith((' ', '\n', '\t')) else ' '
+            raw = f'{head}{sep}{added}{raw[end:]}'
+        return self.before + raw + self.after
+
+
+class EndTag:
+    def __init__(self, raw, name):
+        self.raw = raw
+        self.name = name.lower()
+        self.before = ''
+        self.after = ''
+        self.removed = False
+
+    def remove(self):
+        self.removed = True
+
+    def render(self):
+        return self.before + ('' if self.removed else self.raw) + self.after
+
+
+class Context:
+    """Etat du document pendant la passe (elements ouverts, compteurs par transformation)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.changes = Counter()
+        self.open = Counter()
+        self.seen_doctype = False
+        self.tags_seen = 0
+        self.raw_tag = None          # <script>/<style> ouvert: son contenu arrive en jetons texte
+
+    def inside(self, name):
+        return self.open[name] > 0
+
+    def count(self, name, n=1):
+        self.changes[name] += n
+
+
+class Transform:
+    """Transformation enfichable: surcharger les hooks utiles"""
+    name = 'transform'
+
+    def begin(self, ctx):
+        pass
+
+    def start_tag(self, tag, ctx):
+        pass
+
+    def end_tag(self, tag, ctx):
+        pass
+
+    def head_end(self, ctx):
+        """HTML a inserer juste avant </head>"""
+        return ''
+
+    def text(self, text, ctx):
+        """Texte (ou morceau du contenu de ctx.raw_tag): retourne le texte a emettre"""
+        return text
+
+    def other(self, raw, ctx):
+        """Commentaire, doctype, bloc PHP: retourne le texte a emettre"""
+        return raw
+
+
+class Result:
+    def __init__(self, path=None):
+        self.path = path
+        self.changes = {}
+        self.edits = []          # [(offset dans le nouveau texte, avant, apres)]
+        self.hash_before = None
+        self.hash_after = None
+        self.text = None         # nouveau contenu (rewrite_text seulement)
+        self.written = False
+
+    @property
+    def changed(self):
+        return bool(self.edits)
+
+    def to_dict(self):
+        return {'path': self.path, 'changed': self.changed, 'changes': self.changes,
+                'edits': len(self.edits), 'written': self.written}
+
+
+def _tokens(read):
+    """(type, brut, match) en flux: type = start | end | text | other"""
+    buf, pos, eof, raw_end = '', 0, False, None
+    while True:
+        if pos >= len(buf) or (not eof and len(buf) - pos < 4):
+            chunk = '' if eof else read(CHUNK_SIZE)
+            if chunk:
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            eof = True
+            if pos >= len(buf):
+                return
+        if raw_end is not None:
+            m = raw_end.search(buf, pos)
+            if m is None and not eof and len(buf) - pos < MAX_TOKEN:
+                # Contenu de <script>/<style> emis en un seul jeton (jusqu'a MAX_TOKEN)
+                chunk = read(CHUNK_SIZE)
+                buf, pos = buf[pos:] + chunk, 0
+                eof = not chunk
+                continue
+            if m:
+                if m.start() > pos:
+                    yield 'text', buf[pos:m.start()], None
+                pos, raw_end = m.start(), None
+                continue
+            cut = len(buf) if eof else max(pos, len(buf) - 16)
+            if cut > pos:
+                yield 'text', buf[pos:cut], None
+                pos = cut
+            if not eof:
+                chunk = read(CHUNK_SIZE)
+                buf, pos = buf[pos:] + chunk, 0
+                eof = not chunk
+            continue
+        if buf[pos] != '<':
+            idx = buf.find('<', pos)
+            if idx == -1 and not eof and len(buf) - pos < MAX_TOKEN:
+                # Texte entier jusqu'a la balise suivante (minification independante des blocs)
+                chunk = read(CHUNK_SIZE)
+                buf, pos = buf[pos:] + chunk, 0
+                eof = not chunk
+                continue
+            end = len(buf) if idx == -1 else idx
+            yield 'text', buf[pos:end], None
+            pos = end
+            continue
+        # Commentaire / bloc PHP coupes par la fin du bloc: lire la suite avant de decider
+        if not eof and len(buf) - pos < MAX_TOKEN and (
+                (buf.startswith('<!--', pos) and buf.find('-->', pos + 4) == -1)
+                or (buf.startswith('<?', pos) and buf.find('?>', pos + 2) == -1)):
+            chunk = read(CHUNK_SIZE)
+            buf, pos = buf[pos:] + chunk, 0
+            eof = not chunk
+            continue
+        m = _TOKEN.match(buf, pos)
+        if m is None:
+            if not eof and len(buf) - pos < MAX_TOKEN:
+                chunk = read(CHUNK_SIZE)
+                buf, pos = buf[pos:] + chunk, 0
+                eof = not chunk
+                continue
+            yield 'text', '<', None
+            pos += 1
+            continue
+        if m.group('start'):
+            yield 'start', m.group(0), m
+            name = m.group('name').lower()
+            if name in RAW_TEXT and not m.group(0).endswith('/>'):
+                raw_end = _RAW_END[name]
+        elif m.group('end'):
+            yield 'end', m.group(0), m
+        else:
+            yield 'other', m.group(0), m
+        pos = m.end()
+
+
+def rewrite_stream(read, write, transforms, ctx):
+    """
+    Applique les transformations en une passe: write(texte, modifie) recoit chaque jeton.
+    Retourne la liste des modifications.
+    """
+    for t in transforms:
+        t.begin(ctx)
+    edits, offset = [], 0
+    for kind, raw, m in _tokens(read):
+        out = raw
+        if kind == 'start':
+            tag = Tag(raw, m.group('name'), m.start('attrs') - m.start())
+            for t in transforms:
+                t.start_tag(tag, ctx)
+            if tag.modified:
+                out = tag.render()
+            ctx.tags_seen += 1
+            if tag.name in TRACKED and not tag.self_closing:
+                ctx.open[tag.name] += 1
+            if tag.name in RAW_TEXT and not tag.self_closing:
+                ctx.raw_tag = tag
+        elif kind == 'end':
+            tag = EndTag(raw, m.group('end_name'))
+            if tag.name == 'head':
+                tag.before = ''.join(t.head_end(ctx) for t in transforms)
+            for t in transforms:
+                t.end_tag(tag, ctx)
+            out = tag.render()
+            if ctx.open[tag.name] > 0:
+                ctx.open[tag.name] -= 1
+            if ctx.raw_tag is not None and ctx.raw_tag.name == tag.name:
+                ctx.raw_tag = None
+        elif kind == 'text':
+            for t in transforms:
+                out = t.text(out, ctx)
+        else:
+            if raw[:9].lower() == '<!doctype':
+                ctx.seen_doctype = True
+            for t in transforms:
+                out = t.other(out, ctx)
+        edited = out != raw
+        if edited:
+            edits.append((offset, raw, out))
+        write(out, edited)
+        offset += len(out)
+    return edits
+
+
+class _HashingReader:
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+
+    def read(self, n):
+        chunk = self.f.read(n)
+        self.hash.update(chunk.encode('utf-8', 'surrogateescape'))
+        return chunk
+
+
+class _LazyWriter:
+    """N'ouvre le fichier temporaire qu'a la premiere modification (fichier inchange: aucune ecriture)"""
+
+    def __init__(self, path, dry_run=False):
+        self.path = path
+        self.tmp = f'{path}.rw{os.getpid()}'
+        self.dry_run = dry_run
+        self.pending = []
+        self.f = None
+        self.hash = hashlib.sha256()
+
+    def write(self, text, edited=False):
+        self.hash.update(text.encode('utf-8', 'surrogateescape'))
+        if edited and self.f is None and not self.dry_run:
+            self.open()
+        if self.f is not None:
+            self.f.write(text)
+        else:
+            self.pending.append(text)
+
+    def open(self):
+        if self.f is None:
+            self.f = open(self.tmp, 'w', **ENCODING)
+            self.f.write(''.join(self.pending))
+            self.pending = None
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+
+    def discard(self):
+        self.close()
+        if self.f is not None and os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+def _replace_preserving(tmp, path):
+    """os.replace en gardant mode et proprietaire du fichier d'origine"""
+    try:
+        st = os.stat(path)
+        os.chmod(tmp, st.st_mode & 0o7777)
+        try:
+            os.chown(tmp, st.st_uid, st.st_gid)
+        except (PermissionError, AttributeError):
+            pass
+    except FileNotFoundError:
+        pass
+    os.replace(tmp, path)
+
+
+def write_atomic(path, text):
+    tmp = f'{path}.rw{os.getpid()}'
+    with open(tmp, 'w', **ENCODING) as f:
+        f.write(text)
+    _replace_preserving(tmp, path)
+
+
+def rewrite_text(text, transforms, path=None):
+    """Version memoire: Result avec .text = nouveau contenu (ou None si inchange)"""
+    ctx, out = Context(path), io.StringIO()
+    result = Result(path)
+    result.edits = rewrite_stream(io.StringIO(text).read, lambda chunk, edited: out.write(chunk), transforms, ctx)
+    result.changes = dict(ctx.changes)
+    if result.edits:
+        result.text = out.getvalue()
+        result.hash_before = hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest()
+        result.hash_after = hashlib.sha256(result.text.encode('utf-8', 'surrogateescape')).hexdigest()
+    return result
+
+
+def rewrite_file(path, transforms, dry_run=False):
+    """Une lecture, une ecriture atomique (seulement si quelque chose change)"""
+    ctx, result = Context(path), Result(path)
+    writer = _LazyWriter(path, dry_run)
+    try:
+        with open(path, 'r', **ENCODING) as f:
+            reader = _HashingReader(f)
+            result.edits = rewrite_stream(reader.read, writer.write, transforms, ctx)
+        result.changes = dict(ctx.changes)
+        if not result.edits:
+            return result
+        result.hash_before = reader.hash.hexdigest()
+        result.hash_after = writer.hash.hexdigest()
+        if dry_run:
+            return result
+        writer.close()
+        _replace_preserving(writer.tmp, path)
+        result.written = True
+        return result
+    except BaseException:
+        writer.discard()
+        raise
+
+
+# =========================================
+# JOURNAL + ROLLBACK
+# =========================================
+
+def init_log(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS html_rewrites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL,
+            source TEXT,
+            changes TEXT,
+            edits TEXT NOT NULL,
+            hash_before TEXT,
+            hash_after TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            rolled_back_at TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_html_rewrites_path ON html_rewrites(path, created_at)')
+
+
+def record(conn, result, source=None):
+    """Journalise une reecriture appliquee (dans la transaction de l'appelant). Retourne l'id."""
+    if not result.changed:
+        return None
+    init_log(conn)
+    cursor = conn.execute('''
+        INSERT INTO html_rewrites (path, source, changes, edits, hash_before, hash_after)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (result.path, source, json.dumps(result.changes),
+          json.dumps(result.edits, ensure_ascii=False), result.hash_before, result.hash_after))
+    return cursor.lastrowid
+
+
+def rollback(conn, rewrite_id):
+    """Defait une reecriture: le fichier doit etre exactement celui produit par la reecriture"""
+    row = conn.execute('SELECT path, edits, hash_before, hash_after, rolled_back_at FROM html_rewrites WHERE id = ?',
+                       (rewrite_id,)).fetchone()
+    if not row:
+        raise RewriteError(f'Reecriture inconnue: {rewrite_id}')
+    path, edits, hash_before, hash_after, rolled_back_at = row
+    if rolled_back_at:
+        raise RewriteError(f'Deja annulee le {rolled_back_at}')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if hashlib.sha256(raw).hexdigest() != hash_after:
+        raise RewriteError(f'{path} a change depuis la reecriture {rewrite_id}')
+    edits = json.loads(edits)
+    text = raw.decode('utf-8', 'surrogateescape')
+    for offset, old, new in reversed(edits):
+        if text[offset:offset + len(new)] != new:
+            raise RewriteError(f"Modification introuvable a l'offset {offset}")
+        text = text[:offset] + old + text[offset + len(new):]
+    if hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest() != hash_before:
+        raise RewriteError("Contenu restaure different de l'original")
+    write_atomic(path, text)
+    # Copies .gz/.br servies par gzip_static: regenerees depuis le contenu restaure
+    # (import local: asset_pipeline importe ce module)
+    import asset_pipeline
+    asset_pipeline.refresh_compressed(path)
+    conn.execute("UPDATE html_rewrites SET rolled_back_at = datetime('now') WHERE id = ?", (rewrite_id,))
+    return {'id': rewrite_id, 'path': path, 'edits': len(edits)}
+
+
+# =========================================
+# TRANSFORMATIONS
+# =========================================
+
+class LazyLoading(Transform):
+    """loading="lazy" sur les images (et iframes) qui n'ont pas d'attribut loading"""
+    name = 'lazy_loading'
+
+    def __init__(self, tags=('img',)):
+        self.tags = tags
+
+    def start_tag(self, tag, ctx):
+        if tag.name in self.tags and not tag.has('loading') and (tag.has('src') or tag.has('data-src')):
+            tag.set('loading', 'lazy')
+            ctx.count(self.name)
+
+
+class ScriptDefer(Transform):
+    """defer sur les scripts externes bloquants (ni defer, ni async, ni module)"""
+    name = 'script_defer'
+
+    def start_tag(self, tag, ctx):
+        if (tag.name == 'script' and tag.has('src') and not tag.has('defer') and not tag.has('async')
+                and tag.get('type', '').lower() != 'module'):
+            tag.set('defer')
+            ctx.count(self.name)
+
+
+class Doctype(Transform):
+    """<!DOCTYPE html> devant <html> quand le document n'en a pas"""
+    name = 'doctype'
+
+    def start_tag(self, tag, ctx):
+        if tag.name == 'html' and not ctx.seen_doctype and ctx.tags_seen == 0:
+            tag.before = '<!DOCTYPE html>\n' + tag.before
+            ctx.count(self.name)
+
+
+class HeadMeta(Transform):
+    """Meta charset / viewport / description manquants, inseres avant </head>"""
+    name = 'head_meta'
+    VIEWPORT = '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+
+    def __init__(self, charset=True, viewport=True, description=None, indent='    '):
+        self.charset = charset
+        self.viewport = viewport
+        self.description = description
+        self.indent = indent
+        self.seen = set()
+
+    def begin(self, ctx):
+        self.seen = set()
+
+    def start_tag(self, tag, ctx):
+        if tag.name != 'meta':
+            return
+        if tag.has('charset') or tag.get('http-equiv', '').lower() == 'content-type':
+            self.seen.add('charset')
+        name = tag.get('name', '').lower()
+        if name in ('viewport', 'description'):
+            self.seen.add(name)
+
+    def head_end(self, ctx):
+        html = ''
+        if self.description is not None and 'description' not in self.seen:
+            html += f'{self.indent}<meta name="description" content={_quote(self.description)}>\n'
+            ctx.count('meta_description')
+        if self.charset and 'charset' not in self.seen:
+            html += f'{self.indent}<meta charset="UTF-8">\n'
+            ctx.count('charset')
+        if self.viewport and 'viewport' not in self.seen:
+            html += f'{self.indent}{self.VIEWPORT}\n'
+            ctx.count('viewport')
+        return html
+
+
+class HeadInjection(Transform):
+    """Bloc HTML arbitraire avant </head> (ex: JSON-LD)"""
+
+    def __init__(self, name, html):
+        self.name = name
+        self.html = html
+
+    def head_end(self, ctx):
+        ctx.count(self.name)
+        return self.html
+
+
+class Preconnect(Transform):
+    """<link rel="preconnect"> devant la premiere ressource d'une origine connue"""
+    name = 'preconnect'
+    GOOGLE_FONTS = {'https://fonts.googleapis.com': ('https://fonts.googleapis.com', 'https://fonts.gstatic.com')}
+
+    def __init__(self, origins=None, indent='    '):
+        self.origins = origins or self.GOOGLE_FONTS
+        self.indent = indent
+        self.done = set()
+
+    def begin(self, ctx):
+        self.done = set()
+
+    def start_tag(self, tag, ctx):
+        if tag.name != 'link':
+            return
+        href = tag.get('href', '')
+        if 'preconnect' in tag.get('rel', '').lower():
+            self.done.update(t for t, hosts in self.origins.items() if href.rstrip('/') in hosts)
+            return
+        for trigger, hosts in self.origins.items():
+            if href.startswith(trigger) and trigger not in self.done:
+                self.done.add(trigger)
+                tag.before += ''.join(
+                    f'<link rel="preconnect" href="{h}"{" crossorigin" if h != trigger else ""}>\n{self.indent}'
+                    for h in hosts)
+                ctx.count(self.name)
+
+
+def local_path(base_dir, html_path, url):
+    """Chemin disque d'une URL locale (src, href) ou None (URL externe, data:)"""
+    url = url.split('?')[0].split('#')[0].strip()
+    if not url or url.startswith(('http://', 'https://', '//', 'data:', 'mailto:', 'tel:')):
+        return None
+    if url.startswith('/'):
+        return os.path.normpath(os.path.join(base_dir, url.lstrip('/')))
+    return os.path.normpath(os.path.join(os.path.dirname(html_path), url))
+
+
+class ImageDimensions(Transform):
+    """width/height sur les <img> qui n'en ont pas (CLS): size(src, ctx) -> (w, h) ou None"""
+    name = 'image_dimensions'
+
+    def __init__(self, size):
+        self.size = size
+
+    def start_tag(self, tag, ctx):
+        if tag.name != 'img' or tag.has('width') or tag.has('height') or not tag.get('src'):
+            return
+        style = tag.get('style', '').lower()
+        if 'width' in style or 'height' in style:
+            return
+        dims = self.size(tag.get('src'), ctx)
+        if dims:
+            tag.set('width', str(dims[0]))
+            tag.set('height', str(dims[1]))
+            ctx.count(self.name)
+
+
+class AssetReferences(Transform):
+    """Reecrit les URLs d'assets: rewrite(url, tag, ctx) -> nouvelle URL ou None"""
+    name = 'asset_references'
+
+    def __init__(self, rewrite, attrs=('src', 'srcset', 'href', 'poster', 'data-src')):
+        self.rewrite = rewrite
+        self.attrs = attrs
+
+    def start_tag(self, tag, ctx):
+        for attr in self.attrs:
+            value = tag.get(attr)
+            if not value:
+                continue
+            if attr == 'srcset':
+                parts = []
+                for item in value.split(','):
+                    bits = item.strip().split(None, 1)
+                    if bits:
+                        new = self.rewrite(bits[0], tag, ctx) or bits[0]
+                        parts.append(' '.join([new] + bits[1:]))
+                new_value = ', '.join(parts)
+            else:
+                new_value = self.rewrite(value, tag, ctx) or value
+            if new_value != value:
+                tag.set(attr, new_value)
+                ctx.count(self.name)
@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+"""
+Job Queue — file de travaux persistante (SQLite) pour les endpoints longs
+- enqueue() retourne immediatement un id; les workers executent le travail
+- deduplication: une requete identique deja en file/en cours renvoie le meme job
+- annulation (immediate si en file; en cours: le heartbeat passe le job en cancelling,
+  job.progress() l'interrompt au prochain appel et son resultat est ignore)
+- delai (timeout du type) verifie de la meme facon par le heartbeat (timing_out)
+- limite de concurrence par type de job, verifiee dans la transaction de reservation;
+  un job cancelling / timing_out compte tant que son handler tourne
+- bail renouvele par un heartbeat: un job d'un worker mort est remis en file
+Workers:
+    python3 job_queue.py worker [--threads 4] [--types full_audit,keyword_cluster]
+    ou embarques dans l'API (SEO_JOBS_EMBEDDED=1 par defaut, 0 si workers dedies)
+API:
+    GET  /api/jobs/<id>          statut, progression, resultat
+    POST /api/jobs/<id>/cancel
+    GET  /api/jobs?status=&type=
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+DB_PATH = '/opt/seo-agent/db/seo_agent.db'
+
+LEASE_SECONDS = 90        # bail d'un job en cours, renouvele par le heartbeat
+HEARTBEAT_SECONDS = 20
+MAX_ATTEMPTS = 2          # un job dont le worker meurt est relance une fois
+ENQUEUE_ATTEMPTS = 3      # course dedup: le job identique se termine entre l'INSERT et le SELECT
+POLL_SECONDS = 1.0
+EMBEDDED_THREADS = 2
+
+JOB_TYPES = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobError(Exception):
+    """Echec metier: le message est renvoye tel quel dans job.error"""
+    pass
+
+
+def job_type(name, concurrency=1, timeout=900):
+    """Enregistre un handler: fn(job) -> resultat JSON-serialisable"""
+    def decorator(fn):
+        JOB_TYPES[name] = {'handler': fn, 'concurrency': concurrency, 'timeout': timeout}
+        return fn
+    return decorator
+
+
+def get_db():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+_db_ready = False
+
+
+def init_db():
+    global _db_ready
+    if _db_ready:
+        return
+    conn = get_db()
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                payload TEXT,
+                dedup_key TEXT,
+                status TEXT DEFAULT 'queued',
+                priority INTEGER DEFAULT 0,
+                progress REAL DEFAULT 0,
+                progress_message TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                cancel_requested INTEGER DEFAULT 0,
+                worker_id TEXT,
+                lease_expires TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, job_type, priority, created_at)")
+        # Un seul job en vol par requete identique
+        conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs(dedup_key)
+            WHERE status IN ('queued', 'running')
+        ''')
+        conn.commit()
+        _db_ready = True
+    finally:
+        conn.close()
+
+
+def _dedup_key(name, payload):
+    raw = json.dumps([name, payload], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _row_to_job(row):
+    job = dict(row)
+    for key in ('payload', 'result'):
+        if job.get(key):
+            try:
+                job[key] = json.loads(job[key])
+            except ValueError:
+                pass
+    job.pop('dedup_key', None)
+    job['cancel_requested'] = bool(job.get('cancel_requested'))
+    job['done'] = job['status'] in ('succeeded', 'failed', 'cancelled')
+    return job
+
+
+def enqueue(name, payload=None, dedup=True, priority=0):
+    """
+    Ajoute un job. Retourne (job, created): si une requete identique est deja
+    en file ou en cours, le job existant est renvoye avec created=False.
+    """
+    if name not in JOB_TYPES:
+        raise KeyError(f"Type de job inconnu: {name}")
+    init_db()
+    payload = payload or {}
+    key = _dedup_key(name, payload) if dedup else None
+    job_id = uuid.uuid4().hex
+    conn = get_db()
+    try:
+        for attempt in range(ENQUEUE_ATTEMPTS):
+            try:
+                with conn:
+                    conn.execute('''
+                        INSERT INTO jobs (id, job_type, payload, dedup_key, priority)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (job_id, name, json.dumps(payload, default=str), key, priority))
+                created = True
+                break
+            except sqlite3.IntegrityError:
+                row = conn.execute('''
+                    SELECT id FROM jobs WHERE dedup_key = ? AND status IN ('queued', 'running')
+                ''', (key,)).fetchone()
+                if row is not None:
+                    job_id, created = row['id'], False
+                    break
+                # Le job identique vient de se terminer: on recree
+                if attempt == ENQUEUE_ATTEMPTS - 1:
+                    raise
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return _row_to_job(row), created
+    finally:
+        conn.close()
+
+
+def get_job(job_id):
+    init_db()
+    conn = get_db()
+    try:
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+    finally:
+        conn.close()
+
+
+def list_jobs(status=None, name=None, limit=50):
+    init_db()
+    query = 'SELECT * FROM jobs WHERE 1=1'
+    params = []
+    if status:
+        query += ' AND status = ?'
+        params.append(status)
+    if name:
+        query += ' AND job_type = ?'
+        params.append(name)
+    query += ' ORDER BY created_at DESC LIMIT ?'
+    params.append(int(limit))
+    conn = get_db()
+    try:
+        jobs = [_row_to_job(r) for r in conn.execute(query, params).fetchall()]
+    finally:
+        conn.close()
+    for job in jobs:
+        job.pop('result', None)   # liste legere; le resultat via get_job
+    return jobs
+
+
+def cancel(job_id):
+    """En file: annule tout de suite. En cours: demande d'annulation (prise en compte au prochain heartbeat)."""
+    init_db()
+    conn = get_db()
+    try:
+        with conn:
+            conn.execute('''
+                UPDATE jobs SET status = 'cancelled', finished_at = datetime('now'), dedup_key = NULL
+                WHERE id = ? AND status = 'queued'
+            ''', (job_id,))
+            conn.execute('''
+                UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'
+            ''', (job_id,))
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+    finally:
+        conn.close()
+
+
+def claim(worker_id, names=None):
+    """
+    Reserve le prochain job executable en une transaction IMMEDIATE:
+    les baux expires sont recycles, puis seuls les types sous leur limite de
+    concurrence sont eligibles. Retourne la ligne reservee ou None.
+    """
+    names = [n for n in (names or JOB_TYPES) if n in JOB_TYPES]
+    if not names:
+        return None
+    init_db()
+    conn = get_db()
+    try:
+        conn.isolation_level = None
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('''
+                UPDATE jobs SET
+                    status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                    error = CASE WHEN attempts >= ? THEN 'Worker arrete pendant le traitement' ELSE error END,
+                    finished_at = CASE WHEN attempts >= ? THEN datetime('now') ELSE NULL END,
+                    dedup_key = CASE WHEN attempts >= ? THEN NULL ELSE dedup_key END,
+                    worker_id = NULL
+                WHERE status = 'running' AND lease_expires < datetime('now')
+            ''', (MAX_ATTEMPTS,) * 4)
+            # Worker mort pendant l'arret d'un job: l'arret est acquis
+            conn.execute('''
+                UPDATE jobs SET
+                    status = CASE status WHEN 'cancelling' THEN 'cancelled' ELSE 'failed' END,
+                    finished_at = datetime('now'), lease_expires = NULL, worker_id = NULL
+                WHERE status IN ('cancelling', 'timing_out') AND lease_expires < datetime('now')
+            ''')
+            # Un job en cours d'arret occupe encore son slot: son handler tourne toujours
+            running = dict(conn.execute('''
+                SELECT job_type, COUNT(*) FROM jobs WHERE status IN ('running', 'cancelling', 'timing_out')
+                GROUP BY job_type
+            ''').fetchall())
+            eligible = [n for n in names if running.get(n, 0) < JOB_TYPES[n]['concurrency']]
+            row = None
+            if eligible:
+                placeholders = ','.join('?' * len(eligible))
+                row = conn.execute(f'''
+                    UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1,
+                        lease_expires = datetime('now', ?), started_at = datetime('now')
+                    WHERE id = (
+                        SELECT id FROM jobs WHERE status = 'queued' AND job_type IN ({placeholders})
+                        ORDER BY priority DESC, created_at ASC LIMIT 1
+                    )
+                    RETURNING id, job_type, payload, attempts
+                ''', [worker_id, f'+{LEASE_SECONDS} seconds'] + eligible).fetchone()
+            conn.execute('COMMIT')
+            return row
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+
+
+def _finish(job_id, worker_id, status, result=None, error=None):
+    """
+    Ecrit l'issue du job (seulement si le bail est encore a ce worker).
+    Un job arrete par le heartbeat (cancelling / timing_out) garde l'issue de l'arret.
+    """
+    conn = get_db()
+    try:
+        with conn:
+            conn.execute('''
+                UPDATE jobs SET status = ?, result = ?, error = ?, progress = CASE WHEN ? = 'succeeded' THEN 100 ELSE progress END,
+                    finished_at = datetime('now'), lease_expires = NULL, dedup_key = NULL
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            ''', (status, json.dumps(result, default=str) if result is not None else None, error,
+                  status, job_id, worker_id))
+            conn.execute('''
+                UPDATE jobs SET status = CASE status WHEN 'cancelling' THEN 'cancelled' ELSE 'failed' END,
+                    finished_at = datetime('now'), lease_expires = NULL
+                WHERE id = ? AND worker_id = ? AND status IN ('cancelling', 'timing_out')
+            ''', (job_id, worker_id))
+    finally:
+        conn.close()
+
+
+def _stopping(job_id, worker_id, status, error):
+    """Arret decide par le heartbeat: visible tout de suite, slot garde jusqu'a la fin du handler"""
+    conn = get_db()
+    try:
+        with conn:
+            conn.execute('''
+                UPDATE jobs SET status = ?, error = ?, dedup_key = NULL
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            ''', (status, error, job_id, worker_id))
+    finally:
+        conn.close()
+
+
+class JobContext:
+    """Passe au handler: payload + progress() qui renouvelle le bail et verifie l'annulation"""
+
+    def __init__(self, row, worker_id):
+        self.id = row['id']
+        self.type = row['job_type']
+        self.payload = json.loads(row['payload'] or '{}')
+        self.attempt = row['attempts']
+        self.worker_id = worker_id
+        self.timeout = JOB_TYPES[self.type]['timeout']
+        self.started = time.monotonic()
+        self.stopped = None     # exception posee par le heartbeat (annulation, delai)
+
+    def timed_out(self):
+        return time.monotonic() - self.started > self.timeout
+
+    def progress(self, percent, message=None):
+        """Met a jour la progression; leve JobCancelled si une annulation a ete demandee"""
+        if self.stopped is not None:
+            raise self.stopped
+        conn = get_db()
+        try:
+            with conn:
+                row = conn.execute('''
+                    UPDATE jobs SET progress = ?, progress_message = COALESCE(?, progress_message),
+                        lease_expires = datetime('now', ?)
+                    WHERE id = ? AND worker_id = ?
+                    RETURNING cancel_requested
+                ''', (float(percent), message, f'+{LEASE_SECONDS} seconds', self.id, self.worker_id)).fetchone()
+        finally:
+            conn.close()
+        if row is None or row['cancel_requested']:
+            raise JobCancelled()
+        if self.timed_out():
+            raise JobError(f'Delai depasse ({self.timeout}s)')
+
+
+class Worker:
+    """
+    Pool de threads qui reservent et executent les jobs. Le heartbeat renouvelle les baux
+    et arrete les jobs annules ou hors delai sans attendre leur prochain job.progress():
+    statut cancelling / timing_out tout de suite, slot de concurrence garde tant que le
+    handler tourne; a sa fin, _finish ecrit cancelled / failed et ignore son resultat.
+    """
+
+    def __init__(self, threads=4, names=None):
+        self.threads = threads
+        self.names = names
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._stop = threading.Event()
+        self._running = {}
+        self._running_lock = threading.Lock()
+        self._threads = []
+
+    def run_one(self):
+        """Reserve et execute un job; False si rien a faire"""
+        row = claim(self.worker_id, self.names)
+        if row is None:
+            return False
+        job = JobContext(row, self.worker_id)
+        with self._running_lock:
+            self._running[job.id] = job
+        try:
+            result = JOB_TYPES[job.type]['handler'](job)
+            _finish(job.id, self.worker_id, 'succeeded', result=result)
+        except JobCancelled:
+            _finish(job.id, self.worker_id, 'cancelled', error='Annule')
+        except JobError as e:
+            _finish(job.id, self.worker_id, 'failed', error=str(e))
+        except Exception as e:
+            _finish(job.id, self.worker_id, 'failed', error=f'{type(e).__name__}: {e}')
+        finally:
+            with self._running_lock:
+                self._running.pop(job.id, None)
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if not self.run_one():
+                    self._stop.wait(POLL_SECONDS)
+            except sqlite3.Error as e:
+                print(f'[JOBS] Erreur DB: {e}')
+                self._stop.wait(POLL_SECONDS * 5)
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            with self._running_lock:
+                jobs = list(self._running.values())
+            if jobs:
+                self._beat(jobs)
+
+    def _beat(self, jobs):
+        """
+        Renouvelle les baux (y compris des jobs en cours d'arret: leur handler tourne encore);
+        passe en cancelling / timing_out les jobs annules ou hors delai
+        """
+        stopped = []
+        try:
+            conn = get_db()
+            try:
+                with conn:
+                    for job in jobs:
+                        row = conn.execute('''
+                            UPDATE jobs SET lease_expires = datetime('now', ?)
+                            WHERE id = ? AND worker_id = ? AND status IN ('running', 'cancelling', 'timing_out')
+                            RETURNING status, cancel_requested
+                        ''', (f'+{LEASE_SECONDS} seconds', job.id, self.worker_id)).fetchone()
+                        if job.stopped is not None:
+                            continue
+                        if row is None:
+                            job.stopped = JobCancelled()      # bail perdu: le job n'est plus a ce worker
+                        elif job.timed_out():
+                            stopped.append((job, 'timing_out', JobError(f'Delai depasse ({job.timeout}s)')))
+                        elif row['cancel_requested']:
+                            stopped.append((job, 'cancelling', JobCancelled()))
+            finally:
+                conn.close()
+            for job, status, exc in stopped:
+                job.stopped = exc
+                _stopping(job.id, self.worker_id, status, str(exc) if status == 'timing_out' else 'Annule')
+        except sqlite3.Error as e:
+            print(f'[JOBS] Heartbeat: {e}')
+
+    def start(self):
+        init_db()
+        self._threads = [threading.Thread(target=self._loop, daemon=True, name=f'job-worker-{i}')
+                         for i in range(self.threads)]
+        self._threads.append(threading.Thread(target=self._heartbeat, daemon=True, name='job-heartbeat'))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+
+
+# ============================================================
+# HANDLERS
+# ============================================================
+@job_type('full_audit', concurrency=1, timeout=900)
+def _full_audit(job):
+    from agents_system import MasterOrchestrator
+    return MasterOrchestrator().run_full_audit(int(job.payload.get('site_id', 1)), progress=job.progress)
+
+
+@job_type('client_onboarding', concurrency=2, timeout=1800)
+def _client_onboarding(job):
+    from agent_registry import get_agent
+    job.progress(5, 'Onboarding en cours')
+    return get_agent('ClientOnboardingAgent').onboard_new_client(job.payload)
+
+
+@job_type('white_label_report', concurrency=2, timeout=1200)
+def _white_label_report(job):
+    from agent_registry import get_agent
+    job.progress(5, 'Generation du rapport')
+    report = get_agent('WhiteLabelReportAgent').generate_monthly_report(
+        int(job.payload.get('client_id', 1)), job.payload.get('branding'))
+    if 'error' in report:
+        raise JobError(report['error'])
+    # Ne pas stocker le HTML complet dans le resultat (trop gros)
+    return {
+        'report': {key: report.get(key) for key in (
+            'report_id', 'generated_at', 'period', 'client', 'executive_summary',
+            'analysis', 'recommendations', 'next_steps')},
+        'html_url': f"/api/agent/report/{report['report_id']}/html",
+    }
+
+
+def _save_reports(conn, rows, owner='site_id', report_type='monthly'):
+    """
+    rows: [(id, rapport)] -> ids des lignes inserees dans reports.
+    owner='client_id': rapports clients du lot (site_id NULL, type client_monthly)
+    """
+    if owner == 'client_id':
+        try:
+            conn.execute("ALTER TABLE reports ADD COLUMN client_id TEXT")
+        except sqlite3.OperationalError:
+            pass
+    ids = []
+    period = datetime.now().strftime("%Y-%m")
+    with conn:
+        for owner_id, report in rows:
+            cursor = conn.execute(
+                f"INSERT INTO reports ({owner}, report_type, period, html_content, metrics_json, created_at) VALUES (?,?,?,?,?,datetime('now'))",
+                (owner_id, report_type, period, str(report.get("html_report", ""))[:50000],
+                 json.dumps(report.get("metrics", {}))))
+            ids.append(cursor.lastrowid)
+    return ids
+
+
+@job_type('report_builder', concurrency=2, timeout=1200)
+def _report_builder(job):
+    from agent_registry import get_agent
+    site_id = job.payload.get('site_id', '1')
+    job.progress(5, 'Generation du rapport')
+    result = get_agent('WhiteLabelReportAgent').generate_monthly_report(site_id, job.payload.get('branding'))
+    job.progress(90, 'Enregistrement')
+    conn = get_db()
+    try:
+        result['id'] = _save_reports(conn, [(site_id, result)])[0]
+    finally:
+        conn.close()
+    return result
+
+
+@job_type('white_label_batch', concurrency=1, timeout=3600)
+def _white_label_batch(job):
+    """Rapports de tous les clients (ou payload.client_ids); progression par rapport termine"""
+    from agent_registry import get_agent
+    job.progress(1, 'Preparation du lot')
+    batch = get_agent('WhiteLabelReportAgent').generate_batch_reports(
+        job.payload.get('client_ids'), job.payload.get('branding'),
+        refresh=bool(job.payload.get('refresh')), save_pdf=bool(job.payload.get('pdf')),
+        progress=lambda percent, message: job.progress(min(percent, 99), message))
+    generated = [entry for entry in batch['reports'] if not entry.get('error')]
+    conn = get_db()
+    try:
+        ids = _save_reports(conn, [(entry['client_id'], entry.pop('report')) for entry in generated],
+                           owner='client_id', report_type='client_monthly')
+    finally:
+        conn.close()
+    for entry, row_id in zip(generated, ids):
+        entry['id'] = row_id
+    return batch
+
+
+@job_type('seo_crawl', concurrency=2, timeout=900)
+def _seo_crawl(job):
+    import seo_scanner_api
+    return seo_scanner_api.run_crawl_job(job)
+
+
+@job_type('keyword_cluster', concurrency=1, timeout=900)
+def _keyword_cluster(job):
+    from agent_registry import get_agent
+    job.progress(5, 'Clustering des mots-cles')
+    return get_agent('KeywordClusterAgent').cluster_keywords(job.payload.get('site_id', '1'))
+
+
+# ============================================================
+# FLASK
+# ============================================================
+_embedded = None
+
+
+def _start_embedded_worker():
+    global _embedded
+    if os.environ.get('SEO_JOBS_EMBEDDED', '1') == '0':
+        return
+    if _embedded is None:
+        _embedded = Worker(threads=int(os.environ.get('SEO_JOBS_THREADS', EMBEDDED_THREADS))).start()
+
+
+def _after_fork_in_child():
+    # Les threads ne survivent pas au fork (gunicorn --preload): chaque worker relance les siens
+    global _embedded
+    if _embedded is not None:
+        _embedded = None
+        _start_embedded_worker()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def submit(name, payload, status_code=202):
+    """Reponse Flask standard d'un endpoint asynchrone"""
+    from flask import jsonify
+    job, created = enqueue(name, payload)
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'deduplicated': not created,
+        'status_url': f"/api/jobs/{job['id']}",
+    }), status_code
+
+
+def register_job_routes(app):
+    """Routes /api/jobs + worker embarque (sauf SEO_JOBS_EMBEDDED=0)"""
+    from flask import request, jsonify
+
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def job_status(job_id):
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job non trouve'}), 404
+        return jsonify({'success': True, 'job': job})
+
+    @app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+    def job_cancel(job_id):
+        job = cancel(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job non trouve'}), 404
+        return jsonify({'success': True, 'job': job})
+
+    @app.route('/api/jobs', methods=['GET'])
+    def jobs_list():
+        jobs = list_jobs(request.args.get('status'), request.args.get('type'),
+                         min(int(request.args.get('limit', 50)), 500))
+        return jsonify({'success': True, 'jobs': jobs, 'count': len(jobs)})
+
+    try:
+        init_db()
+        _start_embedded_worker()
+    except sqlite3.Error as e:
+        print(f'[JOBS] Worker embarque non demarre: {e}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='File de jobs SEO Agent')
+    sub = parser.add_subparsers(dest='command', required=True)
+    w = sub.add_parser('worker', help='Executer les jobs')
+    w.add_argument('--threads', type=int, default=4)
+    w.add_argument('--types', help='Types de jobs (separes par des virgules)')
+    ls = sub.add_parser('list', help='Derniers jobs')
+    ls.add_argument('--status')
+    c = sub.add_parser('cancel')
+    c.add_argument('job_id')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if args.command == 'worker':
+        names = args.types.split(',') if args.types else None
+        worker = Worker(args.threads, names).start()
+        print(f"[JOBS] Worker {worker.worker_id}: {args.threads} threads, types: {', '.join(names or JOB_TYPES)}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            worker.stop(timeout=5)
+    elif args.command == 'list':
+        for job in list_jobs(args.status):
+            print(f"{job['id']}  {job['job_type']:<20} {job['status']:<10} {job['progress']:5.0f}%  {job['created_at']}")
+    elif args.command == 'cancel':
+        print(json.dumps(cancel(args.job_id), indent=2, default=str))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+LLM Stream — generation au fil de l'eau + Server-Sent Events
+- stream_chat(): API compatible OpenAI (Groq, Fireworks) avec 'stream': true (SSE)
+- stream_ollama_generate(): Ollama /api/generate en NDJSON
+- strip_think(): retire les blocs <think>...</think> (DeepSeek R1) meme coupes entre deux chunks
+- first_available(): fournisseur suivant si le precedent echoue avant le premier token
+- sse_response(): reponse Flask text/event-stream; on_complete(texte) persiste le resultat final
+Client (fetch, POST): lire response.body par morceaux, evenements 'data: {"delta": ...}'
+puis 'event: done' (ou 'event: error').
+"""
+import json
+import requests
+
+CONNECT_TIMEOUT = 10
+
+
+class LLMStreamError(Exception):
+    pass
+
+
+def iter_lines(response):
+    """Lignes decodees en UTF-8 (iter_lines(decode_unicode) rend des bytes sans charset)"""
+    for line in response.iter_lines():
+        yield line.decode('utf-8', errors='replace')
+
+
+def iter_sse_data(response):
+    """Objets JSON des lignes 'data: ...' d'un flux SSE, jusqu'a [DONE]"""
+    for line in iter_lines(response):
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def stream_chat(url, api_key, model, messages, max_tokens=1000, temperature=0.7, timeout=120):
+    """Texte genere (deltas) d'une API chat/completions compatible OpenAI"""
+    headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {api_key}',
+               'Accept': 'text/event-stream'}
+    payload = {'model': model, 'messages': messages, 'max_tokens': max_tokens,
+               'temperature': temperature, 'stream': True}
+    with requests.post(url, headers=headers, json=payload, stream=True,
+                       timeout=(CONNECT_TIMEOUT, timeout)) as response:
+        if response.status_code != 200:
+            raise LLMStreamError(f'{url}: HTTP {response.status_code}')
+        for event in iter_sse_data(response):
+            choices = event.get('choices') or [{}]
+            delta = choices[0].get('delta', {}).get('content')
+            if delta:
+                yield delta
+
+
+def stream_ollama_generate(url, model, prompt, max_tokens=1000, temperature=0.7, timeout=90):
+    """Texte genere par Ollama (/api/generate, une ligne JSON par token)"""
+    payload = {'model': model, 'prompt': prompt, 'stream': True,
+               'options': {'num_predict': max_tokens, 'temperature': temperature}}
+    with requests.post(url, json=payload, stream=True, timeout=(CONNECT_TIMEOUT, timeout)) as response:
+        if response.status_code != 200:
+            raise LLMStreamError(f'{url}: HTTP {response.status_code}')
+        for line in iter_lines(response):
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get('error'):
+                raise LLMStreamError(event['error'])
+            if event.get('response'):
+                yield event['response']
+            if event.get('done'):
+                return
+
+
+def first_available(*factories, label='LLM'):
+    """
+    Essaie chaque fabrique de flux dans l'ordre. On ne bascule sur la suivante
+    que si la precedente echoue (ou ne produit rien) avant le premier token;
+    une erreur apres le debut du texte interrompt le flux.
+    """
+    for factory in factories:
+        started = False
+        try:
+            for chunk in factory():
+                started = True
+                yield chunk
+        except Exception as e:
+            if started:
+                raise
+            print(f"[{label}] stream indisponible: {e}")
+            continue
+        if started:
+            return
+
+
+def strip_think(chunks, open_tag='<think>', close_tag='</think>'):
+    """Filtre les blocs <think>...</think> d'un flux de texte (balises eventuellement coupees)"""
+    buffer = ''
+    thinking = False
+    for chunk in chunks:
+        buffer += chunk
+        out = []
+        while buffer:
+            tag = close_tag if thinking else open_tag
+            idx = buffer.find(tag)
+            if idx >= 0:
+                if not thinking:
+                    out.append(buffer[:idx])
+                buffer = buffer[idx + len(tag):]
+                thinking = not thinking
+                continue
+            # Garder en reserve un debut de balise possible en fin de buffer
+            keep = 0
+            for n in range(min(len(tag) - 1, len(buffer)), 0, -1):
+                if tag.startswith(buffer[-n:]):
+                    keep = n
+                    break
+            if not thinking:
+                out.append(buffer[:len(buffer) - keep])
+            buffer = buffer[len(buffer) - keep:]
+            break
+        text = ''.join(out)
+        if text:
+            yield text
+    if buffer and not thinking:
+        yield buffer
+
+
+def _event(payload, event=None):
+    head = f'event: {event}\n' if event else ''
+    return f'{head}data: {json.dumps(payload, ensure_ascii=False)}\n\n'
+
+
+def sse_response(chunks, on_complete=None):
+    """
+    Reponse Flask SSE: un evenement par delta, puis 'done' avec le resultat de
+    on_complete(texte_complet) (persistance) ou 'error'.
+    """
+    from flask import Response, stream_with_context
+
+    def generate():
+        parts = []
+        yield ': stream\n\n'   # envoie les en-tetes tout de suite
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield _event({'delta': chunk})
+            extra = on_complete(''.join(parts)) if on_complete else None
+            yield _event(dict(extra or {}, done=True), 'done')
+        except Exception as e:
+            yield _event({'error': str(e)}, 'error')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',   # nginx: ne pas bufferiser le flux
+    })
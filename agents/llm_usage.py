@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+LLM Usage — comptabilite tokens/couts/latences de chaque appel LLM + budgets par agent
+- record(): une ligne par appel logique (agent, fournisseur, modele, tokens prompt/completion,
+  latence, statut, chemin de repli 'groq>fireworks', cache_hit), ecrite par lots
+  (file en memoire videe toutes les 2 s par un thread, comme seoai_analytics)
+- current_agent(): agent appelant (agent_scope() explicite, sinon premier 'self' *Agent de la pile)
+- Budgets: tokens/jour par agent (table llm_budgets, agent '*' = defaut), verifies AVANT
+  l'appel; seuls les fournisseurs distants (Groq, Fireworks) comptent, Ollama est gratuit
+- Tokens: bloc 'usage' de Groq/Fireworks, prompt_eval_count/eval_count d'Ollama;
+  sinon estimation (~4 caracteres/token, colonne estimated=1), ex: flux SSE
+- Cout: prix catalogue USD par million de tokens (PRICES), estimation
+Routes:
+    GET  /api/llm/usage?days=7&group_by=agent|model|provider|day
+    GET  /api/llm/budgets
+    POST /api/llm/budgets {agent, daily_tokens}   (daily_tokens null = retirer)
+"""
+import os
+import sys
+import time
+import atexit
+import sqlite3
+import threading
+import contextvars
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+DB_PATH = '/opt/seo-agent/db/seo_agent.db'
+FLUSH_INTERVAL = 2
+BUDGET_REFRESH = 60          # relecture des budgets et de la consommation du jour (s)
+LOCAL_PROVIDERS = {'ollama'}
+
+# USD par million de tokens (entree, sortie) - prix catalogue, a ajuster
+PRICES = {
+    'llama-3.3-70b-versatile': (0.59, 0.79),
+    'accounts/fireworks/models/llama-v3p3-70b-instruct': (0.90, 0.90),
+    'accounts/fireworks/models/qwen3-235b-a22b-instruct-2507': (0.22, 0.88),
+    'accounts/fireworks/models/deepseek-r1-0528': (3.00, 8.00),
+    'accounts/fireworks/models/deepseek-v3p2': (0.56, 1.68),
+}
+
+_queue = deque(maxlen=50000)
+_flush_lock = threading.Lock()
+_flush_thread = None
+_agent_var = contextvars.ContextVar('llm_agent', default=None)
+
+_budget_lock = threading.Lock()
+_budget_state = {'loaded_at': 0.0, 'day': None, 'limits': {}, 'used': defaultdict(int)}
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS llm_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            agent TEXT NOT NULL,
+            provider TEXT,
+            model TEXT,
+            prompt_tokens INTEGER DEFAULT 0,
+            completion_tokens INTEGER DEFAULT 0,
+            latency_ms REAL,
+            status TEXT DEFAULT 'ok',
+            fallback_path TEXT,
+            cache_hit INTEGER DEFAULT 0,
+            estimated INTEGER DEFAULT 0,
+            cost_usd REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_usage_agent_date ON llm_usage(agent, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_usage_date ON llm_usage(created_at)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS llm_budgets (
+            agent TEXT PRIMARY KEY,
+            daily_tokens INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn
+
+
+# ============================================
+# Attribution
+# ============================================
+
+@contextmanager
+def agent_scope(name):
+    """Attribue les appels LLM du bloc a 'name' (prioritaire sur la detection par la pile)"""
+    token = _agent_var.set(name)
+    try:
+        yield
+    finally:
+        _agent_var.reset(token)
+
+
+def current_agent(depth=2):
+    """Nom de classe de l'agent appelant, sinon module.fonction de l'appelant direct"""
+    name = _agent_var.get()
+    if name:
+        return name
+    frame = sys._getframe(depth)
+    caller = frame
+    for _ in range(15):
+        if frame is None:
+            break
+        if 'self' in frame.f_code.co_varnames[:1]:
+            cls = type(frame.f_locals.get('self')).__name__
+            if cls.endswith('Agent') or cls.endswith('Orchestrator'):
+                return cls
+        frame = frame.f_back
+    module = caller.f_globals.get('__name__', '?')
+    return f"{module}.{caller.f_code.co_name}"
+
+
+# ============================================
+# Mesure
+# ============================================
+
+def estimate_tokens(text):
+    return max(1, len(text or '') // 4) if text else 0
+
+
+def cost_usd(model, prompt_tokens, completion_tokens):
+    price_in, price_out = PRICES.get(model, (0.0, 0.0))
+    return round((prompt_tokens * price_in + completion_tokens * price_out) / 1e6, 6)
+
+
+def record(agent, provider, model, prompt_tokens=0, completion_tokens=0, latency_ms=None,
+           status='ok', fallback_path=None, cache_hit=False, estimated=False):
+    """Met l'appel en file (ecriture par lots) et le compte dans le budget du jour"""
+    cost = 0.0 if provider in LOCAL_PROVIDERS else cost_usd(model, prompt_tokens, completion_tokens)
+    _queue.append((agent, provider, model, int(prompt_tokens or 0), int(completion_tokens or 0),
+                   None if latency_ms is None else round(latency_ms, 1), status, fallback_path,
+                   1 if cache_hit else 0, 1 if estimated else 0, cost,
+                   datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')))
+    if provider not in LOCAL_PROVIDERS and status == 'ok':
+        with _budget_lock:
+            _budget_state['used'][agent] += int(prompt_tokens or 0) + int(completion_tokens or 0)
+    _start_flush_thread()
+
+
+def _usage_tokens(usage):
+    """(prompt, completion) depuis un bloc usage OpenAI ou une reponse Ollama"""
+    if not usage:
+        return None
+    if 'prompt_tokens' in usage or 'completion_tokens' in usage:
+        return usage.get('prompt_tokens') or 0, usage.get('completion_tokens') or 0
+    if 'eval_count' in usage or 'prompt_eval_count' in usage:
+        return usage.get('prompt_eval_count') or 0, usage.get('eval_count') or 0
+    return None
+
+
+class LLMCall:
+    """
+    Un appel logique, eventuellement sur plusieurs fournisseurs:
+        call = LLMCall('groq')... call.attempt('groq'); call.success('groq', model, usage, prompt, text)
+    """
+
+    def __init__(self, agent=None):
+        self.agent = agent or current_agent(depth=3)
+        self.path = []
+        self.started = time.perf_counter()
+
+    def attempt(self, provider):
+        self.path.append(provider)
+
+    def _latency(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def success(self, provider, model, usage=None, prompt='', text=''):
+        tokens = _usage_tokens(usage)
+        estimated = tokens is None
+        if estimated:
+            tokens = estimate_tokens(prompt), estimate_tokens(text)
+        record(self.agent, provider, model, tokens[0], tokens[1], self._latency(), 'ok',
+               '>'.join(self.path) or provider, estimated=estimated)
+
+    def failure(self, model=None):
+        provider = self.path[-1] if self.path else None
+        record(self.agent, provider, model, latency_ms=self._latency(), status='error',
+               fallback_path='>'.join(self.path) or None)
+
+
+def tracked_stream(chunks, agent, provider, model, prompt=''):
+    """Enveloppe un flux de texte: enregistre l'appel (tokens estimes) a la fin ou sur erreur"""
+    started = time.perf_counter()
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    except Exception:
+        record(agent, provider, model, latency_ms=(time.perf_counter() - started) * 1000,
+               status='error', fallback_path=provider)
+        raise
+    text = ''.join(parts)
+    record(agent, provider, model, estimate_tokens(prompt), estimate_tokens(text),
+           (time.perf_counter() - started) * 1000, 'ok' if text else 'error', provider, estimated=True)
+
+
+# ============================================
+# Budgets
+# ============================================
+
+def _today():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+
+def _refresh_budgets(force=False):
+    now = time.monotonic()
+    state = _budget_state
+    if not force and now - state['loaded_at'] < BUDGET_REFRESH and state['day'] == _today():
+        return
+    flush_pending()
+    try:
+        conn = _connect()
+        limits = dict(conn.execute('SELECT agent, daily_tokens FROM llm_budgets').fetchall())
+        used = conn.execute(f'''
+            SELECT agent, SUM(prompt_tokens + completion_tokens) FROM llm_usage
+            WHERE created_at >= ? AND status = 'ok'
+            AND provider NOT IN ({','.join('?' * len(LOCAL_PROVIDERS))})
+            GROUP BY agent
+        ''', (_today(), *LOCAL_PROVIDERS)).fetchall()
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f'[LLM usage] budgets indisponibles: {e}')
+        state['loaded_at'] = now
+        return
+    with _budget_lock:
+        state['limits'] = limits
+        state['used'] = defaultdict(int, {agent: tokens or 0 for agent, tokens in used})
+        state['day'] = _today()
+        state['loaded_at'] = now
+
+
+def budget_status(agent):
+    """{'limit', 'used', 'remaining'} du jour pour l'agent (limit None = pas de budget)"""
+    _refresh_budgets()
+    with _budget_lock:
+        limits = _budget_state['limits']
+        limit = limits.get(agent, limits.get('*'))
+        used = _budget_state['used'].get(agent, 0)
+    return {'limit': limit, 'used': used, 'remaining': None if limit is None else max(0, limit - used)}
+
+
+def check_budget(agent, provider=None, model=None):
+    """
+    True si l'agent peut appeler un LLM distant. Sinon enregistre le refus
+    (status='budget_exceeded') et retourne False: l'appelant ne fait pas l'appel.
+    """
+    status = budget_status(agent)
+    if status['limit'] is None or status['used'] < status['limit']:
+        return True
+    print(f"[LLM usage] budget journalier atteint pour {agent}: {status['used']}/{status['limit']} tokens")
+    record(agent, provider, model, status='budget_exceeded')
+    return False
+
+
+def set_budget(agent, daily_tokens):
+    conn = _connect()
+    with conn:
+        if daily_tokens is None:
+            conn.execute('DELETE FROM llm_budgets WHERE agent = ?', (agent,))
+        else:
+            conn.execute('''
+                INSERT INTO llm_budgets (agent, daily_tokens, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(agent) DO UPDATE SET daily_tokens = excluded.daily_tokens, updated_at = CURRENT_TIMESTAMP
+            ''', (agent, int(daily_tokens)))
+    conn.close()
+    _refresh_budgets(force=True)
+
+
+# ============================================
+# Ecriture par lots
+# ============================================
+
+def flush_pending():
+    """Ecrit la file en base; retourne le nombre de lignes"""
+    rows = []
+    with _flush_lock:
+        while _queue:
+            rows.append(_queue.popleft())
+    if not rows:
+        return 0
+    try:
+        conn = _connect()
+        conn.executemany('''
+            INSERT INTO llm_usage (agent, provider, model, prompt_tokens, completion_tokens, latency_ms,
+                                   status, fallback_path, cache_hit, estimated, cost_usd, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f'[LLM usage] Flush error: {e}')
+        return 0
+    return len(rows)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        if _queue:
+            flush_pending()
+
+
+def _start_flush_thread():
+    global _flush_thread
+    if _flush_thread is None or not _flush_thread.is_alive():
+        with _flush_lock:
+            if _flush_thread is None or not _flush_thread.is_alive():
+                _flush_thread = threading.Thread(target=_flush_loop, daemon=True, name='llm-usage-flush')
+                _flush_thread.start()
+
+
+def _after_fork_in_child():
+    """Worker forke (gunicorn --preload): file, verrous et thread propres au worker"""
+    global _flush_lock, _flush_thread, _budget_lock
+    _flush_lock = threading.Lock()
+    _budget_lock = threading.Lock()
+    _queue.clear()
+    _flush_thread = None
+    _budget_state['loaded_at'] = 0.0
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(flush_pending)
+
+
+# ============================================
+# Rapport
+# ============================================
+
+GROUPS = {
+    'agent': 'agent',
+    'model': 'model',
+    'provider': 'provider',
+    'day': 'DATE(created_at)',
+}
+
+
+def _p95(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+def usage_report(days=7, group_by='agent'):
+    flush_pending()
+    column = GROUPS[group_by]
+    since = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = _connect()
+    rows = conn.execute(f'''
+        SELECT {column} AS grp, COUNT(*),
+               SUM(CASE WHEN status = 'ok' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'budget_exceeded' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN fallback_path LIKE '%>%' THEN 1 ELSE 0 END),
+               SUM(cache_hit), SUM(prompt_tokens), SUM(completion_tokens), SUM(cost_usd),
+               AVG(latency_ms), SUM(estimated)
+        FROM llm_usage WHERE created_at >= ?
+        GROUP BY grp ORDER BY SUM(prompt_tokens + completion_tokens) DESC
+    ''', (since,)).fetchall()
+    latencies = defaultdict(list)
+    for grp, latency in conn.execute(f'''
+            SELECT {column}, latency_ms FROM llm_usage
+            WHERE created_at >= ? AND status = 'ok' AND latency_ms IS NOT NULL''', (since,)):
+        latencies[grp].append(latency)
+    conn.close()
+
+    groups = []
+    for r in rows:
+        groups.append({
+            group_by: r[0], 'calls': r[1], 'ok': r[2], 'errors': r[3], 'budget_exceeded': r[4],
+            'fallbacks': r[5], 'cache_hits': r[6] or 0,
+            'prompt_tokens': r[7] or 0, 'completion_tokens': r[8] or 0,
+            'total_tokens': (r[7] or 0) + (r[8] or 0), 'cost_usd': round(r[9] or 0, 4),
+            'avg_latency_ms': round(r[10], 1) if r[10] is not None else None,
+            'p95_latency_ms': _p95(latencies.get(r[0])),
+            'estimated_calls': r[11] or 0,
+        })
+    totals = {key: sum(g[key] for g in groups) for key in
+              ('calls', 'errors', 'budget_exceeded', 'fallbacks', 'prompt_tokens', 'completion_tokens',
+               'total_tokens')}
+    totals['cost_usd'] = round(sum(g['cost_usd'] for g in groups), 4)
+    return {'days': days, 'group_by': group_by, 'totals': totals, 'groups': groups}
+
+
+def budgets_report():
+    _refresh_budgets(force=True)
+    with _budget_lock:
+        limits = dict(_budget_state['limits'])
+        used = dict(_budget_state['used'])
+    agents = sorted(set(limits) | set(used))
+    report = []
+    for agent in agents:
+        if agent == '*':
+            continue
+        limit = limits.get(agent, limits.get('*'))
+        report.append({'agent': agent, 'daily_tokens': limit, 'used_today': used.get(agent, 0),
+                       'remaining': None if limit is None else max(0, limit - used.get(agent, 0))})
+    return {'default': limits.get('*'), 'day': _today(), 'agents': report}
+
+
+def register_llm_usage_routes(app):
+    from flask import request, jsonify
+
+    @app.route('/api/llm/usage', methods=['GET'])
+    def llm_usage_report():
+        group_by = request.args.get('group_by', 'agent')
+        if group_by not in GROUPS:
+            return jsonify({'success': False, 'error': f"group_by: {', '.join(GROUPS)}"}), 400
+        days = max(1, min(request.args.get('days', 7, type=int), 365))
+        report = usage_report(days, group_by)
+        report['budgets'] = budgets_report()
+        return jsonify({'success': True, **report})
+
+    @app.route('/api/llm/budgets', methods=['GET'])
+    def llm_budgets():
+        return jsonify({'success': True, **budgets_report()})
+
+    @app.route('/api/llm/budgets', methods=['POST'])
+    def llm_set_budget():
+        data = request.get_json() or {}
+        agent = (data.get('agent') or '').strip()
+        if not agent:
+            return jsonify({'success': False, 'error': "agent requis ('*' = defaut)"}), 400
+        daily_tokens = data.get('daily_tokens')
+        if daily_tokens is not None:
+            try:
+                daily_tokens = int(daily_tokens)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'daily_tokens doit etre un entier'}), 400
+        set_budget(agent, daily_tokens)
+        return jsonify({'success': True, 'agent': agent, 'daily_tokens': daily_tokens,
+                        'status': budget_status(agent)})
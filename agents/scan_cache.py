@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Scan Cache — cache de resultats, coalescing et admission pour /api/scan (seo_scanner_api)
+- Cache SQLite (partage entre workers gunicorn), cle = domaine normalise + mode de scan,
+  fraicheur SEO_SCAN_CACHE_TTL (1 h): un domaine scanne par plusieurs prospects, ou une
+  page rafraichie, ne relance ni le scan, ni l'analyse LLM, ni le rapport HTML
+- Single-flight: scans concurrents d'un meme domaine -> une seule execution. Dans un worker
+  via singleflight.SingleFlight; entre workers, la ligne 'running' (bail LEASE_SECONDS)
+  est attendue par les autres puis servie depuis le cache
+- Admission: limite par IP (fenetre glissante, comptee en base donc pour tous les workers)
+  sur les scans non servis par le cache, puis file bornee par worker (SCAN_CONCURRENCY scans
+  simultanes, SCAN_QUEUE_MAX en attente): ScanRejected -> 429 / 503 + Retry-After
+- Les resultats en erreur (site inaccessible) ne sont jamais gardes
+- scan_requests: issue (hit, miss, coalesced, rejected, error) et latence de chaque requete
+  -> stats(): taux de hit, p50/p95 par issue
+Usage:
+    key = cache_key(domain, 'full')
+    cached = get_fresh(key)
+    request_id = admit(ip, domain)                      # ScanRejected
+    results, outcome = get_or_run(key, domain, fn)      # outcome: hit | miss | coalesced
+    finish(request_id, outcome, latency_ms)
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from singleflight import SingleFlight
+
+DB_PATH = '/opt/seo-agent/db/seo_agent.db'
+
+CACHE_TTL = float(os.environ.get('SEO_SCAN_CACHE_TTL', '3600'))
+LEASE_SECONDS = 900           # > duree max d'un crawl (600 s): au-dela, worker mort, reprise
+POLL_SECONDS = 0.5
+RATE_LIMIT = int(os.environ.get('SEO_SCAN_RATE_LIMIT', '10'))          # scans par IP...
+RATE_WINDOW = int(os.environ.get('SEO_SCAN_RATE_WINDOW', '600'))       # ...par fenetre (s)
+SCAN_CONCURRENCY = int(os.environ.get('SEO_SCAN_CONCURRENCY', '4'))   # par worker
+SCAN_QUEUE_MAX = int(os.environ.get('SEO_SCAN_QUEUE_MAX', '16'))
+SCAN_QUEUE_WAIT = 60          # secondes max en file avant 503
+KEEP_REQUESTS_DAYS = 30
+
+
+class ScanRejected(Exception):
+    """Requete refusee par l'admission: status HTTP + Retry-After"""
+
+    def __init__(self, message, status=429, retry_after=60):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def get_db(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+_schema_ready = False
+
+
+def init_db(conn):
+    global _schema_ready
+    if _schema_ready:
+        return
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scan_cache (
+            cache_key TEXT PRIMARY KEY,
+            domain TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            owner TEXT,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            duration_ms REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scan_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ip_hash TEXT,
+            domain TEXT,
+            outcome TEXT NOT NULL,
+            latency_ms REAL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scan_requests_ip ON scan_requests(ip_hash, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scan_requests_created ON scan_requests(created_at)')
+    conn.commit()
+    _schema_ready = True
+
+
+def normalize_domain(domain):
+    """'HTTPS://Example.com/page' -> 'example.com' (port garde, point final et chemin retires)"""
+    domain = (domain or '').strip().lower()
+    if '://' in domain:
+        domain = urlparse(domain).netloc
+    domain = domain.split('/')[0].split('?')[0].split('#')[0]
+    domain = domain.rsplit('@', 1)[-1].rstrip('.')
+    if domain.endswith(':443') or domain.endswith(':80'):
+        domain = domain.rsplit(':', 1)[0]
+    return domain
+
+
+def cache_key(domain, mode='full', **params):
+    """Cle de cache: domaine + mode + parametres qui changent le resultat (ex: max_pages)"""
+    suffix = ','.join(f'{k}={params[k]}' for k in sorted(params))
+    return f'{domain}|{mode}' + (f'|{suffix}' if suffix else '')
+
+
+def _ip_hash(ip):
+    return hashlib.sha1((ip or '').encode('utf-8')).hexdigest()[:16]
+
+
+# =========================================
+# ADMISSION
+# =========================================
+
+def admit(ip, domain, db_path=None):
+    """Enregistre la requete (issue 'pending') et retourne son id; ScanRejected(429) si l'IP a
+    deja RATE_LIMIT scans hors cache dans la fenetre"""
+    now = time.time()
+    ip_hash = _ip_hash(ip)
+    conn = get_db(db_path)
+    try:
+        init_db(conn)
+        conn.execute('BEGIN IMMEDIATE')
+        count, oldest = conn.execute('''
+            SELECT COUNT(*), MIN(created_at) FROM scan_requests
+            WHERE ip_hash = ? AND created_at >= ? AND outcome NOT IN ('hit', 'rejected')
+        ''', (ip_hash, now - RATE_WINDOW)).fetchone()
+        if count >= RATE_LIMIT:
+            conn.execute('INSERT INTO scan_requests (ip_hash, domain, outcome, latency_ms, created_at) VALUES (?, ?, ?, 0, ?)',
+                         (ip_hash, domain, 'rejected', now))
+            conn.commit()
+            retry_after = max(1, int(oldest + RATE_WINDOW - now)) if oldest else RATE_WINDOW
+            raise ScanRejected(f'Trop de scans ({RATE_LIMIT} par {RATE_WINDOW // 60} min). Réessayez plus tard.',
+                               429, retry_after)
+        cursor = conn.execute('INSERT INTO scan_requests (ip_hash, domain, outcome, created_at) VALUES (?, ?, ?, ?)',
+                              (ip_hash, domain, 'pending', now))
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def record(ip, domain, outcome, latency_ms, db_path=None):
+    """Requete deja terminee (ex: hit du cache, sans admission)"""
+    conn = get_db(db_path)
+    try:
+        init_db(conn)
+        conn.execute('INSERT INTO scan_requests (ip_hash, domain, outcome, latency_ms, created_at) VALUES (?, ?, ?, ?, ?)',
+                     (_ip_hash(ip), domain, outcome, round(latency_ms, 1), time.time()))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def finish(request_id, outcome, latency_ms, db_path=None):
+    conn = get_db(db_path)
+    try:
+        conn.execute('UPDATE scan_requests SET outcome = ?, latency_ms = ? WHERE id = ?',
+                     (outcome, round(latency_ms, 1), request_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class _Gate:
+    """File bornee par worker: SCAN_CONCURRENCY scans en cours, SCAN_QUEUE_MAX en attente"""
+
+    def __init__(self, concurrency, max_queued, wait_seconds):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.wait_seconds = wait_seconds
+        self._reset()
+
+    def _reset(self):
+        self._sem = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+
+    @contextmanager
+    def slot(self):
+        with self._lock:
+            if self.waiting >= self.max_queued:
+                raise ScanRejected('Scanner occupé, réessayez dans une minute.', 503, 30)
+            self.waiting += 1
+        acquired = self._sem.acquire(timeout=self.wait_seconds)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.running += 1
+        if not acquired:
+            raise ScanRejected('Scanner occupé, réessayez dans une minute.', 503, 30)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.running -= 1
+            self._sem.release()
+
+
+gate = _Gate(SCAN_CONCURRENCY, SCAN_QUEUE_MAX, SCAN_QUEUE_WAIT)
+_flight = SingleFlight(ttl=0)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=gate._reset)
+
+
+# =========================================
+# CACHE + SINGLE-FLIGHT
+# =========================================
+
+def _cacheable(result):
+    return isinstance(result, dict) and not result.get('error')
+
+
+def get_fresh(key, db_path=None):
+    """Resultat en cache encore frais (avec results['cache']) ou None"""
+    conn = get_db(db_path)
+    try:
+        init_db(conn)
+        row = conn.execute("SELECT result, finished_at FROM scan_cache WHERE cache_key = ? AND status = 'done'",
+                           (key,)).fetchone()
+    finally:
+        conn.close()
+    if not row or time.time() - row[1] >= CACHE_TTL:
+        return None
+    return _from_cache(row[0], row[1])
+
+
+def _from_cache(raw, finished_at):
+    result = json.loads(raw)
+    result['cache'] = {'hit': True, 'age_seconds': int(time.time() - finished_at), 'ttl_seconds': int(CACHE_TTL)}
+    return result
+
+
+def _claim(conn, key, domain, owner, refresh):
+    """('hit', resultat) si frais, ('wait', None) si un autre worker scanne, ('run', None) si la
+    ligne nous revient"""
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    row = conn.execute('SELECT status, result, started_at, finished_at FROM scan_cache WHERE cache_key = ?',
+                       (key,)).fetchone()
+    if row:
+        status, raw, started_at, finished_at = row
+        if status == 'done' and not refresh and now - finished_at < CACHE_TTL:
+            conn.commit()
+            return 'hit', _from_cache(raw, finished_at)
+        if status == 'running' and now - started_at < LEASE_SECONDS:
+            conn.commit()
+            return 'wait', None
+    conn.execute('''
+        INSERT OR REPLACE INTO scan_cache (cache_key, domain, status, owner, started_at)
+        VALUES (?, ?, 'running', ?, ?)
+    ''', (key, domain, owner, now))
+    conn.commit()
+    return 'run', None
+
+
+def _release(key, owner, result=None, duration_ms=None, db_path=None):
+    """Termine la ligne 'running': resultat garde s'il est cacheable, sinon ligne supprimee"""
+    now = time.time()
+    conn = get_db(db_path)
+    try:
+        if result is not None and _cacheable(result):
+            conn.execute('''
+                UPDATE scan_cache SET status = 'done', result = ?, finished_at = ?, duration_ms = ?
+                WHERE cache_key = ? AND owner = ?
+            ''', (json.dumps(result, ensure_ascii=False, default=str), now, round(duration_ms or 0, 1), key, owner))
+        else:
+            conn.execute("DELETE FROM scan_cache WHERE cache_key = ? AND owner = ? AND status = 'running'", (key, owner))
+        conn.execute("DELETE FROM scan_cache WHERE status = 'done' AND finished_at < ?", (now - CACHE_TTL * 24,))
+        conn.execute('DELETE FROM scan_requests WHERE created_at < ?', (now - KEEP_REQUESTS_DAYS * 86400,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _run_once(key, domain, fn, refresh, db_path):
+    owner = uuid.uuid4().hex
+    waited = False
+    while True:
+        conn = get_db(db_path)
+        try:
+            init_db(conn)
+            action, result = _claim(conn, key, domain, owner, refresh)
+        finally:
+            conn.close()
+        if action == 'hit':
+            return ('coalesced' if waited else 'hit'), result
+        if action == 'run':
+            break
+        waited = True
+        refresh = False     # le scan en cours d'un autre worker est assez frais
+        time.sleep(POLL_SECONDS)
+
+    result = None
+    started = time.monotonic()
+    try:
+        with gate.slot():
+            result = fn()
+    finally:
+        _release(key, owner, result, (time.monotonic() - started) * 1000, db_path)
+    return 'miss', result
+
+
+def get_or_run(key, domain, fn, refresh=False, db_path=None):
+    """(resultat, issue): hit (cache), miss (scan execute ici) ou coalesced (scan d'une autre
+    requete, de ce worker ou d'un autre). ScanRejected si la file du worker est pleine."""
+    me = uuid.uuid4().hex
+    leader, outcome, result = _flight.do(key, lambda: (me,) + _run_once(key, domain, fn, refresh, db_path),
+                                         label='scan')
+    if leader != me and outcome == 'miss':
+        outcome = 'coalesced'
+    return result, outcome
+
+
+# =========================================
+# STATS
+# =========================================
+
+def _percentile(values, p):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def stats(hours=24, db_path=None):
+    """Taux de hit et latences (ms) des requetes /api/scan sur les dernieres heures"""
+    since = time.time() - hours * 3600
+    conn = get_db(db_path)
+    try:
+        init_db(conn)
+        rows = conn.execute("SELECT outcome, latency_ms FROM scan_requests WHERE created_at >= ? AND outcome != 'pending'",
+                            (since,)).fetchall()
+        cached, running = conn.execute('''
+            SELECT SUM(CASE WHEN status = 'done' AND finished_at >= ? THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN status = 'running' THEN 1 ELSE 0 END)
+            FROM scan_cache
+        ''', (time.time() - CACHE_TTL,)).fetchone()
+    finally:
+        conn.close()
+
+    by_outcome = {}
+    for outcome, latency in rows:
+        by_outcome.setdefault(outcome, []).append(latency or 0)
+    served = sum(len(by_outcome.get(o, [])) for o in ('hit', 'miss', 'coalesced'))
+    saved = len(by_outcome.get('hit', [])) + len(by_outcome.get('coalesced', []))
+    latencies = sorted(l for o, values in by_outcome.items() if o != 'rejected' for l in values)
+    return {
+        'hours': hours,
+        'requests': len(rows),
+        'hit_rate': round(len(by_outcome.get('hit', [])) / served * 100, 1) if served else 0,
+        'saved_scans_rate': round(saved / served * 100, 1) if served else 0,
+        'latency_ms': {'p50': _percentile(latencies, 0.5), 'p95': _percentile(latencies, 0.95)},
+        'by_outcome': {o: {'count': len(v), 'p50_ms': _percentile(sorted(v), 0.5), 'p95_ms': _percentile(sorted(v), 0.95)}
+                       for o, v in sorted(by_outcome.items())},
+        'cache': {'fresh_entries': cached or 0, 'running': running or 0, 'ttl_seconds': int(CACHE_TTL)},
+        'worker': {'running': gate.running, 'queued': gate.waiting, 'concurrency': gate.concurrency},
+        'rate_limit': {'scans': RATE_LIMIT, 'window_seconds': RATE_WINDOW},
+    }
@@ -13,6 +13,7 @@ import os
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import llm_usage
 
 DB_PATH = '/opt/seo-agent/db/seo_agent.db'
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
@@ -130,15 +131,21 @@ def get_ai_analysis(domain, grade, scores, top_fails):
         '{"recommendations": ["rec1", "rec2", "rec3", "rec4", "rec5"], "priority_action": "action immediate", "competitive_insight": "insight competitif"}'
     )
     messages = [{'role': 'user', 'content': prompt}]
+    if not llm_usage.check_budget('seo_scanner', 'groq', GROQ_MODEL):
+        return None
+    usage = llm_usage.LLMCall('seo_scanner')
 
     # 1. Groq primary (GRATUIT - llama-3.3-70b-versatile)
     if GROQ_API_KEY:
+        usage.attempt('groq')
         try:
             headers = {'Authorization': 'Bearer ' + GROQ_API_KEY, 'Content-Type': 'application/json'}
             payload = {'model': GROQ_MODEL, 'messages': messages, 'max_tokens': 2000, 'temperature': 0.3}
             resp = requests.post(GROQ_URL, headers=headers, json=payload, timeout=60)
             if resp.status_code == 200:
-                content = resp.json()['choices'][0]['message']['content']
+                data = resp.json()
+                content = data['choices'][0]['message']['content']
+                usage.success('groq', GROQ_MODEL, data.get('usage'), prompt, content)
                 print('[AI-Groq] Response: ' + content[:200])
                 return _parse_ai_json(content)
             else:
@@ -148,12 +155,15 @@ def get_ai_analysis(domain, grade, scores, top_fails):
 
     # 2. Fireworks fallback (llama-v3p3-70b-instruct)
     if FIREWORKS_API_KEY:
+        usage.attempt('fireworks')
         try:
             headers = {'Authorization': 'Bearer ' + FIREWORKS_API_KEY, 'Content-Type': 'application/json'}
             payload = {'model': FIREWORKS_MODEL, 'messages': messages, 'max_tokens': 2000, 'temperature': 0.3}
             resp = requests.post(FIREWORKS_URL, headers=headers, json=payload, timeout=60)
             if resp.status_code == 200:
-                content = resp.json()['choices'][0]['message']['content']
+                data = resp.json()
+                content = data['choices'][0]['message']['content']
+                usage.success('fireworks', FIREWORKS_MODEL, data.get('usage'), prompt, content)
                 print('[AI-Fireworks] Response: ' + content[:200])
                 return _parse_ai_json(content)
             else:
@@ -162,6 +172,7 @@ def get_ai_analysis(domain, grade, scores, top_fails):
             print('[AI-Fireworks] Error: ' + str(e))
 
     print('[AI] Both Groq and Fireworks failed, returning None')
+    usage.failure(FIREWORKS_MODEL if FIREWORKS_API_KEY else GROQ_MODEL)
     return None
 
 
@@ -0,0 +1,934 @@
+#!/usr/bin/env python3
+"""
+Scanner Rules — moteur de règles précompilées pour les checks de SEOScanner
+- Chaque check est une règle enregistrée (catégorie, sévérité, poids) dans l'ordre du rapport
+- Les sélecteurs nommés (tag + attributs, sémantique BeautifulSoup find/find_all) sont compilés
+  une fois en table de dispatch par nom de balise
+- Un seul parcours de l'arbre par page collecte les éléments de tous les sélecteurs et le texte
+  visible (équivalent de soup.get_text()); les règles ne font plus de find() sur le document
+- Ressources de site (robots.txt, sitemap.xml, llms.txt, SSL) déclarées par les règles:
+  préchargées en parallèle, partagées via le cache du scanner (_shared) quand il existe
+- Temps par règle (appels, total, max) + temps de parcours: ENGINE.stats()
+- Scores STRICTS calculés avec les poids précalculés: pass=100%, warning=40%, fail=0%,
+  -5 par échec critique
+Ajouter un check (aucun parcours supplémentaire: le sélecteur rejoint la table de dispatch):
+    ENGINE.selector('h3', 'h3')
+    @rule('seo_classic', 'Nom du check', 'high', weight=1.0)
+    def mon_check(page):
+        h3_tags = page.all('h3')
+        return {'status': ..., 'value': ..., 'details': ..., 'recommendation': ...}
+"""
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4.element import Tag
+
+STATUS_FACTOR = {'pass': 1.0, 'warning': 0.4, 'fail': 0.0}
+SEVERITY_PENALTY = {'critical': 5}      # points retirés au score de catégorie par échec
+
+
+# ==========================================
+# SÉLECTEURS
+# ==========================================
+
+def _value_matcher(expected):
+    if expected is True:
+        return lambda value: value is not None
+    if isinstance(expected, str):
+        return lambda value: value == expected
+    if hasattr(expected, 'search'):
+        return lambda value: value is not None and expected.search(value) is not None
+    return expected
+
+
+def _attr_test(name, expected):
+    """Sémantique de find(attrs=...): attributs multi-valeurs (class, rel) testés valeur par
+    valeur puis joints par des espaces"""
+    match = _value_matcher(expected)
+
+    def test(attrs):
+        value = attrs.get(name)
+        if isinstance(value, list):
+            return any(match(v) for v in value) or match(' '.join(value))
+        return match(value)
+    return test
+
+
+class Selector:
+    """Prédicat compilé: nom de balise (None = toutes) + tests d'attributs"""
+    __slots__ = ('alias', 'tags', 'tests', 'first')
+
+    def __init__(self, alias, tags=None, attrs=None, first=False):
+        self.alias = alias
+        self.tags = (tags,) if isinstance(tags, str) else tuple(tags) if tags else None
+        self.tests = tuple(_attr_test(k, v) for k, v in (attrs or {}).items())
+        self.first = first
+
+    def matches(self, tag):
+        attrs = tag.attrs
+        for test in self.tests:
+            if not test(attrs):
+                return False
+        return True
+
+
+class Page:
+    """Une page vue par les règles: éléments collectés en un parcours, ressources, faits mémoïsés"""
+
+    def __init__(self, engine, scanner, resources=None):
+        self.engine = engine
+        self.scanner = scanner
+        self.soup = scanner.soup
+        self.html = scanner.html or ''
+        self.domain = scanner.domain
+        self.final_url = getattr(scanner, 'final_url', None) or ''
+        self.load_time = getattr(scanner, 'load_time', None)
+        self._found, self._strings = engine.collect(self.soup)
+        self._facts = {}
+        self._resources = dict(resources or {})
+
+    def all(self, alias):
+        return self._found[alias]
+
+    def first(self, alias):
+        found = self._found[alias]
+        return found[0] if found else None
+
+    def fact(self, name):
+        if name not in self._facts:
+            self._facts[name] = self.engine.facts[name](self)
+        return self._facts[name]
+
+    @property
+    def text(self):
+        return self.fact('text')
+
+    def resource(self, key):
+        """robots.txt & co: préchargé, sinon cache partagé du scanner (crawl), sinon chargé ici"""
+        if key not in self._resources:
+            self._resources[key] = self.engine.load_shared(self.scanner, key)
+        return self._resources[key]
+
+
+# ==========================================
+# MOTEUR
+# ==========================================
+
+class Rule:
+    __slots__ = ('func', 'category', 'name', 'importance', 'weight', 'ai_impact', 'needs')
+
+    def __init__(self, func, category, name, importance, weight, ai_impact, needs):
+        self.func = func
+        self.category = category
+        self.name = name
+        self.importance = importance
+        self.weight = weight
+        self.ai_impact = ai_impact
+        self.needs = needs
+
+
+class RuleEngine:
+    def __init__(self):
+        self.categories = OrderedDict()     # catégorie -> [Rule]
+        self.finalizers = {}
+        self.selectors = OrderedDict()
+        self.facts = {}
+        self.weights = {}
+        self._by_tag = None
+        self._any_tag = ()
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    # ---------- enregistrement ----------
+
+    def selector(self, alias, tags=None, first=False, **attrs):
+        """Sélecteur nommé; class_ pour l'attribut class, attrs={...} pour les noms non-Python"""
+        attrs.update(attrs.pop('attrs', {}))
+        if 'class_' in attrs:
+            attrs['class'] = attrs.pop('class_')
+        self.selectors[alias] = Selector(alias, tags, attrs, first)
+        self._by_tag = None
+
+    def rule(self, category, name, importance='medium', weight=1.0, ai_impact=None, needs=()):
+        def decorator(func):
+            self.categories.setdefault(category, []).append(
+                Rule(func, category, name, importance, weight, ai_impact, tuple(needs)))
+            self.weights[name] = weight
+            return func
+        return decorator
+
+    def fact(self, func):
+        self.facts[func.__name__] = func
+        return func
+
+    def finalize(self, category):
+        def decorator(func):
+            self.finalizers[category] = func
+            return func
+        return decorator
+
+    @property
+    def resources(self):
+        return sorted({key for rules in self.categories.values() for r in rules for key in r.needs})
+
+    @staticmethod
+    def load_resource(scanner, key):
+        if key == 'ssl':
+            return scanner.check_ssl()
+        return scanner.fetch_page(f"{scanner.base_url}{key}")
+
+    def load_shared(self, scanner, key):
+        shared = getattr(scanner, '_shared', None)
+        if shared is not None:
+            return shared(key, lambda: self.load_resource(scanner, key))
+        return self.load_resource(scanner, key)
+
+    def prefetch(self, scanner):
+        """Ressources de site requises par les règles, chargées en parallèle: {clé: valeur}"""
+        keys = self.resources
+        with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+            return dict(zip(keys, executor.map(lambda key: self.load_shared(scanner, key), keys)))
+
+    # ---------- parcours ----------
+
+    def _compile(self):
+        by_tag = {}
+        any_tag = []
+        for sel in self.selectors.values():
+            if sel.tags is None:
+                any_tag.append(sel)
+            else:
+                for tag in sel.tags:
+                    by_tag.setdefault(tag, []).append(sel)
+        self._any_tag = tuple(any_tag)
+        self._by_tag = {tag: tuple(sels) + self._any_tag for tag, sels in by_tag.items()}
+
+    def collect(self, soup):
+        """Un parcours: éléments de chaque sélecteur (ordre du document) + chaînes de texte visibles"""
+        if self._by_tag is None:
+            self._compile()
+        started = time.perf_counter()
+        found = {alias: [] for alias in self.selectors}
+        strings = []
+        if soup is not None:
+            by_tag, any_tag = self._by_tag, self._any_tag
+            text_types = soup.interesting_string_types
+            for node in soup.descendants:
+                if isinstance(node, Tag):
+                    for sel in by_tag.get(node.name, any_tag):
+                        bucket = found[sel.alias]
+                        if sel.first and bucket:
+                            continue
+                        if sel.matches(node):
+                            bucket.append(node)
+                elif type(node) in text_types:
+                    strings.append(node)
+        self._time('(parcours)', (time.perf_counter() - started) * 1000)
+        return found, strings
+
+    # ---------- évaluation ----------
+
+    def page(self, scanner, resources=None):
+        """Page parcourue une fois; réutilisable par l'appelant (ex: résumé d'une page de crawl)"""
+        return Page(self, scanner, resources)
+
+    def run(self, scanner, categories=None, page=None, resources=None):
+        """{catégorie: {'checks': [...], 'passed', 'failed', 'warnings'}}; une exception dans une
+        règle met sa catégorie en {'error': ...}"""
+        page = page or Page(self, scanner, resources)
+        results = {}
+        for category in categories or self.categories:
+            try:
+                results[category] = self._evaluate(category, page)
+            except Exception as e:
+                results[category] = {'error': str(e)}
+        return results
+
+    def _evaluate(self, category, page):
+        results = {'checks': [], 'passed': 0, 'failed': 0, 'warnings': 0}
+        for r in self.categories[category]:
+            started = time.perf_counter()
+            try:
+                outcome = r.func(page)
+            finally:
+                self._time(r.name, (time.perf_counter() - started) * 1000)
+            check = {
+                'name': r.name,
+                'status': outcome['status'],
+                'value': outcome.get('value'),
+                'details': outcome.get('details'),
+                'importance': r.importance,
+                'recommendation': outcome.get('recommendation'),
+            }
+            ai_impact = outcome.get('ai_impact', r.ai_impact)
+            if ai_impact is not None:
+                check['ai_impact'] = ai_impact
+            results['checks'].append(check)
+
+        # Count
+        for check in results['checks']:
+            if check['status'] == 'pass': results['passed'] += 1
+            elif check['status'] == 'fail': results['failed'] += 1
+            else: results['warnings'] += 1
+
+        if category in self.finalizers:
+            self.finalizers[category](results)
+        return results
+
+    def scores(self, results):
+        """Scores STRICTS par catégorie + total (moyenne des catégories évaluées)"""
+        scores = {}
+        total_score = 0
+        category_count = 0
+        for cat in self.categories:
+            if cat in results and 'checks' in results[cat]:
+                checks = results[cat]['checks']
+                total = sum(self.weights.get(c['name'], 1.0) for c in checks)
+                # Poids sommés par statut puis multipliés: avec des poids de 1.0, même arithmétique
+                # flottante que (passed + warnings * 0.4) / total (int() tronque au même endroit)
+                w_pass = sum(self.weights.get(c['name'], 1.0) for c in checks if c['status'] == 'pass')
+                w_warn = sum(self.weights.get(c['name'], 1.0) for c in checks if c['status'] not in ('pass', 'fail'))
+                penalty = sum(SEVERITY_PENALTY.get(c.get('importance'), 0) for c in checks if c['status'] == 'fail')
+
+                raw_score = ((w_pass * 1) + (w_warn * STATUS_FACTOR['warning'])) / total * 100 if total > 0 else 0
+                cat_score = max(0, raw_score - penalty)
+                scores[cat] = int(cat_score)
+
+                total_score += cat_score
+                category_count += 1
+        scores['total'] = int(total_score / category_count) if category_count > 0 else 0
+        return scores
+
+    # ---------- mesures ----------
+
+    def _time(self, name, ms):
+        with self._lock:
+            t = self._timings.get(name)
+            if t is None:
+                t = self._timings[name] = [0, 0.0, 0.0]
+            t[0] += 1
+            t[1] += ms
+            t[2] = max(t[2], ms)
+
+    def stats(self):
+        """Temps cumulés par règle (ms), du plus coûteux au moins coûteux"""
+        with self._lock:
+            timings = {name: list(t) for name, t in self._timings.items()}
+        rows = [{'rule': name, 'calls': calls, 'total_ms': round(total, 2), 'avg_ms': round(total / calls, 3),
+                 'max_ms': round(worst, 2)} for name, (calls, total, worst) in timings.items()]
+        rows.sort(key=lambda r: -r['total_ms'])
+        return {'rules': sum(len(r) for r in self.categories.values()), 'selectors': len(self.selectors),
+                'timings': rows}
+
+
+ENGINE = RuleEngine()
+rule = ENGINE.rule
+fact = ENGINE.fact
+
+
+def bot_allowed(robots_content, bot_name):
+    """Vérifie si un bot est autorisé dans robots.txt"""
+    if not robots_content:
+        return True  # Pas de robots.txt = tout autorisé par défaut
+
+    # Chercher une règle spécifique pour ce bot
+    lines = robots_content.split('\n')
+    current_agent = None
+
+    for line in lines:
+        line = line.strip().lower()
+        if line.startswith('user-agent:'):
+            current_agent = line.split(':', 1)[1].strip()
+        elif current_agent and (bot_name in current_agent or current_agent == '*'):
+            if line.startswith('disallow:') and line.split(':', 1)[1].strip() == '/':
+                return False
+            if line.startswith('allow:'):
+                return True
+
+    return True  # Par défaut autorisé
+
+
+# ==========================================
+# SÉLECTEURS ET FAITS PARTAGÉS
+# ==========================================
+
+ENGINE.selector('html', 'html', first=True)
+ENGINE.selector('title', 'title', first=True)
+ENGINE.selector('meta_description', 'meta', first=True, attrs={'name': 'description'})
+ENGINE.selector('meta_viewport', 'meta', first=True, attrs={'name': 'viewport'})
+ENGINE.selector('meta_charset', 'meta', first=True, charset=True)
+ENGINE.selector('meta_robots', 'meta', first=True, attrs={'name': re.compile('^robots$', re.I)})
+ENGINE.selector('meta_og', 'meta', property=re.compile('^og:'))
+ENGINE.selector('meta_twitter', 'meta', attrs={'name': re.compile('^twitter:')})
+ENGINE.selector('canonical', 'link', first=True, rel='canonical')
+ENGINE.selector('favicon', 'link', first=True, rel=re.compile('icon'))
+ENGINE.selector('h1', 'h1')
+ENGINE.selector('h2', 'h2')
+ENGINE.selector('p', 'p')
+ENGINE.selector('lists', ('ul', 'ol'))
+ENGINE.selector('li', 'li')
+ENGINE.selector('img', 'img')
+ENGINE.selector('links', 'a', href=True)
+ENGINE.selector('json_ld', 'script', type='application/ld+json')
+ENGINE.selector('reviews', first=True, class_=re.compile('review|testimonial|avis|temoignage', re.I))
+
+
+@fact
+def text(page):
+    return ''.join(page._strings)
+
+
+@fact
+def html_lower(page):
+    return page.html.lower()
+
+
+@fact
+def paragraph_words(page):
+    return [len(p.text.split()) for p in page.all('p')]
+
+
+@fact
+def schema_types(page):
+    types = []
+    for script in page.all('json_ld'):
+        try:
+            data = json.loads(script.string)
+            if isinstance(data, dict):
+                t = data.get('@type', '')
+                if isinstance(t, list):
+                    types.extend([str(x) for x in t])
+                else:
+                    types.append(str(t))
+            elif isinstance(data, list):
+                for item in data:
+                    if isinstance(item, dict):
+                        t = item.get('@type', '')
+                        if isinstance(t, list):
+                            types.extend([str(x) for x in t])
+                        else:
+                            types.append(str(t))
+        except:
+            pass
+    return types
+
+
+@fact
+def has_business(page):
+    return any(t in page.fact('schema_types') for t in ['LocalBusiness', 'Organization', 'Corporation', 'Service'])
+
+
+@fact
+def robots_content(page):
+    robots_resp = page.resource('/robots.txt')
+    return robots_resp.text if robots_resp and robots_resp.status_code == 200 else None
+
+
+# ==========================================
+# SEO CLASSIQUE - STRICT
+# ==========================================
+
+@rule('seo_classic', 'Meta Title Optimisé', 'critical')
+def meta_title(page):
+    # Title - STRICT: doit être entre 50-60 chars
+    title_tag = page.first('title')
+    title = title_tag.text.strip() if title_tag else None
+    title_len = len(title) if title else 0
+    title_status = 'pass' if title and 50 <= title_len <= 60 else 'warning' if title and 30 <= title_len < 50 else 'fail'
+    return {
+        'status': title_status,
+        'value': title[:80] if title else None,
+        'details': f'{title_len} caractères (optimal: 50-60)' if title else 'MANQUANT - Critique pour SEO',
+        'recommendation': 'Titre entre 50-60 caractères avec mot-clé principal au début' if title_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Meta Description Optimisée', 'critical')
+def meta_description(page):
+    # Meta Description - STRICT: doit être entre 150-160 chars
+    meta_desc = page.first('meta_description')
+    desc = meta_desc.get('content', '').strip() if meta_desc else None
+    desc_len = len(desc) if desc else 0
+    desc_status = 'pass' if desc and 150 <= desc_len <= 160 else 'warning' if desc and 100 <= desc_len < 150 else 'fail'
+    return {
+        'status': desc_status,
+        'value': desc[:200] if desc else None,
+        'details': f'{desc_len} caractères (optimal: 150-160)' if desc else 'MANQUANTE - Perte de clics',
+        'recommendation': 'Description 150-160 caractères avec call-to-action et mot-clé' if desc_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Balise H1 Unique', 'critical')
+def h1_unique(page):
+    # H1 - STRICT: exactement 1, avec mot-clé
+    h1_tags = page.all('h1')
+    h1_count = len(h1_tags)
+    h1_text = h1_tags[0].text.strip()[:100] if h1_tags else None
+    h1_status = 'pass' if h1_count == 1 else 'fail'
+    return {
+        'status': h1_status,
+        'value': h1_text,
+        'details': f'{h1_count} H1 trouvé(s) - doit être exactement 1' if h1_count != 1 else 'OK - 1 H1 unique',
+        'recommendation': 'Exactement 1 H1 par page avec mot-clé principal' if h1_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Structure H2 (min 3)', 'high')
+def h2_structure(page):
+    # H2 Structure - STRICT: minimum 3 H2
+    h2_count = len(page.all('h2'))
+    h2_status = 'pass' if h2_count >= 3 else 'warning' if h2_count >= 1 else 'fail'
+    return {
+        'status': h2_status,
+        'value': f'{h2_count} H2 trouvés',
+        'details': f'{h2_count}/3 minimum requis',
+        'recommendation': f'Ajouter {3 - h2_count} sous-titres H2 pour structurer le contenu' if h2_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Images avec ALT descriptif', 'high')
+def images_alt(page):
+    # Images ALT - STRICT: 100% requis
+    images = page.all('img')
+    images_with_alt = [img for img in images if img.get('alt') and len(img.get('alt', '').strip()) > 5]
+    img_count = len(images)
+    alt_count = len(images_with_alt)
+    img_score = (alt_count / img_count * 100) if img_count > 0 else 100
+    img_status = 'pass' if img_score == 100 else 'warning' if img_score >= 80 else 'fail'
+    return {
+        'status': img_status,
+        'value': f'{alt_count}/{img_count}',
+        'details': f'{img_score:.0f}% - TOUTES les images doivent avoir un ALT descriptif',
+        'recommendation': f'Ajouter ALT descriptif à {img_count - alt_count} images' if img_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Maillage Interne (min 5)', 'high')
+def internal_links(page):
+    # Internal Links - STRICT: minimum 5
+    internal = [l for l in page.all('links') if page.domain in l.get('href', '') or l.get('href', '').startswith('/')]
+    int_count = len(internal)
+    link_status = 'pass' if int_count >= 5 else 'warning' if int_count >= 2 else 'fail'
+    return {
+        'status': link_status,
+        'value': f'{int_count} liens internes',
+        'details': f'{int_count}/5 minimum requis pour bon maillage',
+        'recommendation': f'Ajouter {5 - int_count} liens internes vers pages importantes' if link_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'URL Canonique', 'high')
+def canonical_url(page):
+    canonical = page.first('canonical')
+    canonical_url = canonical.get('href') if canonical else None
+    can_status = 'pass' if canonical_url else 'fail'
+    return {
+        'status': can_status,
+        'value': canonical_url[:80] if canonical_url else None,
+        'details': 'Définie' if canonical_url else 'MANQUANTE - Risque contenu dupliqué',
+        'recommendation': 'Ajouter <link rel="canonical"> pour éviter duplication' if can_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Open Graph Complet', 'medium')
+def open_graph(page):
+    # Open Graph - STRICT: tous les 4 requis
+    og_found = [tag.get('property') for tag in page.all('meta_og')]
+    og_required = ['og:title', 'og:description', 'og:image', 'og:url']
+    og_missing = [t for t in og_required if t not in og_found]
+    og_status = 'pass' if len(og_missing) == 0 else 'warning' if len(og_missing) <= 2 else 'fail'
+    return {
+        'status': og_status,
+        'value': f'{4 - len(og_missing)}/4 tags',
+        'details': f'Manquants: {", ".join(og_missing)}' if og_missing else 'Tous les tags présents',
+        'recommendation': f'Ajouter: {", ".join(og_missing)}' if og_status != 'pass' else None
+    }
+
+
+@rule('seo_classic', 'Twitter Cards', 'low')
+def twitter_cards(page):
+    tw_count = len(page.all('meta_twitter'))
+    tw_status = 'pass' if tw_count >= 4 else 'warning' if tw_count >= 2 else 'fail'
+    return {
+        'status': tw_status,
+        'value': f'{tw_count} tags',
+        'details': f'{tw_count}/4 tags recommandés',
+        'recommendation': 'Ajouter twitter:card, twitter:title, twitter:description, twitter:image' if tw_status != 'pass' else None
+    }
+
+
+# ==========================================
+# SEO TECHNIQUE - STRICT
+# ==========================================
+
+@rule('seo_technique', 'HTTPS/SSL Valide', 'critical', needs=('ssl',))
+def https_ssl(page):
+    # SSL/HTTPS - STRICT: obligatoire
+    is_https = page.final_url.startswith('https')
+    ssl_info = page.resource('ssl')
+    ssl_valid = ssl_info.get('valid', False)
+    days = ssl_info.get('days_remaining', 0)
+    ssl_status = 'pass' if is_https and ssl_valid and days > 30 else 'warning' if is_https and ssl_valid else 'fail'
+    return {
+        'status': ssl_status,
+        'value': ssl_info,
+        'details': f"SSL valide, expire dans {days} jours" if ssl_valid else 'SSL INVALIDE ou ABSENT - CRITIQUE',
+        'recommendation': 'Installer certificat SSL valide immédiatement' if ssl_status == 'fail' else 'Renouveler SSL avant expiration' if ssl_status == 'warning' else None
+    }
+
+
+@rule('seo_technique', 'Robots.txt Configuré', 'critical', needs=('/robots.txt',))
+def robots_txt(page):
+    robots_content = page.fact('robots_content')
+    robots_exists = robots_content is not None
+    robots_status = 'pass' if robots_exists and len(robots_content or '') > 20 else 'fail'
+    return {
+        'status': robots_status,
+        'value': robots_content[:300] if robots_content else None,
+        'details': f'{len(robots_content or "")} caractères' if robots_exists else 'MANQUANT - Les bots ne savent pas quoi indexer',
+        'recommendation': 'Créer robots.txt avec règles pour moteurs et bots AI' if robots_status != 'pass' else None
+    }
+
+
+@rule('seo_technique', 'Sitemap.xml avec URLs', 'critical', needs=('/sitemap.xml',))
+def sitemap_xml(page):
+    sitemap_resp = page.resource('/sitemap.xml')
+    sitemap_exists = sitemap_resp and sitemap_resp.status_code == 200
+    sitemap_urls = len(re.findall(r'<loc>', sitemap_resp.text)) if sitemap_exists else 0
+    sitemap_status = 'pass' if sitemap_exists and sitemap_urls >= 3 else 'warning' if sitemap_exists else 'fail'
+    return {
+        'status': sitemap_status,
+        'value': f'{sitemap_urls} URLs',
+        'details': f'{sitemap_urls} pages indexées' if sitemap_exists else 'MANQUANT - Google ne trouve pas vos pages',
+        'recommendation': 'Créer sitemap.xml avec toutes les pages importantes' if sitemap_status != 'pass' else None
+    }
+
+
+@rule('seo_technique', 'Vitesse < 2 secondes', 'critical')
+def page_speed(page):
+    # Page Speed - STRICT: < 2s (temps mesuré au chargement de la page si disponible)
+    load_time = page.load_time
+    if load_time is None:
+        start_time = time.time()
+        _ = page.scanner.fetch_page(page.scanner.base_url)
+        load_time = time.time() - start_time
+    speed_status = 'pass' if load_time < 2 else 'warning' if load_time < 3 else 'fail'
+    return {
+        'status': speed_status,
+        'value': f'{load_time:.2f}s',
+        'details': 'Rapide' if load_time < 2 else 'LENT - Perte de visiteurs' if load_time >= 3 else 'Acceptable',
+        'recommendation': 'Optimiser images, activer compression, utiliser CDN' if speed_status != 'pass' else None
+    }
+
+
+@rule('seo_technique', 'Mobile Viewport Correct', 'critical')
+def mobile_viewport(page):
+    viewport = page.first('meta_viewport')
+    vp_content = viewport.get('content', '') if viewport else ''
+    vp_status = 'pass' if viewport and 'width=device-width' in vp_content else 'fail'
+    return {
+        'status': vp_status,
+        'value': vp_content[:80] if vp_content else None,
+        'details': 'Configuré correctement' if vp_status == 'pass' else 'MANQUANT - Site non mobile-friendly',
+        'recommendation': 'Ajouter <meta name="viewport" content="width=device-width, initial-scale=1">' if vp_status != 'pass' else None
+    }
+
+
+@rule('seo_technique', 'Attribut lang HTML', 'high')
+def html_lang(page):
+    html_tag = page.first('html')
+    lang = html_tag.get('lang') if html_tag else None
+    lang_status = 'pass' if lang and len(lang) >= 2 else 'fail'
+    return {
+        'status': lang_status,
+        'value': lang,
+        'details': f'Langue: {lang}' if lang else 'MANQUANT - Problème accessibilité',
+        'recommendation': 'Ajouter lang="fr" à la balise <html>' if lang_status != 'pass' else None
+    }
+
+
+@rule('seo_technique', 'Encodage UTF-8', 'medium')
+def charset_utf8(page):
+    charset = page.first('meta_charset')
+    charset_val = charset.get('charset', '').upper() if charset else None
+    charset_status = 'pass' if charset_val == 'UTF-8' else 'warning' if charset else 'fail'
+    return {
+        'status': charset_status,
+        'value': charset_val,
+        'details': 'UTF-8 correct' if charset_status == 'pass' else 'Encodage incorrect ou manquant',
+        'recommendation': 'Ajouter <meta charset="UTF-8"> en premier dans <head>' if charset_status != 'pass' else None
+    }
+
+
+@rule('seo_technique', 'Favicon', 'low')
+def favicon(page):
+    favicon = page.first('favicon')
+    fav_status = 'pass' if favicon else 'warning'
+    return {
+        'status': fav_status,
+        'value': favicon.get('href')[:60] if favicon else None,
+        'details': 'Présent' if favicon else 'Manquant - Mauvaise image de marque',
+        'recommendation': 'Ajouter favicon pour branding' if fav_status != 'pass' else None
+    }
+
+
+# ==========================================
+# AI READINESS - TRÈS STRICT!!!
+# ==========================================
+
+AI_BOTS = {
+    'GPTBot': 'gptbot',
+    'ChatGPT-User': 'chatgpt-user',
+    'ClaudeBot': 'claudebot',
+    'Claude-Web': 'claude-web',
+    'PerplexityBot': 'perplexitybot',
+    'Cohere-AI': 'cohere',
+    'Google-Extended': 'google-extended',
+    'Anthropic-AI': 'anthropic',
+}
+
+
+@rule('ai_readiness', 'Bots AI Autorisés (8 requis)', 'critical', needs=('/robots.txt',))
+def ai_bots(page):
+    # 1. Robots.txt - AI Bots - STRICT: tous doivent être autorisés explicitement
+    robots_content = (page.fact('robots_content') or '').lower()
+    ai_bots_check = {bot: bot_allowed(robots_content, token) for bot, token in AI_BOTS.items()}
+
+    blocked = [b for b, allowed in ai_bots_check.items() if not allowed]
+    allowed = [b for b, allowed in ai_bots_check.items() if allowed]
+
+    # STRICT: Tous les bots doivent être autorisés
+    bot_status = 'pass' if len(blocked) == 0 else 'warning' if len(blocked) <= 2 else 'fail'
+    return {
+        'status': bot_status,
+        'value': {'allowed': allowed, 'blocked': blocked},
+        'details': f'{len(allowed)}/8 bots autorisés' + (f' - BLOQUÉS: {", ".join(blocked)}' if blocked else ''),
+        'recommendation': f'Autoriser explicitement dans robots.txt: {", ".join(blocked)}' if blocked else None,
+        'ai_impact': 'ChatGPT, Claude et Perplexity NE PEUVENT PAS recommander votre site' if blocked else 'Tous les AI peuvent indexer votre site'
+    }
+
+
+@rule('ai_readiness', 'Fichier llms.txt Complet', 'critical', needs=('/llms.txt',),
+      ai_impact='Les AI utilisent ce fichier pour MIEUX comprendre et recommander votre site')
+def llms_txt(page):
+    # 2. LLMs.txt - STRICT: obligatoire et bien formaté
+    llms_resp = page.resource('/llms.txt')
+    llms_exists = llms_resp and llms_resp.status_code == 200
+    llms_content = llms_resp.text if llms_exists else None
+    llms_good = llms_exists and len(llms_content or '') > 200 and '#' in (llms_content or '')
+    llms_status = 'pass' if llms_good else 'warning' if llms_exists else 'fail'
+    return {
+        'status': llms_status,
+        'value': llms_content[:500] if llms_content else None,
+        'details': 'Bien formaté avec sections' if llms_good else 'Existe mais incomplet' if llms_exists else 'MANQUANT - Opportunité critique manquée',
+        'recommendation': 'Créer llms.txt détaillé avec services, FAQ, contact' if llms_status != 'pass' else None,
+    }
+
+
+@rule('ai_readiness', 'Schema.org (Business + FAQ)', 'critical',
+      ai_impact='Les AI utilisent Schema.org pour comprendre votre entreprise et l\'afficher dans les résultats')
+def schema_org(page):
+    # 3. Schema.org - STRICT: LocalBusiness OU Organization requis + FAQPage
+    schema_types = page.fact('schema_types')
+    has_business = page.fact('has_business')
+    has_faq = 'FAQPage' in schema_types
+    has_webpage = 'WebPage' in schema_types or 'WebSite' in schema_types
+
+    schema_score = sum([has_business, has_faq, has_webpage])
+    schema_status = 'pass' if schema_score >= 2 else 'warning' if schema_score >= 1 else 'fail'
+
+    missing = []
+    if not has_business: missing.append('LocalBusiness/Organization')
+    if not has_faq: missing.append('FAQPage')
+
+    return {
+        'status': schema_status,
+        'value': schema_types,
+        'details': f'{len(schema_types)} schemas: {", ".join(schema_types[:4])}' if schema_types else 'AUCUN SCHEMA - Invisible pour AI',
+        'recommendation': f'Ajouter Schema: {", ".join(missing)}' if missing else None,
+    }
+
+
+@rule('ai_readiness', 'FAQ avec Schema FAQPage', 'critical',
+      ai_impact='Les FAQ avec Schema apparaissent DIRECTEMENT dans les réponses ChatGPT et Google')
+def faq_schema(page):
+    # 4. FAQ Structurée - STRICT: FAQPage schema requis
+    has_faq = 'FAQPage' in page.fact('schema_types')
+    faq_status = 'pass' if has_faq else 'fail'
+    return {
+        'status': faq_status,
+        'value': 'FAQPage présent' if has_faq else None,
+        'details': 'FAQ optimisée pour AI' if has_faq else 'MANQUANT - Vos FAQ n\'apparaissent pas dans ChatGPT',
+        'recommendation': 'Ajouter FAQPage Schema avec questions/réponses' if not has_faq else None,
+    }
+
+
+@rule('ai_readiness', 'Contenu Riche (min 500 mots)', 'critical',
+      ai_impact='Plus de contenu = plus de contexte = plus de chances d\'être recommandé')
+def rich_content(page):
+    # 5. Contenu Substantiel - STRICT: min 500 mots
+    word_count = sum(page.fact('paragraph_words'))
+    has_lists = len(page.all('lists')) >= 2
+
+    content_status = 'pass' if word_count >= 500 and has_lists else 'warning' if word_count >= 300 else 'fail'
+    return {
+        'status': content_status,
+        'value': {'words': word_count, 'has_lists': has_lists},
+        'details': f'{word_count} mots, listes: {"oui" if has_lists else "non"}',
+        'recommendation': f'Ajouter {500 - word_count} mots de contenu structuré avec listes' if word_count < 500 else None,
+    }
+
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+PHONE_PATTERN = re.compile(r'[\+]?[(]?[0-9]{1,3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4}')
+
+
+@rule('ai_readiness', 'Contact Visible (Email + Tél)', 'high',
+      ai_impact='Les AI recommandent avec vos coordonnées - invisible = pas de contact')
+def contact_visible(page):
+    # 6. Informations NAP Claires - STRICT
+    emails = list(set(EMAIL_PATTERN.findall(page.html)))
+    phones = list(set(PHONE_PATTERN.findall(page.html)))
+
+    nap_status = 'pass' if emails and phones else 'warning' if emails or phones else 'fail'
+    return {
+        'status': nap_status,
+        'value': {'emails': emails[:2], 'phones': phones[:2]},
+        'details': f'Email: {"oui" if emails else "NON"}, Tél: {"oui" if phones else "NON"}',
+        'recommendation': 'Afficher clairement email ET téléphone sur la page' if nap_status != 'pass' else None,
+    }
+
+
+@rule('ai_readiness', 'Description Riche pour AI', 'high',
+      ai_impact='Les AI utilisent la meta description comme résumé principal')
+def ai_description(page):
+    # 7. Meta Description Riche pour AI
+    meta_desc = page.first('meta_description')
+    desc = meta_desc.get('content', '') if meta_desc else ''
+    desc_words = len(desc.split())
+    desc_status = 'pass' if desc_words >= 20 else 'warning' if desc_words >= 10 else 'fail'
+    return {
+        'status': desc_status,
+        'value': desc[:150],
+        'details': f'{desc_words} mots (min 20 recommandés)',
+        'recommendation': 'Écrire description détaillée avec services, lieu, différenciateurs' if desc_status != 'pass' else None,
+    }
+
+
+@rule('ai_readiness', 'Mentions de Marque (min 5)', 'medium',
+      ai_impact='Aide les AI à associer votre marque à vos services')
+def brand_mentions(page):
+    # 8. Mentions de Marque
+    brand = page.domain.split('.')[0].lower()
+    brand_count = page.fact('html_lower').count(brand)
+    brand_status = 'pass' if brand_count >= 5 else 'warning' if brand_count >= 2 else 'fail'
+    return {
+        'status': brand_status,
+        'value': brand_count,
+        'details': f'{brand_count} mentions de "{brand}"',
+        'recommendation': f'Mentionner votre marque "{brand}" au moins 5 fois' if brand_status != 'pass' else None,
+    }
+
+
+@rule('ai_readiness', 'Services Clairement Décrits', 'high',
+      ai_impact='Les AI ne peuvent pas recommander ce qu\'ils ne comprennent pas')
+def services_described(page):
+    # 9. Données structurées pour services
+    service_keywords = ['service', 'prix', 'tarif', 'offre', 'solution', 'produit']
+    html_lower = page.fact('html_lower')
+    has_service_content = any(kw in html_lower for kw in service_keywords)
+    has_business = page.fact('has_business')
+    service_status = 'pass' if has_service_content and has_business else 'warning' if has_service_content else 'fail'
+    return {
+        'status': service_status,
+        'value': has_service_content,
+        'details': 'Services décrits avec schema' if service_status == 'pass' else 'Services mentionnés' if has_service_content else 'Aucune description de services',
+        'recommendation': 'Décrire clairement vos services avec prix et détails' if service_status != 'pass' else None,
+    }
+
+
+@rule('ai_readiness', 'Avis/Témoignages avec Schema', 'high',
+      ai_impact='Les avis augmentent la crédibilité et les recommandations AI')
+def reviews(page):
+    # 10. Avis/Témoignages structurés
+    has_reviews = bool(page.first('reviews'))
+    review_schema = any(t in page.fact('schema_types') for t in ['Review', 'AggregateRating'])
+    review_status = 'pass' if review_schema else 'warning' if has_reviews else 'fail'
+    return {
+        'status': review_status,
+        'value': review_schema,
+        'details': 'Avis avec schema Review' if review_schema else 'Témoignages sans schema' if has_reviews else 'Aucun avis visible',
+        'recommendation': 'Ajouter témoignages clients avec schema AggregateRating' if review_status != 'pass' else None,
+    }
+
+
+@ENGINE.finalize('ai_readiness')
+def ai_score(results):
+    # AI Score strict: échecs comptent double
+    total = len(results['checks'])
+    score = ((results['passed'] * 1) + (results['warnings'] * 0.4)) / total * 100
+    results['ai_score'] = int(score)
+
+
+# ==========================================
+# QUALITÉ DU CONTENU - STRICT
+# ==========================================
+
+@rule('content_quality', 'Contenu Substantiel (min 800)', 'critical')
+def word_count(page):
+    # Word count - STRICT: min 800 mots
+    words = len(page.text.split())
+    word_status = 'pass' if words >= 800 else 'warning' if words >= 400 else 'fail'
+    return {
+        'status': word_status,
+        'value': words,
+        'details': f'{words} mots (min 800 pour bon SEO)',
+        'recommendation': f'Ajouter {800 - words} mots de contenu pertinent' if words < 800 else None
+    }
+
+
+@rule('content_quality', 'Paragraphes Développés (min 5)', 'high')
+def developed_paragraphs(page):
+    # Paragraphes - STRICT
+    p_count = len([w for w in page.fact('paragraph_words') if w > 20])
+    p_status = 'pass' if p_count >= 5 else 'warning' if p_count >= 2 else 'fail'
+    return {
+        'status': p_status,
+        'value': p_count,
+        'details': f'{p_count} paragraphes de 20+ mots',
+        'recommendation': 'Développer le contenu en paragraphes substantiels' if p_status != 'pass' else None
+    }
+
+
+CTA_PATTERNS = ['contact', 'appel', 'soumission', 'devis', 'gratuit', 'réserv', 'command', 'achet', 'inscri', 'essai']
+
+
+@rule('content_quality', 'Appels à l\'Action (CTA)', 'high')
+def calls_to_action(page):
+    # Call to Action - STRICT
+    text_lower = page.text.lower()
+    cta_found = [p for p in CTA_PATTERNS if p in text_lower]
+    cta_status = 'pass' if len(cta_found) >= 2 else 'warning' if len(cta_found) >= 1 else 'fail'
+    return {
+        'status': cta_status,
+        'value': cta_found,
+        'details': f'{len(cta_found)} CTA trouvés: {", ".join(cta_found[:3])}' if cta_found else 'AUCUN CTA - Pas de conversion',
+        'recommendation': 'Ajouter CTAs clairs: "Contactez-nous", "Demandez un devis gratuit"' if cta_status != 'pass' else None
+    }
+
+
+@rule('content_quality', 'Listes Structurées', 'medium')
+def structured_lists(page):
+    # Listes: un <li> compte une fois par <ul>/<ol> ancêtre (listes imbriquées)
+    list_items = sum(1 for li in page.all('li') for parent in li.parents if parent.name in ('ul', 'ol'))
+    list_status = 'pass' if list_items >= 6 else 'warning' if list_items >= 3 else 'fail'
+    return {
+        'status': list_status,
+        'value': list_items,
+        'details': f'{list_items} éléments de liste',
+        'recommendation': 'Ajouter listes à puces pour services, avantages, FAQ' if list_status != 'pass' else None
+    }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Search Index — recherche plein texte unifiee (SQLite FTS5)
+- Une table FTS5 par entite (contenu externe: <table>_fts indexe les colonnes texte de la
+  table sans les dupliquer), synchronisee par triggers, remplie au premier ensure_indexes()
+- Entites: contacts (CRM), tickets (support), kb (articles), drafts, briefs, content
+  (les tables absentes sont ignorees puis branchees quand elles apparaissent)
+- search(): resultats classes BM25 toutes entites confondues + extraits <mark>...</mark>
+  + facettes (nombre de resultats par entite et par statut)
+- fts_condition(): filtre 'id IN (...)' pour les listes existantes (CRM, tickets, KB)
+- SQLite sans FTS5: search() retourne None et les appelants gardent leurs LIKE
+Usage:
+    GET /api/search?q=tremblay&entity=contacts,tickets&limit=20
+"""
+import re
+import sqlite3
+
+import faq_index
+from faq_index import fts5_available, normalize
+
+MAX_LIMIT = 100
+SNIPPET_TOKENS = 12
+
+# entite -> table, colonnes indexees, titre affiche et statut (SQL sur t.*)
+ENTITIES = {
+    'contacts': {
+        'table': 'crm_contacts',
+        'columns': ('first_name', 'last_name', 'email', 'company', 'phone', 'city', 'notes', 'tags'),
+        'title': "TRIM(COALESCE(t.first_name, '') || ' ' || COALESCE(t.last_name, '') || "
+                 "CASE WHEN t.company IS NOT NULL AND t.company != '' THEN ' (' || t.company || ')' ELSE '' END)",
+        'status': 't.status',
+    },
+    'tickets': {
+        'table': 'support_tickets',
+        'columns': ('ticket_number', 'subject', 'description', 'name', 'email', 'tags'),
+        'title': "COALESCE(t.ticket_number, '') || ' - ' || t.subject",
+        'status': 't.status',
+    },
+    'kb': {
+        'table': 'kb_articles',
+        'columns': ('title', 'excerpt', 'content', 'tags'),
+        'title': 't.title',
+        'status': 't.status',
+    },
+    'drafts': {
+        'table': 'drafts',
+        'columns': ('titre', 'contenu', 'mot_cle'),
+        'title': 't.titre',
+        'status': 't.status',
+    },
+    'briefs': {
+        'table': 'content_briefs',
+        'columns': ('title', 'target_keyword'),
+        'title': 't.title',
+        'status': 't.status',
+    },
+    'content': {
+        'table': 'content',
+        'columns': ('title', 'content', 'meta_description', 'keywords'),
+        'title': 't.title',
+        'status': 't.status',
+    },
+}
+
+_WORD = re.compile(r'\w+')
+
+
+def fts_table(entity):
+    return f"{ENTITIES[entity]['table']}_fts"
+
+
+def match_query(query):
+    """Tous les mots requis, chacun en prefixe: 'jean trem' -> "jean"* "trem"*"""
+    words = _WORD.findall(normalize(query))
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def _table_columns(conn, table):
+    return {r[1] for r in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _install(conn, entity):
+    """Table FTS5 a contenu externe + triggers + remplissage ('rebuild')"""
+    spec = ENTITIES[entity]
+    table, fts, cols = spec['table'], fts_table(entity), spec['columns']
+    col_list = ', '.join(cols)
+    new_values = ', '.join(f'new.{c}' for c in cols)
+    old_values = ', '.join(f'old.{c}' for c in cols)
+    insert = f"INSERT INTO {fts} (rowid, {col_list}) VALUES (new.id, {new_values});"
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values});"
+
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {col_list}, content='{table}', content_rowid='id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    ''')
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON {table} "
+                 f"BEGIN {delete} {insert} END")
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def ensure_indexes(conn, entities=None):
+    """
+    Cree les index manquants des tables existantes. Retourne les entites indexees,
+    ou None si FTS5 n'est pas disponible.
+    """
+    if not fts5_available(conn):
+        return None
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+    ready = []
+    for entity in entities or ENTITIES:
+        spec = ENTITIES[entity]
+        if spec['table'] not in existing:
+            continue
+        if f'{fts_table(entity)}_au' not in existing:
+            # Schemas anciens: une colonne manquante = entite non indexee plutot qu'une erreur
+            if not set(spec['columns']) <= _table_columns(conn, spec['table']):
+                continue
+            _install(conn, entity)
+            conn.commit()
+        ready.append(entity)
+    return ready
+
+
+def fts_condition(conn, entity, query, column='id'):
+    """
+    ('id IN (SELECT rowid FROM <fts> WHERE ... MATCH ?)', [expr]) pour filtrer une liste existante,
+    ou None (pas de FTS5 / requete vide): l'appelant garde son LIKE.
+    """
+    expr = match_query(query or '')
+    if not expr:
+        return None
+    try:
+        if entity not in (ensure_indexes(conn, [entity]) or []):
+            return None
+    except sqlite3.Error:
+        return None
+    fts = fts_table(entity)
+    return f"{column} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)", [expr]
+
+
+def ranked_ids(conn, entity, query, limit=20, where=None, params=(), any_term=False):
+    """
+    Ids classes par BM25 (where: condition SQL sur t.*), ou None sans FTS5.
+    any_term: question en langage naturel -> un seul terme significatif suffit
+    """
+    if any_term:
+        expr = faq_index.match_query(faq_index.terms(query or ''))
+    else:
+        expr = match_query(query or '')
+    if not expr or entity not in (ensure_indexes(conn, [entity]) or []):
+        return None
+    spec, fts = ENTITIES[entity], fts_table(entity)
+    extra = f' AND ({where})' if where else ''
+    rows = conn.execute(f'''
+        SELECT t.id FROM {fts} f JOIN {spec['table']} t ON t.id = f.rowid
+        WHERE {fts} MATCH ?{extra}
+        ORDER BY bm25({fts}) LIMIT ?
+    ''', [expr, *params, limit]).fetchall()
+    return [r[0] for r in rows]
+
+
+def search(conn, query, entities=None, limit=20):
+    """
+    {'query', 'total', 'facets': {entite: {'total', 'by_status'}}, 'results': [...]}
+    results: {'entity', 'id', 'title', 'status', 'snippet', 'score'} tries par BM25 (plus petit = meilleur)
+    Retourne None si FTS5 n'est pas disponible.
+    """
+    expr = match_query(query or '')
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    ready = ensure_indexes(conn, entities)
+    if ready is None:
+        return None
+    results, facets = [], {}
+    if expr:
+        for entity in ready:
+            spec, fts = ENTITIES[entity], fts_table(entity)
+            base = f"FROM {fts} f JOIN {spec['table']} t ON t.id = f.rowid WHERE {fts} MATCH ?"
+            by_status = dict(conn.execute(
+                f"SELECT {spec['status']}, COUNT(*) {base} GROUP BY 1", (expr,)).fetchall())
+            total = sum(by_status.values())
+            facets[entity] = {'total': total, 'by_status': by_status}
+            if not total:
+                continue
+            rows = conn.execute(f'''
+                SELECT t.id, {spec['title']}, {spec['status']},
+                       snippet({fts}, -1, '<mark>', '</mark>', '...', {SNIPPET_TOKENS}), bm25({fts}) AS score
+                {base} ORDER BY score LIMIT ?
+            ''', (expr, limit)).fetchall()
+            results.extend({'entity': entity, 'id': r[0], 'title': r[1], 'status': r[2],
+                            'snippet': r[3], 'score': round(r[4], 6)} for r in rows)
+    results.sort(key=lambda r: r['score'])
+    return {
+        'query': query,
+        'total': sum(f['total'] for f in facets.values()),
+        'facets': facets,
+        'results': results[:limit],
+    }
+
+
+def register_search_routes(app):
+    """GET /api/search?q=...&entity=contacts,kb&limit=20"""
+    from flask import request, jsonify
+
+    @app.route('/api/search', methods=['GET'])
+    def api_search():
+        from agents_system import get_db
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({'success': False, 'error': 'q requis'}), 400
+        entities = [e for e in (request.args.get('entity') or '').split(',') if e]
+        unknown = [e for e in entities if e not in ENTITIES]
+        if unknown:
+            return jsonify({'success': False, 'error': f"Entite inconnue: {', '.join(unknown)}",
+                            'entities': sorted(ENTITIES)}), 400
+        conn = get_db()
+        try:
+            result = search(conn, query, entities or None, request.args.get('limit', 20, type=int))
+        finally:
+            conn.close()
+        if result is None:
+            return jsonify({'success': False, 'error': 'FTS5 non disponible dans ce SQLite'}), 501
+        return jsonify(dict(result, success=True))
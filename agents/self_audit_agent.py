@@ -23,6 +23,11 @@ from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from html.parser import HTMLParser
 import logging
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import html_rewriter
+import asset_pipeline
 
 logging.basicConfig(
     level=logging.INFO,
@@ -127,6 +132,315 @@ SITE_BUSINESS_DATA = {
 }
 
 
+# Audit incremental: un fichier n'est re-audite que si son contenu ou les regles changent
+AUDIT_RULES_VERSION = 2
+AUDIT_EXTENSIONS = ('.html', '.htm', '.php')
+AUDIT_EXCLUDE_DIRS = ['node_modules', '.git', '__pycache__', 'vendor', 'venv']
+AUDIT_WORKERS = int(os.environ.get('SEO_AUDIT_WORKERS', '0')) or os.cpu_count() or 1
+AUDIT_POOL_MIN_FILES = 64     # en dessous, le demarrage du pool coute plus qu'il ne rapporte
+
+
+def _issue(site_id: str, check_type: str, severity: str, message: str, fix_level: str,
+           file_path: str, fix_detail: str, auto_fixed: bool = False) -> Dict:
+    """Probleme detecte, enregistre plus tard par SelfAuditAgent._apply_audit"""
+    return {
+        "site_id": site_id,
+        "check_type": check_type,
+        "severity": severity,
+        "message": message,
+        "fix_level": fix_level,
+        "file_path": file_path,
+        "fix_detail": fix_detail,
+        "auto_fixed": auto_fixed
+    }
+
+
+def rules_signature(site_id: str) -> str:
+    """Empreinte des regles d'audit d'un site: la changer invalide l'index des fichiers"""
+    payload = json.dumps([AUDIT_RULES_VERSION, SITES.get(site_id), SITE_BUSINESS_DATA.get(site_id)],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _audit_file_task(task: Tuple[str, str, Optional[str]]) -> Dict:
+    """
+    Travail d'un processus du pool: lit, hache et audite un fichier (sans ecrire).
+    task = (site_id, chemin, hash connu). Contenu identique au hash connu -> 'unchanged'.
+    """
+    site_id, file_path, known_hash = task
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        st = os.stat(file_path)
+    except OSError as e:
+        return {"path": file_path, "error": str(e)}
+    result = {"path": file_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+              "hash": hashlib.sha256(raw).hexdigest()}
+    if result["hash"] == known_hash:
+        result["unchanged"] = True
+        return result
+    content = raw.decode('utf-8', 'surrogateescape')
+    if len(content) < 50:
+        result["small"] = True
+        return result
+    try:
+        result["specs"], result["rewrite"] = analyze_html(site_id, file_path, content)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def analyze_html(site_id: str, file_path: str, content: str) -> Tuple[List[Dict], Optional[html_rewriter.Result]]:
+    """
+    Audit d'un fichier HTML sans effet de bord (executable dans un processus du pool):
+    (issues, reecriture) — reecriture = html_rewriter.Result (.text, .edits) ou None si aucun auto-fix
+    """
+    issues = []
+
+    # ---- AUTO-FIX: DOCTYPE, lazy loading, defer, meta description/charset/viewport ----
+    # Appliques en une seule passe par html_rewriter a la fin de l'analyse
+    domain = SITES[site_id]["domain"]
+    page_name = os.path.basename(file_path).replace('.html', '').replace('.htm', '').replace('.php', '')
+    default_desc = f"{domain} - {page_name.replace('-', ' ').replace('_', ' ').title()}"
+    meta_tag = f'<meta name="description" content="{default_desc}">'
+    transforms = [
+        html_rewriter.Doctype(),
+        html_rewriter.LazyLoading(),
+        html_rewriter.ScriptDefer(),
+        html_rewriter.HeadMeta(description=default_desc),
+    ]
+    schema_detail = None
+
+    # ---- AUTO-FIX: Schema LocalBusiness (page principale seulement) ----
+    is_main_page = os.path.basename(file_path) in ('index.html', 'landing.html')
+
+    if is_main_page and site_id in SITE_BUSINESS_DATA:
+        biz = SITE_BUSINESS_DATA[site_id]
+
+        # Verifier si LocalBusiness existe deja dans le JSON-LD
+        has_local_business = False
+        existing_schemas = re.finditer(
+            r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+            content, re.DOTALL
+        )
+        for match in existing_schemas:
+            try:
+                schema_data = json.loads(match.group(1).strip())
+                schema_type = schema_data.get('@type', '')
+                if isinstance(schema_type, list):
+                    if 'LocalBusiness' in schema_type:
+                        has_local_business = True
+                elif schema_type == 'LocalBusiness':
+                    has_local_business = True
+            except (json.JSONDecodeError, AttributeError):
+                pass
+
+        if not has_local_business and '</head>' in content:
+            # Generer schema LocalBusiness complet
+            local_schema = {
+                "@context": "https://schema.org",
+                "@type": biz["types"],
+                "@id": f"{SITES[site_id]['url']}/#localbusiness",
+                "name": biz["name"],
+                "url": SITES[site_id]["url"],
+                "description": biz["description"],
+                "telephone": biz["telephone"],
+                "email": biz.get("email", ""),
+                "address": {
+                    "@type": "PostalAddress",
+                    **biz["address"]
+                },
+                "priceRange": biz.get("priceRange", "$$"),
+                "areaServed": [
+                    {"@type": "City", "name": city}
+                    for city in biz.get("areaServed", [])
+                ],
+                "hasOfferCatalog": {
+                    "@type": "OfferCatalog",
+                    "name": "Services",
+                    "itemListElement": [
+                        {"@type": "Offer", "itemOffered": {"@type": "Service", "name": svc}}
+                        for svc in biz.get("services", [])
+                    ]
+                }
+            }
+            # Horaires d'ouverture
+            if biz.get("openingHours"):
+                local_schema["openingHoursSpecification"] = []
+                for days, opens, closes in biz["openingHours"]:
+                    local_schema["openingHoursSpecification"].append({
+                        "@type": "OpeningHoursSpecification",
+                        "dayOfWeek": days,
+                        "opens": opens,
+                        "closes": closes
+                    })
+            # Licence/credential
+            if biz.get("credential"):
+                local_schema["hasCredential"] = {
+                    "@type": "EducationalOccupationalCredential",
+                    "credentialCategory": "license",
+                    "name": biz["credential"]
+                }
+            # AggregateRating
+            if biz.get("rating"):
+                local_schema["aggregateRating"] = {
+                    "@type": "AggregateRating",
+                    **biz["rating"]
+                }
+            # Reseaux sociaux
+            if biz.get("sameAs"):
+                local_schema["sameAs"] = biz["sameAs"]
+            if biz.get("alternateName"):
+                local_schema["alternateName"] = biz["alternateName"]
+
+            schema_json = json.dumps(local_schema, indent=2, ensure_ascii=False)
+            schema_tag = f'\n    <script type="application/ld+json">\n{schema_json}\n    </script>'
+            transforms.append(html_rewriter.HeadInjection("schema_local_business", f'{schema_tag}\n'))
+            schema_detail = f"JSON-LD LocalBusiness avec {len(biz.get('services',[]))} services, rating, horaires"
+
+    elif 'application/ld+json' not in content:
+        # Pas de JSON-LD du tout sur page non-principale — CONFIRM
+        schema_example = json.dumps({
+            "@context": "https://schema.org",
+            "@type": "Organization",
+            "name": SITES[site_id]["domain"],
+            "url": SITES[site_id].get("url", f"https://{SITES[site_id]['domain']}")
+        }, indent=2)
+        fix_cmd = f'# Ajouter avant </head> dans {file_path}:\n<script type="application/ld+json">\n{schema_example}\n</script>'
+        issues.append(_issue(
+            site_id, "schema_markup", "high",
+            f"Schema markup (JSON-LD) manquant: {file_path}",
+            "confirm", file_path, fix_cmd,
+            auto_fixed=False
+        ))
+
+    # ---- DETECT: Liens internes insuffisants (page principale) ----
+    if is_main_page:
+        internal_links = re.findall(
+            r'<a[^>]+href=["\'](?!#|tel:|mailto:|https?://|javascript:)([^"\'>\s]+)["\']',
+            content, re.IGNORECASE
+        )
+        unique_links = set(internal_links)
+        if len(unique_links) < 5:
+            issues.append(_issue(
+                site_id, "internal_links_low", "high",
+                f"Seulement {len(unique_links)} liens internes uniques (min 5): {file_path}",
+                "confirm", file_path,
+                f"Liens trouves: {', '.join(list(unique_links)[:10])}. Ajouter liens vers pages cles.",
+                auto_fixed=False
+            ))
+
+    # ---- DETECT: Listes structurees <ul>/<li> absentes (page principale) ----
+    if is_main_page:
+        has_lists = '<ul' in content.lower() or '<ol' in content.lower()
+        if not has_lists:
+            issues.append(_issue(
+                site_id, "no_structured_lists", "high",
+                f"Aucune liste structuree <ul>/<li> trouvee: {file_path}",
+                "confirm", file_path,
+                "Convertir les grilles de services/features en <ul><li> pour SEO semantique",
+                auto_fixed=False
+            ))
+
+    # ---- CONFIRM: Open Graph manquant ----
+    if 'og:title' not in content and 'og:description' not in content:
+        fix_cmd = f"""# Ajouter dans <head> de {file_path}:
+<meta property="og:title" content="TITRE_PAGE">
+<meta property="og:description" content="DESCRIPTION_PAGE">
+<meta property="og:type" content="website">
+<meta property="og:url" content="URL_PAGE">
+<meta property="og:image" content="URL_IMAGE">"""
+        issues.append(_issue(
+            site_id, "open_graph", "medium",
+            f"Open Graph meta tags manquants: {file_path}",
+            "confirm", file_path, fix_cmd,
+            auto_fixed=False
+        ))
+
+    # ---- CONFIRM: Alt text manquant sur images ----
+    img_no_alt = re.findall(r'<img\s+(?![^>]*alt=)[^>]*>', content, re.IGNORECASE)
+    if img_no_alt:
+        fix_cmd = f"# {len(img_no_alt)} images sans alt dans {file_path}\n# Ajouter alt='description' sur chaque image"
+        issues.append(_issue(
+            site_id, "img_alt", "high",
+            f"{len(img_no_alt)} images sans attribut alt: {file_path}",
+            "confirm", file_path, fix_cmd,
+            auto_fixed=False
+        ))
+
+    # ---- CONFIRM: Canonical URL manquant ----
+    if '<link rel="canonical"' not in content:
+        fix_cmd = f'# Ajouter dans <head> de {file_path}:\n<link rel="canonical" href="URL_DE_LA_PAGE">'
+        issues.append(_issue(
+            site_id, "canonical", "medium",
+            f"Canonical URL manquant: {file_path}",
+            "confirm", file_path, fix_cmd,
+            auto_fixed=False
+        ))
+
+    # Auto-fix: une lecture du contenu, toutes les corrections, liste des modifications (rollback)
+    rewrite = html_rewriter.rewrite_text(content, transforms, file_path)
+    changes = rewrite.changes
+    fixes = []
+    if changes.get("meta_description"):
+        fixes.append(_issue(
+            site_id, "meta_description", "high",
+            f"Meta description manquante: {file_path}",
+            "auto", file_path, meta_tag, auto_fixed=True
+        ))
+    if changes.get("lazy_loading"):
+        count = changes["lazy_loading"]
+        fixes.append(_issue(
+            site_id, "lazy_loading", "medium",
+            f"{count} images sans lazy loading: {file_path}",
+            "auto", file_path,
+            f"Ajout loading='lazy' sur {count} images",
+            auto_fixed=True
+        ))
+    if changes.get("script_defer"):
+        fixes.append(_issue(
+            site_id, "script_defer", "medium",
+            f"Scripts bloquants sans defer: {file_path}",
+            "auto", file_path,
+            "Ajout defer sur scripts bloquants",
+            auto_fixed=True
+        ))
+    if changes.get("doctype"):
+        fixes.append(_issue(
+            site_id, "doctype", "medium",
+            f"DOCTYPE manquant: {file_path}",
+            "auto", file_path,
+            "Ajout <!DOCTYPE html>",
+            auto_fixed=True
+        ))
+    if changes.get("charset"):
+        fixes.append(_issue(
+            site_id, "charset", "medium",
+            f"Charset manquant: {file_path}",
+            "auto", file_path,
+            'Ajout <meta charset="UTF-8">',
+            auto_fixed=True
+        ))
+    if changes.get("viewport"):
+        fixes.append(_issue(
+            site_id, "viewport", "high",
+            f"Viewport manquant: {file_path}",
+            "auto", file_path,
+            "Ajout meta viewport",
+            auto_fixed=True
+        ))
+    if changes.get("schema_local_business"):
+        fixes.append(_issue(
+            site_id, "schema_local_business", "critical",
+            f"Schema LocalBusiness+AggregateRating AUTO-INJECTE: {file_path}",
+            "auto", file_path, schema_detail,
+            auto_fixed=True
+        ))
+        logger.info(f"AUTO-FIX Schema LocalBusiness injecte dans {file_path}")
+
+    return fixes + issues, (rewrite if rewrite.changed else None)
+
+
 class SelfAuditAgent:
     # IPs admin connues — pas d'alerte email si connecte depuis ces IPs
     ADMIN_USERS = ["ubuntu", "root", "michael"]
@@ -212,6 +526,19 @@ class SelfAuditAgent:
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             );
 
+            -- Etat des fichiers audites: seuls les fichiers modifies sont re-audites
+            CREATE TABLE IF NOT EXISTS self_audit_file_index (
+                site_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                rules_sig TEXT NOT NULL,
+                issues TEXT,
+                audited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (site_id, path)
+            );
+
             CREATE INDEX IF NOT EXISTS idx_audit_site ON self_audit_results(site_id);
             CREATE INDEX IF NOT EXISTS idx_audit_level ON self_audit_results(fix_level);
             CREATE INDEX IF NOT EXISTS idx_audit_executed ON self_audit_results(executed);
@@ -223,22 +550,25 @@ class SelfAuditAgent:
     # BACKUP avant toute modification
     # =========================================
 
-    def _backup_file(self, site_id: str, file_path: str) -> Optional[str]:
-        """Cree un backup avant modification"""
+    def _backup_file(self, site_id: str, file_path: str, conn=None) -> Optional[str]:
+        """Cree un backup avant modification (conn fourni: dans la transaction de l'appelant)"""
         if not os.path.exists(file_path):
             return None
         backup_dir = f"/opt/seo-agent/backups/{site_id}/{datetime.now().strftime('%Y%m%d')}"
         os.makedirs(backup_dir, exist_ok=True)
         backup_path = os.path.join(backup_dir, os.path.basename(file_path) + f".{datetime.now().strftime('%H%M%S')}.bak")
         shutil.copy2(file_path, backup_path)
-        conn = sqlite3.connect(self.db_path)
+        own = conn is None
+        if own:
+            conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO self_audit_backups (site_id, file_path, backup_path) VALUES (?, ?, ?)",
             (site_id, file_path, backup_path)
         )
-        conn.commit()
-        conn.close()
+        if own:
+            conn.commit()
+            conn.close()
         return backup_path
 
     # =========================================
@@ -248,9 +578,11 @@ class SelfAuditAgent:
     def _record_issue(self, site_id: str, check_type: str, severity: str,
                       message: str, fix_level: str, details: str = None,
                       fix_command: str = None, fix_sql: str = None,
-                      auto_fixed: bool = False) -> int:
-        """Enregistre un probleme trouve"""
-        conn = sqlite3.connect(self.db_path)
+                      auto_fixed: bool = False, conn=None) -> int:
+        """Enregistre un probleme trouve (conn fourni: dans la transaction de l'appelant)"""
+        own = conn is None
+        if own:
+            conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO self_audit_results
@@ -260,19 +592,23 @@ class SelfAuditAgent:
               fix_command, fix_sql, auto_fixed,
               datetime.now().isoformat() if auto_fixed else None))
         issue_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        if own:
+            conn.commit()
+            conn.close()
+            conn = None
 
         # Aussi creer une alerte dans mon_alerts pour le dashboard
-        self._create_dashboard_alert(site_id, check_type, severity, message, auto_fixed=auto_fixed)
+        self._create_dashboard_alert(site_id, check_type, severity, message, auto_fixed=auto_fixed, conn=conn)
 
         return issue_id
 
     def _create_dashboard_alert(self, site_id: str, alert_type: str,
                                 severity: str, message: str,
-                                auto_fixed: bool = False):
+                                auto_fixed: bool = False, conn=None):
         """Cree une alerte visible dans le dashboard existant"""
-        conn = sqlite3.connect(self.db_path)
+        own = conn is None
+        if own:
+            conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         # Eviter les doublons
         cursor.execute("""
@@ -296,15 +632,38 @@ class SelfAuditAgent:
                     corrected_by = 'self_audit_agent', corrected_at = datetime('now')
                     WHERE id = last_insert_rowid()
                 """)
-            conn.commit()
-        conn.close()
+            if own:
+                conn.commit()
+        if own:
+            conn.close()
 
     # =========================================
     # CHECKS HTML (fichiers locaux)
     # =========================================
 
-    def check_html_files(self, site_id: str) -> Dict:
-        """Analyse tous les fichiers HTML d'un site"""
+    def _scan_html_files(self, path: str) -> Dict[str, os.stat_result]:
+        """Fichiers .html/.htm/.php du site -> stat"""
+        found = {}
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d not in AUDIT_EXCLUDE_DIRS]
+            for fname in files:
+                if not fname.endswith(AUDIT_EXTENSIONS):
+                    continue
+                fpath = os.path.join(root, fname)
+                try:
+                    found[fpath] = os.stat(fpath)
+                except OSError:
+                    continue
+        return found
+
+    def check_html_files(self, site_id: str, workers: Optional[int] = None, force: bool = False) -> Dict:
+        """
+        Analyse les fichiers HTML d'un site. Incremental: un fichier dont taille + mtime
+        (ou a defaut le hash du contenu) et les regles n'ont pas change reprend son dernier
+        resultat sans etre relu. Les fichiers a auditer passent par un pool de processus
+        (workers, defaut SEO_AUDIT_WORKERS ou nombre de coeurs), resultats ecrits en une
+        seule transaction. force=True re-audite tout.
+        """
         if site_id not in SITES:
             return {"error": f"Site inconnu: {site_id}"}
 
@@ -312,319 +671,139 @@ class SelfAuditAgent:
         if not os.path.exists(path):
             return {"error": f"Path inexistant: {path}"}
 
-        results = {"checked": 0, "auto_fixed": 0, "pending": 0, "issues": []}
+        results = {"checked": 0, "audited": 0, "unchanged": 0, "auto_fixed": 0, "pending": 0, "issues": []}
+        sig = rules_signature(site_id)
+        files = self._scan_html_files(path)
 
-        for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if d not in ['node_modules', '.git', '__pycache__', 'vendor', 'venv']]
-            for fname in files:
-                if not fname.endswith(('.html', '.htm', '.php')):
+        conn = sqlite3.connect(self.db_path, timeout=30)   # full_audit_all: sites en parallele
+        try:
+            index = {row[0]: row[1:] for row in conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, rules_sig, issues FROM self_audit_file_index "
+                "WHERE site_id = ?", (site_id,))}
+
+            tasks = []
+            for fpath, st in files.items():
+                known = index.get(fpath)
+                if known and not force and known[3] == sig:
+                    if known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                        self._reuse_index_entry(results, known[4])
+                        continue
+                    tasks.append((site_id, fpath, known[2]))    # touche: le hash tranchera
+                else:
+                    tasks.append((site_id, fpath, None))
+
+            workers = workers or AUDIT_WORKERS
+            if workers > 1 and len(tasks) >= AUDIT_POOL_MIN_FILES:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    outcomes = list(pool.map(_audit_file_task, tasks,
+                                             chunksize=max(1, len(tasks) // (workers * 8))))
+            else:
+                outcomes = [_audit_file_task(task) for task in tasks]
+
+            # Une seule transaction pour tout le site (un savepoint par fichier)
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            for outcome in outcomes:
+                fpath = outcome["path"]
+                if "error" in outcome:
+                    logger.error(f"Erreur lecture {fpath}: {outcome['error']}")
                     continue
-                fpath = os.path.join(root, fname)
-                try:
-                    with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    if len(content) < 50:
+                if outcome.get("unchanged"):
+                    # Seul le mtime a bouge (copie, deploiement): resultat precedent toujours valable
+                    self._reuse_index_entry(results, index[fpath][4])
+                    conn.execute("UPDATE self_audit_file_index SET size = ?, mtime_ns = ? WHERE site_id = ? AND path = ?",
+                                 (outcome["size"], outcome["mtime_ns"], site_id, fpath))
+                    continue
+                stored = None
+                if not outcome.get("small"):
+                    conn.execute("SAVEPOINT audit_file")
+                    try:
+                        issues = self._apply_audit(conn, site_id, fpath, outcome["specs"], outcome["rewrite"])
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO audit_file")
+                        conn.execute("RELEASE audit_file")
+                        logger.error(f"Erreur audit {fpath}: {e}")
                         continue
+                    conn.execute("RELEASE audit_file")
                     results["checked"] += 1
-                    file_issues = self._audit_html(site_id, fpath, content)
-                    results["issues"].extend(file_issues)
-                    for issue in file_issues:
-                        if issue["auto_fixed"]:
-                            results["auto_fixed"] += 1
-                        else:
-                            results["pending"] += 1
-                except Exception as e:
-                    logger.error(f"Erreur lecture {fpath}: {e}")
+                    results["audited"] += 1
+                    self._count_issues(results, issues)
+                    if outcome["rewrite"] is not None:
+                        # Fichier reecrit par l'auto-fix: indexer son nouvel etat
+                        st = os.stat(fpath)
+                        outcome.update(size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                       hash=outcome["rewrite"].hash_after)
+                    # Au prochain passage seuls les problemes non corriges seraient retrouves
+                    stored = json.dumps([i for i in issues if not i["auto_fixed"]])
+                conn.execute("""
+                    INSERT OR REPLACE INTO self_audit_file_index
+                    (site_id, path, size, mtime_ns, content_hash, rules_sig, issues, audited_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                """, (site_id, fpath, outcome["size"], outcome["mtime_ns"], outcome["hash"], sig, stored))
+
+            removed = [p for p in index if p not in files]
+            conn.executemany("DELETE FROM self_audit_file_index WHERE site_id = ? AND path = ?",
+                             [(site_id, p) for p in removed])
+            conn.commit()
+        finally:
+            conn.close()
 
+        logger.info(f"HTML {site_id}: {results['checked']} fichiers, {results['audited']} audites, "
+                    f"{results['unchanged']} inchanges")
         return results
 
-    def _audit_html(self, site_id: str, file_path: str, content: str) -> List[Dict]:
-        """Audit complet d'un fichier HTML — auto-fix ou alerte"""
+    @staticmethod
+    def _count_issues(results: Dict, issues: List[Dict]):
+        results["issues"].extend(issues)
+        for issue in issues:
+            if issue["auto_fixed"]:
+                results["auto_fixed"] += 1
+            else:
+                results["pending"] += 1
+
+    def _reuse_index_entry(self, results: Dict, issues_json: Optional[str]):
+        """Fichier inchange: dernier resultat, sans re-enregistrer ses problemes"""
+        if issues_json is None:
+            return          # fichier trop court, ignore comme avant
+        results["checked"] += 1
+        results["unchanged"] += 1
+        self._count_issues(results, json.loads(issues_json))
+
+    def _apply_audit(self, conn, site_id: str, file_path: str, specs: List[Dict],
+                     rewrite: Optional[html_rewriter.Result]) -> List[Dict]:
+        """Enregistre les problemes dans la transaction conn puis applique les auto-fix (backup + ecriture atomique + journal)"""
         issues = []
-        modified = False
-        new_content = content
-
-        # ---- AUTO-FIX: Meta description manquante ----
-        if '<meta name="description"' not in content and '<head' in content:
-            domain = SITES[site_id]["domain"]
-            page_name = os.path.basename(file_path).replace('.html', '').replace('.htm', '').replace('.php', '')
-            default_desc = f"{domain} - {page_name.replace('-', ' ').replace('_', ' ').title()}"
-            meta_tag = f'<meta name="description" content="{default_desc}">'
-
-            # AUTO-FIX: Inserer apres <head> ou apres le dernier <meta
-            if '</head>' in new_content:
-                new_content = new_content.replace('</head>', f'    {meta_tag}\n</head>')
-                modified = True
-                issues.append(self._record_and_return(
-                    site_id, "meta_description", "high",
-                    f"Meta description manquante: {file_path}",
-                    "auto", file_path, meta_tag, auto_fixed=True
-                ))
-
-        # ---- AUTO-FIX: Lazy loading sur images ----
-        img_pattern = re.compile(r'<img\s+(?![^>]*loading=)[^>]*src=', re.IGNORECASE)
-        if img_pattern.search(new_content):
-            new_content = re.sub(
-                r'<img\s+(?![^>]*loading=)([^>]*)(src=)',
-                r'<img loading="lazy" \1\2',
-                new_content,
-                flags=re.IGNORECASE
-            )
-            if new_content != content:
-                modified = True
-                count = len(img_pattern.findall(content))
-                issues.append(self._record_and_return(
-                    site_id, "lazy_loading", "medium",
-                    f"{count} images sans lazy loading: {file_path}",
-                    "auto", file_path,
-                    f"Ajout loading='lazy' sur {count} images",
-                    auto_fixed=True
-                ))
-
-        # ---- AUTO-FIX: defer sur scripts ----
-        script_pattern = re.compile(
-            r'<script\s+(?![^>]*(defer|async|type=["\']module))[^>]*src=',
-            re.IGNORECASE
-        )
-        if script_pattern.search(new_content):
-            new_content = re.sub(
-                r'<script\s+(?![^>]*(defer|async|type=["\']module))([^>]*)(src=)',
-                r'<script defer \2\3',
-                new_content,
-                flags=re.IGNORECASE
+        for spec in specs:
+            issue_id = self._record_issue(
+                site_id, spec["check_type"], spec["severity"], spec["message"], spec["fix_level"],
+                details=spec["file_path"], fix_command=spec["fix_detail"],
+                auto_fixed=spec["auto_fixed"], conn=conn
             )
-            if new_content != (content if not modified else new_content):
-                modified = True
-                issues.append(self._record_and_return(
-                    site_id, "script_defer", "medium",
-                    f"Scripts bloquants sans defer: {file_path}",
-                    "auto", file_path,
-                    "Ajout defer sur scripts bloquants",
-                    auto_fixed=True
-                ))
-
-        # ---- AUTO-FIX: DOCTYPE manquant ----
-        if not content.strip().lower().startswith('<!doctype'):
-            if '<html' in content.lower():
-                new_content = '<!DOCTYPE html>\n' + new_content
-                modified = True
-                issues.append(self._record_and_return(
-                    site_id, "doctype", "medium",
-                    f"DOCTYPE manquant: {file_path}",
-                    "auto", file_path,
-                    "Ajout <!DOCTYPE html>",
-                    auto_fixed=True
-                ))
-
-        # ---- AUTO-FIX: charset manquant ----
-        if '<meta charset=' not in content.lower() and '<meta http-equiv="content-type"' not in content.lower():
-            if '</head>' in new_content:
-                new_content = new_content.replace('</head>', '    <meta charset="UTF-8">\n</head>')
-                modified = True
-                issues.append(self._record_and_return(
-                    site_id, "charset", "medium",
-                    f"Charset manquant: {file_path}",
-                    "auto", file_path,
-                    'Ajout <meta charset="UTF-8">',
-                    auto_fixed=True
-                ))
-
-        # ---- AUTO-FIX: viewport manquant ----
-        if '<meta name="viewport"' not in content.lower():
-            if '</head>' in new_content:
-                viewport = '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
-                new_content = new_content.replace('</head>', f'    {viewport}\n</head>')
-                modified = True
-                issues.append(self._record_and_return(
-                    site_id, "viewport", "high",
-                    f"Viewport manquant: {file_path}",
-                    "auto", file_path,
-                    "Ajout meta viewport",
-                    auto_fixed=True
-                ))
-
-        # ---- AUTO-FIX: Schema LocalBusiness (page principale seulement) ----
-        is_main_page = os.path.basename(file_path) in ('index.html', 'landing.html')
-
-        if is_main_page and site_id in SITE_BUSINESS_DATA:
-            biz = SITE_BUSINESS_DATA[site_id]
-
-            # Verifier si LocalBusiness existe deja dans le JSON-LD
-            has_local_business = False
-            existing_schemas = re.finditer(
-                r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-                new_content, re.DOTALL
-            )
-            for match in existing_schemas:
-                try:
-                    schema_data = json.loads(match.group(1).strip())
-                    schema_type = schema_data.get('@type', '')
-                    if isinstance(schema_type, list):
-                        if 'LocalBusiness' in schema_type:
-                            has_local_business = True
-                    elif schema_type == 'LocalBusiness':
-                        has_local_business = True
-                except (json.JSONDecodeError, AttributeError):
-                    pass
-
-            if not has_local_business and '</head>' in new_content:
-                # Generer schema LocalBusiness complet
-                local_schema = {
-                    "@context": "https://schema.org",
-                    "@type": biz["types"],
-                    "@id": f"{SITES[site_id]['url']}/#localbusiness",
-                    "name": biz["name"],
-                    "url": SITES[site_id]["url"],
-                    "description": biz["description"],
-                    "telephone": biz["telephone"],
-                    "email": biz.get("email", ""),
-                    "address": {
-                        "@type": "PostalAddress",
-                        **biz["address"]
-                    },
-                    "priceRange": biz.get("priceRange", "$$"),
-                    "areaServed": [
-                        {"@type": "City", "name": city}
-                        for city in biz.get("areaServed", [])
-                    ],
-                    "hasOfferCatalog": {
-                        "@type": "OfferCatalog",
-                        "name": "Services",
-                        "itemListElement": [
-                            {"@type": "Offer", "itemOffered": {"@type": "Service", "name": svc}}
-                            for svc in biz.get("services", [])
-                        ]
-                    }
-                }
-                # Horaires d'ouverture
-                if biz.get("openingHours"):
-                    local_schema["openingHoursSpecification"] = []
-                    for days, opens, closes in biz["openingHours"]:
-                        local_schema["openingHoursSpecification"].append({
-                            "@type": "OpeningHoursSpecification",
-                            "dayOfWeek": days,
-                            "opens": opens,
-                            "closes": closes
-                        })
-                # Licence/credential
-                if biz.get("credential"):
-                    local_schema["hasCredential"] = {
-                        "@type": "EducationalOccupationalCredential",
-                        "credentialCategory": "license",
-                        "name": biz["credential"]
-                    }
-                # AggregateRating
-                if biz.get("rating"):
-                    local_schema["aggregateRating"] = {
-                        "@type": "AggregateRating",
-                        **biz["rating"]
-                    }
-                # Reseaux sociaux
-                if biz.get("sameAs"):
-                    local_schema["sameAs"] = biz["sameAs"]
-                if biz.get("alternateName"):
-                    local_schema["alternateName"] = biz["alternateName"]
-
-                schema_json = json.dumps(local_schema, indent=2, ensure_ascii=False)
-                schema_tag = f'\n    <script type="application/ld+json">\n{schema_json}\n    </script>'
-                new_content = new_content.replace('</head>', f'{schema_tag}\n</head>')
-                modified = True
-                issues.append(self._record_and_return(
-                    site_id, "schema_local_business", "critical",
-                    f"Schema LocalBusiness+AggregateRating AUTO-INJECTE: {file_path}",
-                    "auto", file_path,
-                    f"JSON-LD LocalBusiness avec {len(biz.get('services',[]))} services, rating, horaires",
-                    auto_fixed=True
-                ))
-                logger.info(f"AUTO-FIX Schema LocalBusiness injecte dans {file_path}")
-
-        elif 'application/ld+json' not in content:
-            # Pas de JSON-LD du tout sur page non-principale — CONFIRM
-            schema_example = json.dumps({
-                "@context": "https://schema.org",
-                "@type": "Organization",
-                "name": SITES[site_id]["domain"],
-                "url": SITES[site_id].get("url", f"https://{SITES[site_id]['domain']}")
-            }, indent=2)
-            fix_cmd = f'# Ajouter avant </head> dans {file_path}:\n<script type="application/ld+json">\n{schema_example}\n</script>'
-            issues.append(self._record_and_return(
-                site_id, "schema_markup", "high",
-                f"Schema markup (JSON-LD) manquant: {file_path}",
-                "confirm", file_path, fix_cmd,
-                auto_fixed=False
-            ))
-
-        # ---- DETECT: Liens internes insuffisants (page principale) ----
-        if is_main_page:
-            internal_links = re.findall(
-                r'<a[^>]+href=["\'](?!#|tel:|mailto:|https?://|javascript:)([^"\'>\s]+)["\']',
-                content, re.IGNORECASE
-            )
-            unique_links = set(internal_links)
-            if len(unique_links) < 5:
-                issues.append(self._record_and_return(
-                    site_id, "internal_links_low", "high",
-                    f"Seulement {len(unique_links)} liens internes uniques (min 5): {file_path}",
-                    "confirm", file_path,
-                    f"Liens trouves: {', '.join(list(unique_links)[:10])}. Ajouter liens vers pages cles.",
-                    auto_fixed=False
-                ))
-
-        # ---- DETECT: Listes structurees <ul>/<li> absentes (page principale) ----
-        if is_main_page:
-            has_lists = '<ul' in content.lower() or '<ol' in content.lower()
-            if not has_lists:
-                issues.append(self._record_and_return(
-                    site_id, "no_structured_lists", "high",
-                    f"Aucune liste structuree <ul>/<li> trouvee: {file_path}",
-                    "confirm", file_path,
-                    "Convertir les grilles de services/features en <ul><li> pour SEO semantique",
-                    auto_fixed=False
-                ))
-
-        # ---- CONFIRM: Open Graph manquant ----
-        if 'og:title' not in content and 'og:description' not in content:
-            fix_cmd = f"""# Ajouter dans <head> de {file_path}:
-<meta property="og:title" content="TITRE_PAGE">
-<meta property="og:description" content="DESCRIPTION_PAGE">
-<meta property="og:type" content="website">
-<meta property="og:url" content="URL_PAGE">
-<meta property="og:image" content="URL_IMAGE">"""
-            issues.append(self._record_and_return(
-                site_id, "open_graph", "medium",
-                f"Open Graph meta tags manquants: {file_path}",
-                "confirm", file_path, fix_cmd,
-                auto_fixed=False
-            ))
-
-        # ---- CONFIRM: Alt text manquant sur images ----
-        img_no_alt = re.findall(r'<img\s+(?![^>]*alt=)[^>]*>', content, re.IGNORECASE)
-        if img_no_alt:
-            fix_cmd = f"# {len(img_no_alt)} images sans alt dans {file_path}\n# Ajouter alt='description' sur chaque image"
-            issues.append(self._record_and_return(
-                site_id, "img_alt", "high",
-                f"{len(img_no_alt)} images sans attribut alt: {file_path}",
-                "confirm", file_path, fix_cmd,
-                auto_fixed=False
-            ))
-
-        # ---- CONFIRM: Canonical URL manquant ----
-        if '<link rel="canonical"' not in content:
-            fix_cmd = f'# Ajouter dans <head> de {file_path}:\n<link rel="canonical" href="URL_DE_LA_PAGE">'
-            issues.append(self._record_and_return(
-                site_id, "canonical", "medium",
-                f"Canonical URL manquant: {file_path}",
-                "confirm", file_path, fix_cmd,
-                auto_fixed=False
-            ))
-
-        # Sauvegarder les auto-fix
-        if modified:
-            self._backup_file(site_id, file_path)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            logger.info(f"AUTO-FIX applique: {file_path}")
+            issues.append({
+                "id": issue_id,
+                "check_type": spec["check_type"],
+                "severity": spec["severity"],
+                "message": spec["message"],
+                "fix_level": spec["fix_level"],
+                "auto_fixed": spec["auto_fixed"]
+            })
+        if rewrite is not None:
+            self._backup_file(site_id, file_path, conn=conn)
+            asset_pipeline.write_site_file(file_path, rewrite.text)
+            rewrite_id = html_rewriter.record(conn, rewrite, 'self_audit')
+            logger.info(f"AUTO-FIX applique: {file_path} ({len(rewrite.edits)} modifications, reecriture #{rewrite_id})")
+        return issues
 
+    def _audit_html(self, site_id: str, file_path: str, content: str) -> List[Dict]:
+        """Audit complet d'un fichier HTML — auto-fix ou alerte"""
+        specs, rewrite = analyze_html(site_id, file_path, content)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            issues = self._apply_audit(conn, site_id, file_path, specs, rewrite)
+            conn.commit()
+        finally:
+            conn.close()
         return issues
 
     def _record_and_return(self, site_id: str, check_type: str, severity: str,
@@ -837,7 +1016,7 @@ class SelfAuditAgent:
     # AUDIT COMPLET D'UN SITE
     # =========================================
 
-    def full_audit(self, site_id: str) -> Dict:
+    def full_audit(self, site_id: str, workers: Optional[int] = None) -> Dict:
         """Audit complet: fichiers locaux + site live"""
         logger.info(f"=== AUDIT COMPLET: {site_id} ===")
         start = datetime.now()
@@ -852,7 +1031,7 @@ class SelfAuditAgent:
         }
 
         # Audit fichiers HTML locaux
-        results["html_audit"] = self.check_html_files(site_id)
+        results["html_audit"] = self.check_html_files(site_id, workers=workers)
 
         # Audit site live
         results["live_audit"] = self.check_live_site(site_id)
@@ -895,10 +1074,23 @@ class SelfAuditAgent:
         return results
 
     def full_audit_all(self) -> Dict:
-        """Audit complet de TOUS les sites"""
+        """Audit complet de TOUS les sites, en parallele (le check live attend surtout le reseau)"""
+        from concurrent.futures import ThreadPoolExecutor
+        workers = max(1, AUDIT_WORKERS // len(SITES))
+        with ThreadPoolExecutor(max_workers=len(SITES)) as pool:
+            futures = {site_id: pool.submit(self.full_audit, site_id, workers) for site_id in SITES}
         results = {}
-        for site_id in SITES:
-            results[site_id] = self.full_audit(site_id)
+        for site_id, future in futures.items():
+            try:
+                results[site_id] = future.result()
+            except Exception as e:
+                # Un site en echec n'empeche pas le rapport des autres
+                logger.error(f"Erreur audit {site_id}: {e}")
+                results[site_id] = {
+                    "site_id": site_id,
+                    "domain": SITES.get(site_id, {}).get("domain", "inconnu"),
+                    "error": str(e)
+                }
         return results
 
     # =========================================
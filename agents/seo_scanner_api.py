@@ -4,9 +4,9 @@ SEO Scanner API - Scanner STRICT pour seoparai.com
 Analyse complète SEO + AI-readiness - SCORING SÉVÈRE
 """
 
+import os
+import hmac
 import requests
-import json
-import re
 import ssl
 import socket
 from datetime import datetime
@@ -15,12 +15,45 @@ from bs4 import BeautifulSoup
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import concurrent.futures
+import threading
 import time
+from collections import Counter
 from scanner_helpers import save_lead, send_report_email, get_ai_analysis, generate_html_report
+import scan_cache
+import scanner_rules
+import site_crawler
+import job_queue
 
 app = Flask(__name__)
 CORS(app)
 
+CATEGORIES = ['seo_classic', 'seo_technique', 'ai_readiness', 'content_quality']
+# Checks qui dépendent du site et non de la page: évalués une fois (accueil) en mode crawl
+SITE_WIDE_CHECKS = {'HTTPS/SSL Valide', 'Robots.txt Configuré', 'Sitemap.xml avec URLs',
+                    'Bots AI Autorisés (8 requis)', 'Fichier llms.txt Complet'}
+MAX_CRAWL_PAGES = 5000
+MAX_CRAWL_DEPTH = 10
+# Sans clé (X-Scan-Key = SEO_SCANNER_CRAWL_KEY), un crawl public reste petit
+MAX_PUBLIC_CRAWL_PAGES = 50
+MAX_PUBLIC_CRAWL_DEPTH = 3
+CRAWL_KEY = os.getenv('SEO_SCANNER_CRAWL_KEY', '')
+CRAWL_WORKERS = 2               # crawls exécutés en parallèle par le worker embarqué
+CRAWL_PROGRESS_EVERY = 10       # pages entre deux mises à jour de la progression du job
+MAIL_WORKERS = 2
+
+_mail_pool = concurrent.futures.ThreadPoolExecutor(max_workers=MAIL_WORKERS, thread_name_prefix='scan-mail')
+
+
+def grade_for_score(score):
+    """Grade STRICT d'un score sur 100"""
+    if score >= 90: return 'A+'
+    if score >= 80: return 'A'
+    if score >= 70: return 'B'
+    if score >= 55: return 'C'
+    if score >= 40: return 'D'
+    return 'F'
+
+
 class SEOScanner:
     """Scanner SEO STRICT avec focus AI-readiness"""
 
@@ -42,6 +75,37 @@ class SEOScanner:
         }
         self.html = None
         self.soup = None
+        self.load_time = None
+        # robots.txt, sitemap.xml, llms.txt, SSL: une requête par scan, partagée entre
+        # catégories et entre les pages d'un crawl (voir for_page)
+        self._site_cache = {}
+        self._site_locks = {}
+        self._site_lock = threading.Lock()
+
+    def for_page(self, url, html, load_time=None):
+        """Scanner d'une page du même site: ressources du site partagées, page déjà récupérée"""
+        page = SEOScanner(self.domain)
+        page.base_url = self.base_url
+        page._site_cache, page._site_locks, page._site_lock = self._site_cache, self._site_locks, self._site_lock
+        page.html = html
+        page.soup = BeautifulSoup(html, 'html.parser')
+        page.final_url = url
+        page.load_time = load_time
+        return page
+
+    def _shared(self, key, loader):
+        """Valeur de site calculée une seule fois (un verrou par clé: fetchs distincts en parallèle)"""
+        with self._site_lock:
+            if key in self._site_cache:
+                return self._site_cache[key]
+            lock = self._site_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._site_cache:
+                self._site_cache[key] = loader()
+            return self._site_cache[key]
+
+    def _site_file(self, path):
+        return self._shared(path, lambda: self.fetch_page(f"{self.base_url}{path}"))
 
     def fetch_page(self, url, timeout=15):
         """Récupère une page web"""
@@ -66,10 +130,12 @@ class SEOScanner:
         """Lance le scan complet"""
         print(f"[SCAN] Démarrage scan STRICT: {self.domain}")
 
-        # Récupérer la page d'accueil
+        # Récupérer la page d'accueil (le temps de chargement sert au check Vitesse)
+        start_time = time.time()
         resp = self.fetch_page(self.base_url)
         if not resp:
             resp = self.fetch_page(f"http://{self.domain}")
+        self.load_time = time.time() - start_time
 
         if not resp or resp.status_code != 200:
             self.results['error'] = f"Site inaccessible (Status: {resp.status_code if resp else 'N/A'})"
@@ -81,20 +147,7 @@ class SEOScanner:
         self.final_url = resp.url
 
         # Exécuter tous les scans
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {
-                executor.submit(self.scan_seo_classic): 'seo_classic',
-                executor.submit(self.scan_seo_technique): 'seo_technique',
-                executor.submit(self.scan_ai_readiness): 'ai_readiness',
-                executor.submit(self.scan_content_quality): 'content_quality',
-            }
-
-            for future in concurrent.futures.as_completed(futures):
-                category = futures[future]
-                try:
-                    self.results[category] = future.result()
-                except Exception as e:
-                    self.results[category] = {'error': str(e)}
+        self.run_checks(parallel=True)
 
         # Calculer les scores STRICTS
         self.calculate_strict_scores()
@@ -104,269 +157,107 @@ class SEOScanner:
 
         return self.results
 
+    def run_checks(self, parallel=False):
+        """Exécute les 4 catégories en un seul parcours de la page (scanner_rules).
+        parallel: ressources du site (robots.txt, sitemap, llms.txt, SSL) préchargées en parallèle;
+        inutile pour les pages d'un crawl, qui les partagent déjà"""
+        resources = scanner_rules.ENGINE.prefetch(self) if parallel else None
+        self.results.update(scanner_rules.ENGINE.run(self, resources=resources))
+
     # ==========================================
-    # SEO CLASSIQUE - STRICT
+    # MODE CRAWL - AUDIT MULTI-PAGES
     # ==========================================
-    def scan_seo_classic(self):
-        """Analyse SEO classique STRICTE"""
-        results = {'checks': [], 'passed': 0, 'failed': 0, 'warnings': 0}
-
-        # Title - STRICT: doit être entre 50-60 chars
-        title_tag = self.soup.find('title')
-        title = title_tag.text.strip() if title_tag else None
-        title_len = len(title) if title else 0
-        title_status = 'pass' if title and 50 <= title_len <= 60 else 'warning' if title and 30 <= title_len < 50 else 'fail'
-        results['checks'].append({
-            'name': 'Meta Title Optimisé',
-            'status': title_status,
-            'value': title[:80] if title else None,
-            'details': f'{title_len} caractères (optimal: 50-60)' if title else 'MANQUANT - Critique pour SEO',
-            'importance': 'critical',
-            'recommendation': 'Titre entre 50-60 caractères avec mot-clé principal au début' if title_status != 'pass' else None
-        })
-
-        # Meta Description - STRICT: doit être entre 150-160 chars
-        meta_desc = self.soup.find('meta', attrs={'name': 'description'})
-        desc = meta_desc.get('content', '').strip() if meta_desc else None
-        desc_len = len(desc) if desc else 0
-        desc_status = 'pass' if desc and 150 <= desc_len <= 160 else 'warning' if desc and 100 <= desc_len < 150 else 'fail'
-        results['checks'].append({
-            'name': 'Meta Description Optimisée',
-            'status': desc_status,
-            'value': desc[:200] if desc else None,
-            'details': f'{desc_len} caractères (optimal: 150-160)' if desc else 'MANQUANTE - Perte de clics',
-            'importance': 'critical',
-            'recommendation': 'Description 150-160 caractères avec call-to-action et mot-clé' if desc_status != 'pass' else None
-        })
-
-        # H1 - STRICT: exactement 1, avec mot-clé
-        h1_tags = self.soup.find_all('h1')
-        h1_count = len(h1_tags)
-        h1_text = h1_tags[0].text.strip()[:100] if h1_tags else None
-        h1_status = 'pass' if h1_count == 1 else 'fail'
-        results['checks'].append({
-            'name': 'Balise H1 Unique',
-            'status': h1_status,
-            'value': h1_text,
-            'details': f'{h1_count} H1 trouvé(s) - doit être exactement 1' if h1_count != 1 else 'OK - 1 H1 unique',
-            'importance': 'critical',
-            'recommendation': 'Exactement 1 H1 par page avec mot-clé principal' if h1_status != 'pass' else None
-        })
-
-        # H2 Structure - STRICT: minimum 3 H2
-        h2_tags = self.soup.find_all('h2')
-        h2_count = len(h2_tags)
-        h2_status = 'pass' if h2_count >= 3 else 'warning' if h2_count >= 1 else 'fail'
-        results['checks'].append({
-            'name': 'Structure H2 (min 3)',
-            'status': h2_status,
-            'value': f'{h2_count} H2 trouvés',
-            'details': f'{h2_count}/3 minimum requis',
-            'importance': 'high',
-            'recommendation': f'Ajouter {3 - h2_count} sous-titres H2 pour structurer le contenu' if h2_status != 'pass' else None
-        })
-
-        # Images ALT - STRICT: 100% requis
-        images = self.soup.find_all('img')
-        images_with_alt = [img for img in images if img.get('alt') and len(img.get('alt', '').strip()) > 5]
-        img_count = len(images)
-        alt_count = len(images_with_alt)
-        img_score = (alt_count / img_count * 100) if img_count > 0 else 100
-        img_status = 'pass' if img_score == 100 else 'warning' if img_score >= 80 else 'fail'
-        results['checks'].append({
-            'name': 'Images avec ALT descriptif',
-            'status': img_status,
-            'value': f'{alt_count}/{img_count}',
-            'details': f'{img_score:.0f}% - TOUTES les images doivent avoir un ALT descriptif',
-            'importance': 'high',
-            'recommendation': f'Ajouter ALT descriptif à {img_count - alt_count} images' if img_status != 'pass' else None
-        })
-
-        # Internal Links - STRICT: minimum 5
-        links = self.soup.find_all('a', href=True)
-        internal_links = [l for l in links if self.domain in l.get('href', '') or l.get('href', '').startswith('/')]
-        int_count = len(internal_links)
-        link_status = 'pass' if int_count >= 5 else 'warning' if int_count >= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Maillage Interne (min 5)',
-            'status': link_status,
-            'value': f'{int_count} liens internes',
-            'details': f'{int_count}/5 minimum requis pour bon maillage',
-            'importance': 'high',
-            'recommendation': f'Ajouter {5 - int_count} liens internes vers pages importantes' if link_status != 'pass' else None
-        })
-
-        # Canonical
-        canonical = self.soup.find('link', rel='canonical')
-        canonical_url = canonical.get('href') if canonical else None
-        can_status = 'pass' if canonical_url else 'fail'
-        results['checks'].append({
-            'name': 'URL Canonique',
-            'status': can_status,
-            'value': canonical_url[:80] if canonical_url else None,
-            'details': 'Définie' if canonical_url else 'MANQUANTE - Risque contenu dupliqué',
-            'importance': 'high',
-            'recommendation': 'Ajouter <link rel="canonical"> pour éviter duplication' if can_status != 'pass' else None
-        })
-
-        # Open Graph - STRICT: tous les 4 requis
-        og_tags = self.soup.find_all('meta', property=re.compile('^og:'))
-        og_found = [tag.get('property') for tag in og_tags]
-        og_required = ['og:title', 'og:description', 'og:image', 'og:url']
-        og_missing = [t for t in og_required if t not in og_found]
-        og_status = 'pass' if len(og_missing) == 0 else 'warning' if len(og_missing) <= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Open Graph Complet',
-            'status': og_status,
-            'value': f'{4 - len(og_missing)}/4 tags',
-            'details': f'Manquants: {", ".join(og_missing)}' if og_missing else 'Tous les tags présents',
-            'importance': 'medium',
-            'recommendation': f'Ajouter: {", ".join(og_missing)}' if og_status != 'pass' else None
-        })
-
-        # Twitter Cards
-        twitter_tags = self.soup.find_all('meta', attrs={'name': re.compile('^twitter:')})
-        tw_count = len(twitter_tags)
-        tw_status = 'pass' if tw_count >= 4 else 'warning' if tw_count >= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Twitter Cards',
-            'status': tw_status,
-            'value': f'{tw_count} tags',
-            'details': f'{tw_count}/4 tags recommandés',
-            'importance': 'low',
-            'recommendation': 'Ajouter twitter:card, twitter:title, twitter:description, twitter:image' if tw_status != 'pass' else None
-        })
+    def run_crawl(self, max_pages=100, max_depth=3, workers=8, per_host=4, max_seconds=600, memory_mb=256,
+                  progress=None):
+        """Scan complet de l'accueil + crawl borné du site: chaque page passe par les mêmes checks,
+        seul un résumé compact est conservé (scores par page + agrégats site).
+        progress(pourcentage, message): appelé toutes les CRAWL_PROGRESS_EVERY pages (job_queue)"""
+        self.run_full_scan()
+        if self.results.get('error'):
+            return self.results
 
-        # Count
-        for check in results['checks']:
-            if check['status'] == 'pass': results['passed'] += 1
-            elif check['status'] == 'fail': results['failed'] += 1
-            else: results['warnings'] += 1
+        robots = self._site_file('/robots.txt')
+        report = CrawlReport()
+        crawler = site_crawler.SiteCrawler(
+            self.final_url, self._analyze_page,
+            max_pages=max(1, min(max_pages, MAX_CRAWL_PAGES)), max_depth=max(0, min(max_depth, MAX_CRAWL_DEPTH)),
+            workers=workers, per_host=per_host, max_seconds=max_seconds, memory_mb=memory_mb,
+            robots_txt=robots.text if robots is not None and robots.status_code == 200 else '')
+        print(f"[CRAWL] {self.domain}: max {crawler.max_pages} pages, profondeur {crawler.max_depth}")
+        for page in crawler.crawl():
+            report.add(page)
+            if progress and crawler.stats['pages'] % CRAWL_PROGRESS_EVERY == 0:
+                done = crawler.stats['pages']
+                progress(5 + 90 * min(done, crawler.max_pages) / crawler.max_pages, f'{done} pages analysées')
+
+        # Les scores / grade / recommandations de premier niveau deviennent ceux du site;
+        # le détail par catégorie reste celui de l'accueil
+        self.results['homepage'] = {'url': self.final_url, 'scores': self.results['scores'], 'grade': self.results['grade'],
+                                    'recommendations': self.results['recommendations']}
+        self.results['site'] = report.finish(self.results)
+        self.results['site']['crawl'] = crawler.stats
+        self.results['pages'] = report.pages
+        self.results['scores'] = self.results['site']['scores']
+        self.results['grade'] = self.results['site']['grade']
+        self.results['recommendations'] = self.results['site']['recommendations']
+        print(f"[CRAWL] {self.domain}: {crawler.stats['pages']} pages en {crawler.stats['elapsed_s']}s "
+              f"- score site {self.results['scores'].get('total', 0)}")
+        return self.results
 
-        return results
+    def _analyze_page(self, url, html, load_time, depth):
+        """Appelé par le crawler (threads): checks de la page -> (résumé compact, liens à suivre)"""
+        page = self.for_page(url, html, load_time)
+        parsed = scanner_rules.ENGINE.page(page)
+        page.results.update(scanner_rules.ENGINE.run(page, page=parsed))
+        page.calculate_strict_scores()
+
+        robots_meta = parsed.first('meta_robots')
+        directives = robots_meta.get('content', '').lower() if robots_meta else ''
+        title_tag = parsed.first('title')
+        meta_desc = parsed.first('meta_description')
+        summary = {
+            'url': url,
+            'depth': depth,
+            'status': 200,
+            'load_time': round(load_time, 2),
+            'scores': page.results['scores'],
+            'grade': page.results['grade'],
+            'title': title_tag.text.strip()[:120] if title_tag else '',
+            'description': meta_desc.get('content', '').strip()[:200] if meta_desc else '',
+            'noindex': 'noindex' in directives,
+            'checks': [(cat, c['name'], c['status'], c.get('importance', 'medium'), c.get('recommendation'))
+                       for cat in CATEGORIES for c in page.results.get(cat, {}).get('checks', [])
+                       if c['name'] not in SITE_WIDE_CHECKS],
+        }
+        if 'nofollow' in directives:
+            return summary, []
+        links = [a['href'] for a in parsed.all('links') if 'nofollow' not in (a.get('rel') or [])]
+        return summary, links
 
     # ==========================================
-    # SEO TECHNIQUE - STRICT
+    # CHECKS - moteur de règles (scanner_rules)
     # ==========================================
+    def scan_seo_classic(self):
+        """Analyse SEO classique STRICTE"""
+        return self._scan_category('seo_classic')
+
     def scan_seo_technique(self):
         """Analyse SEO technique STRICTE"""
-        results = {'checks': [], 'passed': 0, 'failed': 0, 'warnings': 0}
-
-        # SSL/HTTPS - STRICT: obligatoire
-        is_https = self.final_url.startswith('https')
-        ssl_info = self.check_ssl()
-        ssl_valid = ssl_info.get('valid', False)
-        days = ssl_info.get('days_remaining', 0)
-        ssl_status = 'pass' if is_https and ssl_valid and days > 30 else 'warning' if is_https and ssl_valid else 'fail'
-        results['checks'].append({
-            'name': 'HTTPS/SSL Valide',
-            'status': ssl_status,
-            'value': ssl_info,
-            'details': f"SSL valide, expire dans {days} jours" if ssl_valid else 'SSL INVALIDE ou ABSENT - CRITIQUE',
-            'importance': 'critical',
-            'recommendation': 'Installer certificat SSL valide immédiatement' if ssl_status == 'fail' else 'Renouveler SSL avant expiration' if ssl_status == 'warning' else None
-        })
-
-        # Robots.txt - STRICT
-        robots_resp = self.fetch_page(f"{self.base_url}/robots.txt")
-        robots_exists = robots_resp and robots_resp.status_code == 200
-        robots_content = robots_resp.text if robots_exists else None
-        robots_status = 'pass' if robots_exists and len(robots_content or '') > 20 else 'fail'
-        results['checks'].append({
-            'name': 'Robots.txt Configuré',
-            'status': robots_status,
-            'value': robots_content[:300] if robots_content else None,
-            'details': f'{len(robots_content or "")} caractères' if robots_exists else 'MANQUANT - Les bots ne savent pas quoi indexer',
-            'importance': 'critical',
-            'recommendation': 'Créer robots.txt avec règles pour moteurs et bots AI' if robots_status != 'pass' else None
-        })
-
-        # Sitemap.xml - STRICT
-        sitemap_resp = self.fetch_page(f"{self.base_url}/sitemap.xml")
-        sitemap_exists = sitemap_resp and sitemap_resp.status_code == 200
-        sitemap_urls = len(re.findall(r'<loc>', sitemap_resp.text)) if sitemap_exists else 0
-        sitemap_status = 'pass' if sitemap_exists and sitemap_urls >= 3 else 'warning' if sitemap_exists else 'fail'
-        results['checks'].append({
-            'name': 'Sitemap.xml avec URLs',
-            'status': sitemap_status,
-            'value': f'{sitemap_urls} URLs',
-            'details': f'{sitemap_urls} pages indexées' if sitemap_exists else 'MANQUANT - Google ne trouve pas vos pages',
-            'importance': 'critical',
-            'recommendation': 'Créer sitemap.xml avec toutes les pages importantes' if sitemap_status != 'pass' else None
-        })
+        return self._scan_category('seo_technique')
 
-        # Page Speed - STRICT: < 2s
-        start_time = time.time()
-        _ = self.fetch_page(self.base_url)
-        load_time = time.time() - start_time
-        speed_status = 'pass' if load_time < 2 else 'warning' if load_time < 3 else 'fail'
-        results['checks'].append({
-            'name': 'Vitesse < 2 secondes',
-            'status': speed_status,
-            'value': f'{load_time:.2f}s',
-            'details': 'Rapide' if load_time < 2 else 'LENT - Perte de visiteurs' if load_time >= 3 else 'Acceptable',
-            'importance': 'critical',
-            'recommendation': 'Optimiser images, activer compression, utiliser CDN' if speed_status != 'pass' else None
-        })
-
-        # Mobile Viewport - STRICT
-        viewport = self.soup.find('meta', attrs={'name': 'viewport'})
-        vp_content = viewport.get('content', '') if viewport else ''
-        vp_status = 'pass' if viewport and 'width=device-width' in vp_content else 'fail'
-        results['checks'].append({
-            'name': 'Mobile Viewport Correct',
-            'status': vp_status,
-            'value': vp_content[:80] if vp_content else None,
-            'details': 'Configuré correctement' if vp_status == 'pass' else 'MANQUANT - Site non mobile-friendly',
-            'importance': 'critical',
-            'recommendation': 'Ajouter <meta name="viewport" content="width=device-width, initial-scale=1">' if vp_status != 'pass' else None
-        })
-
-        # HTML Lang
-        html_tag = self.soup.find('html')
-        lang = html_tag.get('lang') if html_tag else None
-        lang_status = 'pass' if lang and len(lang) >= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Attribut lang HTML',
-            'status': lang_status,
-            'value': lang,
-            'details': f'Langue: {lang}' if lang else 'MANQUANT - Problème accessibilité',
-            'importance': 'high',
-            'recommendation': 'Ajouter lang="fr" à la balise <html>' if lang_status != 'pass' else None
-        })
-
-        # Charset UTF-8
-        charset = self.soup.find('meta', charset=True)
-        charset_val = charset.get('charset', '').upper() if charset else None
-        charset_status = 'pass' if charset_val == 'UTF-8' else 'warning' if charset else 'fail'
-        results['checks'].append({
-            'name': 'Encodage UTF-8',
-            'status': charset_status,
-            'value': charset_val,
-            'details': 'UTF-8 correct' if charset_status == 'pass' else 'Encodage incorrect ou manquant',
-            'importance': 'medium',
-            'recommendation': 'Ajouter <meta charset="UTF-8"> en premier dans <head>' if charset_status != 'pass' else None
-        })
-
-        # Favicon
-        favicon = self.soup.find('link', rel=re.compile('icon'))
-        fav_status = 'pass' if favicon else 'warning'
-        results['checks'].append({
-            'name': 'Favicon',
-            'status': fav_status,
-            'value': favicon.get('href')[:60] if favicon else None,
-            'details': 'Présent' if favicon else 'Manquant - Mauvaise image de marque',
-            'importance': 'low',
-            'recommendation': 'Ajouter favicon pour branding' if fav_status != 'pass' else None
-        })
+    def scan_ai_readiness(self):
+        """Analyse AI-readiness TRÈS STRICTE"""
+        return self._scan_category('ai_readiness')
 
-        # Count
-        for check in results['checks']:
-            if check['status'] == 'pass': results['passed'] += 1
-            elif check['status'] == 'fail': results['failed'] += 1
-            else: results['warnings'] += 1
+    def scan_content_quality(self):
+        """Analyse qualité du contenu STRICTE"""
+        return self._scan_category('content_quality')
 
-        return results
+    def _scan_category(self, category):
+        result = scanner_rules.ENGINE.run(self, [category])[category]
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+        return result
 
     def check_ssl(self):
         """Vérifie le certificat SSL"""
@@ -386,348 +277,15 @@ class SEOScanner:
         except Exception as e:
             return {'valid': False, 'error': str(e)}
 
-    # ==========================================
-    # AI READINESS - TRÈS STRICT!!!
-    # ==========================================
-    def scan_ai_readiness(self):
-        """Analyse AI-readiness TRÈS STRICTE"""
-        results = {'checks': [], 'passed': 0, 'failed': 0, 'warnings': 0, 'ai_score': 0}
-
-        # 1. Robots.txt - AI Bots - STRICT: tous doivent être autorisés explicitement
-        robots_resp = self.fetch_page(f"{self.base_url}/robots.txt")
-        robots_content = robots_resp.text.lower() if robots_resp and robots_resp.status_code == 200 else ''
-
-        ai_bots_check = {
-            'GPTBot': self._check_bot_allowed(robots_content, 'gptbot'),
-            'ChatGPT-User': self._check_bot_allowed(robots_content, 'chatgpt-user'),
-            'ClaudeBot': self._check_bot_allowed(robots_content, 'claudebot'),
-            'Claude-Web': self._check_bot_allowed(robots_content, 'claude-web'),
-            'PerplexityBot': self._check_bot_allowed(robots_content, 'perplexitybot'),
-            'Cohere-AI': self._check_bot_allowed(robots_content, 'cohere'),
-            'Google-Extended': self._check_bot_allowed(robots_content, 'google-extended'),
-            'Anthropic-AI': self._check_bot_allowed(robots_content, 'anthropic'),
-        }
-
-        blocked = [b for b, allowed in ai_bots_check.items() if not allowed]
-        allowed = [b for b, allowed in ai_bots_check.items() if allowed]
-
-        # STRICT: Tous les bots doivent être autorisés
-        bot_status = 'pass' if len(blocked) == 0 else 'warning' if len(blocked) <= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Bots AI Autorisés (8 requis)',
-            'status': bot_status,
-            'value': {'allowed': allowed, 'blocked': blocked},
-            'details': f'{len(allowed)}/8 bots autorisés' + (f' - BLOQUÉS: {", ".join(blocked)}' if blocked else ''),
-            'importance': 'critical',
-            'recommendation': f'Autoriser explicitement dans robots.txt: {", ".join(blocked)}' if blocked else None,
-            'ai_impact': 'ChatGPT, Claude et Perplexity NE PEUVENT PAS recommander votre site' if blocked else 'Tous les AI peuvent indexer votre site'
-        })
-
-        # 2. LLMs.txt - STRICT: obligatoire et bien formaté
-        llms_resp = self.fetch_page(f"{self.base_url}/llms.txt")
-        llms_exists = llms_resp and llms_resp.status_code == 200
-        llms_content = llms_resp.text if llms_exists else None
-        llms_good = llms_exists and len(llms_content or '') > 200 and '#' in (llms_content or '')
-        llms_status = 'pass' if llms_good else 'warning' if llms_exists else 'fail'
-        results['checks'].append({
-            'name': 'Fichier llms.txt Complet',
-            'status': llms_status,
-            'value': llms_content[:500] if llms_content else None,
-            'details': 'Bien formaté avec sections' if llms_good else 'Existe mais incomplet' if llms_exists else 'MANQUANT - Opportunité critique manquée',
-            'importance': 'critical',
-            'recommendation': 'Créer llms.txt détaillé avec services, FAQ, contact' if llms_status != 'pass' else None,
-            'ai_impact': 'Les AI utilisent ce fichier pour MIEUX comprendre et recommander votre site'
-        })
-
-        # 3. Schema.org - STRICT: LocalBusiness OU Organization requis + FAQPage
-        schema_scripts = self.soup.find_all('script', type='application/ld+json')
-        schema_types = []
-        for script in schema_scripts:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, dict):
-                    t = data.get('@type', '')
-                    if isinstance(t, list):
-                        schema_types.extend([str(x) for x in t])
-                    else:
-                        schema_types.append(str(t))
-                elif isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict):
-                            t = item.get('@type', '')
-                            if isinstance(t, list):
-                                schema_types.extend([str(x) for x in t])
-                            else:
-                                schema_types.append(str(t))
-            except:
-                pass
-
-        has_business = any(t in schema_types for t in ['LocalBusiness', 'Organization', 'Corporation', 'Service'])
-        has_faq = 'FAQPage' in schema_types
-        has_webpage = 'WebPage' in schema_types or 'WebSite' in schema_types
-
-        schema_score = sum([has_business, has_faq, has_webpage])
-        schema_status = 'pass' if schema_score >= 2 else 'warning' if schema_score >= 1 else 'fail'
-
-        missing = []
-        if not has_business: missing.append('LocalBusiness/Organization')
-        if not has_faq: missing.append('FAQPage')
-
-        results['checks'].append({
-            'name': 'Schema.org (Business + FAQ)',
-            'status': schema_status,
-            'value': schema_types,
-            'details': f'{len(schema_types)} schemas: {", ".join(schema_types[:4])}' if schema_types else 'AUCUN SCHEMA - Invisible pour AI',
-            'importance': 'critical',
-            'recommendation': f'Ajouter Schema: {", ".join(missing)}' if missing else None,
-            'ai_impact': 'Les AI utilisent Schema.org pour comprendre votre entreprise et l\'afficher dans les résultats'
-        })
-
-        # 4. FAQ Structurée - STRICT: FAQPage schema requis
-        faq_status = 'pass' if has_faq else 'fail'
-        results['checks'].append({
-            'name': 'FAQ avec Schema FAQPage',
-            'status': faq_status,
-            'value': 'FAQPage présent' if has_faq else None,
-            'details': 'FAQ optimisée pour AI' if has_faq else 'MANQUANT - Vos FAQ n\'apparaissent pas dans ChatGPT',
-            'importance': 'critical',
-            'recommendation': 'Ajouter FAQPage Schema avec questions/réponses' if not has_faq else None,
-            'ai_impact': 'Les FAQ avec Schema apparaissent DIRECTEMENT dans les réponses ChatGPT et Google'
-        })
-
-        # 5. Contenu Substantiel - STRICT: min 500 mots
-        paragraphs = self.soup.find_all('p')
-        word_count = sum(len(p.text.split()) for p in paragraphs)
-        has_lists = len(self.soup.find_all(['ul', 'ol'])) >= 2
-
-        content_status = 'pass' if word_count >= 500 and has_lists else 'warning' if word_count >= 300 else 'fail'
-        results['checks'].append({
-            'name': 'Contenu Riche (min 500 mots)',
-            'status': content_status,
-            'value': {'words': word_count, 'has_lists': has_lists},
-            'details': f'{word_count} mots, listes: {"oui" if has_lists else "non"}',
-            'importance': 'critical',
-            'recommendation': f'Ajouter {500 - word_count} mots de contenu structuré avec listes' if word_count < 500 else None,
-            'ai_impact': 'Plus de contenu = plus de contexte = plus de chances d\'être recommandé'
-        })
-
-        # 6. Informations NAP Claires - STRICT
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        phone_pattern = r'[\+]?[(]?[0-9]{1,3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4}'
-        emails = list(set(re.findall(email_pattern, self.html)))
-        phones = list(set(re.findall(phone_pattern, self.html)))
-
-        nap_status = 'pass' if emails and phones else 'warning' if emails or phones else 'fail'
-        results['checks'].append({
-            'name': 'Contact Visible (Email + Tél)',
-            'status': nap_status,
-            'value': {'emails': emails[:2], 'phones': phones[:2]},
-            'details': f'Email: {"oui" if emails else "NON"}, Tél: {"oui" if phones else "NON"}',
-            'importance': 'high',
-            'recommendation': 'Afficher clairement email ET téléphone sur la page' if nap_status != 'pass' else None,
-            'ai_impact': 'Les AI recommandent avec vos coordonnées - invisible = pas de contact'
-        })
-
-        # 7. Meta Description Riche pour AI
-        meta_desc = self.soup.find('meta', attrs={'name': 'description'})
-        desc = meta_desc.get('content', '') if meta_desc else ''
-        desc_words = len(desc.split())
-        desc_status = 'pass' if desc_words >= 20 else 'warning' if desc_words >= 10 else 'fail'
-        results['checks'].append({
-            'name': 'Description Riche pour AI',
-            'status': desc_status,
-            'value': desc[:150],
-            'details': f'{desc_words} mots (min 20 recommandés)',
-            'importance': 'high',
-            'recommendation': 'Écrire description détaillée avec services, lieu, différenciateurs' if desc_status != 'pass' else None,
-            'ai_impact': 'Les AI utilisent la meta description comme résumé principal'
-        })
-
-        # 8. Mentions de Marque
-        brand = self.domain.split('.')[0].lower()
-        brand_count = self.html.lower().count(brand)
-        brand_status = 'pass' if brand_count >= 5 else 'warning' if brand_count >= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Mentions de Marque (min 5)',
-            'status': brand_status,
-            'value': brand_count,
-            'details': f'{brand_count} mentions de "{brand}"',
-            'importance': 'medium',
-            'recommendation': f'Mentionner votre marque "{brand}" au moins 5 fois' if brand_status != 'pass' else None,
-            'ai_impact': 'Aide les AI à associer votre marque à vos services'
-        })
-
-        # 9. NOUVEAU: Données structurées pour services
-        service_keywords = ['service', 'prix', 'tarif', 'offre', 'solution', 'produit']
-        has_service_content = any(kw in self.html.lower() for kw in service_keywords)
-        service_status = 'pass' if has_service_content and has_business else 'warning' if has_service_content else 'fail'
-        results['checks'].append({
-            'name': 'Services Clairement Décrits',
-            'status': service_status,
-            'value': has_service_content,
-            'details': 'Services décrits avec schema' if service_status == 'pass' else 'Services mentionnés' if has_service_content else 'Aucune description de services',
-            'importance': 'high',
-            'recommendation': 'Décrire clairement vos services avec prix et détails' if service_status != 'pass' else None,
-            'ai_impact': 'Les AI ne peuvent pas recommander ce qu\'ils ne comprennent pas'
-        })
-
-        # 10. NOUVEAU: Avis/Témoignages structurés
-        has_reviews = bool(self.soup.find(class_=re.compile('review|testimonial|avis|temoignage', re.I)))
-        review_schema = any(t in schema_types for t in ['Review', 'AggregateRating'])
-        review_status = 'pass' if review_schema else 'warning' if has_reviews else 'fail'
-        results['checks'].append({
-            'name': 'Avis/Témoignages avec Schema',
-            'status': review_status,
-            'value': review_schema,
-            'details': 'Avis avec schema Review' if review_schema else 'Témoignages sans schema' if has_reviews else 'Aucun avis visible',
-            'importance': 'high',
-            'recommendation': 'Ajouter témoignages clients avec schema AggregateRating' if review_status != 'pass' else None,
-            'ai_impact': 'Les avis augmentent la crédibilité et les recommandations AI'
-        })
-
-        # Count
-        for check in results['checks']:
-            if check['status'] == 'pass': results['passed'] += 1
-            elif check['status'] == 'fail': results['failed'] += 1
-            else: results['warnings'] += 1
-
-        # AI Score strict: échecs comptent double
-        total = len(results['checks'])
-        score = ((results['passed'] * 1) + (results['warnings'] * 0.4)) / total * 100
-        results['ai_score'] = int(score)
-
-        return results
-
-    def _check_bot_allowed(self, robots_content, bot_name):
-        """Vérifie si un bot est autorisé dans robots.txt"""
-        if not robots_content:
-            return True  # Pas de robots.txt = tout autorisé par défaut
-
-        # Chercher une règle spécifique pour ce bot
-        lines = robots_content.split('\n')
-        current_agent = None
-
-        for line in lines:
-            line = line.strip().lower()
-            if line.startswith('user-agent:'):
-                current_agent = line.split(':', 1)[1].strip()
-            elif current_agent and (bot_name in current_agent or current_agent == '*'):
-                if line.startswith('disallow:') and line.split(':', 1)[1].strip() == '/':
-                    return False
-                if line.startswith('allow:'):
-                    return True
-
-        return True  # Par défaut autorisé
-
-    # ==========================================
-    # QUALITÉ DU CONTENU - STRICT
-    # ==========================================
-    def scan_content_quality(self):
-        """Analyse qualité du contenu STRICTE"""
-        results = {'checks': [], 'passed': 0, 'failed': 0, 'warnings': 0}
-
-        # Word count - STRICT: min 800 mots
-        text = self.soup.get_text()
-        words = len(text.split())
-        word_status = 'pass' if words >= 800 else 'warning' if words >= 400 else 'fail'
-        results['checks'].append({
-            'name': 'Contenu Substantiel (min 800)',
-            'status': word_status,
-            'value': words,
-            'details': f'{words} mots (min 800 pour bon SEO)',
-            'importance': 'critical',
-            'recommendation': f'Ajouter {800 - words} mots de contenu pertinent' if words < 800 else None
-        })
-
-        # Paragraphes - STRICT
-        paragraphs = self.soup.find_all('p')
-        p_count = len([p for p in paragraphs if len(p.text.split()) > 20])
-        p_status = 'pass' if p_count >= 5 else 'warning' if p_count >= 2 else 'fail'
-        results['checks'].append({
-            'name': 'Paragraphes Développés (min 5)',
-            'status': p_status,
-            'value': p_count,
-            'details': f'{p_count} paragraphes de 20+ mots',
-            'importance': 'high',
-            'recommendation': 'Développer le contenu en paragraphes substantiels' if p_status != 'pass' else None
-        })
-
-        # Call to Action - STRICT
-        cta_patterns = ['contact', 'appel', 'soumission', 'devis', 'gratuit', 'réserv', 'command', 'achet', 'inscri', 'essai']
-        cta_found = [p for p in cta_patterns if p in text.lower()]
-        cta_status = 'pass' if len(cta_found) >= 2 else 'warning' if len(cta_found) >= 1 else 'fail'
-        results['checks'].append({
-            'name': 'Appels à l\'Action (CTA)',
-            'status': cta_status,
-            'value': cta_found,
-            'details': f'{len(cta_found)} CTA trouvés: {", ".join(cta_found[:3])}' if cta_found else 'AUCUN CTA - Pas de conversion',
-            'importance': 'high',
-            'recommendation': 'Ajouter CTAs clairs: "Contactez-nous", "Demandez un devis gratuit"' if cta_status != 'pass' else None
-        })
-
-        # Listes
-        lists = self.soup.find_all(['ul', 'ol'])
-        list_items = sum(len(l.find_all('li')) for l in lists)
-        list_status = 'pass' if list_items >= 6 else 'warning' if list_items >= 3 else 'fail'
-        results['checks'].append({
-            'name': 'Listes Structurées',
-            'status': list_status,
-            'value': list_items,
-            'details': f'{list_items} éléments de liste',
-            'importance': 'medium',
-            'recommendation': 'Ajouter listes à puces pour services, avantages, FAQ' if list_status != 'pass' else None
-        })
-
-        # Count
-        for check in results['checks']:
-            if check['status'] == 'pass': results['passed'] += 1
-            elif check['status'] == 'fail': results['failed'] += 1
-            else: results['warnings'] += 1
-
-        return results
-
     # ==========================================
     # SCORES STRICTS
     # ==========================================
     def calculate_strict_scores(self):
-        """Calcule les scores avec pénalités strictes"""
-        categories = ['seo_classic', 'seo_technique', 'ai_readiness', 'content_quality']
-
-        total_score = 0
-        category_count = 0
-
-        for cat in categories:
-            if cat in self.results and 'checks' in self.results[cat]:
-                checks = self.results[cat]['checks']
-                passed = sum(1 for c in checks if c['status'] == 'pass')
-                warnings = sum(1 for c in checks if c['status'] == 'warning')
-                failed = sum(1 for c in checks if c['status'] == 'fail')
-                total = len(checks)
-
-                # Score strict: pass=100%, warning=40%, fail=0%
-                # Les fails sur 'critical' pénalisent -10% supplémentaire
-                critical_fails = sum(1 for c in checks if c['status'] == 'fail' and c.get('importance') == 'critical')
-
-                raw_score = ((passed * 1) + (warnings * 0.4)) / total * 100 if total > 0 else 0
-                penalty = critical_fails * 5  # -5% par échec critique
-
-                cat_score = max(0, raw_score - penalty)
-                self.results['scores'][cat] = int(cat_score)
-
-                total_score += cat_score
-                category_count += 1
-
-        # Score total (moyenne)
-        self.results['scores']['total'] = int(total_score / category_count) if category_count > 0 else 0
+        """Calcule les scores avec pénalités strictes (poids et pénalités du moteur de règles)"""
+        self.results['scores'].update(scanner_rules.ENGINE.scores(self.results))
 
         # Grade STRICT
-        score = self.results['scores']['total']
-        if score >= 90: self.results['grade'] = 'A+'
-        elif score >= 80: self.results['grade'] = 'A'
-        elif score >= 70: self.results['grade'] = 'B'
-        elif score >= 55: self.results['grade'] = 'C'
-        elif score >= 40: self.results['grade'] = 'D'
-        else: self.results['grade'] = 'F'
+        self.results['grade'] = grade_for_score(self.results['scores']['total'])
 
     def generate_recommendations(self):
         """Génère les recommandations prioritaires"""
@@ -751,6 +309,122 @@ class SEOScanner:
         self.results['recommendations'] = all_recs[:15]
 
 
+class CrawlReport:
+    """Agrégation en flux des résumés de pages d'un crawl: la mémoire dépend du nombre de pages
+    (résumés compacts), jamais de leur contenu"""
+    EXAMPLES = 5
+    WORST_PAGES = 20
+    IMPORTANCE_ORDER = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+    def __init__(self):
+        self.pages = []
+        self.scored = 0
+        self.score_sums = Counter()
+        self.statuses = Counter()
+        self.checks = {}
+        self.titles = {}
+        self.descriptions = {}
+        self.broken = []
+        self.noindex = 0
+
+    def add(self, page):
+        status = page.get('status')
+        self.statuses[str(status) if status else 'erreur'] += 1
+        entry = {'url': page['url'], 'depth': page.get('depth', 0), 'status': status}
+        if 'scores' not in page:
+            for key in ('error', 'redirect'):
+                if page.get(key):
+                    entry[key] = page[key]
+            if not status or status >= 400:
+                self.broken.append(entry)
+            self.pages.append(entry)
+            return
+
+        self.scored += 1
+        self.score_sums.update(page['scores'])
+        self.noindex += page.get('noindex', False)
+        failed = []
+        for category, name, check_status, importance, recommendation in page['checks']:
+            stats = self.checks.get(name)
+            if stats is None:
+                stats = self.checks[name] = {'category': category, 'check': name, 'importance': importance,
+                                             'pass': 0, 'warning': 0, 'fail': 0, 'recommendation': None, 'examples': []}
+            stats[check_status] = stats.get(check_status, 0) + 1
+            if check_status != 'pass':
+                failed.append(name)
+                stats['recommendation'] = stats['recommendation'] or recommendation
+                if len(stats['examples']) < self.EXAMPLES:
+                    stats['examples'].append(page['url'])
+        for field, seen in (('title', self.titles), ('description', self.descriptions)):
+            value = page.get(field)
+            if value:
+                dup = seen.setdefault(value.lower(), [0, value, []])
+                dup[0] += 1
+                if len(dup[2]) < self.EXAMPLES:
+                    dup[2].append(page['url'])
+
+        entry.update({
+            'load_time': page.get('load_time'),
+            'score': page['scores'].get('total', 0),
+            'grade': page.get('grade'),
+            'title': page.get('title'),
+            'noindex': page.get('noindex', False),
+            'failed': failed,
+        })
+        self.pages.append(entry)
+
+    def _duplicates(self, seen):
+        dups = [{'value': value, 'pages': count, 'examples': urls} for count, value, urls in seen.values() if count > 1]
+        dups.sort(key=lambda d: -d['pages'])
+        return dups[:20]
+
+    def finish(self, home_results):
+        """Rapport site: scores moyens, checks par taux d'échec, doublons, pires pages, recommandations"""
+        if self.scored:
+            scores = {cat: int(total / self.scored) for cat, total in self.score_sums.items()}
+        else:
+            scores = dict(home_results.get('scores', {}))
+
+        checks = list(self.checks.values())
+        for stats in checks:
+            stats['pages_affected'] = stats['warning'] + stats['fail']
+            stats['share'] = round(stats['pages_affected'] / self.scored * 100, 1) if self.scored else 0.0
+        checks.sort(key=lambda c: (-c['pages_affected'], self.IMPORTANCE_ORDER.get(c['importance'], 2)))
+
+        site_checks = [{'category': cat, 'check': c['name'], 'status': c['status'], 'importance': c.get('importance', 'medium'),
+                        'details': c.get('details'), 'recommendation': c.get('recommendation'), 'ai_impact': c.get('ai_impact')}
+                       for cat in CATEGORIES for c in home_results.get(cat, {}).get('checks', [])
+                       if c['name'] in SITE_WIDE_CHECKS]
+
+        recommendations = [{'category': c['category'], 'check': c['check'], 'importance': c['importance'],
+                            'recommendation': c['recommendation'], 'ai_impact': c['ai_impact'],
+                            'status': c['status'], 'pages': None}
+                           for c in site_checks if c['status'] != 'pass' and c['recommendation']]
+        recommendations += [{'category': c['category'], 'check': c['check'], 'importance': c['importance'],
+                             'recommendation': c['recommendation'], 'ai_impact': None,
+                             'status': 'fail' if c['fail'] else 'warning', 'pages': c['pages_affected']}
+                            for c in checks if c['pages_affected'] and c['recommendation']]
+        recommendations.sort(key=lambda r: (self.IMPORTANCE_ORDER.get(r['importance'], 2), r['status'] != 'fail',
+                                            -(r['pages'] if r['pages'] is not None else self.scored)))
+
+        worst = sorted((p for p in self.pages if 'score' in p), key=lambda p: p['score'])[:self.WORST_PAGES]
+        return {
+            'pages_crawled': len(self.pages),
+            'pages_scored': self.scored,
+            'scores': scores,
+            'grade': grade_for_score(scores.get('total', 0)),
+            'status_codes': dict(self.statuses),
+            'broken_pages': self.broken[:100],
+            'noindex_pages': self.noindex,
+            'site_checks': site_checks,
+            'checks': checks,
+            'duplicate_titles': self._duplicates(self.titles),
+            'duplicate_descriptions': self._duplicates(self.descriptions),
+            'worst_pages': [{'url': p['url'], 'score': p['score'], 'grade': p['grade'], 'failed': p['failed']} for p in worst],
+            'recommendations': recommendations[:15],
+        }
+
+
 # ==========================================
 # API ENDPOINTS
 # ==========================================
@@ -759,26 +433,13 @@ class SEOScanner:
 def health():
     return jsonify({'status': 'ok', 'service': 'seo-scanner-api-strict', 'version': '2.0'})
 
-@app.route('/api/scan', methods=['POST', 'GET'])
-def scan_domain():
-    """Lance un scan complet STRICT avec email et AI"""
-    if request.method == 'POST':
-        data = request.json or {}
-        domain = data.get('domain')
-        email = data.get('email', '').strip()
-    else:
-        domain = request.args.get('domain')
-        email = request.args.get('email', '').strip()
-
-    if not domain:
-        return jsonify({'error': 'domain requis'}), 400
-
-    domain = domain.strip().lower()
-    if domain.startswith('http'):
-        domain = urlparse(domain).netloc
-
+def build_report(domain, mode, max_pages=None, max_depth=None, progress=None):
+    """Scan + analyse AI + rapport HTML: tout ce qui est mis en cache pour un domaine"""
     scanner = SEOScanner(domain)
-    results = scanner.run_full_scan()
+    if mode == 'crawl':
+        results = scanner.run_crawl(max_pages=max_pages, max_depth=max_depth, progress=progress)
+    else:
+        results = scanner.run_full_scan()
 
     # AI Analysis via DeepSeek
     ai_analysis = None
@@ -792,22 +453,180 @@ def scan_domain():
             print(f"[AI] Skipped: {e}")
 
     # Generate HTML report
-    html_report = generate_html_report(results, ai_analysis)
-    results['html_report'] = html_report
+    results['html_report'] = generate_html_report(results, ai_analysis)
+    return results
+
+
+def _deliver_report(email, domain, grade, score, html_report):
+    """Envoi du rapport + lead, hors de la requête HTTP"""
+    try:
+        email_sent = send_report_email(email, domain, grade, score, html_report)
+        save_lead(email, domain, grade, score, 1 if email_sent else 0)
+    except Exception as e:
+        print(f"[EMAIL] Échec envoi à {email}: {e}")
+
+
+def _rejected(error):
+    resp = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    resp.headers['Retry-After'] = str(error.retry_after)
+    return resp, error.status
+
+
+def _crawl_limits(params):
+    """(max_pages, max_depth) bornés: petits sans clé, jusqu'à MAX_CRAWL_* avec X-Scan-Key"""
+    key = request.headers.get('X-Scan-Key', '')
+    trusted = bool(CRAWL_KEY) and hmac.compare_digest(key.encode(), CRAWL_KEY.encode())
+    pages_cap = MAX_CRAWL_PAGES if trusted else MAX_PUBLIC_CRAWL_PAGES
+    depth_cap = MAX_CRAWL_DEPTH if trusted else MAX_PUBLIC_CRAWL_DEPTH
+    return (max(1, min(int(params.get('max_pages', pages_cap)), pages_cap)),
+            max(0, min(int(params.get('max_depth', 3)), depth_cap)))
+
+
+_crawl_worker = None
+_crawl_worker_lock = threading.Lock()
+
+
+def _start_crawl_worker():
+    """Worker job_queue limité aux crawls, démarré au premier crawl (donc après le fork gunicorn).
+    SEO_JOBS_EMBEDDED=0: les crawls sont exécutés par les workers dédiés (job_queue.py worker)"""
+    global _crawl_worker
+    if os.environ.get('SEO_JOBS_EMBEDDED', '1') == '0':
+        return
+    with _crawl_worker_lock:
+        if _crawl_worker is None:
+            _crawl_worker = job_queue.Worker(threads=CRAWL_WORKERS, names=['seo_crawl']).start()
+
+
+def _after_fork_in_child():
+    global _crawl_worker
+    _crawl_worker = None
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def run_crawl_job(job):
+    """Handler job_queue 'seo_crawl': crawl (cache + coalescing de scan_cache), puis email éventuel"""
+    payload = job.payload
+    domain = payload['domain']
+    params = {'max_pages': int(payload['max_pages']), 'max_depth': int(payload['max_depth'])}
+    job.progress(2, 'Crawl démarré')
+    try:
+        results, outcome = scan_cache.get_or_run(
+            scan_cache.cache_key(domain, 'crawl', **params), domain,
+            lambda: build_report(domain, 'crawl', progress=job.progress, **params),
+            refresh=bool(payload.get('refresh')))
+    except scan_cache.ScanRejected as e:
+        raise job_queue.JobError(str(e))
+    results.setdefault('cache', {'hit': outcome == 'hit', 'coalesced': outcome == 'coalesced'})
+    email = payload.get('email') or ''
+    if email and '@' in email and not results.get('error'):
+        job.progress(97, 'Envoi du rapport')
+        _deliver_report(email, domain, results.get('grade', 'F'), results.get('scores', {}).get('total', 0),
+                        results.get('html_report'))
+        results['email_to'] = email
+    return results
+
+
+def _submit_crawl(domain, email, refresh, params, ip, started):
+    """mode=crawl: jamais exécuté dans la requête HTTP; 202 + job à suivre sur /api/scan/jobs/<id>"""
+    try:
+        request_id = scan_cache.admit(ip, domain)
+    except scan_cache.ScanRejected as e:
+        return _rejected(e)
+    job, created = job_queue.enqueue('seo_crawl', dict(params, domain=domain, refresh=refresh,
+                                                        email=email if '@' in email else ''))
+    scan_cache.finish(request_id, 'queued', (time.monotonic() - started) * 1000)
+    _start_crawl_worker()
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'deduplicated': not created,
+        'status_url': f"/api/scan/jobs/{job['id']}",
+        **params,
+    }), 202
+
+
+@app.route('/api/scan', methods=['POST', 'GET'])
+def scan_domain():
+    """Lance un scan complet STRICT avec email et AI (mode=crawl: audit multi-pages, max_pages / max_depth).
+    Résultat servi depuis le cache tant qu'il est frais (refresh=1 pour forcer un nouveau scan).
+    Un crawl non caché part en job_queue: réponse 202, suivi sur /api/scan/jobs/<job_id>."""
+    started = time.monotonic()
+    params = (request.json or {}) if request.method == 'POST' else request.args
+    domain = scan_cache.normalize_domain(params.get('domain'))
+    email = (params.get('email') or '').strip()
+    refresh = str(params.get('refresh', '')).lower() in ('1', 'true', 'yes')
+
+    if not domain:
+        return jsonify({'error': 'domain requis'}), 400
 
-    # Email handling
-    email_sent = False
+    mode = 'crawl' if params.get('mode') == 'crawl' else 'full'
+    key_params = {}
+    if mode == 'crawl':
+        try:
+            key_params = dict(zip(('max_pages', 'max_depth'), _crawl_limits(params)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_pages et max_depth doivent être des entiers'}), 400
+    key = scan_cache.cache_key(domain, mode, **key_params)
+    ip = request.headers.get('X-Real-IP', request.remote_addr)
+
+    results = None if refresh else scan_cache.get_fresh(key)
+    if results is not None:
+        scan_cache.record(ip, domain, 'hit', (time.monotonic() - started) * 1000)
+    elif mode == 'crawl':
+        return _submit_crawl(domain, email, refresh, key_params, ip, started)
+    else:
+        try:
+            request_id = scan_cache.admit(ip, domain)
+        except scan_cache.ScanRejected as e:
+            return _rejected(e)
+        try:
+            results, outcome = scan_cache.get_or_run(key, domain, lambda: build_report(domain, mode, **key_params),
+                                                     refresh=refresh)
+        except scan_cache.ScanRejected as e:
+            scan_cache.finish(request_id, 'rejected', (time.monotonic() - started) * 1000)
+            return _rejected(e)
+        except Exception:
+            scan_cache.finish(request_id, 'error', (time.monotonic() - started) * 1000)
+            raise
+        scan_cache.finish(request_id, 'error' if results.get('error') else outcome, (time.monotonic() - started) * 1000)
+        results.setdefault('cache', {'hit': outcome == 'hit', 'coalesced': outcome == 'coalesced'})
+
+    # Email: mis en file, la réponse n'attend pas SMTP
     if email and '@' in email:
         score = results.get('scores', {}).get('total', 0)
         grade = results.get('grade', 'F')
-        email_sent = send_report_email(email, domain, grade, score, html_report)
-        save_lead(email, domain, grade, score, 1 if email_sent else 0)
-        results['email_sent'] = email_sent
+        _mail_pool.submit(_deliver_report, email, domain, grade, score, results.get('html_report'))
+        results['email_queued'] = True
         results['email_to'] = email
 
     return jsonify(results)
 
 
+@app.route('/api/scan/jobs/<job_id>', methods=['GET'])
+def scan_job_status(job_id):
+    """Progression / résultat d'un crawl soumis par /api/scan?mode=crawl (jobs 'seo_crawl' uniquement)"""
+    job = job_queue.get_job(job_id)
+    if job is None or job['job_type'] != 'seo_crawl':
+        return jsonify({'success': False, 'error': 'Job non trouvé'}), 404
+    job.pop('payload', None)
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/scan/stats', methods=['GET'])
+def scan_stats():
+    """Taux de hit du cache, scans coalescés et latences p50/p95 (hours=24) + temps par règle (worker)"""
+    try:
+        hours = max(1, min(int(request.args.get('hours', 24)), 24 * 30))
+    except ValueError:
+        return jsonify({'error': 'hours doit être un entier'}), 400
+    stats = scan_cache.stats(hours)
+    stats['rules'] = scanner_rules.ENGINE.stats()
+    return jsonify(stats)
+
+
 if __name__ == '__main__':
     print("="*60)
     print("🔍 SEO SCANNER API v2.0 - STRICT MODE")
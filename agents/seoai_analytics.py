@@ -4,6 +4,8 @@ SeoAI Analytics Module — Zero-cookie server-side analytics
 Adds Flask routes for: tracker endpoint, JS serve, dashboard data, gclid tracking
 Import and call register_analytics_routes(app) from api_server.py
 """
+import os
+import atexit
 import sqlite3
 import json
 import hashlib
@@ -78,31 +80,37 @@ def _detect_device(screen_width):
     return 'desktop'
 
 
+def flush_pending():
+    """Write every queued event to SQLite now; returns the number of rows written"""
+    events = []
+    with _flush_lock:
+        while _event_queue:
+            events.append(_event_queue.popleft())
+    if not events:
+        return 0
+    try:
+        conn = _get_db()
+        conn.executemany('''
+            INSERT INTO analytics_events
+            (site_id, event_type, fingerprint, page_path, referrer, referrer_domain,
+             user_agent, device_type, screen_width, screen_height, language, country,
+             gclid, utm_source, utm_medium, utm_campaign)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+        ''', events)
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f'[Analytics] Flush error: {e}')
+        return 0
+    return len(events)
+
+
 def _flush_events():
     """Background thread: flush event queue to SQLite every 2 seconds"""
     while True:
         time.sleep(2)
-        if not _event_queue:
-            continue
-        events = []
-        with _flush_lock:
-            while _event_queue:
-                events.append(_event_queue.popleft())
-        if not events:
-            continue
-        try:
-            conn = _get_db()
-            conn.executemany('''
-                INSERT INTO analytics_events
-                (site_id, event_type, fingerprint, page_path, referrer, referrer_domain,
-                 user_agent, device_type, screen_width, screen_height, language, country,
-                 gclid, utm_source, utm_medium, utm_campaign)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            ''', events)
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f'[Analytics] Flush error: {e}')
+        if _event_queue:
+            flush_pending()
 
 
 def _start_flush_thread():
@@ -113,6 +121,27 @@ def _start_flush_thread():
         _flush_thread.start()
 
 
+def _after_fork_in_child():
+    """
+    Pre-fork servers (gunicorn --preload) import this module in the master:
+    threads do not survive fork(), and the child inherits a copy of the
+    parent's queue and possibly a held lock. Each worker starts clean with
+    its own flush thread.
+    """
+    global _flush_lock, _flush_thread
+    _flush_lock = threading.Lock()
+    _event_queue.clear()
+    _flush_thread = None
+    if _routes_registered:
+        _start_flush_thread()
+
+
+_routes_registered = False
+os.register_at_fork(after_in_child=_after_fork_in_child)
+# Graceful worker shutdown (SIGTERM / reload): do not drop the last 2 seconds of events
+atexit.register(flush_pending)
+
+
 # ============================================================
 # TRACKER JAVASCRIPT
 # ============================================================
@@ -143,6 +172,8 @@ document.addEventListener('click',function(e){var a=e.target.closest('a');if(!a)
 # ============================================================
 def register_analytics_routes(app):
     """Register all analytics routes on the Flask app"""
+    global _routes_registered
+    _routes_registered = True
     _start_flush_thread()
 
     # --- Tracker endpoint (high volume, must be fast) ---
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Serve — lanceur de production unique pour les API Flask
+Remplace app.run() (serveur de dev mono-processus) par gunicorn ou uvicorn.
+
+Usage:
+    python3 serve.py api                          # gunicorn gthread, workers auto
+    python3 serve.py scanner --worker-class gevent --workers 4
+    python3 serve.py chatbot --server uvicorn --workers 2
+    python3 serve.py site-audit --server dev      # ancien comportement (app.run)
+    python3 serve.py --list
+
+Variables d'environnement (prioritaires sur les valeurs par defaut de l'app,
+les options de ligne de commande restent prioritaires):
+    SEO_SERVER, SEO_WORKERS, SEO_THREADS, SEO_WORKER_CLASS, SEO_BIND, SEO_TIMEOUT
+
+Rechargement gracieux (gunicorn):
+    kill -HUP <pid master>   relance les workers un par un (config + code si --no-preload)
+    kill -USR2 <pid master>  puis -QUIT sur l'ancien master: nouveau code avec --preload
+    Unite systemd: ExecReload=/bin/kill -HUP $MAINPID
+
+Threads de fond au niveau module (ex: _flush_thread de seoai_analytics):
+    chaque worker a sa propre file et son propre thread de flush (relance
+    apres fork via os.register_at_fork), et vide sa file a la sortie.
+"""
+import os
+import sys
+import argparse
+import importlib
+import multiprocessing
+
+AGENTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(AGENTS_DIR)
+
+# name -> module, port, defaults. 'setup' = fonction du module a appeler avant de servir
+# (ce que faisait le bloc __main__ du module).
+APPS = {
+    'api': {'module': 'api_server', 'port': 8002, 'threads': 8},
+    'scanner': {'module': 'seo_scanner_api', 'port': 8893, 'threads': 16},
+    'sync': {'module': 'sync_bridge', 'port': 8892, 'workers': 1, 'threads': 8},
+    'chatbot': {'module': 'chatbot_api', 'port': 8895, 'threads': 16},
+    'site-audit': {'module': 'site_audit_agent', 'port': 8889, 'workers': 2, 'threads': 4, 'setup': 'init_db'},
+}
+
+SERVERS = ('gunicorn', 'uvicorn', 'dev')
+WORKER_CLASSES = ('gthread', 'gevent', 'sync')
+MAX_AUTO_WORKERS = 8   # SQLite: au-dela, les ecritures se bloquent plus qu'elles ne gagnent
+
+
+def default_workers():
+    return min(multiprocessing.cpu_count() * 2 + 1, MAX_AUTO_WORKERS)
+
+
+def load_app(name):
+    """Importe le module de l'app et execute son setup; retourne l'objet Flask"""
+    spec = APPS[name]
+    for path in (AGENTS_DIR, ROOT_DIR):
+        if path not in sys.path:
+            sys.path.append(path)
+    module = importlib.import_module(spec['module'])
+    if spec.get('setup'):
+        getattr(module, spec['setup'])()
+    return module.app
+
+
+def create_asgi_app():
+    """Factory uvicorn (--workers > 1 exige une chaine d'import): app WSGI adaptee en ASGI"""
+    app = load_app(os.environ['SEO_SERVE_APP'])
+    try:
+        from asgiref.wsgi import WsgiToAsgi
+        return WsgiToAsgi(app)
+    except ImportError:
+        from a2wsgi import WSGIMiddleware
+        return WSGIMiddleware(app)
+
+
+def _flush_background_queues():
+    """Vide les files en memoire avant la sortie d'un worker"""
+    for name in ('seoai_analytics', 'llm_usage'):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.flush_pending()
+
+
+def run_gunicorn(name, options):
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, settings):
+            self.settings = settings
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app(name)
+
+    settings = {
+        'bind': options['bind'],
+        'workers': options['workers'],
+        'worker_class': options['worker_class'],
+        'timeout': options['timeout'],
+        'graceful_timeout': 30,
+        'keepalive': 5,
+        'preload_app': options['preload'],
+        # Recycle les workers pour borner la croissance memoire (caches en memoire, fuites)
+        'max_requests': 5000,
+        'max_requests_jitter': 500,
+        'proc_name': f'seo-{name}',
+        'accesslog': options['accesslog'],
+        'worker_exit': lambda server, worker: _flush_background_queues(),
+    }
+    if options['worker_class'] == 'gthread':
+        settings['threads'] = options['threads']
+    elif options['worker_class'] == 'gevent':
+        settings['worker_connections'] = options['threads'] * 64
+    StandaloneApplication(settings).run()
+
+
+def run_uvicorn(name, options):
+    import uvicorn
+    host, _, port = options['bind'].rpartition(':')
+    os.environ['SEO_SERVE_APP'] = name
+    uvicorn.run('serve:create_asgi_app', factory=True, host=host or '0.0.0.0', port=int(port),
+                workers=options['workers'], timeout_graceful_shutdown=30,
+                access_log=bool(options['accesslog']), lifespan='off', app_dir=AGENTS_DIR)
+
+
+def run_dev(name, options):
+    host, _, port = options['bind'].rpartition(':')
+    load_app(name).run(host=host or '0.0.0.0', port=int(port), threaded=True, debug=False)
+
+
+def resolve_options(name, args):
+    spec = APPS[name]
+    env = os.environ
+    worker_class = args.worker_class or env.get('SEO_WORKER_CLASS') or 'gthread'
+    options = {
+        'server': args.server or env.get('SEO_SERVER') or 'gunicorn',
+        'workers': args.workers or int(env.get('SEO_WORKERS') or spec.get('workers') or default_workers()),
+        'threads': args.threads or int(env.get('SEO_THREADS') or spec.get('threads', 4)),
+        'worker_class': worker_class,
+        'bind': args.bind or env.get('SEO_BIND') or f"0.0.0.0:{spec['port']}",
+        'timeout': args.timeout or int(env.get('SEO_TIMEOUT') or 120),
+        # gevent doit patcher avant tout import: pas de preload dans ce cas
+        'preload': not args.no_preload and worker_class != 'gevent',
+        'accesslog': args.accesslog,
+    }
+    if options['server'] not in SERVERS:
+        raise SystemExit(f"Serveur inconnu: {options['server']} ({', '.join(SERVERS)})")
+    if options['worker_class'] not in WORKER_CLASSES:
+        raise SystemExit(f"Worker class inconnue: {options['worker_class']} ({', '.join(WORKER_CLASSES)})")
+    return options
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lanceur de production des API SEO Agent')
+    parser.add_argument('app', nargs='?', choices=sorted(APPS))
+    parser.add_argument('--list', action='store_true', help='Lister les apps et leurs ports')
+    parser.add_argument('--server', choices=SERVERS)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--threads', type=int, help='Threads par worker (gthread) / echelle des connexions (gevent)')
+    parser.add_argument('--worker-class', choices=WORKER_CLASSES)
+    parser.add_argument('--bind', help='host:port (defaut: port historique de l\'app)')
+    parser.add_argument('--timeout', type=int)
+    parser.add_argument('--no-preload', action='store_true', help='Importer l\'app dans chaque worker')
+    parser.add_argument('--accesslog', default=None, help="Fichier d'access log ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.app:
+        for name, spec in APPS.items():
+            print(f"  {name:<12} {spec['module']:<20} port {spec['port']}")
+        return 0
+
+    options = resolve_options(args.app, args)
+    print(f"[SERVE] {args.app} ({APPS[args.app]['module']}) sur {options['bind']} - "
+          f"{options['server']}, {options['workers']} workers x {options['threads']} threads ({options['worker_class']})")
+
+    if options['server'] == 'gunicorn':
+        if options['worker_class'] == 'gevent':
+            from gevent import monkey
+            monkey.patch_all()
+        run_gunicorn(args.app, options)
+    elif options['server'] == 'uvicorn':
+        run_uvicorn(args.app, options)
+    else:
+        run_dev(args.app, options)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Single Flight — une seule execution pour des appels d'agent identiques et simultanes
+- Cle = (agent, methode, arguments normalises): deux clics sur "generer rapport" ou la
+  meme requete n8n lancee par deux workflows attendent la meme execution
+- Le resultat reussi reste servi pendant une courte TTL (SEO_SINGLEFLIGHT_TTL, 15 s)
+- Les resultats {'error': ...} et les exceptions sont partages avec les appels en attente
+  mais jamais gardes en cache
+- Chaque appelant recoit sa propre copie du resultat (les routes peuvent le modifier)
+- Portee: un processus (worker). Entre workers/processus, voir job_queue (dedup en base).
+Usage:
+    from agent_registry import coalesced
+    coalesced('SERPTrackerAgent').track_all_keywords(client_id)
+    GET /api/agents/coalescing -> compteurs par agent.methode
+"""
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+DEFAULT_TTL = float(os.environ.get('SEO_SINGLEFLIGHT_TTL', '15'))
+MAX_RESULTS = 256
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(agent, method, args=(), kwargs=None):
+    """Cle stable (agent, methode, arguments normalises)"""
+    payload = json.dumps([agent, method, _normalize(list(args)), _normalize(kwargs or {})],
+                         sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _cacheable(result):
+    return not (isinstance(result, dict) and result.get('error'))
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, ttl=DEFAULT_TTL, max_results=MAX_RESULTS):
+        self.ttl = ttl
+        self.max_results = max_results
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._results = OrderedDict()      # key -> (expire_a, resultat)
+        self._stats = defaultdict(Counter)
+
+    def do(self, key, fn, label=None, ttl=None):
+        """Execute fn() une seule fois pour les appels concurrents de meme cle"""
+        ttl = self.ttl if ttl is None else ttl
+        stats_key = label or key
+        with self._lock:
+            stats = self._stats[stats_key]
+            stats['calls'] += 1
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    stats['cache_hits'] += 1
+                    return copy.deepcopy(cached[1])
+                del self._results[key]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                stats['executions'] += 1
+            else:
+                stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn()
+            # Copie figee avant de rendre la main: l'appelant peut modifier son resultat
+            try:
+                call.result = copy.deepcopy(result)
+                cacheable = _cacheable(result)
+            except Exception:
+                call.result, cacheable = result, False
+        except BaseException as e:
+            call.error = e
+            cacheable = False
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call.error is not None:
+                    self._stats[stats_key]['errors'] += 1
+                elif cacheable and ttl > 0:
+                    self._results[key] = (time.monotonic() + ttl, call.result)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+            call.done.set()
+        return result
+
+    def forget(self, key=None):
+        """Oublie un resultat en cache (ou tous)"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            by_call = {label: dict(counter) for label, counter in sorted(self._stats.items())}
+            in_flight = len(self._inflight)
+            cached = len(self._results)
+        totals = Counter()
+        for counter in by_call.values():
+            totals.update(counter)
+        calls = totals.get('calls', 0)
+        saved = totals.get('coalesced', 0) + totals.get('cache_hits', 0)
+        return {
+            'ttl_seconds': self.ttl,
+            'in_flight': in_flight,
+            'cached_results': cached,
+            'totals': dict(totals),
+            'saved_executions_rate': round(saved / calls * 100, 1) if calls else 0,
+            'by_call': by_call,
+        }
+
+
+flight = SingleFlight()
+
+# Worker gunicorn forke avec --preload: verrou et appels en cours du parent ne valent rien ici
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=flight._reset)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Site Crawler — exploration bornee d'un site pour les audits multi-pages
+- Frontiere en largeur (BFS) bornee: max_pages, max_depth, max_frontier (liens en attente)
+- URLs normalisees (schema/hote en minuscules, port par defaut, fragment et parametres de
+  suivi retires, query triee, chemin resolu) et dedupliquees par un filtre de Bloom:
+  memoire fixe quel que soit le nombre de liens rencontres
+- robots.txt respecte (Disallow, Crawl-delay) pour l'agent du scanner
+- Pool de threads + semaphore par hote: concurrence globale et par hote bornees,
+  session HTTP keep-alive partagee
+- Chaque page est lue en flux (MAX_PAGE_BYTES max), passee a analyze() puis oubliee: seul le
+  resume retourne est conserve. crawl() est un generateur: l'appelant agrege au fil de l'eau.
+  Plafond memoire et duree maximale verifies. Le RSS est celui du processus: sa croissance
+  depuis le debut du plus ancien crawl en cours est repartie entre les crawls actifs.
+Usage:
+    crawler = SiteCrawler('https://example.com/', analyze, max_pages=500)
+    for summary in crawler.crawl():      # analyze(url, html, secondes, profondeur) -> (resume, liens)
+        ...
+    crawler.stats
+"""
+import os
+import re
+import math
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+USER_AGENT = 'Mozilla/5.0 (compatible; SEOparAI-Scanner/2.0; +https://seoparai.com)'
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+LINKS_PER_PAGE = 50             # dimensionnement du filtre de Bloom: max_pages * LINKS_PER_PAGE
+BLOOM_ERROR_RATE = 0.001
+MEMORY_CHECK_EVERY = 25         # pages
+MAX_CRAWL_DELAY = 5.0           # secondes: au-dela, le Crawl-delay est plafonne
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl|ref)$', re.I)
+SKIP_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg', '.ico', '.bmp', '.pdf', '.zip',
+                   '.gz', '.rar', '.mp3', '.mp4', '.avi', '.mov', '.webm', '.woff', '.woff2', '.ttf', '.eot',
+                   '.css', '.js', '.json', '.xml', '.txt', '.csv', '.doc', '.docx', '.xls', '.xlsx', '.ppt')
+
+
+class BloomFilter:
+    """Ensemble probabiliste a taille fixe: faux positifs ~error_rate, jamais de faux negatifs"""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8', 'surrogateescape'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Ajoute key; True si elle etait (probablement) deja presente"""
+        present = True
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        if not present:
+            self.count += 1
+        return present
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def normalize_url(url, base=None):
+    """URL absolue canonique, ou None si ce n'est pas une page http(s)"""
+    try:
+        parts = urlsplit(urljoin(base, url.strip()) if base else url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    host = parts.hostname.lower().rstrip('.')
+    netloc = host if port is None or (scheme, port) in (('http', 80), ('https', 443)) else f'{host}:{port}'
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    segments = []
+    for segment in path.split('/')[1:]:
+        if segment == '..':
+            if segments:
+                segments.pop()
+        elif segment != '.':
+            segments.append(segment)
+    path = '/' + '/'.join(segments)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def site_host(url):
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def dedup_key(url):
+    """http/https et www/sans www designent la meme page"""
+    parts = urlsplit(url)
+    return f'{site_host(url)}{parts.path}?{parts.query}'
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _MemoryLedger:
+    """Crawls actifs du processus et RSS au demarrage du premier: chacun est juge sur sa part"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.active = 0
+        self.base = None
+
+    def enter(self):
+        with self.lock:
+            if self.active == 0:
+                self.base = _rss_mb()
+            self.active += 1
+
+    def leave(self):
+        with self.lock:
+            self.active = max(0, self.active - 1)
+
+    def share_mb(self):
+        """Croissance du RSS depuis le debut du plus ancien crawl actif, divisee par leur nombre"""
+        rss = _rss_mb()
+        with self.lock:
+            if rss is None or self.base is None:
+                return None
+            return max(0.0, rss - self.base) / max(1, self.active)
+
+
+_memory = _MemoryLedger()
+os.register_at_fork(after_in_child=_memory.reset)
+
+
+class SiteCrawler:
+    """Crawl BFS borne d'un site; analyze(url, html, secondes, profondeur) -> (resume, hrefs)"""
+
+    def __init__(self, start_url, analyze, max_pages=100, max_depth=3, workers=8, per_host=4,
+                 max_seconds=600, memory_mb=256, max_frontier=None, robots_txt=None,
+                 user_agent=USER_AGENT, timeout=15, session=None):
+        self.start_url = normalize_url(start_url)
+        if not self.start_url:
+            raise ValueError(f'URL de depart invalide: {start_url}')
+        self.analyze = analyze
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.max_seconds = max_seconds
+        self.memory_mb = memory_mb
+        self.max_frontier = max_frontier or max_pages * 4
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.host = site_host(self.start_url)
+        self.seen = BloomFilter(max_pages * LINKS_PER_PAGE)
+        self.session = session or self._make_session()
+        self._robots_txt = robots_txt
+        self.robots = None
+        self.crawl_delay = 0.0
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+        self.stats = {}
+
+    def _make_session(self):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(self.workers, self.per_host))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.5',
+            'Accept-Language': 'fr-CA,fr;q=0.9,en;q=0.8',
+        })
+        return session
+
+    # ---------- robots.txt ----------
+
+    def _load_robots(self):
+        text = self._robots_txt
+        if text is None:
+            parts = urlsplit(self.start_url)
+            try:
+                resp = self.session.get(f'{parts.scheme}://{parts.netloc}/robots.txt', timeout=self.timeout)
+                text = resp.text if resp.status_code == 200 else ''
+            except requests.RequestException:
+                text = ''
+        self.robots = RobotFileParser()
+        self.robots.parse(text.splitlines())
+        delay = self.robots.crawl_delay(self.user_agent)
+        self.crawl_delay = min(float(delay or 0), MAX_CRAWL_DELAY)
+
+    def allowed(self, url):
+        return self.robots is None or self.robots.can_fetch(self.user_agent, url)
+
+    def in_scope(self, url):
+        return site_host(url) == self.host and not urlsplit(url).path.lower().endswith(SKIP_EXTENSIONS)
+
+    # ---------- fetch ----------
+
+    def _host_slot(self, host):
+        with self._hosts_lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = {'sem': threading.BoundedSemaphore(self.per_host),
+                                            'lock': threading.Lock(), 'last': 0.0}
+            return slot
+
+    def _fetch(self, url):
+        """(statut, url finale, html ou None, secondes): lecture en flux plafonnee a MAX_PAGE_BYTES"""
+        slot = self._host_slot(urlsplit(url).netloc)
+        with slot['sem']:
+            if self.crawl_delay:
+                with slot['lock']:
+                    wait_s = slot['last'] + self.crawl_delay - time.monotonic()
+                    if wait_s > 0:
+                        time.sleep(wait_s)
+                    slot['last'] = time.monotonic()
+            started = time.monotonic()
+            resp = self.session.get(url, timeout=self.timeout, stream=True, allow_redirects=True)
+            try:
+                content_type = resp.headers.get('Content-Type', '')
+                if resp.status_code != 200 or 'html' not in content_type.lower():
+                    return resp.status_code, resp.url, None, time.monotonic() - started
+                chunks, size = [], 0
+                for chunk in resp.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= MAX_PAGE_BYTES:
+                        break
+                elapsed = time.monotonic() - started
+            finally:
+                resp.close()
+        encoding = resp.encoding if 'charset' in content_type.lower() else 'utf-8'
+        return 200, resp.url, b''.join(chunks).decode(encoding or 'utf-8', errors='replace'), elapsed
+
+    def _visit(self, url, depth):
+        """Execute dans un thread du pool: (resume, hrefs, url finale)"""
+        try:
+            status, final_url, html, elapsed = self._fetch(url)
+        except requests.RequestException as e:
+            return {'url': url, 'depth': depth, 'status': None, 'error': str(e)[:200]}, [], url
+        final_url = normalize_url(final_url) or url
+        if html is None:
+            return {'url': url, 'depth': depth, 'status': status}, [], final_url
+        if final_url != url and not self.in_scope(final_url):
+            return {'url': url, 'depth': depth, 'status': status, 'redirect': final_url}, [], final_url
+        try:
+            summary, hrefs = self.analyze(final_url, html, elapsed, depth)
+        except Exception as e:
+            return {'url': final_url, 'depth': depth, 'status': status, 'error': f'analyse: {e}'[:200]}, [], final_url
+        summary.setdefault('url', final_url)
+        summary.setdefault('depth', depth)
+        summary.setdefault('status', status)
+        return summary, hrefs, final_url
+
+    # ---------- frontiere ----------
+
+    def _enqueue(self, hrefs, base, depth, frontier):
+        if depth > self.max_depth:
+            return
+        for href in hrefs:
+            url = normalize_url(href, base)
+            if not url or not self.in_scope(url):
+                continue
+            if self.seen.add(dedup_key(url)):
+                continue
+            if len(frontier) >= self.max_frontier:
+                self.stats['frontier_dropped'] += 1
+                continue
+            frontier.append((url, depth))
+
+    def crawl(self):
+        """Generateur des resumes de pages, au fil du crawl"""
+        started = time.monotonic()
+        self._next_memory_check = MEMORY_CHECK_EVERY
+        self.stats = {'pages': 0, 'fetched': 0, 'errors': 0, 'blocked_by_robots': 0, 'frontier_dropped': 0,
+                      'max_depth_reached': 0, 'stopped': None, 'peak_rss_growth_mb': 0.0}
+        self._load_robots()
+        self.stats['crawl_delay'] = self.crawl_delay
+        frontier = deque([(self.start_url, 0)])
+        self.seen.add(dedup_key(self.start_url))
+        pending = {}
+        _memory.enter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                while frontier or pending:
+                    while frontier and len(pending) < self.workers * 2 and not self.stats['stopped']:
+                        if self.stats['fetched'] >= self.max_pages:
+                            self.stats['stopped'] = 'max_pages'
+                            break
+                        url, depth = frontier.popleft()
+                        if not self.allowed(url):
+                            self.stats['blocked_by_robots'] += 1
+                            continue
+                        pending[pool.submit(self._visit, url, depth)] = depth
+                        self.stats['fetched'] += 1
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        depth = pending.pop(future)
+                        summary, hrefs, final_url = future.result()
+                        self.seen.add(dedup_key(final_url))
+                        self._enqueue(hrefs, final_url, depth + 1, frontier)
+                        self.stats['pages'] += 1
+                        self.stats['max_depth_reached'] = max(self.stats['max_depth_reached'], depth)
+                        if summary.get('error') or not summary.get('status'):
+                            self.stats['errors'] += 1
+                        yield summary
+                    self._check_limits(started, frontier)
+            finally:
+                for future in pending:
+                    future.cancel()
+                _memory.leave()
+        self.stats['elapsed_s'] = round(time.monotonic() - started, 2)
+        self.stats['pages_per_s'] = round(self.stats['pages'] / self.stats['elapsed_s'], 2) if self.stats['elapsed_s'] else 0.0
+        self.stats['frontier_left'] = len(frontier)
+        self.stats['urls_seen'] = self.seen.count
+        self.stats['bloom_kb'] = round(len(self.seen.bits) / 1024, 1)
+
+    def _check_limits(self, started, frontier):
+        if self.stats['stopped']:
+            return
+        if time.monotonic() - started > self.max_seconds:
+            self.stats['stopped'] = 'max_seconds'
+        elif self.stats['pages'] >= self._next_memory_check:
+            # Plusieurs pages peuvent se terminer d'un coup: seuil glissant, pas un multiple exact
+            self._next_memory_check = self.stats['pages'] + MEMORY_CHECK_EVERY
+            growth = _memory.share_mb()
+            if growth is not None:
+                self.stats['peak_rss_growth_mb'] = round(max(self.stats['peak_rss_growth_mb'], growth), 1)
+                if self.memory_mb and growth > self.memory_mb:
+                    self.stats['stopped'] = 'memory'
+        if self.stats['stopped']:
+            frontier.clear()
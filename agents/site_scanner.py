@@ -2,17 +2,38 @@
 """
 Site Scanner - Vérifie ce qui existe déjà sur chaque site
 Les agents consultent ce scan avant d'agir pour éviter les doublons
+
+Pages (contact, services...): d'abord les liens de la page d'accueil et du sitemap
+(vérifiés en HEAD: 2xx/3xx), puis seuls les candidats non résolus sont sondés, en
+parallèle, en HEAD, sur une session HTTP partagée (keep-alive). scan_all_sites scanne les sites en parallèle.
 """
 
 import requests
 import sqlite3
 import json
 import re
+import time
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 
 DB_PATH = '/opt/seo-agent/db/seo_agent.db'
 
+USER_AGENT = 'SEO-AI-Scanner/1.0'
+PROBE_WORKERS = 8           # requêtes simultanées par site
+SITE_WORKERS = 4            # sites scannés en parallèle
+PAGE_EXTENSIONS = ('.html', '.htm', '.php')
+
+PAGES_TO_CHECK = [
+    ('contact', ['/contact', '/contact.html', '/contactez-nous', '/nous-joindre']),
+    ('services', ['/services', '/services.html', '/nos-services']),
+    ('about', ['/a-propos', '/about', '/a-propos.html', '/qui-sommes-nous']),
+    ('faq', ['/faq', '/faq.html', '/questions']),
+    ('blog', ['/blog', '/blogue', '/articles', '/actualites']),
+]
+
 SITES = [
     {'id': 1, 'name': 'Déneigement Excellence', 'domain': 'deneigement-excellence.ca'},
     {'id': 2, 'name': 'Paysagiste Excellence', 'domain': 'paysagiste-excellence.ca'},
@@ -40,15 +61,88 @@ def init_db():
     conn.commit()
     conn.close()
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Session HTTP partagée entre threads: pool de connexions keep-alive par hôte"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=SITE_WORKERS * 4,
+                                                    pool_maxsize=PROBE_WORKERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            session.verify = False
+            _session = session
+    return _session
+
+
 def get_page(url, timeout=10):
     """Récupère une page web"""
     try:
-        headers = {'User-Agent': 'SEO-AI-Scanner/1.0'}
-        resp = requests.get(url, headers=headers, timeout=timeout, verify=False)
+        return get_session().get(url, timeout=timeout)
+    except Exception:
+        return None
+
+
+def head_page(url, timeout=10):
+    """Existence d'une page sans télécharger le corps (HEAD, GET en streaming si HEAD refusé)"""
+    try:
+        resp = get_session().head(url, timeout=timeout, allow_redirects=True)
+        if resp.status_code in (405, 501):
+            resp = get_session().get(url, timeout=timeout, stream=True)
+            resp.close()
         return resp
-    except:
+    except Exception:
         return None
 
+
+def _is_ok(resp):
+    return bool(resp is not None and resp.status_code == 200)
+
+
+def _is_live(resp):
+    """Page présente: réponse 2xx ou 3xx"""
+    return bool(resp is not None and 200 <= resp.status_code < 400)
+
+
+def _page_key(path):
+    """'/Contact.html', '/contact/', '/blog/index.html' -> 'contact', 'contact', 'blog'"""
+    path = path.split('?')[0].split('#')[0].strip('/').lower()
+    for ext in PAGE_EXTENSIONS:
+        if path.endswith(ext):
+            path = path[:-len(ext)]
+            break
+    if path == 'index' or path.endswith('/index'):
+        path = path[:-len('index')].rstrip('/')
+    return path
+
+
+def _sitemap_locs(xml):
+    """URLs de pages d'un sitemap (les sous-sitemaps .xml sont ignorés)"""
+    return [loc for loc in re.findall(r'<loc>\s*([^<\s]+)\s*</loc>', xml) if not loc.endswith('.xml')]
+
+
+def discover_pages(base_url, urls):
+    """Pages du site parmi des liens (accueil, sitemap): {clé normalisée: chemin}"""
+    host = urlparse(base_url).netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    pages = {}
+    for url in urls:
+        parsed = urlparse(urljoin(base_url + '/', url.strip()))
+        netloc = parsed.netloc.lower()
+        if netloc.startswith('www.'):
+            netloc = netloc[4:]
+        if parsed.scheme not in ('http', 'https') or netloc != host:
+            continue
+        pages.setdefault(_page_key(parsed.path), parsed.path or '/')
+    return pages
+
 def scan_site(site):
     """Scan complet d'un site"""
     domain = site['domain']
@@ -101,47 +195,59 @@ def scan_site(site):
     })
 
     # === PAGES ===
-    pages_to_check = [
-        ('contact', ['/contact', '/contact.html', '/contactez-nous', '/nous-joindre']),
-        ('services', ['/services', '/services.html', '/nos-services']),
-        ('about', ['/a-propos', '/about', '/a-propos.html', '/qui-sommes-nous']),
-        ('faq', ['/faq', '/faq.html', '/questions']),
-        ('blog', ['/blog', '/blogue', '/articles', '/actualites']),
-    ]
-
-    for page_name, urls in pages_to_check:
-        found = False
-        found_url = None
-        for url in urls:
-            resp = get_page(f"{base_url}{url}")
-            if resp and resp.status_code == 200:
-                found = True
-                found_url = url
-                break
-        results.append({
-            'check_type': 'page',
-            'check_name': page_name,
-            'is_present': found,
-            'value': found_url
-        })
+    # Liens de l'accueil + sitemap d'abord; seuls les candidats non trouvés sont sondés (HEAD, en parallèle)
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+        sitemap_future = pool.submit(get_page, f"{base_url}/sitemap.xml")
+        robots_future = pool.submit(head_page, f"{base_url}/robots.txt")
+        links = [a['href'] for a in soup.find_all('a', href=True)]
+        sitemap_resp = sitemap_future.result()
+        sitemap_ok = _is_ok(sitemap_resp)
+        if sitemap_ok:
+            links += _sitemap_locs(sitemap_resp.text)
+        known = discover_pages(base_url, links)
+
+        # Liens découverts vérifiés eux aussi (HEAD): un lien mort dans le menu ou le sitemap ne compte pas
+        hits, probes = {}, {}
+        for page_name, urls in PAGES_TO_CHECK:
+            hit = next((known[_page_key(url)] for url in urls if _page_key(url) in known), None)
+            if hit:
+                hits[page_name] = (hit, pool.submit(head_page, f"{base_url}{hit}"))
+            else:
+                probes[page_name] = [(url, pool.submit(head_page, f"{base_url}{url}")) for url in urls]
+        for page_name, urls in PAGES_TO_CHECK:
+            if page_name in hits:
+                hit, future = hits[page_name]
+                probes[page_name] = hit if _is_live(future.result()) else \
+                    [(url, pool.submit(head_page, f"{base_url}{url}")) for url in urls if url != hit]
+
+        for page_name, _ in PAGES_TO_CHECK:
+            found_url = probes[page_name]
+            if isinstance(found_url, list):
+                # Premier candidat (dans l'ordre de la liste) qui répond 2xx/3xx
+                found_url = next((url for url, future in found_url if _is_live(future.result())), None)
+            results.append({
+                'check_type': 'page',
+                'check_name': page_name,
+                'is_present': found_url is not None,
+                'value': found_url
+            })
+        robots_ok = _is_ok(robots_future.result())
 
     # === FICHIERS TECHNIQUES ===
     # Sitemap
-    sitemap_resp = get_page(f"{base_url}/sitemap.xml")
     results.append({
         'check_type': 'technical',
         'check_name': 'sitemap',
-        'is_present': sitemap_resp and sitemap_resp.status_code == 200,
-        'value': '/sitemap.xml' if sitemap_resp and sitemap_resp.status_code == 200 else None
+        'is_present': sitemap_ok,
+        'value': '/sitemap.xml' if sitemap_ok else None
     })
 
     # Robots.txt
-    robots_resp = get_page(f"{base_url}/robots.txt")
     results.append({
         'check_type': 'technical',
         'check_name': 'robots',
-        'is_present': robots_resp and robots_resp.status_code == 200,
-        'value': '/robots.txt' if robots_resp and robots_resp.status_code == 200 else None
+        'is_present': robots_ok,
+        'value': '/robots.txt' if robots_ok else None
     })
 
     # === SCHEMA MARKUP ===
@@ -256,17 +362,20 @@ def get_site_summary(site_id):
             summary['missing'].append(item)
     return summary
 
-def scan_all_sites():
-    """Scan tous les sites et sauvegarde les résultats"""
+def scan_all_sites(workers=SITE_WORKERS):
+    """Scan tous les sites (en parallèle) et sauvegarde les résultats"""
     print("=" * 60)
     print("SCAN COMPLET DE TOUS LES SITES")
     print("=" * 60)
 
     init_db()
 
-    for site in SITES:
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(SITES)))) as pool:
+        scans = list(pool.map(scan_site, SITES))
+
+    for site, results in zip(SITES, scans):
         print(f"\n[SCAN] {site['name']} ({site['domain']})")
-        results = scan_site(site)
 
         if results:
             save_results(site['id'], site['domain'], results)
@@ -283,7 +392,7 @@ def scan_all_sites():
                 print(f"    {status} {r['check_type']}/{r['check_name']}: {r['value'] or 'MANQUANT'}")
 
     print("\n" + "=" * 60)
-    print("SCAN TERMINÉ - Résultats sauvegardés dans la DB")
+    print(f"SCAN TERMINÉ en {time.time() - started:.1f}s - Résultats sauvegardés dans la DB")
     print("Les agents vont maintenant vérifier avant d'agir")
     print("=" * 60)
 
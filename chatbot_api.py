@@ -1,6 +1,12 @@
 from flask import Flask, request, jsonify
 import requests
 import re
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agents'))
+from llm_stream import stream_chat, strip_think, sse_response
+import llm_usage
 
 app = Flask(__name__)
 
@@ -141,6 +147,23 @@ def needs_search(message):
     msg_lower = message.lower()
     return any(trigger in msg_lower for trigger in search_triggers)
 
+def build_prompt(user_message):
+    extra_context = ""
+    
+    if needs_scan(user_message):
+        domain = extract_domain(user_message)
+        if domain:
+            scan_result = run_seo_scan(domain)
+            if scan_result:
+                extra_context = "\n\n" + format_scan_results(scan_result)
+    
+    elif needs_search(user_message):
+        search_result = search_web(user_message)
+        if search_result:
+            extra_context = f"\n\n[RECHERCHE WEB: {search_result}]"
+    
+    return SYSTEM_PROMPT + extra_context
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
@@ -150,21 +173,11 @@ def chat():
         if not user_message:
             return jsonify({'error': 'Message vide'}), 400
         
-        extra_context = ""
-        
-        if needs_scan(user_message):
-            domain = extract_domain(user_message)
-            if domain:
-                scan_result = run_seo_scan(domain)
-                if scan_result:
-                    extra_context = "\n\n" + format_scan_results(scan_result)
-        
-        elif needs_search(user_message):
-            search_result = search_web(user_message)
-            if search_result:
-                extra_context = f"\n\n[RECHERCHE WEB: {search_result}]"
-        
-        enhanced_prompt = SYSTEM_PROMPT + extra_context
+        enhanced_prompt = build_prompt(user_message)
+        if not llm_usage.check_budget('chatbot', 'fireworks', MODEL):
+            return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+        usage = llm_usage.LLMCall('chatbot')
+        usage.attempt('fireworks')
         
         payload = {
             "model": MODEL,
@@ -181,11 +194,15 @@ def chat():
             "Content-Type": "application/json"
         }
         
-        response = requests.post(FIREWORKS_URL, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
-        assistant_message = result['choices'][0]['message']['content']
+        try:
+            response = requests.post(FIREWORKS_URL, json=payload, headers=headers, timeout=60)
+            response.raise_for_status()
+            result = response.json()
+            assistant_message = result['choices'][0]['message']['content']
+        except Exception:
+            usage.failure(MODEL)
+            raise
+        usage.success('fireworks', MODEL, result.get('usage'), enhanced_prompt + user_message, assistant_message)
         
         assistant_message = re.sub(r'<think>.*?</think>', '', assistant_message, flags=re.DOTALL)
         assistant_message = assistant_message.strip()
@@ -196,6 +213,27 @@ def chat():
         print(f'Erreur chatbot: {e}')
         return jsonify({'error': str(e)}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Meme reponse que /chat, envoyee en SSE au fil de la generation"""
+    data = request.json or {}
+    user_message = data.get('message', '')
+    
+    if not user_message:
+        return jsonify({'error': 'Message vide'}), 400
+    
+    if not llm_usage.check_budget('chatbot', 'fireworks', MODEL):
+        return jsonify({'error': 'Budget LLM journalier atteint'}), 429
+    system = build_prompt(user_message)
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user_message}
+    ]
+    chunks = strip_think(llm_usage.tracked_stream(
+        stream_chat(FIREWORKS_URL, FIREWORKS_API_KEY, MODEL, messages, 1000, 0.8, 60),
+        'chatbot', 'fireworks', MODEL, system + user_message))
+    return sse_response(chunks, on_complete=lambda text: {'response': text.strip()})
+
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({'status': 'ok', 'model': MODEL, 'persona': 'Michael', 'scanner': 'integrated'})
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start and memory of the agent entry points.
+Usage: python3 bench_agent_startup.py [runs] [baseline_rev]
+       python3 bench_agent_startup.py 5 HEAD~1
+
+Each scenario runs in a fresh interpreter (best of N runs) and reports wall
+time, resident memory and how many agents were instantiated:
+  - api_server:  import the API module (routes registered, agents ready)
+  - scheduler:   import auto_scheduler + the agents of the maintenance cycle
+With baseline_rev, the agents/ directory of that git revision is exported to
+a temporary directory and measured the same way (before/after).
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+AGENTS_DIR = os.path.join(REPO_DIR, 'agents')
+
+PRELUDE = '''
+import sys, time, json, io, contextlib
+sys.path.insert(0, {agents_dir!r})
+t = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+'''
+
+EPILOGUE = '''
+registry = sys.modules.get('agent_registry')
+with open('/proc/self/status') as f:
+    rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS'))
+print(json.dumps({{'seconds': time.perf_counter() - t,
+                  'rss_mb': rss_kb / 1024,
+                  'agents': len(registry.loaded_agents()) if registry else None}}))
+'''
+
+SCENARIOS = [
+    ('api_server', '''
+    import api_server
+'''),
+    ('scheduler maintenance', '''
+    import auto_scheduler
+    for name in ('BackupAgent', 'SSLAgent', 'MonitoringAgent', 'PerformanceAgent'):
+        if hasattr(auto_scheduler, 'get_agent'):
+            auto_scheduler.get_agent(name)
+        else:
+            getattr(auto_scheduler, name)()
+'''),
+]
+
+
+def run(body, agents_dir):
+    code = PRELUDE.format(agents_dir=agents_dir) + body + EPILOGUE.format()
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=agents_dir)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else 'failed')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def export_revision(rev):
+    """agents/ d'une revision git dans un repertoire temporaire"""
+    tmp = tempfile.mkdtemp(prefix='bench-agents-')
+    archive = subprocess.run(['git', '-C', REPO_DIR, 'archive', rev, 'agents'], capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', tmp], input=archive.stdout, check=True)
+    return tmp
+
+
+def measure(label, agents_dir, runs):
+    for name, body in SCENARIOS:
+        try:
+            results = [run(body, agents_dir) for _ in range(runs)]
+        except RuntimeError as e:
+            print(f"  {label:<8} {name:<22} echec: {e}")
+            continue
+        best = min(results, key=lambda r: r['seconds'])
+        agents = '-' if best['agents'] is None else best['agents']
+        print(f"  {label:<8} {name:<22} {best['seconds'] * 1000:7.0f} ms   RSS {best['rss_mb']:6.1f} MB   "
+              f"agents instancies {agents}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = sys.argv[2] if len(sys.argv) > 2 else None
+    print(f"Demarrage a froid (meilleur de {runs})")
+    if baseline:
+        tmp = export_revision(baseline)
+        try:
+            measure(baseline[:8], os.path.join(tmp, 'agents'), runs)
+        finally:
+            shutil.rmtree(tmp)
+    measure('actuel', AGENTS_DIR, runs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark CalendarAgent availability on a busy calendar.
+Usage: python3 bench_calendar_availability.py [events] [days]
+
+Builds a temporary DB with thousands of events, then compares the previous
+per-day algorithm (re-parse every event for every slot) with the
+get_availability_range sweep. Results must be identical.
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents'))
+import agents_system
+
+
+def naive_day(cursor, date, slot_duration=60, buffer_time=15, start_time='09:00', end_time='17:00'):
+    """Ancien algorithme: O(creneaux x evenements) avec strptime a chaque comparaison"""
+    cursor.execute('''
+        SELECT start_datetime, end_datetime FROM calendar_events
+        WHERE DATE(start_datetime) = ? AND status != 'cancelled'
+    ''', (date,))
+    existing = cursor.fetchall()
+    slots = []
+    current = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+    end = datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
+    while current + timedelta(minutes=slot_duration) <= end:
+        slot_end = current + timedelta(minutes=slot_duration)
+        is_free = True
+        for ev_start, ev_end in existing:
+            es = datetime.strptime(ev_start.split('.')[0], '%Y-%m-%d %H:%M:%S')
+            ee = datetime.strptime(ev_end.split('.')[0], '%Y-%m-%d %H:%M:%S')
+            if not (slot_end <= es or current >= ee):
+                is_free = False
+                break
+        slots.append(is_free)
+        current = slot_end + timedelta(minutes=buffer_time)
+    return slots
+
+
+def main():
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+
+    tmp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    tmp.close()
+    agents_system.DB_PATH = tmp.name
+    agent = agents_system.CalendarAgent()
+    agent.init_db()
+
+    first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    random.seed(42)
+    rows = []
+    for _ in range(n_events):
+        start = first_day + timedelta(days=random.randrange(n_days), minutes=random.randrange(8 * 60, 18 * 60, 5))
+        end = start + timedelta(minutes=random.choice((15, 30, 45, 60)))
+        rows.append(('Bench', start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S')))
+    conn = sqlite3.connect(tmp.name)
+    conn.executemany('INSERT INTO calendar_events (title, start_datetime, end_datetime) VALUES (?, ?, ?)', rows)
+    conn.commit()
+
+    start_date = first_day.strftime('%Y-%m-%d')
+    print(f"{n_events} evenements sur {n_days} jours")
+
+    t = time.perf_counter()
+    cursor = conn.cursor()
+    naive = {}
+    for offset in range(n_days):
+        day = first_day + timedelta(days=offset)
+        if day.weekday() < 5:
+            naive[day.strftime('%Y-%m-%d')] = naive_day(cursor, day.strftime('%Y-%m-%d'))
+    naive_s = time.perf_counter() - t
+    conn.close()
+
+    t = time.perf_counter()
+    result = agent.get_availability_range(start_date, n_days)
+    sweep_s = time.perf_counter() - t
+
+    swept = {d['date']: [s['available'] for s in d['slots']] for d in result['days'] if d['available']}
+    mismatches = [d for d in naive if naive[d] != swept.get(d)]
+
+    print(f"  ancien (par jour):  {naive_s * 1000:8.1f} ms")
+    print(f"  balayage (plage):   {sweep_s * 1000:8.1f} ms  (x{naive_s / sweep_s:.1f})")
+    print(f"  creneaux libres:    {result['available_count']}")
+    print(f"  differences:        {len(mismatches)}")
+
+    os.unlink(tmp.name)
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
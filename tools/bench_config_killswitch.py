@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark the killswitch check: yaml.safe_load per request vs ConfigService snapshot.
+Usage: python3 bench_config_killswitch.py [iterations] [sites]
+
+Writes a temporary config.yaml with N sites, measures per-call latency of both
+approaches, then checks that an update() is picked up by a second service
+instance (another worker process would behave the same way).
+"""
+import os
+import sys
+import time
+import tempfile
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents'))
+from config_service import ConfigService
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_sites = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, 'config.yaml')
+    config = {
+        'general': {'pause_active': False, 'timezone': 'America/Montreal'},
+        'sites': [{'nom': f'site{i}', 'domaine': f'site{i}.example.com', 'actif': True,
+                   'keywords': [f'mot cle {j}' for j in range(30)]} for i in range(n_sites)],
+    }
+    with open(path, 'w') as f:
+        yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
+
+    t = time.perf_counter()
+    for _ in range(iterations):
+        with open(path) as f:
+            yaml.safe_load(f).get('general', {}).get('pause_active', False)
+    parse_s = time.perf_counter() - t
+
+    service = ConfigService(path)
+    service.snapshot()
+    t = time.perf_counter()
+    for _ in range(iterations):
+        service.snapshot().pause_active
+    snap_s = time.perf_counter() - t
+
+    print(f"{iterations} appels, config de {os.path.getsize(path)} octets ({n_sites} sites)")
+    print(f"  yaml.safe_load:     {parse_s / iterations * 1e6:10.1f} us/appel")
+    print(f"  snapshot():         {snap_s / iterations * 1e6:10.1f} us/appel  (x{parse_s / snap_s:.0f})")
+
+    other = ConfigService(path, check_interval=0)
+    service.update(lambda c: c['general'].__setitem__('pause_active', True))
+    seen = other.snapshot().pause_active
+    print(f"  update() visible:   {seen}")
+
+    for name in os.listdir(tmpdir):
+        os.unlink(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+    return 0 if seen else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Load test: Flask dev server vs gunicorn / uvicorn for one of the API apps.
+Usage: python3 bench_http_servers.py [app] [path] [requests] [concurrency]
+       python3 bench_http_servers.py api /api/check-killswitch 4000 32
+
+Each server is started through agents/serve.py on a free local port, warmed
+up, then hit by `concurrency` client threads (keep-alive sessions). Reports
+req/s, p50, p99 and errors for every mode.
+"""
+import os
+import sys
+import time
+import socket
+import signal
+import threading
+import subprocess
+import statistics
+import requests
+
+SERVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents', 'serve.py')
+
+MODES = [
+    ('dev (app.run)', ['--server', 'dev']),
+    ('gunicorn gthread', ['--server', 'gunicorn', '--worker-class', 'gthread']),
+    ('uvicorn', ['--server', 'uvicorn']),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def hammer(url, total, concurrency):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = total // concurrency
+
+    def worker():
+        session = requests.Session()
+        local = []
+        failed = 0
+        for _ in range(per_thread):
+            t = time.perf_counter()
+            try:
+                if not 200 <= session.get(url, timeout=10).status_code < 300:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            local.append(time.perf_counter() - t)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors[0],
+    }
+
+
+def main():
+    app = sys.argv[1] if len(sys.argv) > 1 else 'api'
+    path = sys.argv[2] if len(sys.argv) > 2 else '/api/check-killswitch'
+    total = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+    concurrency = int(sys.argv[4]) if len(sys.argv) > 4 else 32
+
+    print(f"{app}{path}: {total} requetes, {concurrency} clients")
+    for label, extra in MODES:
+        port = free_port()
+        proc = subprocess.Popen([sys.executable, SERVE, app, '--bind', f'127.0.0.1:{port}'] + extra,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        url = f'http://127.0.0.1:{port}{path}'
+        try:
+            if not wait_ready(url):
+                print(f"  {label:<18} n'a pas demarre (dependance manquante ?)")
+                continue
+            hammer(url, concurrency * 10, concurrency)  # warm-up
+            r = hammer(url, total, concurrency)
+            print(f"  {label:<18} {r['rps']:8.0f} req/s   p50 {r['p50']:6.1f} ms   "
+                  f"p99 {r['p99']:7.1f} ms   erreurs {r['errors']}")
+        finally:
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text search: LIKE '%x%' (current queries) vs FTS5 (search_index).
+Usage: python3 bench_search.py [contacts] [articles] [runs]
+       python3 bench_search.py 100000 10000 20
+
+Builds a temporary SQLite DB with synthetic CRM contacts and KB articles, creates
+the FTS5 indexes (build time + size), then measures for each query the median
+latency of the CRMAgent.list_contacts / KnowledgeBaseAgent.search_articles LIKE
+filters and of the FTS5 equivalents (filter on the list, BM25 ranking, /api/search).
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents'))
+import search_index
+
+FIRST = ['Jean', 'Marie', 'Luc', 'Sophie', 'Martin', 'Julie', 'Eric', 'Nathalie', 'Pierre', 'Isabelle',
+         'Francois', 'Chantal', 'Michel', 'Genevieve', 'Alain', 'Catherine', 'Daniel', 'Josee']
+LAST = ['Tremblay', 'Gagnon', 'Roy', 'Cote', 'Bouchard', 'Gauthier', 'Morin', 'Lavoie', 'Fortin',
+        'Gagne', 'Ouellet', 'Pelletier', 'Belanger', 'Levesque', 'Bergeron', 'Leblanc', 'Paquette']
+TRADES = ['Toitures', 'Paysagement', 'Plomberie', 'Renovations', 'Deneigement', 'Peinture',
+          'Electricite', 'Excavation', 'Isolation', 'Fenestration', 'Maconnerie', 'Asphalte']
+CITIES = ['Montreal', 'Laval', 'Longueuil', 'Quebec', 'Gatineau', 'Sherbrooke', 'Terrebonne', 'Levis']
+WORDS = ('toiture bardeau membrane elastomere infiltration ventilation entretien garantie soumission '
+         'isolation grenier deneigement gouttiere solin couvreur inspection urgence hiver printemps '
+         'pavé uni muret drainage terrassement haie gazon arrosage plomberie chauffe-eau drain '
+         'fuite refoulement renovation cuisine salle de bain peinture facade prix delai permis').split()
+
+QUERIES = [
+    ('contacts', 'tremblay'),
+    ('contacts', 'gagnon laval'),
+    ('contacts', 'toitures'),
+    ('contacts', 'jean.roy'),
+    ('kb', 'infiltration'),
+    ('kb', 'garantie membrane'),
+    ('kb', 'refoulement'),
+]
+
+
+def build(path, n_contacts, n_articles):
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE crm_contacts (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT DEFAULT 'lead',
+            status TEXT DEFAULT 'new', first_name TEXT, last_name TEXT, email TEXT, phone TEXT,
+            company TEXT, job_title TEXT, source TEXT, website TEXT, address TEXT, city TEXT,
+            province TEXT, postal_code TEXT, notes TEXT, tags TEXT, assigned_to TEXT,
+            score INTEGER DEFAULT 0, last_contact_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE kb_articles (id INTEGER PRIMARY KEY AUTOINCREMENT, slug TEXT UNIQUE, title TEXT NOT NULL,
+            content TEXT, excerpt TEXT, category_id INTEGER, author TEXT, status TEXT DEFAULT 'draft',
+            is_featured BOOLEAN DEFAULT 0, view_count INTEGER DEFAULT 0, helpful_yes INTEGER DEFAULT 0,
+            helpful_no INTEGER DEFAULT 0, tags TEXT, meta_title TEXT, meta_description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            published_at TIMESTAMP);
+    ''')
+    contacts = []
+    for i in range(n_contacts):
+        first, last = rnd.choice(FIRST), rnd.choice(LAST)
+        contacts.append((rnd.choice(['new', 'contacted', 'qualified', 'won', 'lost']), first, last,
+                         f'{first.lower()}.{last.lower()}{i}@example.com', f'514-555-{i % 10000:04d}',
+                         f'{rnd.choice(TRADES)} {last} inc.', rnd.choice(CITIES),
+                         ' '.join(rnd.choices(WORDS, k=12)), ','.join(rnd.choices(WORDS, k=3))))
+    conn.executemany('''INSERT INTO crm_contacts (status, first_name, last_name, email, phone, company, city, notes, tags)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', contacts)
+    # Vocabulaire de remplissage (syllabes) + quelques termes metier par article
+    syllables = ['ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ri', 'sa', 'te', 'vu', 'tion', 'ment']
+    filler = [''.join(rnd.choices(syllables, k=rnd.randint(2, 4))) for _ in range(5000)]
+    articles = []
+    for i in range(n_articles):
+        topic = rnd.choices(WORDS, k=6)
+        title = ' '.join(topic[:3] + rnd.choices(filler, k=3)).capitalize()
+        body = ' '.join(rnd.choices(filler, k=394) + topic)
+        articles.append((f'article-{i}', title, body, body[:160], 'published' if i % 5 else 'draft',
+                         rnd.randint(0, 5000), ','.join(rnd.choices(WORDS, k=3))))
+    conn.executemany('''INSERT INTO kb_articles (slug, title, content, excerpt, status, view_count, tags)
+        VALUES (?, ?, ?, ?, ?, ?, ?)''', articles)
+    conn.commit()
+    return conn
+
+
+def like_query(conn, entity, q):
+    term = f'%{q}%'
+    if entity == 'contacts':
+        return conn.execute('''SELECT id, type, status, first_name, last_name, email, phone, company, score,
+            last_contact_date, created_at FROM crm_contacts
+            WHERE (first_name LIKE ? OR last_name LIKE ? OR email LIKE ? OR company LIKE ?)
+            ORDER BY created_at DESC LIMIT 50''', (term, term, term, term)).fetchall()
+    return conn.execute('''SELECT id, slug, title, excerpt, view_count FROM kb_articles
+        WHERE status = 'published' AND (title LIKE ? OR content LIKE ? OR tags LIKE ?)
+        ORDER BY view_count DESC LIMIT 20''', (term, term, term)).fetchall()
+
+
+def fts_query(conn, entity, q):
+    if entity == 'contacts':
+        sql, params = search_index.fts_condition(conn, 'contacts', q)
+        return conn.execute(f'''SELECT id, type, status, first_name, last_name, email, phone, company, score,
+            last_contact_date, created_at FROM crm_contacts WHERE {sql}
+            ORDER BY created_at DESC LIMIT 50''', params).fetchall()
+    return search_index.ranked_ids(conn, 'kb', q, 20, where="t.status = 'published'")
+
+
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    n_contacts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_articles = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, 'search.db')
+    print(f"Generation: {n_contacts} contacts, {n_articles} articles KB...")
+    conn = build(path, n_contacts, n_articles)
+    size_before = os.path.getsize(path)
+
+    t = time.perf_counter()
+    search_index.ensure_indexes(conn)
+    print(f"Index FTS5: {time.perf_counter() - t:.1f} s, base {size_before / 1e6:.0f} MB -> "
+          f"{os.path.getsize(path) / 1e6:.0f} MB\n")
+
+    print(f"{'requete':<28} {'LIKE':>10} {'FTS5':>10} {'gain':>8}   resultats LIKE / FTS5")
+    for entity, q in QUERIES:
+        like_ms, like_rows = median_ms(lambda: like_query(conn, entity, q), runs)
+        fts_ms, fts_rows = median_ms(lambda: fts_query(conn, entity, q), runs)
+        print(f"{entity + ': ' + q:<28} {like_ms:8.2f}ms {fts_ms:8.2f}ms {like_ms / fts_ms:7.0f}x   "
+              f"{len(like_rows)} / {len(fts_rows)}")
+
+    api_ms, result = median_ms(lambda: search_index.search(conn, 'tremblay toitures', limit=20), runs)
+    print(f"\n/api/search 'tremblay toitures' (facettes + extraits, toutes entites): {api_ms:.2f} ms, "
+          f"{result['total']} resultats")
+
+    # Ecriture: cout des triggers de synchronisation
+    t = time.perf_counter()
+    for i in range(1000):
+        conn.execute("INSERT INTO crm_contacts (first_name, last_name, email) VALUES ('Bench', 'Insert', ?)",
+                     (f'bench{i}@example.com',))
+    conn.commit()
+    print(f"1000 INSERT contacts avec triggers FTS5: {(time.perf_counter() - t) * 1000:.0f} ms")
+    conn.close()
+    os.remove(path)
+    os.rmdir(tmpdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
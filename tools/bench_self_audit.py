@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark SelfAuditAgent.check_html_files: audit complet (avant) vs index incremental + pool.
+Usage: python3 bench_self_audit.py [fichiers] [workers]
+       python3 bench_self_audit.py 20000 4
+
+Genere un site synthetique (pages conformes aux auto-fix: aucune reecriture ni backup,
+~5% des pages avec problemes a confirmer) et une base temporaire, puis mesure:
+  - avant: os.walk + relecture + audit de chaque fichier, 1 connexion SQLite par probleme
+  - 1er passage incremental (serie, puis pool de processus): tout est audite et indexe
+  - regime permanent: rien n'a change / 1% des fichiers touches (mtime) / 1% modifies
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents'))
+import self_audit_agent
+from self_audit_agent import SelfAuditAgent, analyze_html
+
+SITE_ID = 'bench'
+
+PAGE = '''<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="description" content="Page {i} - deneigement et entretien">
+    <meta property="og:title" content="Page {i}">
+    <meta property="og:description" content="Page {i}">
+    {canonical}
+    <script type="application/ld+json">{{"@context": "https://schema.org", "@type": "WebPage"}}</script>
+    <script defer src="/js/app.js"></script>
+</head>
+<body>
+    <h1>Service {i}</h1>
+    <ul><li><a href="/services">Services</a></li><li><a href="/contact">Contact</a></li></ul>
+    {paragraphs}
+    <img loading="lazy" src="/img/{i}.webp" {alt}>
+</body>
+</html>
+'''
+
+
+def build_site(root, n_files):
+    filler = ' '.join(f'<p>Paragraphe {k}: deneigement residentiel, toiture, entretien.</p>' for k in range(40))
+    for i in range(n_files):
+        directory = os.path.join(root, f'section{i % 50}', f'sub{i % 7}')
+        os.makedirs(directory, exist_ok=True)
+        flawed = i % 20 == 0
+        with open(os.path.join(directory, f'page-{i}.html'), 'w') as f:
+            f.write(PAGE.format(i=i, paragraphs=filler,
+                                canonical='' if flawed else f'<link rel="canonical" href="/page-{i}.html">',
+                                alt='' if flawed else f'alt="Photo {i}"'))
+
+
+def build_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE mon_alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, site_id TEXT, alert_type TEXT,
+        severity TEXT, message TEXT, details TEXT, source_agent TEXT, resolved INTEGER DEFAULT 0,
+        resolved_at TEXT, corrected_by TEXT, corrected_at TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.commit()
+    conn.close()
+
+
+def legacy_run(agent, root):
+    """Comportement d'origine: tout relire et re-auditer, un enregistrement par connexion"""
+    checked = 0
+    for dirpath, dirs, files in os.walk(root):
+        for fname in files:
+            if not fname.endswith(('.html', '.htm', '.php')):
+                continue
+            with open(os.path.join(dirpath, fname), 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            checked += 1
+            specs, _ = analyze_html(SITE_ID, os.path.join(dirpath, fname), content)
+            for s in specs:
+                agent._record_issue(SITE_ID, s['check_type'], s['severity'], s['message'], s['fix_level'],
+                                    details=s['file_path'], fix_command=s['fix_detail'])
+    return checked
+
+
+def timed(label, fn):
+    t = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t
+    if isinstance(result, dict):
+        detail = f"{result['checked']} fichiers, {result['audited']} audites, {result['unchanged']} inchanges"
+    else:
+        detail = f'{result} fichiers'
+    print(f"{label:<44} {elapsed:8.2f} s   {detail}")
+    return elapsed
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    tmpdir = tempfile.mkdtemp()
+    root = os.path.join(tmpdir, 'site')
+    self_audit_agent.SITES[SITE_ID] = {'domain': 'bench.example.com', 'url': 'https://bench.example.com',
+                                       'path': root}
+    print(f"Generation: {n_files} fichiers HTML ({workers} workers, {os.cpu_count()} coeurs)...")
+    build_site(root, n_files)
+
+    def fresh_agent(name):
+        db = os.path.join(tmpdir, f'{name}.db')
+        build_db(db)
+        return SelfAuditAgent(db_path=db)
+
+    print()
+    legacy = fresh_agent('legacy')
+    timed('avant: audit complet', lambda: legacy_run(legacy, root))
+    timed('avant: audit complet (2e cycle, identique)', lambda: legacy_run(legacy, root))
+
+    serial = fresh_agent('serial')
+    timed('incremental 1er passage, serie', lambda: serial.check_html_files(SITE_ID, workers=1))
+
+    agent = fresh_agent('pool')
+    timed(f'incremental 1er passage, pool x{workers}', lambda: agent.check_html_files(SITE_ID, workers=workers))
+    timed('regime permanent: rien de change', lambda: agent.check_html_files(SITE_ID, workers=workers))
+
+    paths = sorted(os.path.join(d, f) for d, _, files in os.walk(root) for f in files)
+    sample = paths[::100]
+    now = time.time()
+    for p in sample:
+        os.utime(p, (now + 10, now + 10))
+    timed(f'regime permanent: {len(sample)} touches (mtime)', lambda: agent.check_html_files(SITE_ID, workers=workers))
+    for p in sample:
+        with open(p, 'a') as f:
+            f.write('<!-- maj -->\n')
+    timed(f'regime permanent: {len(sample)} modifies', lambda: agent.check_html_files(SITE_ID, workers=workers))
+
+    shutil.rmtree(tmpdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())